@@ -0,0 +1,317 @@
+"""
+스트리밍 admission control 모듈
+- 워커 프로세스당 / 사용자당 동시 스트림 수 제한
+- 자리가 없으면 짧은 대기열에서 대기 (크기, 대기 시간 제한)
+- 대기열이 가득 차거나 대기 시간이 지나면 거절 (503 + Retry-After)
+- 재생 중인 세션(같은 사용자/게시물의 최근 스트림)의 Range 요청은 대기열 우선
+- 현재 스트림 수, 대기 수, 거절 횟수 카운터
+
+스트림 하나는 응답 본문을 전송하는 동안 파일 디스크립터 하나를 사용하므로
+동시 스트림 수 제한이 곧 스트리밍용 파일 디스크립터 수 제한입니다.
+"""
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+
+from app.config import (
+    STREAM_MAX_CONCURRENT,
+    STREAM_MAX_PER_USER,
+    STREAM_QUEUE_SIZE,
+    STREAM_QUEUE_TIMEOUT,
+    STREAM_RETRY_AFTER,
+    STREAM_SESSION_TTL,
+)
+
+# 세션 기록 최대 개수 (오래된 것부터 삭제)
+MAX_SESSIONS = 10000
+
+_WAITING = "waiting"
+_GRANTED = "granted"
+_EVICTED = "evicted"
+
+
+class AdmissionRejected(Exception):
+    """동시 스트림 수 제한으로 요청을 받을 수 없는 경우"""
+
+    def __init__(self, reason: str, retry_after: int) -> None:
+        super().__init__(reason)
+        self.retry_after = retry_after
+
+
+class StreamSlot:
+    """
+    스트림 한 개의 자리
+
+    응답 본문 전송이 끝나면 release()로 반환합니다 (여러 번 호출해도 한 번만 반환).
+    """
+
+    def __init__(self, controller: "AdmissionController", user_id: int, session: tuple[int, int]) -> None:
+        self.controller = controller
+        self.user_id = user_id
+        self.session = session
+        self._released = False
+
+    def release(self) -> None:
+        if not self._released:
+            self._released = True
+            self.controller._release(self)
+
+
+class _Waiter:
+    """대기열 항목 (상태는 controller lock 안에서만 변경)"""
+
+    __slots__ = ("loop", "future", "slot", "priority", "state")
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, slot: StreamSlot, priority: bool) -> None:
+        self.loop = loop
+        self.future = loop.create_future()
+        self.slot = slot
+        self.priority = priority
+        self.state = _WAITING
+
+    def wake(self) -> None:
+        # 다른 이벤트 루프(스레드)에서 깨울 수도 있으므로 call_soon_threadsafe 사용
+        self.loop.call_soon_threadsafe(self._set)
+
+    def _set(self) -> None:
+        if not self.future.done():
+            self.future.set_result(None)
+
+
+class AdmissionController:
+    """
+    동시 스트림 수 제한
+
+    - max_streams: 워커 프로세스 전체 최대 동시 스트림 수 (0이면 제한 없음)
+    - max_user_streams: 사용자별 최대 동시 스트림 수 (0이면 제한 없음)
+    - queue_size: 자리를 기다릴 수 있는 최대 요청 수
+    - queue_timeout: 대기열 최대 대기 시간 (초)
+    - 재생 중인 세션의 요청은 새 세션보다 먼저 자리를 받고,
+      대기열이 가득 차면 가장 최근에 들어온 새 세션 요청을 밀어냄
+    - 이벤트 루프와 관리자 API(스레드 풀)에서 함께 접근하므로 lock으로 보호
+    """
+
+    def __init__(
+        self,
+        max_streams: int,
+        max_user_streams: int,
+        queue_size: int = 32,
+        queue_timeout: float = 5.0,
+        retry_after: int = 5,
+        session_ttl: float = 30.0,
+    ) -> None:
+        self.max_streams = max_streams
+        self.max_user_streams = max_user_streams
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self.session_ttl = session_ttl
+        self._lock = threading.Lock()
+        self._active = 0
+        self._user_active: dict[int, int] = {}
+        self._waiters: list[_Waiter] = []
+        # (user_id, post_id) -> 마지막 스트림 시각
+        self._sessions: OrderedDict[tuple[int, int], float] = OrderedDict()
+        self.admitted = 0
+        self.queued = 0
+        self.rejected = 0
+        self.timed_out = 0
+
+    def configure(
+        self,
+        max_streams: int,
+        max_user_streams: int,
+        queue_size: int | None = None,
+        queue_timeout: float | None = None,
+    ) -> None:
+        """제한 변경 (자리가 늘어나면 대기 중인 요청을 바로 깨움)"""
+        with self._lock:
+            self.max_streams = max_streams
+            self.max_user_streams = max_user_streams
+            if queue_size is not None:
+                self.queue_size = queue_size
+            if queue_timeout is not None:
+                self.queue_timeout = queue_timeout
+            self._wake_waiters()
+
+    async def acquire(self, user_id: int, post_id: int) -> StreamSlot:
+        """
+        스트림 자리 확보
+
+        - 자리가 있으면 바로 반환
+        - 없으면 대기열에서 최대 queue_timeout초 대기
+
+        Args:
+            user_id: 스트리밍하는 사용자 ID
+            post_id: 게시물 ID (재생 세션 구분)
+
+        Returns:
+            StreamSlot (본문 전송이 끝나면 release 호출)
+
+        Raises:
+            AdmissionRejected: 대기열이 가득 찼거나 대기 시간이 지난 경우
+        """
+        slot = StreamSlot(self, user_id, (user_id, post_id))
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            now = time.monotonic()
+            priority = self._session_active(slot.session, now)
+            # 자리가 나면 먼저 받을 대기 요청이 있으면 끼어들지 않음
+            # (우선 세션은 새 세션 대기만 무시, 사용자 제한에 걸려 기다리는 요청은 앞선 것으로 보지 않음)
+            ahead = any(
+                (w.priority or not priority) and self._has_room(w.slot.user_id) for w in self._waiters
+            )
+            if not ahead and self._has_room(user_id):
+                self._grant(slot, now)
+                return slot
+
+            waiter = _Waiter(loop, slot, priority)
+            if not self._enqueue(waiter):
+                self.rejected += 1
+                raise AdmissionRejected("Too many concurrent streams", self.retry_after)
+            self.queued += 1
+
+        try:
+            await asyncio.wait_for(waiter.future, self.queue_timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            with self._lock:
+                state = waiter.state
+                if state == _WAITING:
+                    self._waiters.remove(waiter)
+                    if isinstance(e, asyncio.TimeoutError):
+                        self.timed_out += 1
+            if isinstance(e, asyncio.CancelledError):
+                # 클라이언트가 끊긴 경우: 깨어나는 순간 받은 자리는 반환
+                if state == _GRANTED:
+                    slot.release()
+                raise
+            if state != _GRANTED:
+                raise AdmissionRejected("Timed out waiting for a stream slot", self.retry_after)
+            # 깨어나는 순간 시간이 다 된 경우: 자리는 이미 확보됨
+
+        if waiter.state == _EVICTED:
+            raise AdmissionRejected("Too many concurrent streams", self.retry_after)
+        return slot
+
+    def _release(self, slot: StreamSlot) -> None:
+        with self._lock:
+            self._active = max(0, self._active - 1)
+            count = self._user_active.get(slot.user_id, 0) - 1
+            if count > 0:
+                self._user_active[slot.user_id] = count
+            else:
+                self._user_active.pop(slot.user_id, None)
+            self._touch_session(slot.session, time.monotonic())
+            self._wake_waiters()
+
+    # ---------- lock 안에서 호출 ----------
+
+    def _has_room(self, user_id: int) -> bool:
+        if self.max_streams > 0 and self._active >= self.max_streams:
+            return False
+        if self.max_user_streams > 0 and self._user_active.get(user_id, 0) >= self.max_user_streams:
+            return False
+        return True
+
+    def _grant(self, slot: StreamSlot, now: float) -> None:
+        self._active += 1
+        self._user_active[slot.user_id] = self._user_active.get(slot.user_id, 0) + 1
+        self.admitted += 1
+        self._touch_session(slot.session, now)
+
+    def _enqueue(self, waiter: _Waiter) -> bool:
+        """
+        대기열에 추가 (가득 차면 우선 요청은 가장 최근의 새 세션 요청을 밀어냄)
+
+        Returns:
+            추가 여부
+        """
+        if len(self._waiters) < self.queue_size:
+            self._waiters.append(waiter)
+            return True
+        if not waiter.priority:
+            return False
+        for index in range(len(self._waiters) - 1, -1, -1):
+            evicted = self._waiters[index]
+            if not evicted.priority:
+                del self._waiters[index]
+                evicted.state = _EVICTED
+                evicted.wake()
+                self.rejected += 1
+                self._waiters.append(waiter)
+                return True
+        return False
+
+    def _wake_waiters(self) -> None:
+        """자리가 난 만큼 대기 요청 깨우기 (우선 세션 먼저, 같은 등급은 도착 순서)"""
+        now = time.monotonic()
+        for waiter in sorted(self._waiters, key=lambda w: not w.priority):
+            if self.max_streams > 0 and self._active >= self.max_streams:
+                break
+            if not self._has_room(waiter.slot.user_id):
+                # 사용자 제한에 걸린 요청은 건너뛰고 다른 사용자에게 자리를 줌
+                continue
+            self._waiters.remove(waiter)
+            waiter.state = _GRANTED
+            self._grant(waiter.slot, now)
+            waiter.wake()
+
+    def _session_active(self, session: tuple[int, int], now: float) -> bool:
+        seen = self._sessions.get(session)
+        return seen is not None and now - seen < self.session_ttl
+
+    def _touch_session(self, session: tuple[int, int], now: float) -> None:
+        self._sessions[session] = now
+        self._sessions.move_to_end(session)
+        while self._sessions:
+            seen = next(iter(self._sessions.values()))
+            if now - seen < self.session_ttl and len(self._sessions) <= MAX_SESSIONS:
+                break
+            self._sessions.popitem(last=False)
+
+    def stats(self) -> dict:
+        """현재 스트림/대기 상태 (모니터링용)"""
+        with self._lock:
+            return {
+                "max_streams": self.max_streams,
+                "max_user_streams": self.max_user_streams,
+                "queue_size": self.queue_size,
+                "active_streams": self._active,
+                "active_users": len(self._user_active),
+                "queued": len(self._waiters),
+                "queued_priority": sum(1 for w in self._waiters if w.priority),
+                "active_sessions": len(self._sessions),
+                "admitted_total": self.admitted,
+                "queued_total": self.queued,
+                "rejected_total": self.rejected,
+                "timed_out_total": self.timed_out,
+                "users": [
+                    {"user_id": user_id, "streams": count}
+                    for user_id, count in sorted(self._user_active.items())
+                ],
+            }
+
+    def reset(self) -> None:
+        """스트림 수, 세션, 카운터 초기화"""
+        with self._lock:
+            self._active = 0
+            self._user_active.clear()
+            self._waiters.clear()
+            self._sessions.clear()
+            self.admitted = 0
+            self.queued = 0
+            self.rejected = 0
+            self.timed_out = 0
+
+
+# 프로세스 전역 admission controller
+stream_admission = AdmissionController(
+    STREAM_MAX_CONCURRENT,
+    STREAM_MAX_PER_USER,
+    queue_size=STREAM_QUEUE_SIZE,
+    queue_timeout=STREAM_QUEUE_TIMEOUT,
+    retry_after=STREAM_RETRY_AFTER,
+    session_ttl=STREAM_SESSION_TTL,
+)
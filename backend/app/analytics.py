@@ -0,0 +1,121 @@
+"""
+스트리밍 통계 집계 모듈
+- 스트림 응답이 끝날 때 게시물/사용자별 조회수, 전송량을 메모리에 누적
+- 같은 사용자/게시물의 연속된 Range 요청은 조회 한 번으로 집계 (ANALYTICS_VIEW_WINDOW)
+- 주기 또는 대기 항목 수에 도달하면 (일, 게시물, 사용자) 롤업 테이블에 한 트랜잭션으로 upsert
+- 종료 시 남은 통계를 기록 (lifespan)
+
+롤업은 기존 값에 더하는 upsert이므로 워커 프로세스가 여러 개여도 합계가 맞습니다.
+"""
+
+import time
+from collections import OrderedDict
+from datetime import date, datetime, timezone
+
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import func
+
+from app.config import ANALYTICS_FLUSH_INTERVAL, ANALYTICS_FLUSH_THRESHOLD, ANALYTICS_VIEW_WINDOW
+from app.database import SessionLocal
+from app.models import StreamStat
+from app.write_behind import WriteBehindBuffer
+
+# 조회 판단용 세션 기록 최대 개수 (오래된 것부터 삭제)
+MAX_SESSIONS = 10000
+
+
+class AnalyticsCollector(WriteBehindBuffer):
+    """
+    스트리밍 통계 write-behind 집계기
+
+    - record(): 스트리밍 경로에서 호출 (메모리 갱신만, DB 접근 없음)
+    - 대기 항목: (일, 게시물, 사용자) → [조회수, 전송량]
+    """
+
+    name = "analytics"
+
+    def __init__(
+        self,
+        flush_interval: float,
+        flush_threshold: int,
+        view_window: float,
+        session_factory=SessionLocal
+    ) -> None:
+        super().__init__(flush_interval, flush_threshold, session_factory)
+        self.view_window = view_window
+        # (사용자, 게시물) → 마지막 스트림 시각 (monotonic)
+        self._sessions: OrderedDict[tuple[int, int], float] = OrderedDict()
+
+    def record(self, post_id: int, user_id: int, bytes_served: int, day: date | None = None) -> None:
+        """
+        스트림 응답 한 건 집계
+
+        Args:
+            post_id: 게시물 ID
+            user_id: 사용자 ID
+            bytes_served: 실제로 전송한 본문 크기 (전송이 중단된 경우 보낸 만큼)
+            day: 집계 일자 (기본: 오늘, UTC)
+        """
+        if bytes_served <= 0:
+            return
+        if day is None:
+            day = datetime.now(timezone.utc).date()
+        now = time.monotonic()
+        session = (user_id, post_id)
+
+        with self._lock:
+            last_seen = self._sessions.get(session)
+            is_view = last_seen is None or now - last_seen > self.view_window
+            self._sessions[session] = now
+            self._sessions.move_to_end(session)
+            while len(self._sessions) > MAX_SESSIONS:
+                self._sessions.popitem(last=False)
+
+            entry = self._pending.setdefault((day, post_id, user_id), [0, 0])
+            entry[0] += int(is_view)
+            entry[1] += bytes_served
+            self._recorded()
+
+    def _merge(self, batch: dict[tuple[date, int, int], list[int]]) -> None:
+        for key, (views, nbytes) in batch.items():
+            entry = self._pending.setdefault(key, [0, 0])
+            entry[0] += views
+            entry[1] += nbytes
+
+    def _write(self, session: Session, batch: dict[tuple[date, int, int], list[int]]) -> None:
+        """(일, 게시물, 사용자) 행에 조회수/전송량을 더하는 upsert"""
+        rows = [
+            {"day": day, "post_id": post_id, "user_id": user_id, "views": views, "bytes_served": nbytes}
+            for (day, post_id, user_id), (views, nbytes) in batch.items()
+        ]
+        statement = insert(StreamStat)
+        statement = statement.on_conflict_do_update(
+            index_elements=["day", "post_id", "user_id"],
+            set_={
+                "views": StreamStat.views + statement.excluded.views,
+                "bytes_served": StreamStat.bytes_served + statement.excluded.bytes_served,
+                "updated_at": func.now(),
+            }
+        )
+        session.execute(statement, rows)
+
+    def stats(self) -> dict:
+        """대기 중인 통계와 flush 카운터"""
+        stats = super().stats()
+        with self._lock:
+            stats["pending_views"] = sum(views for views, _ in self._pending.values())
+            stats["pending_bytes"] = sum(nbytes for _, nbytes in self._pending.values())
+        return stats
+
+    def reset(self) -> None:
+        """대기 중인 통계, 세션 기록, 카운터 초기화 (테스트용)"""
+        super().reset()
+        with self._lock:
+            self._sessions.clear()
+
+
+# 프로세스 전역 통계 집계기
+analytics_collector = AnalyticsCollector(
+    ANALYTICS_FLUSH_INTERVAL, ANALYTICS_FLUSH_THRESHOLD, ANALYTICS_VIEW_WINDOW
+)
@@ -0,0 +1,320 @@
+"""
+스트리밍 대역폭 제어 모듈
+- 사용자별 / 전체(워커 프로세스) 토큰 버킷
+- 가중치 기반 공정 분배 (max-min fairness, 작성자/관리자 가중치)
+- 사용자 단위 분배: 한 사용자가 연결을 여러 개 열어도 몫은 하나
+- 현재 할당량, 전송량, 대기 시간 카운터
+
+전체 속도가 제한된 경우 활성 사용자의 최근 전송 속도로 수요를 추정해
+몫을 다 쓰지 않는 사용자의 남는 대역폭을 다른 사용자에게 재분배합니다.
+"""
+
+import asyncio
+import math
+import threading
+import time
+
+from app.config import (
+    STREAM_BURST_SECONDS,
+    STREAM_GLOBAL_RATE,
+    STREAM_PRIORITY_WEIGHT,
+    STREAM_USER_RATE,
+)
+
+# 할당량 재계산 주기 (초)
+ALLOCATION_INTERVAL = 0.5
+# 제한받지 않은 사용자의 수요 추정 여유분 (최근 속도 대비)
+DEMAND_HEADROOM = 1.25
+# 사용자별 최소 할당량 (bytes/s) - 잠시 멈췄던 사용자도 다시 시작할 수 있도록
+MIN_ALLOCATION = 64 * 1024
+
+
+class TokenBucket:
+    """
+    바이트 단위 토큰 버킷
+
+    토큰이 부족하면 음수(빚)로 예약하고 빚을 갚는 데 필요한 대기 시간을 반환합니다.
+    대기열 없이 시간 계산만 하므로 호출 순서대로 공정하게 처리됩니다.
+    rate가 0 이하이면 제한 없음.
+    """
+
+    def __init__(self, rate: float, burst_seconds: float) -> None:
+        self.burst_seconds = burst_seconds
+        self.rate = 0.0
+        self.tokens = 0.0
+        self.updated = time.monotonic()
+        self.set_rate(rate)
+
+    @property
+    def limited(self) -> bool:
+        return 0 < self.rate < math.inf
+
+    def set_rate(self, rate: float, now: float | None = None) -> None:
+        """속도 변경 (쌓인 토큰은 새 버스트 크기로 제한)"""
+        self._refill(time.monotonic() if now is None else now)
+        was_limited = self.limited
+        self.rate = rate
+        if self.limited:
+            capacity = self.rate * self.burst_seconds
+            # 제한이 새로 걸리면 버스트만큼 채운 상태로 시작
+            self.tokens = min(self.tokens, capacity) if was_limited else capacity
+
+    def _refill(self, now: float) -> None:
+        if self.limited:
+            capacity = self.rate * self.burst_seconds
+            self.tokens = min(capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, nbytes: int, now: float) -> float:
+        """
+        nbytes만큼 예약
+
+        Returns:
+            전송 전에 기다려야 하는 시간 (초)
+        """
+        if not self.limited:
+            return 0.0
+        self._refill(now)
+        self.tokens -= nbytes
+        return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+
+class UserShare:
+    """사용자 한 명의 대역폭 몫 (같은 사용자의 모든 연결이 공유)"""
+
+    def __init__(self, user_id: int, burst_seconds: float, now: float) -> None:
+        self.user_id = user_id
+        self.bucket = TokenBucket(0, burst_seconds)
+        self.weights: list[float] = []  # 연결별 가중치
+        self.allocated = 0.0  # bytes/s, 0이면 제한 없음
+        self.current_rate = 0.0
+        self.bytes_sent = 0
+        self.window_bytes = 0
+        self.window_start = now
+        self.throttled = False
+        # 새 사용자는 수요를 알 수 없으므로 무한대로 간주
+        self.demand = math.inf
+
+    @property
+    def weight(self) -> float:
+        return max(self.weights, default=1.0)
+
+
+class StreamThrottle:
+    """
+    응답 하나의 대역폭 제어 핸들
+
+    응답 본문 전송을 시작할 때 open(), 끝나면 close()를 호출하고
+    청크를 보내기 전에 consume()으로 대기합니다.
+    """
+
+    def __init__(self, scheduler: "BandwidthScheduler", user_id: int, weight: float = 1.0) -> None:
+        self.scheduler = scheduler
+        self.user_id = user_id
+        self.weight = weight
+        self._share: UserShare | None = None
+
+    def open(self) -> None:
+        if self._share is None:
+            self._share = self.scheduler._attach(self.user_id, self.weight)
+
+    def close(self) -> None:
+        if self._share is not None:
+            self.scheduler._detach(self._share, self.weight)
+            self._share = None
+
+    async def consume(self, nbytes: int) -> None:
+        """nbytes를 보내기 전에 할당량에 맞춰 대기"""
+        if self._share is None:
+            return
+        delay = self.scheduler._reserve(self._share, nbytes)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class BandwidthScheduler:
+    """
+    워커 프로세스 전체의 스트리밍 대역폭 스케줄러
+
+    - global_rate: 프로세스 전체 최대 전송 속도 (bytes/s, 0이면 제한 없음)
+    - user_rate: 사용자별 최대 전송 속도 (bytes/s, 0이면 제한 없음)
+    - 전체 속도가 제한되면 가중치에 따라 활성 사용자에게 나눠 할당
+    - 이벤트 루프와 관리자 API(스레드 풀)에서 함께 접근하므로 lock으로 보호
+    """
+
+    def __init__(
+        self,
+        global_rate: float,
+        user_rate: float,
+        burst_seconds: float = 1.0,
+        priority_weight: float = 4.0,
+    ) -> None:
+        self.user_rate = user_rate
+        self.burst_seconds = burst_seconds
+        self.priority_weight = priority_weight
+        self._global = TokenBucket(global_rate, burst_seconds)
+        self._shares: dict[int, UserShare] = {}
+        self._lock = threading.Lock()
+        self._allocated_at = 0.0
+        self.bytes_sent = 0
+        self.throttled_waits = 0
+        self.throttled_seconds = 0.0
+
+    @property
+    def global_rate(self) -> float:
+        return self._global.rate
+
+    @property
+    def enabled(self) -> bool:
+        return self.global_rate > 0 or self.user_rate > 0
+
+    def configure(self, global_rate: float, user_rate: float) -> None:
+        """속도 설정 변경 (다음 재계산부터 적용)"""
+        with self._lock:
+            self._global.set_rate(global_rate)
+            self.user_rate = user_rate
+            self._allocated_at = 0.0
+
+    def throttle(self, user_id: int, priority: bool = False) -> StreamThrottle | None:
+        """
+        응답용 대역폭 제어 핸들 생성
+
+        Args:
+            user_id: 스트리밍하는 사용자 ID
+            priority: 게시물 작성자 또는 관리자 여부 (가중치 적용)
+
+        Returns:
+            제한이 설정되지 않았으면 None
+        """
+        if not self.enabled:
+            return None
+        return StreamThrottle(self, user_id, self.priority_weight if priority else 1.0)
+
+    def _attach(self, user_id: int, weight: float) -> UserShare:
+        now = time.monotonic()
+        with self._lock:
+            share = self._shares.get(user_id)
+            if share is None:
+                share = UserShare(user_id, self.burst_seconds, now)
+                self._shares[user_id] = share
+            share.weights.append(weight)
+            self._allocate(now)
+            return share
+
+    def _detach(self, share: UserShare, weight: float) -> None:
+        now = time.monotonic()
+        with self._lock:
+            share.weights.remove(weight)
+            if not share.weights:
+                self._shares.pop(share.user_id, None)
+            self._allocate(now)
+
+    def _reserve(self, share: UserShare, nbytes: int) -> float:
+        now = time.monotonic()
+        with self._lock:
+            if now - self._allocated_at >= ALLOCATION_INTERVAL:
+                self._measure(now)
+                self._allocate(now)
+            delay = max(share.bucket.reserve(nbytes, now), self._global.reserve(nbytes, now))
+            share.bytes_sent += nbytes
+            share.window_bytes += nbytes
+            self.bytes_sent += nbytes
+            if delay > 0:
+                share.throttled = True
+                self.throttled_waits += 1
+                self.throttled_seconds += delay
+            return delay
+
+    def _measure(self, now: float) -> None:
+        """
+        직전 구간의 사용자별 전송 속도로 수요 추정 (lock 안에서 호출)
+
+        구간 중에 대기한 적이 있는 사용자는 할당량에 막힌 것이므로 수요를 무한대로 봅니다.
+        """
+        for share in self._shares.values():
+            elapsed = now - share.window_start
+            if elapsed > 0:
+                share.current_rate = share.window_bytes / elapsed
+            share.demand = math.inf if share.throttled else share.current_rate * DEMAND_HEADROOM
+            share.window_bytes = 0
+            share.window_start = now
+            share.throttled = False
+
+    def _allocate(self, now: float) -> None:
+        """
+        활성 사용자별 할당량 재계산 (lock 안에서 호출)
+
+        가중치 max-min 공정 분배:
+        수요가 공정 몫보다 작은 사용자는 수요만큼만 주고, 남는 몫을 나머지에게 다시 나눕니다.
+        """
+        user_cap = self.user_rate if self.user_rate > 0 else math.inf
+        demands = {user_id: min(share.demand, user_cap) for user_id, share in self._shares.items()}
+
+        capacity = self.global_rate if self._global.limited else math.inf
+        allocation = {}
+        remaining = dict(self._shares)
+        while remaining:
+            if capacity == math.inf:
+                # 전체 제한 없음: 사용자 제한만 적용
+                allocation.update({user_id: user_cap for user_id in remaining})
+                break
+            total_weight = sum(share.weight for share in remaining.values())
+            fair = {user_id: capacity * share.weight / total_weight for user_id, share in remaining.items()}
+            satisfied = [user_id for user_id in remaining if demands[user_id] <= fair[user_id]]
+            if not satisfied:
+                allocation.update(fair)
+                break
+            for user_id in satisfied:
+                allocation[user_id] = demands[user_id]
+                capacity -= demands[user_id]
+                del remaining[user_id]
+
+        for user_id, share in self._shares.items():
+            rate = allocation[user_id]
+            rate = 0.0 if rate == math.inf else max(rate, MIN_ALLOCATION)
+            share.allocated = rate
+            share.bucket.set_rate(rate, now)
+        self._allocated_at = now
+
+    def stats(self) -> dict:
+        """현재 할당 상태 (모니터링용)"""
+        with self._lock:
+            users = [
+                {
+                    "user_id": share.user_id,
+                    "connections": len(share.weights),
+                    "weight": share.weight,
+                    "allocated_rate": round(share.allocated),
+                    "current_rate": round(share.current_rate),
+                    "bytes_sent": share.bytes_sent,
+                }
+                for share in self._shares.values()
+            ]
+            return {
+                "global_rate": self.global_rate,
+                "user_rate": self.user_rate,
+                "active_users": len(self._shares),
+                "active_connections": sum(len(share.weights) for share in self._shares.values()),
+                "bytes_sent": self.bytes_sent,
+                "throttled_waits": self.throttled_waits,
+                "throttled_seconds": round(self.throttled_seconds, 3),
+                "users": sorted(users, key=lambda user: user["user_id"]),
+            }
+
+    def reset(self) -> None:
+        """활성 사용자 및 카운터 초기화"""
+        with self._lock:
+            self._shares.clear()
+            self._allocated_at = 0.0
+            self.bytes_sent = 0
+            self.throttled_waits = 0
+            self.throttled_seconds = 0.0
+
+
+# 프로세스 전역 스케줄러
+bandwidth_scheduler = BandwidthScheduler(
+    STREAM_GLOBAL_RATE,
+    STREAM_USER_RATE,
+    burst_seconds=STREAM_BURST_SECONDS,
+    priority_weight=STREAM_PRIORITY_WEIGHT,
+)
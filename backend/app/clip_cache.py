@@ -0,0 +1,146 @@
+"""
+클립 디스크 캐시 모듈
+- 추출한 클립 파일의 크기 합계를 예산(CLIP_CACHE_MAX_BYTES) 안으로 유지
+- 프로세스 전역, 파일 경로 기준 LRU (사용한 클립은 atime 갱신)
+- 재시작 후 첫 사용 시 기존 클립을 atime 순으로 다시 등록
+- 적중/미스/삭제 카운터
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Iterable
+
+from app.config import CLIP_CACHE_MAX_BYTES
+
+
+class ClipCache:
+    """
+    클립 파일 LRU (파일 내용은 디스크에, 크기와 사용 순서만 메모리에)
+
+    - 새 클립을 등록해 합계가 max_bytes를 넘으면 가장 오래 사용하지 않은 클립 파일부터 삭제
+    - 전송 중인 클립이 삭제되어도 열린 파일은 끝까지 읽을 수 있음 (POSIX)
+    - 클립 추출 스레드와 파일 I/O 스레드에서 호출되므로 lock으로 보호
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[str, int] = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.loaded = False
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def load(self, paths: Iterable[str]) -> None:
+        """기존 클립 파일 등록 (오래 사용하지 않은 순서로 정렬, 예산을 넘는 만큼 삭제)"""
+        found = []
+        for path in paths:
+            try:
+                file_stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            found.append((file_stat.st_atime_ns, path, file_stat.st_size))
+        with self._lock:
+            for _, path, size in sorted(found):
+                if path not in self._entries:
+                    self._entries[path] = size
+                    self._size += size
+            self.loaded = True
+            evicted = self._evict_locked(keep=None)
+        self._remove_files(evicted)
+
+    def touch(self, path: str) -> bool:
+        """
+        클립 사용 (있으면 LRU 순서와 atime 갱신)
+
+        mtime은 ETag에 쓰이므로 그대로 둡니다.
+
+        Returns:
+            클립 파일이 있으면 True
+        """
+        try:
+            file_stat = os.stat(path)
+            os.utime(path, ns=(time.time_ns(), file_stat.st_mtime_ns))
+            size = file_stat.st_size
+        except FileNotFoundError:
+            with self._lock:
+                self._size -= self._entries.pop(path, 0)
+                self.misses += 1
+            return False
+        with self._lock:
+            # 다른 프로세스가 만든 클립도 등록
+            self._size += size - self._entries.get(path, 0)
+            self._entries[path] = size
+            self._entries.move_to_end(path)
+            self.hits += 1
+        return True
+
+    def add(self, path: str, size: int) -> list[str]:
+        """
+        새 클립 등록 후 예산을 넘는 만큼 오래된 클립 삭제 (방금 등록한 클립은 유지)
+
+        Returns:
+            삭제한 클립 경로 목록
+        """
+        with self._lock:
+            self._size += size - self._entries.get(path, 0)
+            self._entries[path] = size
+            self._entries.move_to_end(path)
+            evicted = self._evict_locked(keep=path)
+        self._remove_files(evicted)
+        return evicted
+
+    def _evict_locked(self, keep: str | None) -> list[str]:
+        evicted = []
+        while self._size > self.max_bytes and self._entries:
+            path, size = next(iter(self._entries.items()))
+            if path == keep:
+                break
+            del self._entries[path]
+            self._size -= size
+            evicted.append(path)
+        self.evictions += len(evicted)
+        return evicted
+
+    @staticmethod
+    def _remove_files(paths: list[str]) -> None:
+        for path in paths:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def discard_dir(self, directory: str) -> None:
+        """디렉토리 아래 클립 등록 해제 (파생 파일 디렉토리 삭제 시, 파일은 삭제하지 않음)"""
+        prefix = os.path.join(directory, "")
+        with self._lock:
+            for path in [path for path in self._entries if path.startswith(prefix)]:
+                self._size -= self._entries.pop(path)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "size": self._size,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def clear(self) -> None:
+        """등록 정보와 카운터 초기화 (파일은 삭제하지 않음)"""
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+            self.loaded = False
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+
+# 프로세스 전역 클립 캐시
+clip_cache = ClipCache(CLIP_CACHE_MAX_BYTES)
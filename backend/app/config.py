@@ -3,6 +3,26 @@
 - 업로드 디렉토리 설정
 - 파일 크기 제한
 - 허용 확장자
+- 스트리밍 업로드 (폼 필드 크기 제한, 쓰기 단위) 설정
+- 이어받기 업로드 (청크 크기, 세션 만료, 정리 주기) 설정
+- 스트리밍 offload 설정
+- 파일 I/O 스레드 풀 설정
+- 스트리밍 캐시 정책
+- 페이지 캐시 힌트 (posix_fadvise) 설정
+- 핫 세그먼트 캐시 설정
+- 스트리밍 메타데이터 캐시 설정
+- 스트림 티켓 설정
+- 키프레임 인덱스 캐시 설정
+- 스트리밍 대역폭 제어 (토큰 버킷, 공정 분배) 설정
+- 동시 스트림 수 제한 (admission control) 설정
+- 스트리밍 통계 (조회수, 전송량) 집계 설정
+- 시청 위치 (이어보기) 기록 설정
+- 미디어 후처리 (ffmpeg, HLS) 설정
+- 썸네일(포스터 이미지) 생성 설정
+- 탐색 미리보기 스프라이트 시트 설정
+- 구간 클립 추출 / 디스크 캐시 설정
+- 적응형 화질(rendition) 트랜스코딩 설정
+- 업로드 후처리 작업 큐 (워커 수, 재시도, 작업 임대 시간) 설정
 """
 
 import os
@@ -13,5 +33,153 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 
 # 업로드 설정
 UPLOAD_DIR = str(BASE_DIR / "uploads" / "videos")
+# 파생 파일 (HLS, 썸네일 등) - 비디오별 하위 디렉토리
+DERIVATIVES_DIR = str(BASE_DIR / "uploads" / "derivatives")
 MAX_FILE_SIZE = 500 * 1024 * 1024  # 500MB
 ALLOWED_EXTENSIONS = {".mp4", ".webm", ".mov"}
+
+# 스트리밍 업로드 (요청 본문을 받는 대로 업로드 디렉토리의 임시 파일에 기록)
+# - 비디오 외 폼 데이터(제목, 설명, 파트 헤더 등) 최대 크기
+# - Content-Length가 MAX_FILE_SIZE + 이 크기를 넘으면 본문을 받기 전에 거부
+UPLOAD_FORM_MAX_BYTES = int(os.getenv("UPLOAD_FORM_MAX_BYTES", str(1024 * 1024)))  # 1MB
+# 파일에 한 번에 쓰는 크기 (이만큼 모이면 파일 I/O 스레드에서 기록)
+UPLOAD_WRITE_BYTES = int(os.getenv("UPLOAD_WRITE_BYTES", str(1024 * 1024)))  # 1MB
+
+# 이어받기 업로드 (세션 생성 → 청크 PUT (병렬/순서 무관) → 완료)
+# - 청크 크기 기본값과 클라이언트가 지정할 수 있는 범위
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(8 * 1024 * 1024)))  # 8MB
+UPLOAD_MIN_CHUNK_SIZE = int(os.getenv("UPLOAD_MIN_CHUNK_SIZE", str(256 * 1024)))  # 256KB
+UPLOAD_MAX_CHUNK_SIZE = int(os.getenv("UPLOAD_MAX_CHUNK_SIZE", str(64 * 1024 * 1024)))  # 64MB
+# 마지막 청크 이후 세션을 유지하는 시간 (초), 지나면 정리 스레드가 세션과 받은 데이터 삭제
+UPLOAD_SESSION_TTL = int(os.getenv("UPLOAD_SESSION_TTL", str(24 * 3600)))
+# 만료 세션 / 남은 임시 파일 정리 주기 (초)
+UPLOAD_SWEEP_INTERVAL = float(os.getenv("UPLOAD_SWEEP_INTERVAL", "600"))
+# 사용자당 동시에 열 수 있는 업로드 세션 수
+UPLOAD_MAX_SESSIONS_PER_USER = int(os.getenv("UPLOAD_MAX_SESSIONS_PER_USER", "10"))
+
+# 스트리밍 offload 설정 (리버스 프록시가 파일을 직접 전송)
+# - "": 앱이 직접 전송 (기본값)
+# - "x-accel": nginx X-Accel-Redirect
+# - "x-sendfile": Apache/lighttpd X-Sendfile
+STREAM_OFFLOAD_MODE = os.getenv("STREAM_OFFLOAD_MODE", "").lower()
+# nginx internal location 경로 (UPLOAD_DIR을 alias로 매핑)
+STREAM_OFFLOAD_PREFIX = os.getenv("STREAM_OFFLOAD_PREFIX", "/protected/videos/")
+
+# 스트리밍 파일 읽기 전용 스레드 풀 크기
+FILE_IO_THREADS = int(os.getenv("FILE_IO_THREADS", "8"))
+
+# 페이지 캐시 힌트 (posix_fadvise, 지원하지 않는 OS에서는 무시)
+# - SEQUENTIAL/WILLNEED: 다음 구간을 커널이 미리 읽도록 요청
+# - DONTNEED: 이 크기 이상인 구간을 전송할 때 이미 보낸 페이지를 캐시에서 제거 (0이면 사용 안 함)
+STREAM_FADVISE = os.getenv("STREAM_FADVISE", "true").lower() in ("true", "1", "yes")
+STREAM_DONTNEED_MIN_BYTES = int(os.getenv("STREAM_DONTNEED_MIN_BYTES", str(64 * 1024 * 1024)))  # 64MB
+
+# 스트리밍 캐시 정책 (Cache-Control)
+# - 공개 게시물: 공유 캐시(엣지)에 저장하되 매번 ETag로 재검증
+# - 비공개 게시물: 브라우저에만 짧게 저장
+STREAM_CACHE_CONTROL_PUBLIC = os.getenv("STREAM_CACHE_CONTROL_PUBLIC", "public, no-cache")
+STREAM_CACHE_CONTROL_PRIVATE = os.getenv("STREAM_CACHE_CONTROL_PRIVATE", "private, max-age=300")
+
+# 핫 세그먼트 캐시 (비디오 앞/끝 구간을 메모리에 보관)
+STREAM_SEGMENT_CACHE_BYTES = int(os.getenv("STREAM_SEGMENT_CACHE_BYTES", str(64 * 1024 * 1024)))  # 64MB
+STREAM_SEGMENT_BYTES = int(os.getenv("STREAM_SEGMENT_BYTES", str(512 * 1024)))  # 512KB
+
+# 스트리밍 메타데이터 캐시 (경로, 크기, 수정 시각 등 - stat 호출 절감)
+STREAM_METADATA_CACHE_SIZE = int(os.getenv("STREAM_METADATA_CACHE_SIZE", "1024"))
+STREAM_METADATA_TTL = float(os.getenv("STREAM_METADATA_TTL", "30"))  # 초
+
+# 스트림 티켓 유효 시간 (초)
+STREAM_TICKET_TTL = int(os.getenv("STREAM_TICKET_TTL", "300"))
+# 다른 워커가 DB에 기록한 티켓 폐기를 읽어 오는 최소 간격 (초) - 폐기가 다른 워커에 반영되기까지의 최대 지연
+STREAM_TICKET_REVOCATION_SYNC = float(os.getenv("STREAM_TICKET_REVOCATION_SYNC", "1"))
+
+# 키프레임 인덱스 메모리 캐시 항목 수 (?t= 시간 기반 탐색)
+KEYFRAME_INDEX_CACHE_SIZE = int(os.getenv("KEYFRAME_INDEX_CACHE_SIZE", "256"))
+
+# 스트리밍 대역폭 제어 (bytes/s, 0이면 제한 없음)
+# - 전체 속도는 워커 프로세스 하나의 모든 연결 합계
+# - 사용자별 속도는 한 사용자의 모든 연결 합계
+STREAM_GLOBAL_RATE = int(os.getenv("STREAM_GLOBAL_RATE", "0"))
+STREAM_USER_RATE = int(os.getenv("STREAM_USER_RATE", "0"))
+# 토큰 버킷 버스트 크기 (초 단위, 속도 x 초)
+STREAM_BURST_SECONDS = float(os.getenv("STREAM_BURST_SECONDS", "1.0"))
+# 게시물 작성자/관리자의 공정 분배 가중치 (일반 사용자 1)
+STREAM_PRIORITY_WEIGHT = float(os.getenv("STREAM_PRIORITY_WEIGHT", "4.0"))
+
+# 동시 스트림 수 제한 (본문을 전송 중인 응답 수, 응답마다 파일 디스크립터 1개 사용)
+# - 워커 프로세스당 / 사용자당 최대 동시 스트림 수 (0이면 제한 없음)
+STREAM_MAX_CONCURRENT = int(os.getenv("STREAM_MAX_CONCURRENT", "256"))
+STREAM_MAX_PER_USER = int(os.getenv("STREAM_MAX_PER_USER", "8"))
+# 자리가 없을 때 기다릴 수 있는 요청 수와 최대 대기 시간 (초), 넘으면 503
+STREAM_QUEUE_SIZE = int(os.getenv("STREAM_QUEUE_SIZE", "32"))
+STREAM_QUEUE_TIMEOUT = float(os.getenv("STREAM_QUEUE_TIMEOUT", "5.0"))
+# 503 응답의 Retry-After (초)
+STREAM_RETRY_AFTER = int(os.getenv("STREAM_RETRY_AFTER", "5"))
+# 재생 중인 세션으로 보는 시간 (초) - 같은 사용자/게시물의 최근 스트림이 있으면 대기열 우선
+STREAM_SESSION_TTL = float(os.getenv("STREAM_SESSION_TTL", "30"))
+
+# 스트리밍 통계 (게시물/사용자/일별 조회수, 전송량)
+# - 메모리에 모았다가 주기(초) 또는 대기 항목 수에 도달하면 한 트랜잭션으로 기록
+ANALYTICS_ENABLED = os.getenv("ANALYTICS_ENABLED", "true").lower() in ("true", "1", "yes")
+ANALYTICS_FLUSH_INTERVAL = float(os.getenv("ANALYTICS_FLUSH_INTERVAL", "10"))
+ANALYTICS_FLUSH_THRESHOLD = int(os.getenv("ANALYTICS_FLUSH_THRESHOLD", "1000"))
+# 같은 사용자/게시물의 스트림을 한 번의 조회로 보는 시간 (초) - Range 요청마다 조회수가 늘지 않도록
+ANALYTICS_VIEW_WINDOW = float(os.getenv("ANALYTICS_VIEW_WINDOW", "1800"))
+
+# 시청 위치 (이어보기) - 사용자/게시물별 최신 위치만 메모리에 남겨 주기/대기 항목 수마다 일괄 기록
+PROGRESS_FLUSH_INTERVAL = float(os.getenv("PROGRESS_FLUSH_INTERVAL", "5"))
+PROGRESS_FLUSH_THRESHOLD = int(os.getenv("PROGRESS_FLUSH_THRESHOLD", "500"))
+
+# 미디어 후처리 (로컬에 설치된 ffmpeg 사용, 없으면 생략)
+FFMPEG_BIN = os.getenv("FFMPEG_BIN", "ffmpeg")
+# 업로드 후 HLS 패키징 여부 및 세그먼트 길이 (초)
+HLS_ENABLED = os.getenv("HLS_ENABLED", "false").lower() in ("true", "1", "yes")
+HLS_SEGMENT_SECONDS = int(os.getenv("HLS_SEGMENT_SECONDS", "6"))
+FFPROBE_BIN = os.getenv("FFPROBE_BIN", "ffprobe")
+
+# 썸네일(포스터 이미지) - 업로드 후 가로 크기별 JPEG 생성
+THUMBNAILS_ENABLED = os.getenv("THUMBNAILS_ENABLED", "true").lower() in ("true", "1", "yes")
+THUMBNAIL_WIDTHS = os.getenv("THUMBNAIL_WIDTHS", "160,320,640")
+# ?size=를 지정하지 않았을 때 응답할 가로 크기 (목록 카드 크기)
+THUMBNAIL_DEFAULT_WIDTH = int(os.getenv("THUMBNAIL_DEFAULT_WIDTH", "320"))
+# 포스터로 사용할 프레임 위치 (초, 더 짧은 영상은 첫 프레임)
+THUMBNAIL_SEEK_SECONDS = float(os.getenv("THUMBNAIL_SEEK_SECONDS", "1.0"))
+
+# 탐색 미리보기 스프라이트 시트 (타임라인 hover 미리보기, 이미지 한 장 + WebVTT)
+SPRITES_ENABLED = os.getenv("SPRITES_ENABLED", "true").lower() in ("true", "1", "yes")
+SPRITE_TILE_WIDTH = int(os.getenv("SPRITE_TILE_WIDTH", "160"))
+SPRITE_COLUMNS = int(os.getenv("SPRITE_COLUMNS", "10"))
+# 타일 수 상한 (긴 영상은 간격을 늘림)과 최소 간격 (초)
+SPRITE_MAX_TILES = int(os.getenv("SPRITE_MAX_TILES", "100"))
+SPRITE_MIN_INTERVAL = float(os.getenv("SPRITE_MIN_INTERVAL", "2.0"))
+
+# 구간 클립 (재인코딩 없이 키프레임 기준으로 잘라낸 MP4)
+# - 최대 클립 길이 (초), 동시에 실행할 ffmpeg 수
+CLIP_MAX_SECONDS = float(os.getenv("CLIP_MAX_SECONDS", "300"))
+CLIP_WORKERS = int(os.getenv("CLIP_WORKERS", "2"))
+# 클립 디스크 캐시 크기 (bytes, 넘으면 가장 오래 사용하지 않은 클립부터 삭제)
+CLIP_CACHE_MAX_BYTES = int(os.getenv("CLIP_CACHE_MAX_BYTES", str(2 * 1024 * 1024 * 1024)))  # 2GB
+
+# 적응형 화질(rendition) 트랜스코딩
+# - 형식: "이름:가로x세로:비트레이트" 를 쉼표로 구분 (비트레이트 단위 k/M)
+# - 원본 해상도보다 큰 단계는 만들지 않음
+RENDITIONS_ENABLED = os.getenv("RENDITIONS_ENABLED", "false").lower() in ("true", "1", "yes")
+RENDITION_LADDER = os.getenv(
+    "RENDITION_LADDER",
+    "1080p:1920x1080:5000k,720p:1280x720:2800k,480p:854x480:1400k,360p:640x360:800k"
+)
+# 동시에 실행할 ffmpeg 프로세스 수 (전체 게시물 합계)
+TRANSCODE_WORKERS = int(os.getenv("TRANSCODE_WORKERS", "2"))
+# 대역폭 힌트 대비 선택할 최대 비트레이트 비율 (여유분 확보)
+RENDITION_BANDWIDTH_HEADROOM = float(os.getenv("RENDITION_BANDWIDTH_HEADROOM", "0.8"))
+
+# 업로드 후처리 작업 큐 (processing_jobs 테이블, 재시작해도 남은 작업을 이어서 처리)
+# - 프로세스마다 실행하는 작업 스레드 수 (0이면 작업을 실행하지 않음, 다른 프로세스가 처리)
+PROCESSING_WORKERS = int(os.getenv("PROCESSING_WORKERS", "2"))
+# 작업당 최대 시도 횟수, 첫 재시도 대기 시간 (초, 재시도마다 두 배)
+PROCESSING_MAX_ATTEMPTS = int(os.getenv("PROCESSING_MAX_ATTEMPTS", "3"))
+PROCESSING_RETRY_DELAY = float(os.getenv("PROCESSING_RETRY_DELAY", "30"))
+# 새 작업 확인 주기 (초, 같은 프로세스에서 등록한 작업은 바로 시작)
+PROCESSING_POLL_INTERVAL = float(os.getenv("PROCESSING_POLL_INTERVAL", "5"))
+# 실행 중인 작업의 임대 시간 (초) - 실행하는 동안 1/3마다 연장, 연장이 끊기면 (프로세스 종료 등) 다른 워커가 다시 실행
+PROCESSING_LEASE_SECONDS = int(os.getenv("PROCESSING_LEASE_SECONDS", "1800"))
@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
@@ -18,3 +18,31 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def add_missing_columns(bind) -> list[str]:
+    """
+    기존 테이블에 모델의 새 컬럼과 인덱스 추가 (create_all은 이미 있는 테이블을 바꾸지 않음)
+
+    - 이미 있으면 건너뛰므로 시작할 때마다 실행해도 됨
+    - 새 컬럼은 NULL 허용이어야 함 (기존 행은 NULL)
+
+    Returns:
+        추가한 컬럼 ("테이블.컬럼")
+    """
+    inspector = inspect(bind)
+    added = []
+    with bind.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                column_type = column.type.compile(dialect=bind.dialect)
+                conn.execute(text(f'ALTER TABLE "{table.name}" ADD COLUMN "{column.name}" {column_type}'))
+                added.append(f"{table.name}.{column.name}")
+            for index in table.indexes:
+                index.create(conn, checkfirst=True)
+    return added
@@ -0,0 +1,175 @@
+"""
+키프레임 인덱스 모듈
+- 비디오 트랙의 키프레임 (시각, byte offset) 배열을 파생 파일로 저장
+- 시각 → 키프레임 이진 탐색 (?t= 시간 기반 탐색을 요청 한 번으로 처리)
+- 원본 파일 크기/수정 시각이 바뀌면 다시 생성
+- 메모리 LRU 캐시 (Range 요청마다 인덱스 파일을 다시 읽지 않음)
+
+인덱스 파일 형식 (little-endian):
+    헤더: magic(4) timescale(u32) count(u32) 원본 크기(u64) 원본 mtime_ns(u64)
+    본문: 시각 배열(u64 x count) + offset 배열(u64 x count)
+"""
+
+import os
+import struct
+import sys
+import tempfile
+import threading
+from array import array
+from bisect import bisect_right
+from collections import OrderedDict
+
+from app.config import KEYFRAME_INDEX_CACHE_SIZE
+from app.mp4_utils import KeyframeTable, Mp4Error, read_keyframes
+
+INDEX_MAGIC = b"KFI1"
+_HEADER = struct.Struct("<4sIIQQ")
+
+
+class KeyframeIndex:
+    """키프레임 시각/offset 배열 (시각 순 정렬, 이진 탐색)"""
+
+    def __init__(self, timescale: int, times: array, offsets: array) -> None:
+        self.timescale = timescale
+        self.times = times
+        self.offsets = offsets
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    @classmethod
+    def from_table(cls, table: KeyframeTable) -> "KeyframeIndex":
+        return cls(table.timescale, array("Q", table.times), array("Q", table.offsets))
+
+    def lookup(self, seconds: float) -> tuple[float, int]:
+        """
+        seconds 이전의 가장 가까운 키프레임
+
+        Returns:
+            (키프레임 시각(초), byte offset) - seconds가 첫 키프레임보다 앞이면 첫 키프레임
+        """
+        index = max(bisect_right(self.times, seconds * self.timescale) - 1, 0)
+        return self.times[index] / self.timescale, self.offsets[index]
+
+    def to_bytes(self, source_size: int, source_mtime_ns: int) -> bytes:
+        times, offsets = array("Q", self.times), array("Q", self.offsets)
+        # 파일 형식은 little-endian
+        if sys.byteorder == "big":
+            times.byteswap()
+            offsets.byteswap()
+        header = _HEADER.pack(INDEX_MAGIC, self.timescale, len(times), source_size, source_mtime_ns)
+        return header + times.tobytes() + offsets.tobytes()
+
+    @classmethod
+    def from_bytes(cls, data: bytes, source_size: int, source_mtime_ns: int) -> "KeyframeIndex | None":
+        """
+        인덱스 파일 내용 해석
+
+        Returns:
+            형식이 잘못됐거나 원본 파일이 바뀐 경우 None
+        """
+        if len(data) < _HEADER.size:
+            return None
+        magic, timescale, count, size, mtime_ns = _HEADER.unpack_from(data)
+        if magic != INDEX_MAGIC or (size, mtime_ns) != (source_size, source_mtime_ns):
+            return None
+        if len(data) != _HEADER.size + count * 16 or count == 0:
+            return None
+        times, offsets = array("Q"), array("Q")
+        times.frombytes(data[_HEADER.size:_HEADER.size + count * 8])
+        offsets.frombytes(data[_HEADER.size + count * 8:])
+        if sys.byteorder == "big":
+            times.byteswap()
+            offsets.byteswap()
+        return cls(timescale, times, offsets)
+
+
+def build_keyframe_index(source_path: str, index_path: str) -> KeyframeIndex:
+    """
+    원본 파일의 moov를 읽어 인덱스 파일 생성 (임시 파일에 쓴 뒤 rename)
+
+    Raises:
+        Mp4Error: 키프레임 테이블을 읽을 수 없는 경우
+    """
+    file_stat = os.stat(source_path)
+    index = KeyframeIndex.from_table(read_keyframes(source_path))
+    if not len(index):
+        raise Mp4Error("No keyframes")
+
+    index_dir = os.path.dirname(index_path)
+    os.makedirs(index_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=".keyframes-", dir=index_dir)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(index.to_bytes(file_stat.st_size, file_stat.st_mtime_ns))
+        os.replace(tmp_path, index_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return index
+
+
+def load_keyframe_index(source_path: str, index_path: str, size: int, mtime_ns: int) -> KeyframeIndex:
+    """
+    인덱스 파일 읽기 (없거나 원본보다 오래됐으면 생성)
+
+    Raises:
+        Mp4Error: 키프레임 테이블을 읽을 수 없는 경우
+    """
+    try:
+        with open(index_path, "rb") as f:
+            index = KeyframeIndex.from_bytes(f.read(), size, mtime_ns)
+    except FileNotFoundError:
+        index = None
+    if index is None:
+        index = build_keyframe_index(source_path, index_path)
+    return index
+
+
+class KeyframeIndexCache:
+    """
+    인덱스 파일 경로 기준 LRU 캐시
+
+    - 원본 (크기, mtime_ns)가 다르면 미스로 처리
+    - 키프레임 테이블이 없는 파일(WebM 등)도 None으로 기억해 매번 파싱하지 않음
+    - 파일 I/O 스레드 풀에서 호출되므로 lock으로 보호
+    """
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[tuple[int, int], KeyframeIndex | None]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, source_path: str, index_path: str, size: int, mtime_ns: int) -> KeyframeIndex | None:
+        """
+        키프레임 인덱스 조회 (캐시 → 인덱스 파일 → moov 파싱 순)
+
+        Returns:
+            인덱스를 만들 수 없는 파일이면 None
+        """
+        with self._lock:
+            entry = self._entries.get(index_path)
+            if entry is not None and entry[0] == (size, mtime_ns):
+                self._entries.move_to_end(index_path)
+                return entry[1]
+
+        try:
+            index = load_keyframe_index(source_path, index_path, size, mtime_ns)
+        except Mp4Error:
+            index = None
+
+        with self._lock:
+            self._entries[index_path] = ((size, mtime_ns), index)
+            self._entries.move_to_end(index_path)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return index
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+# 프로세스 전역 키프레임 인덱스 캐시
+keyframe_index_cache = KeyframeIndexCache(KEYFRAME_INDEX_CACHE_SIZE)
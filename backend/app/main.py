@@ -1,13 +1,45 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.database import engine, Base
-from app.routers import examples, auth, posts, stream, permissions, admin
+from app.analytics import analytics_collector
+from app.config import ANALYTICS_ENABLED
+from app.database import engine, Base, add_missing_columns
+from app.processing import processing_queue
+from app.progress import progress_buffer
+from app.routers import examples, auth, posts, stream, permissions, admin, uploads
+from app.upload_sessions import upload_sweeper
 
-# 데이터베이스 테이블 생성
+# 데이터베이스 테이블 생성 (기존 테이블에는 새 컬럼과 인덱스 추가)
 Base.metadata.create_all(bind=engine)
+add_missing_columns(engine)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    애플리케이션 시작/종료 처리
+
+    - 스트리밍 통계 / 시청 위치 flush 스레드 시작
+    - 만료된 업로드 세션 정리 스레드 시작
+    - 업로드 후처리 작업 스레드 시작 (이전에 남은 작업도 이어서 처리)
+    - 종료 시 (진행 중인 응답이 끝난 뒤) 남은 통계와 시청 위치 기록, 실행 중인 후처리 작업 완료 대기
+    """
+    if ANALYTICS_ENABLED:
+        analytics_collector.start()
+    progress_buffer.start()
+    upload_sweeper.start()
+    processing_queue.start()
+    yield
+    await asyncio.to_thread(processing_queue.stop)
+    await asyncio.to_thread(upload_sweeper.stop)
+    await asyncio.to_thread(analytics_collector.stop)
+    await asyncio.to_thread(progress_buffer.stop)
+
 
-app = FastAPI(title="Module 5 API", version="1.0.0")
+app = FastAPI(title="Module 5 API", version="1.0.0", lifespan=lifespan)
 
 # CORS 설정
 app.add_middleware(
@@ -25,6 +57,7 @@ app.include_router(posts.router)
 app.include_router(stream.router)
 app.include_router(permissions.router)
 app.include_router(admin.router)
+app.include_router(uploads.router)
 
 
 @app.get("/api/health")
@@ -0,0 +1,902 @@
+"""
+미디어 처리 유틸리티 모듈
+- 파생 파일(derivatives) 디렉토리 관리
+- ffmpeg 실행 (로컬 설치 필요, 없으면 처리 생략)
+- 미디어 정보 조회 (MP4/MOV는 직접 파싱, 그 외는 ffprobe)
+- faststart 재작성 (moov-at-end MP4/MOV)
+- 키프레임 인덱스 생성 (시간 기반 탐색)
+- HLS 패키징 (세그먼트 + .m3u8 플레이리스트)
+- 썸네일(포스터 이미지) 생성 (가로 크기별 JPEG)
+- 탐색 미리보기 스프라이트 시트 + WebVTT 인덱스 생성
+- 구간 클립 추출 (재인코딩 없음, 디스크 LRU 캐시)
+- 적응형 화질(rendition) 트랜스코딩 (동시 ffmpeg 프로세스 수 제한)
+"""
+
+import json
+import logging
+import math
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import NamedTuple
+
+from app.config import (
+    CLIP_WORKERS,
+    DERIVATIVES_DIR,
+    FFMPEG_BIN,
+    FFPROBE_BIN,
+    HLS_SEGMENT_SECONDS,
+    RENDITION_LADDER,
+    SPRITE_COLUMNS,
+    SPRITE_MAX_TILES,
+    SPRITE_MIN_INTERVAL,
+    SPRITE_TILE_WIDTH,
+    THUMBNAIL_SEEK_SECONDS,
+    THUMBNAIL_WIDTHS,
+    TRANSCODE_WORKERS,
+    UPLOAD_DIR,
+)
+from app.clip_cache import clip_cache
+from app.keyframe_index import build_keyframe_index
+from app.metadata_cache import metadata_cache
+from app.models import Post, PostRendition
+from app.mp4_utils import FASTSTART_EXTENSIONS, MediaInfo, Mp4Error, faststart, read_media_info
+from app.segment_cache import segment_cache
+
+logger = logging.getLogger(__name__)
+
+# HLS 파일 이름
+HLS_DIRNAME = "hls"
+HLS_PLAYLIST = "index.m3u8"
+HLS_SEGMENT_PATTERN = "seg_%05d.ts"
+
+
+class MediaProcessingError(Exception):
+    """ffmpeg 실행 실패"""
+
+
+def ffmpeg_available() -> bool:
+    """ffmpeg 실행 파일이 설치되어 있는지 확인"""
+    return shutil.which(FFMPEG_BIN) is not None
+
+
+def run_ffmpeg(args: list[str], timeout: int = 3600) -> None:
+    """
+    ffmpeg 실행
+
+    Args:
+        args: ffmpeg 인자 (실행 파일 제외)
+        timeout: 최대 실행 시간 (초)
+
+    Raises:
+        MediaProcessingError: ffmpeg가 없거나 실패한 경우
+    """
+    if not ffmpeg_available():
+        raise MediaProcessingError("ffmpeg is not installed")
+    command = [FFMPEG_BIN, "-hide_banner", "-loglevel", "error", "-y", *args]
+    try:
+        subprocess.run(command, check=True, capture_output=True, timeout=timeout)
+    except subprocess.CalledProcessError as e:
+        raise MediaProcessingError(e.stderr.decode("utf-8", "replace").strip()) from e
+    except subprocess.TimeoutExpired as e:
+        raise MediaProcessingError("ffmpeg timed out") from e
+
+
+class VideoProbe(NamedTuple):
+    """ffprobe로 조회한 첫 번째 비디오 스트림과 컨테이너 정보"""
+    width: int
+    height: int
+    duration: float | None  # 초 (컨테이너에 없으면 None)
+    video_codec: str | None = None
+    audio_codec: str | None = None  # 첫 번째 오디오 스트림 (없으면 None)
+    bitrate: int | None = None  # 컨테이너 전체 비트레이트 (bps)
+
+
+def probe_video(video_path: str) -> VideoProbe | None:
+    """ffprobe로 첫 번째 비디오 스트림의 해상도, 코덱과 길이, 비트레이트 조회 (비디오 스트림이 없거나 실패 시 None)"""
+    if shutil.which(FFPROBE_BIN) is None:
+        return None
+    try:
+        result = subprocess.run(
+            [
+                FFPROBE_BIN, "-v", "error",
+                "-show_entries", "stream=codec_type,codec_name,width,height:format=duration,bit_rate",
+                "-of", "json",
+                video_path,
+            ],
+            check=True, capture_output=True, timeout=60
+        )
+        info = json.loads(result.stdout)
+        streams = info.get("streams", [])
+        video = next(stream for stream in streams if stream.get("codec_type") == "video")
+        audio = next((stream for stream in streams if stream.get("codec_type") == "audio"), {})
+        container = info.get("format", {})
+        duration = container.get("duration")
+        bitrate = container.get("bit_rate")
+        return VideoProbe(
+            int(video["width"]),
+            int(video["height"]),
+            float(duration) if duration else None,
+            video.get("codec_name"),
+            audio.get("codec_name"),
+            int(bitrate) if bitrate else None,
+        )
+    except (subprocess.SubprocessError, ValueError, KeyError, StopIteration):
+        return None
+
+
+# ==================== 미디어 정보 ====================
+
+# 미디어 정보를 기록하는 Post 컬럼
+MEDIA_INFO_COLUMNS = ("duration", "width", "height", "video_codec", "audio_codec", "bitrate", "is_faststart")
+
+
+def probe_media(video_path: str, use_ffprobe: bool = True) -> MediaInfo | None:
+    """
+    비디오 파일의 미디어 정보 조회
+
+    - MP4/MOV: moov 박스만 직접 읽어 파싱 (ffprobe 불필요, 업로드 요청 안에서도 실행)
+    - 그 외 형식이나 파싱할 수 없는 파일: ffprobe (use_ffprobe=False면 생략)
+
+    Returns:
+        MediaInfo, 알 수 없으면 None
+    """
+    if os.path.splitext(video_path)[1].lower() in FASTSTART_EXTENSIONS:
+        try:
+            return read_media_info(video_path)
+        except Mp4Error as e:
+            logger.info("MP4 probe failed for %s: %s", os.path.basename(video_path), e)
+        except OSError:
+            return None
+    probe = probe_video(video_path) if use_ffprobe else None
+    if probe is None:
+        return None
+    return MediaInfo(
+        duration=probe.duration or None,
+        width=probe.width,
+        height=probe.height,
+        video_codec=probe.video_codec,
+        audio_codec=probe.audio_codec,
+        bitrate=probe.bitrate,
+        faststart=None,
+    )
+
+
+def media_info_values(info: MediaInfo | None) -> dict:
+    """Post 미디어 정보 컬럼 값 (info가 None이면 모두 None)"""
+    if info is None:
+        return dict.fromkeys(MEDIA_INFO_COLUMNS)
+    return {
+        "duration": info.duration,
+        "width": info.width,
+        "height": info.height,
+        "video_codec": info.video_codec,
+        "audio_codec": info.audio_codec,
+        "bitrate": info.bitrate,
+        "is_faststart": info.faststart,
+    }
+
+
+def get_video_path(video_filename: str) -> str:
+    """업로드된 비디오 파일 경로"""
+    return os.path.join(UPLOAD_DIR, video_filename)
+
+
+def get_derivatives_dir(video_filename: str) -> str:
+    """비디오별 파생 파일 디렉토리 (HLS, 썸네일 등)"""
+    stem = os.path.splitext(os.path.basename(video_filename))[0]
+    return os.path.join(DERIVATIVES_DIR, stem)
+
+
+def remove_derivatives(video_filename: str) -> None:
+    """비디오의 파생 파일 전체 삭제 (클립 캐시 등록도 해제)"""
+    shutil.rmtree(get_derivatives_dir(video_filename), ignore_errors=True)
+    clip_cache.discard_dir(get_clips_dir(video_filename))
+
+
+def publish_directory(staging_dir: str, target_dir: str) -> None:
+    """
+    임시 디렉토리를 대상 경로로 교체 (rename 기반)
+
+    완성된 결과만 노출되도록 같은 파일 시스템의 임시 디렉토리에서
+    작업한 뒤 이름을 바꿉니다.
+    """
+    if os.path.isdir(target_dir):
+        old_dir = f"{target_dir}.old"
+        shutil.rmtree(old_dir, ignore_errors=True)
+        os.rename(target_dir, old_dir)
+        os.rename(staging_dir, target_dir)
+        shutil.rmtree(old_dir, ignore_errors=True)
+    else:
+        os.rename(staging_dir, target_dir)
+
+
+# ==================== Faststart ====================
+
+def faststart_for_post(video_filename: str) -> bool:
+    """
+    업로드 후처리: moov-at-end MP4/MOV를 moov가 앞에 오도록 재작성 (작업 큐)
+
+    플레이어가 첫 프레임 전에 파일 끝을 따로 요청하지 않아도 되게 합니다.
+    임시 파일에 쓴 뒤 교체하므로 재생 중인 요청은 이전 파일을 끝까지 읽습니다.
+    해석할 수 없는 파일은 원본 그대로 둡니다.
+
+    Returns:
+        재작성했으면 True
+
+    Raises:
+        OSError: 파일을 읽거나 쓰지 못한 경우 (작업 큐가 재시도)
+    """
+    if os.path.splitext(video_filename)[1].lower() not in FASTSTART_EXTENSIONS:
+        return False
+    video_path = get_video_path(video_filename)
+    try:
+        rewritten = faststart(video_path)
+    except Mp4Error as e:
+        logger.warning("Faststart skipped for %s: %s", video_filename, e)
+        return False
+    if rewritten:
+        logger.info("Moved moov atom to the front of %s", video_filename)
+    return rewritten
+
+
+# ==================== 키프레임 인덱스 ====================
+
+KEYFRAMES_DIRNAME = "keyframes"
+
+
+def get_keyframe_index_path(video_filename: str, file_path: str) -> str:
+    """
+    키프레임 인덱스 파일 경로
+
+    Args:
+        video_filename: 게시물 비디오 파일명 (파생 파일 디렉토리 기준)
+        file_path: 인덱스 대상 파일 (원본 또는 화질 파일)
+    """
+    return os.path.join(
+        get_derivatives_dir(video_filename), KEYFRAMES_DIRNAME, os.path.basename(file_path) + ".idx"
+    )
+
+
+def index_keyframes_for_post(video_filename: str) -> None:
+    """
+    업로드 후처리: 원본 비디오의 키프레임 인덱스 생성 (작업 큐)
+
+    MP4/MOV가 아니거나 해석할 수 없으면 생략합니다 (?t= 탐색 시 무시됨).
+
+    Raises:
+        OSError: 파일을 읽거나 인덱스를 쓰지 못한 경우 (작업 큐가 재시도)
+    """
+    video_path = get_video_path(video_filename)
+    if os.path.splitext(video_filename)[1].lower() not in FASTSTART_EXTENSIONS:
+        return
+    try:
+        index = build_keyframe_index(video_path, get_keyframe_index_path(video_filename, video_path))
+        logger.info("Indexed %d keyframes for %s", len(index), video_filename)
+    except Mp4Error as e:
+        logger.warning("Keyframe index skipped for %s: %s", video_filename, e)
+
+
+# ==================== HLS ====================
+
+def get_hls_dir(video_filename: str) -> str:
+    """HLS 플레이리스트/세그먼트 디렉토리"""
+    return os.path.join(get_derivatives_dir(video_filename), HLS_DIRNAME)
+
+
+def package_hls(video_path: str, output_dir: str, segment_seconds: int = HLS_SEGMENT_SECONDS) -> None:
+    """
+    비디오를 재인코딩 없이 HLS 세그먼트와 플레이리스트로 remux
+
+    Args:
+        video_path: 원본 비디오 경로
+        output_dir: 결과 디렉토리 (완성 후 교체)
+        segment_seconds: 세그먼트 길이 (초, 키프레임 기준으로 잘림)
+
+    Raises:
+        MediaProcessingError: ffmpeg 실행 실패
+    """
+    parent_dir = os.path.dirname(output_dir)
+    os.makedirs(parent_dir, exist_ok=True)
+    staging_dir = tempfile.mkdtemp(prefix=".hls-", dir=parent_dir)
+    try:
+        run_ffmpeg([
+            "-i", video_path,
+            "-map", "0:v:0", "-map", "0:a:0?",
+            "-c", "copy",
+            "-f", "hls",
+            "-hls_time", str(segment_seconds),
+            "-hls_playlist_type", "vod",
+            "-hls_segment_filename", os.path.join(staging_dir, HLS_SEGMENT_PATTERN),
+            os.path.join(staging_dir, HLS_PLAYLIST),
+        ])
+        publish_directory(staging_dir, output_dir)
+    except Exception:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        raise
+
+
+def package_hls_for_post(video_filename: str) -> None:
+    """
+    업로드 후처리: 게시물 비디오 HLS 패키징 (작업 큐)
+
+    ffmpeg가 없으면 생략합니다 (원본 스트리밍에는 영향 없음).
+
+    Raises:
+        MediaProcessingError, OSError: 패키징 실패 (작업 큐가 재시도)
+    """
+    if not ffmpeg_available():
+        logger.info("ffmpeg not installed, skipping HLS packaging for %s", video_filename)
+        return
+    package_hls(get_video_path(video_filename), get_hls_dir(video_filename))
+
+
+# ==================== 썸네일 ====================
+
+THUMBNAILS_DIRNAME = "thumbnails"
+
+
+def parse_thumbnail_widths(value: str) -> list[int]:
+    """
+    썸네일 가로 크기 설정 파싱 ("160,320,640")
+
+    Returns:
+        가로 크기 목록 (작은 순)
+
+    Raises:
+        ValueError: 형식이 잘못된 경우
+    """
+    widths = sorted({int(item) for item in value.split(",") if item.strip()})
+    if not widths or widths[0] <= 0:
+        raise ValueError(f"Invalid thumbnail widths: {value!r}")
+    return widths
+
+
+def get_thumbnails_dir(video_filename: str) -> str:
+    """썸네일 디렉토리"""
+    return os.path.join(get_derivatives_dir(video_filename), THUMBNAILS_DIRNAME)
+
+
+def get_thumbnail_path(video_filename: str, width: int) -> str:
+    """가로 크기별 썸네일 경로"""
+    return os.path.join(get_thumbnails_dir(video_filename), f"{width}.jpg")
+
+
+def generate_thumbnails(
+    video_path: str,
+    output_dir: str,
+    widths: list[int],
+    seek_seconds: float = THUMBNAIL_SEEK_SECONDS
+) -> None:
+    """
+    포스터 프레임 하나를 디코딩해 가로 크기별 JPEG로 저장 (ffmpeg 한 번 실행)
+
+    seek_seconds보다 짧은 영상이면 첫 프레임을 사용합니다.
+
+    Args:
+        video_path: 원본 비디오 경로
+        output_dir: 결과 디렉토리 (완성 후 교체)
+        widths: 가로 크기 목록 (세로는 비율 유지, 짝수)
+        seek_seconds: 포스터 프레임 위치 (초)
+
+    Raises:
+        MediaProcessingError: ffmpeg 실행 실패
+    """
+    parent_dir = os.path.dirname(output_dir)
+    os.makedirs(parent_dir, exist_ok=True)
+    staging_dir = tempfile.mkdtemp(prefix=".thumbnails-", dir=parent_dir)
+
+    # 프레임 하나를 크기별로 나눠 스케일
+    filter_graph = f"[0:v:0]split={len(widths)}" + "".join(f"[s{i}]" for i in range(len(widths)))
+    filter_graph += "".join(f";[s{i}]scale={width}:-2[o{i}]" for i, width in enumerate(widths))
+    paths = [os.path.join(staging_dir, f"{width}.jpg") for width in widths]
+    outputs = []
+    for i, path in enumerate(paths):
+        outputs += ["-map", f"[o{i}]", "-frames:v", "1", "-q:v", "4", path]
+
+    try:
+        error = MediaProcessingError("No frame decoded")
+        for seek in dict.fromkeys((seek_seconds, 0)):
+            # 영상보다 뒤를 지정하면 출력이 없거나 실패하므로 첫 프레임으로 다시 시도
+            try:
+                run_ffmpeg(["-ss", str(seek), "-i", video_path, "-filter_complex", filter_graph, *outputs])
+            except MediaProcessingError as e:
+                error = e
+                continue
+            if all(os.path.exists(path) and os.path.getsize(path) > 0 for path in paths):
+                break
+        else:
+            raise error
+        publish_directory(staging_dir, output_dir)
+    except Exception:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        raise
+
+
+def generate_thumbnails_for_post(video_filename: str) -> None:
+    """
+    업로드 후처리: 게시물 썸네일 생성 (작업 큐)
+
+    ffmpeg가 없으면 썸네일 없이 둡니다 (썸네일 API는 404).
+
+    Raises:
+        MediaProcessingError, OSError: 생성 실패 (작업 큐가 재시도)
+        ValueError: THUMBNAIL_WIDTHS 형식 오류
+    """
+    if not ffmpeg_available():
+        logger.info("ffmpeg not installed, skipping thumbnails for %s", video_filename)
+        return
+    generate_thumbnails(
+        get_video_path(video_filename),
+        get_thumbnails_dir(video_filename),
+        parse_thumbnail_widths(THUMBNAIL_WIDTHS)
+    )
+
+
+# ==================== 탐색 미리보기 스프라이트 ====================
+
+SPRITES_DIRNAME = "sprites"
+SPRITE_IMAGE = "sprite.jpg"
+SPRITE_VTT = "sprite.vtt"
+
+
+class SpriteLayout(NamedTuple):
+    """스프라이트 시트 배치"""
+    interval: float  # 타일 하나가 나타내는 시간 (초)
+    tiles: int
+    columns: int
+    rows: int
+    tile_width: int
+    tile_height: int
+
+
+def plan_sprite_layout(
+    duration: float,
+    width: int,
+    height: int,
+    tile_width: int = SPRITE_TILE_WIDTH,
+    columns: int = SPRITE_COLUMNS,
+    max_tiles: int = SPRITE_MAX_TILES,
+    min_interval: float = SPRITE_MIN_INTERVAL
+) -> SpriteLayout:
+    """
+    영상 길이와 해상도로 스프라이트 배치 계산
+
+    - 타일 수는 max_tiles 이하, 타일 간격은 min_interval 이상
+    - 타일 크기는 원본 비율 유지 (세로는 짝수)
+    """
+    interval = max(min_interval, duration / max_tiles)
+    tiles = max(1, min(max_tiles, math.ceil(duration / interval)))
+    columns = min(columns, tiles)
+    tile_height = max(2, round(tile_width * height / width / 2) * 2)
+    return SpriteLayout(interval, tiles, columns, math.ceil(tiles / columns), tile_width, tile_height)
+
+
+def _format_vtt_time(seconds: float) -> str:
+    milliseconds = round(seconds * 1000)
+    hours, milliseconds = divmod(milliseconds, 3600 * 1000)
+    minutes, milliseconds = divmod(milliseconds, 60 * 1000)
+    return f"{hours:02d}:{minutes:02d}:{milliseconds // 1000:02d}.{milliseconds % 1000:03d}"
+
+
+def build_sprite_vtt(layout: SpriteLayout, duration: float, image_url: str = SPRITE_IMAGE) -> str:
+    """
+    시간 구간 → 스프라이트 좌표 WebVTT (media fragment #xywh=)
+
+    Args:
+        layout: 스프라이트 배치
+        duration: 영상 길이 (초, 마지막 구간의 끝)
+        image_url: 스프라이트 이미지 URL (VTT 기준 상대 경로)
+    """
+    lines = ["WEBVTT", ""]
+    for index in range(layout.tiles):
+        start = index * layout.interval
+        end = min((index + 1) * layout.interval, duration)
+        x = (index % layout.columns) * layout.tile_width
+        y = (index // layout.columns) * layout.tile_height
+        lines += [
+            f"{_format_vtt_time(start)} --> {_format_vtt_time(end)}",
+            f"{image_url}#xywh={x},{y},{layout.tile_width},{layout.tile_height}",
+            "",
+        ]
+    return "\n".join(lines)
+
+
+def get_sprites_dir(video_filename: str) -> str:
+    """스프라이트 시트/WebVTT 디렉토리"""
+    return os.path.join(get_derivatives_dir(video_filename), SPRITES_DIRNAME)
+
+
+def generate_sprite(video_path: str, output_dir: str) -> SpriteLayout:
+    """
+    일정 간격의 프레임을 타일로 이어 붙인 스프라이트 시트와 WebVTT 생성
+
+    Args:
+        video_path: 원본 비디오 경로
+        output_dir: 결과 디렉토리 (완성 후 교체)
+
+    Returns:
+        스프라이트 배치
+
+    Raises:
+        MediaProcessingError: 영상 정보를 알 수 없거나 ffmpeg 실행 실패
+    """
+    probe = probe_video(video_path)
+    if probe is None or not probe.duration or probe.width <= 0 or probe.height <= 0:
+        raise MediaProcessingError("Could not probe video size and duration")
+    layout = plan_sprite_layout(probe.duration, probe.width, probe.height)
+
+    parent_dir = os.path.dirname(output_dir)
+    os.makedirs(parent_dir, exist_ok=True)
+    staging_dir = tempfile.mkdtemp(prefix=".sprites-", dir=parent_dir)
+    try:
+        run_ffmpeg([
+            "-i", video_path,
+            "-map", "0:v:0",
+            "-vf", (
+                f"fps=1/{layout.interval:.3f},"
+                f"scale={layout.tile_width}:{layout.tile_height},"
+                f"tile={layout.columns}x{layout.rows}"
+            ),
+            "-frames:v", "1", "-q:v", "5",
+            os.path.join(staging_dir, SPRITE_IMAGE),
+        ])
+        with open(os.path.join(staging_dir, SPRITE_VTT), "w", encoding="utf-8") as f:
+            f.write(build_sprite_vtt(layout, probe.duration))
+        publish_directory(staging_dir, output_dir)
+    except Exception:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        raise
+    return layout
+
+
+def generate_sprite_for_post(video_filename: str) -> None:
+    """
+    업로드 후처리: 탐색 미리보기 스프라이트 생성 (작업 큐)
+
+    ffmpeg/ffprobe가 없으면 생략합니다 (스프라이트 API는 404).
+
+    Raises:
+        MediaProcessingError, OSError: 생성 실패 (작업 큐가 재시도)
+    """
+    if not ffmpeg_available():
+        logger.info("ffmpeg not installed, skipping sprite sheet for %s", video_filename)
+        return
+    layout = generate_sprite(get_video_path(video_filename), get_sprites_dir(video_filename))
+    logger.info("Built %d-tile sprite sheet for %s", layout.tiles, video_filename)
+
+
+# ==================== 구간 클립 ====================
+
+CLIPS_DIRNAME = "clips"
+
+# 클립 추출 ffmpeg 프로세스 수 제한
+_clip_executor = ThreadPoolExecutor(max_workers=max(CLIP_WORKERS, 1), thread_name_prefix="clip")
+# 같은 클립을 동시에 요청해도 한 번만 추출 (경로 해시로 lock 선택)
+_clip_locks = [threading.Lock() for _ in range(64)]
+
+
+def get_clips_dir(video_filename: str) -> str:
+    """클립 디렉토리"""
+    return os.path.join(get_derivatives_dir(video_filename), CLIPS_DIRNAME)
+
+
+def get_clip_path(video_filename: str, start: float, end: float) -> str:
+    """구간별 클립 경로 (밀리초 단위 시작-끝)"""
+    return os.path.join(get_clips_dir(video_filename), f"{round(start * 1000)}-{round(end * 1000)}.mp4")
+
+
+def extract_clip(video_path: str, output_path: str, start: float, end: float) -> int:
+    """
+    재인코딩 없이(stream copy) 구간 클립 추출
+
+    입력 탐색(-ss를 -i 앞에)은 start 이전의 키프레임부터 읽으므로
+    호출하는 쪽에서 start를 키프레임 시각에 맞추면 클립이 정확히 그 시각에서 시작합니다.
+
+    Args:
+        video_path: 원본 비디오 경로
+        output_path: 클립 경로 (임시 파일에 쓴 뒤 rename)
+        start: 시작 시각 (초)
+        end: 끝 시각 (초)
+
+    Returns:
+        클립 파일 크기
+
+    Raises:
+        MediaProcessingError: ffmpeg 실행 실패 또는 빈 결과
+    """
+    output_dir = os.path.dirname(output_path)
+    os.makedirs(output_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=".clip-", suffix=".mp4", dir=output_dir)
+    os.close(fd)
+    try:
+        run_ffmpeg([
+            "-ss", f"{start:.3f}",
+            "-i", video_path,
+            "-t", f"{end - start:.3f}",
+            "-map", "0:v:0", "-map", "0:a:0?",
+            "-c", "copy",
+            "-avoid_negative_ts", "make_zero",
+            "-movflags", "+faststart",
+            "-f", "mp4",
+            tmp_path,
+        ], timeout=600)
+        size = os.path.getsize(tmp_path)
+        if size == 0:
+            raise MediaProcessingError("Empty clip")
+        os.replace(tmp_path, output_path)
+        return size
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _clip_paths() -> list[str]:
+    if not os.path.isdir(DERIVATIVES_DIR):
+        return []
+    paths = []
+    for entry in os.scandir(DERIVATIVES_DIR):
+        clips_dir = os.path.join(entry.path, CLIPS_DIRNAME)
+        if entry.is_dir() and os.path.isdir(clips_dir):
+            paths.extend(
+                os.path.join(clips_dir, name) for name in os.listdir(clips_dir)
+                if name.endswith(".mp4") and not name.startswith(".")
+            )
+    return paths
+
+
+def get_clip(video_filename: str, start: float, end: float) -> str:
+    """
+    구간 클립 경로 (캐시에 없으면 추출 후 캐시에 등록, 예산을 넘으면 오래된 클립 삭제)
+
+    Raises:
+        MediaProcessingError: ffmpeg가 없거나 추출에 실패한 경우
+    """
+    if not clip_cache.loaded:
+        clip_cache.load(_clip_paths())
+
+    path = get_clip_path(video_filename, start, end)
+    if clip_cache.touch(path):
+        return path
+    with _clip_locks[hash(path) % len(_clip_locks)]:
+        # 기다리는 동안 다른 요청이 추출했을 수 있음
+        if os.path.exists(path) and clip_cache.touch(path):
+            return path
+        size = extract_clip(get_video_path(video_filename), path, start, end)
+        evicted = clip_cache.add(path, size)
+    logger.info("Extracted clip %s (%d bytes, evicted %d)", path, size, len(evicted))
+    return path
+
+
+def submit_clip(video_filename: str, start: float, end: float) -> Future:
+    """클립 조회/추출을 클립 전용 스레드 풀에서 실행"""
+    return _clip_executor.submit(get_clip, video_filename, start, end)
+
+
+# ==================== Renditions ====================
+
+RENDITIONS_DIRNAME = "renditions"
+
+_RENDITION_SPEC_PATTERN = re.compile(r"^(\w+):(\d+)x(\d+):(\d+)([kKmM]?)$")
+
+# 트랜스코딩 ffmpeg 프로세스 수 제한 (스레드 하나가 ffmpeg 프로세스 하나를 기다림)
+_transcode_executor = ThreadPoolExecutor(
+    max_workers=max(TRANSCODE_WORKERS, 1),
+    thread_name_prefix="transcode"
+)
+
+
+class RenditionSpec(NamedTuple):
+    """화질 단계 설정"""
+    name: str
+    width: int
+    height: int
+    bitrate: int  # bits/s
+
+
+def parse_rendition_ladder(value: str) -> list[RenditionSpec]:
+    """
+    화질 단계 설정 문자열 파싱
+
+    Args:
+        value: "720p:1280x720:2800k,480p:854x480:1400k" 형식
+
+    Returns:
+        비트레이트 내림차순 목록
+
+    Raises:
+        ValueError: 형식이 잘못된 경우
+    """
+    ladder = []
+    for item in value.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        match = _RENDITION_SPEC_PATTERN.match(item)
+        if not match:
+            raise ValueError(f"Invalid rendition spec: {item}")
+        name, width, height, bitrate, unit = match.groups()
+        multiplier = {"": 1, "k": 1000, "m": 1000 * 1000}[unit.lower()]
+        ladder.append(RenditionSpec(name, int(width), int(height), int(bitrate) * multiplier))
+    return sorted(ladder, key=lambda spec: spec.bitrate, reverse=True)
+
+
+def get_renditions_dir(video_filename: str) -> str:
+    """화질별 트랜스코딩 결과 디렉토리"""
+    return os.path.join(get_derivatives_dir(video_filename), RENDITIONS_DIRNAME)
+
+
+def get_rendition_path(video_filename: str, rendition_filename: str) -> str:
+    """화질 파일 경로"""
+    return os.path.join(get_renditions_dir(video_filename), rendition_filename)
+
+
+def rendition_cache_key(video_filename: str, rendition_filename: str) -> str:
+    """화질 파일의 세그먼트 캐시 키 (파생 파일 디렉토리 기준 상대 경로)"""
+    return os.path.relpath(get_rendition_path(video_filename, rendition_filename), DERIVATIVES_DIR)
+
+
+def invalidate_segments(video_filename: str) -> None:
+    """원본과 모든 화질 파일의 캐시된 세그먼트 제거 (파일을 재작성하거나 삭제한 경우)"""
+    segment_cache.invalidate(video_filename)
+    segment_cache.invalidate_prefix(os.path.relpath(get_renditions_dir(video_filename), DERIVATIVES_DIR) + os.sep)
+
+
+def transcode_rendition(video_path: str, output_path: str, spec: RenditionSpec) -> int:
+    """
+    비디오를 지정한 해상도/비트레이트로 트랜스코딩 (H.264/AAC, faststart)
+
+    Returns:
+        결과 파일 크기
+
+    Raises:
+        MediaProcessingError: ffmpeg 실행 실패
+    """
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=".rendition-", suffix=".mp4", dir=os.path.dirname(output_path))
+    os.close(fd)
+    try:
+        run_ffmpeg([
+            "-i", video_path,
+            "-map", "0:v:0", "-map", "0:a:0?",
+            "-vf", (
+                f"scale={spec.width}:{spec.height}:force_original_aspect_ratio=decrease,"
+                "scale=trunc(iw/2)*2:trunc(ih/2)*2"
+            ),
+            "-c:v", "libx264", "-preset", "veryfast",
+            "-b:v", str(spec.bitrate),
+            "-maxrate", str(int(spec.bitrate * 1.1)),
+            "-bufsize", str(spec.bitrate * 2),
+            "-c:a", "aac", "-b:a", "128k",
+            "-movflags", "+faststart",
+            tmp_path,
+        ])
+        os.replace(tmp_path, output_path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return os.path.getsize(output_path)
+
+
+def save_renditions(db, post_id: int, results: list[tuple[RenditionSpec, str, int]]) -> bool:
+    """
+    트랜스코딩 결과를 post_renditions 테이블에 반영 (기존 행 교체)
+
+    Args:
+        db: 데이터베이스 세션
+        post_id: 게시물 ID
+        results: (화질 설정, 파일명, 파일 크기) 목록
+
+    Returns:
+        게시물이 삭제되어 반영하지 못했으면 False
+    """
+    post = db.query(Post).filter(Post.id == post_id).first()
+    if post is None:
+        return False
+    # 이름이 같은 행이 있으므로 먼저 삭제 후 추가
+    post.renditions.clear()
+    db.flush()
+    post.renditions = [
+        PostRendition(
+            name=spec.name,
+            filename=filename,
+            width=spec.width,
+            height=spec.height,
+            bitrate=spec.bitrate,
+            size=size,
+        )
+        for spec, filename, size in results
+    ]
+    db.commit()
+    metadata_cache.invalidate(post_id)
+    return True
+
+
+def share_renditions(db, post_id: int, video_filename: str) -> bool:
+    """
+    같은 비디오 파일을 쓰는 다른 게시물의 화질 단계를 그대로 기록 (중복 업로드는 다시 트랜스코딩하지 않음)
+
+    Returns:
+        복사할 화질 단계가 있었으면 True
+    """
+    source = (
+        db.query(Post)
+        .join(Post.renditions)
+        .filter(Post.video_filename == video_filename, Post.id != post_id)
+        .first()
+    )
+    if source is None:
+        return False
+    save_renditions(db, post_id, [
+        (RenditionSpec(r.name, r.width, r.height, r.bitrate), r.filename, r.size)
+        for r in source.renditions
+    ])
+    return True
+
+
+def transcode_renditions_for_post(db, post_id: int, video_filename: str) -> None:
+    """
+    업로드 후처리: 화질 단계별 트랜스코딩 (작업 큐)
+
+    - 원본보다 큰 해상도 단계는 건너뜀 (짧은 변 기준, 세로 영상은 단계 크기의 가로/세로를 바꿔 적용)
+    - 테이블에는 트랜스코딩한 파일에서 조회한 실제 해상도를 기록
+    - 단계별 ffmpeg는 제한된 풀에서 실행 (여러 업로드가 겹쳐도 TRANSCODE_WORKERS개까지)
+    - 원본 파일은 그대로 두고, 성공한 단계만 테이블에 기록
+    - 같은 파일을 쓰는 게시물이 이미 트랜스코딩했으면 그 결과를 공유
+
+    Args:
+        db: 데이터베이스 세션
+        post_id: 게시물 ID
+        video_filename: 게시물 비디오 파일명
+
+    Raises:
+        MediaProcessingError: 모든 단계가 실패한 경우 (작업 큐가 재시도)
+    """
+    if share_renditions(db, post_id, video_filename):
+        return
+
+    if not ffmpeg_available():
+        logger.info("ffmpeg not installed, skipping renditions for %s", video_filename)
+        return
+
+    video_path = get_video_path(video_filename)
+    source = probe_video(video_path)
+    ladder = parse_rendition_ladder(RENDITION_LADDER)
+    if source is not None:
+        # 단계는 짧은 변 기준 (세로 영상은 가로/세로를 바꾼 크기에 맞춤)
+        short_side = min(source.width, source.height)
+        ladder = [spec for spec in ladder if min(spec.width, spec.height) <= short_side]
+        if source.height > source.width:
+            ladder = [spec._replace(width=spec.height, height=spec.width) for spec in ladder]
+
+    futures = [
+        (spec, _transcode_executor.submit(
+            transcode_rendition, video_path, get_rendition_path(video_filename, f"{spec.name}.mp4"), spec
+        ))
+        for spec in ladder
+    ]
+    results = []
+    for spec, future in futures:
+        try:
+            size = future.result()
+        except (MediaProcessingError, OSError) as e:
+            logger.warning("Rendition %s failed for %s: %s", spec.name, video_filename, e)
+            continue
+        # 원본 비율을 유지해 줄이므로 실제 해상도는 단계 크기보다 작을 수 있음
+        info = probe_media(get_rendition_path(video_filename, f"{spec.name}.mp4"))
+        if info is not None and info.width and info.height:
+            spec = spec._replace(width=info.width, height=info.height)
+        results.append((spec, f"{spec.name}.mp4", size))
+    if ladder and not results:
+        raise MediaProcessingError(f"All renditions failed for {video_filename}")
+
+    if not save_renditions(db, post_id, results) \
+            and db.query(Post).filter(Post.video_filename == video_filename).first() is None:
+        # 처리 중 게시물이 삭제됨 (같은 파일을 쓰는 게시물이 남아 있으면 유지)
+        remove_derivatives(video_filename)
@@ -0,0 +1,108 @@
+"""
+스트리밍 메타데이터 캐시 모듈
+- 게시물별 비디오 경로, 크기, 수정 시각, Content-Type, ETag 보관
+- 화질(rendition) 파일 메타데이터도 함께 보관 (화질 선택 시 DB/stat 조회 없음)
+- Range 요청마다 반복되는 stat 호출 제거
+- TTL + LRU, 게시물 수정/삭제 시 무효화
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from app.config import STREAM_METADATA_CACHE_SIZE, STREAM_METADATA_TTL
+
+
+@dataclass(frozen=True)
+class StreamMetadata:
+    """스트리밍에 필요한 비디오 파일 메타데이터"""
+    video_filename: str
+    path: str
+    size: int
+    mtime: float
+    mtime_ns: int
+    content_type: str
+    etag: str
+    is_public: bool
+    author_id: int | None = None
+    renditions: tuple["RenditionMetadata", ...] = ()
+
+
+@dataclass(frozen=True)
+class RenditionMetadata:
+    """화질(rendition) 정보와 파일 메타데이터"""
+    name: str
+    width: int
+    height: int
+    bitrate: int
+    file: StreamMetadata
+
+
+class MetadataCache:
+    """
+    게시물 ID 기준 TTL/LRU 캐시
+
+    - ttl초가 지난 항목은 조회 시 제거 (파일이 외부에서 바뀐 경우에도 결국 갱신)
+    - max_entries를 넘으면 가장 오래 사용하지 않은 항목부터 제거
+    - 동기 라우터(스레드 풀)에서도 무효화하므로 lock으로 보호
+    """
+
+    def __init__(self, max_entries: int, ttl: float) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: OrderedDict[int, tuple[float, StreamMetadata]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, post_id: int) -> StreamMetadata | None:
+        """메타데이터 조회 (만료된 항목은 미스로 처리)"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(post_id)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._entries[post_id]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(post_id)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, post_id: int, metadata: StreamMetadata) -> None:
+        """메타데이터 저장"""
+        if self.max_entries <= 0 or self.ttl <= 0:
+            return
+        with self._lock:
+            self._entries[post_id] = (time.monotonic() + self.ttl, metadata)
+            self._entries.move_to_end(post_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, post_id: int) -> None:
+        """게시물 메타데이터 제거"""
+        with self._lock:
+            self._entries.pop(post_id, None)
+
+    def clear(self) -> None:
+        """캐시 및 카운터 초기화"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        """캐시 상태 (모니터링용)"""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl": self.ttl,
+            }
+
+
+# 프로세스 전역 캐시
+metadata_cache = MetadataCache(STREAM_METADATA_CACHE_SIZE, STREAM_METADATA_TTL)
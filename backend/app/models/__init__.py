@@ -2,5 +2,13 @@ from app.models.example import Example
 from app.models.user import User
 from app.models.post import Post
 from app.models.post_permission import PostPermission
+from app.models.post_rendition import PostRendition
+from app.models.stream_stat import StreamStat
+from app.models.watch_progress import WatchProgress
+from app.models.upload_session import UploadSession, UploadChunk
+from app.models.video_blob import VideoBlob
+from app.models.processing_job import ProcessingJob
+from app.models.ticket_revocation import TicketRevocation
 
-__all__ = ["Example", "User", "Post", "PostPermission"]
+__all__ = ["Example", "User", "Post", "PostPermission", "PostRendition", "StreamStat", "WatchProgress",
+           "UploadSession", "UploadChunk", "VideoBlob", "ProcessingJob", "TicketRevocation"]
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Float, ForeignKey
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
@@ -14,6 +14,14 @@ class Post(Base):
     video_filename = Column(String(255), nullable=False)
     video_original_name = Column(String(255), nullable=False)
     video_size = Column(Integer, nullable=False)
+    # 미디어 정보 (업로드 시 조회, 알 수 없으면 NULL)
+    duration = Column(Float, nullable=True, index=True)  # 초
+    width = Column(Integer, nullable=True, index=True)
+    height = Column(Integer, nullable=True, index=True)
+    video_codec = Column(String(32), nullable=True, index=True)
+    audio_codec = Column(String(32), nullable=True, index=True)
+    bitrate = Column(Integer, nullable=True, index=True)  # bit/s
+    is_faststart = Column(Boolean, nullable=True, index=True)
     author_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     is_public = Column(Boolean, default=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -22,3 +30,16 @@ class Post(Base):
     # Relationships
     author = relationship("User", back_populates="posts")
     permissions = relationship("PostPermission", back_populates="post", cascade="all, delete-orphan")
+    renditions = relationship(
+        "PostRendition",
+        back_populates="post",
+        cascade="all, delete-orphan",
+        order_by="PostRendition.bitrate"
+    )
+    watch_progress = relationship("WatchProgress", back_populates="post", cascade="all, delete-orphan")
+    processing_jobs = relationship(
+        "ProcessingJob",
+        back_populates="post",
+        cascade="all, delete-orphan",
+        order_by="ProcessingJob.id"
+    )
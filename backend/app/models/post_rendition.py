@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, UniqueConstraint
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+
+from app.database import Base
+
+
+class PostRendition(Base):
+    __tablename__ = "post_renditions"
+    __table_args__ = (UniqueConstraint("post_id", "name", name="uq_post_rendition_name"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    post_id = Column(Integer, ForeignKey("posts.id"), nullable=False, index=True)
+    name = Column(String(50), nullable=False)
+    filename = Column(String(255), nullable=False)
+    width = Column(Integer, nullable=False)
+    height = Column(Integer, nullable=False)
+    bitrate = Column(Integer, nullable=False)  # bits/s
+    size = Column(Integer, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    # Relationships
+    post = relationship("Post", back_populates="renditions")
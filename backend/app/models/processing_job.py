@@ -0,0 +1,29 @@
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, String
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+
+from app.database import Base
+
+
+class ProcessingJob(Base):
+    """업로드 후처리 작업 (게시물 하나의 작업 한 종류)"""
+    __tablename__ = "processing_jobs"
+    # 다음에 실행할 작업 조회 (대기 중인 작업을 우선순위, 실행 가능 시각 순으로)
+    __table_args__ = (Index("ix_processing_jobs_next", "status", "priority", "run_at"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    post_id = Column(Integer, ForeignKey("posts.id"), nullable=False, index=True)
+    kind = Column(String(32), nullable=False)  # prepare, thumbnails, sprite, hls, renditions
+    priority = Column(Integer, nullable=False, default=0)  # 클수록 먼저 실행
+    status = Column(String(16), nullable=False, default="pending")  # pending, running, succeeded, failed
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False)
+    # 실행 가능 시각 (재시도 대기 후), 실행 중이면 임대 만료 시각 (UTC)
+    run_at = Column(DateTime(timezone=True), nullable=False)
+    last_error = Column(String(1000), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    # Relationships
+    post = relationship("Post", back_populates="processing_jobs")
@@ -0,0 +1,18 @@
+from sqlalchemy import BigInteger, Column, Date, DateTime, Integer, UniqueConstraint
+from sqlalchemy.sql import func
+
+from app.database import Base
+
+
+class StreamStat(Base):
+    __tablename__ = "stream_stats"
+    __table_args__ = (UniqueConstraint("day", "post_id", "user_id", name="uq_stream_stat_day_post_user"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    day = Column(Date, nullable=False, index=True)  # UTC
+    # 게시물/사용자가 삭제되어도 통계는 남김 (외래 키 없음)
+    post_id = Column(Integer, nullable=False, index=True)
+    user_id = Column(Integer, nullable=False)
+    views = Column(Integer, nullable=False, default=0)
+    bytes_served = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
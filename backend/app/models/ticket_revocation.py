@@ -0,0 +1,16 @@
+from sqlalchemy import BigInteger, Column, Integer
+
+from app.database import Base
+
+
+class TicketRevocation(Base):
+    """스트림 티켓 폐기 기록 - 워커끼리 공유 (각 워커가 새 행을 읽어 메모리 폐기 목록에 반영)"""
+    __tablename__ = "ticket_revocations"
+    # 정리 후에도 id를 재사용하지 않음 (워커는 마지막으로 읽은 id 이후만 조회)
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    id = Column(Integer, primary_key=True)
+    # 게시물만: 게시물 단위, 사용자만: 사용자 단위, 둘 다: (게시물, 사용자) 권한 단위
+    post_id = Column(Integer, nullable=True)
+    user_id = Column(Integer, nullable=True)
+    revoked_at = Column(BigInteger, nullable=False, index=True)  # 유닉스 밀리초
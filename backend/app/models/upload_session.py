@@ -0,0 +1,36 @@
+from sqlalchemy import BigInteger, Boolean, Column, DateTime, ForeignKey, Integer, String
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+
+from app.database import Base
+
+
+class UploadSession(Base):
+    __tablename__ = "upload_sessions"
+
+    id = Column(String(32), primary_key=True)  # uuid4 hex
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    # 완료 시 만들 게시물 정보
+    title = Column(String(200), nullable=False)
+    description = Column(String(5000), nullable=True)
+    is_public = Column(Boolean, default=False)
+    filename = Column(String(255), nullable=False)  # 원본 파일명
+    size = Column(BigInteger, nullable=False)  # 전체 파일 크기
+    chunk_size = Column(Integer, nullable=False)
+    # 완료 처리 중 (청크 수신과 중복 완료 방지)
+    completing = Column(Boolean, nullable=False, default=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # 마지막 청크 수신 시각 + UPLOAD_SESSION_TTL (UTC)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+
+    # Relationships
+    chunks = relationship("UploadChunk", cascade="all, delete-orphan")
+
+
+class UploadChunk(Base):
+    """받은 청크 (병렬 PUT이 서로 덮어쓰지 않도록 청크마다 한 행)"""
+    __tablename__ = "upload_chunks"
+
+    session_id = Column(String(32), ForeignKey("upload_sessions.id"), primary_key=True)
+    index = Column(Integer, primary_key=True)
+    size = Column(Integer, nullable=False)
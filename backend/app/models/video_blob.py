@@ -0,0 +1,16 @@
+from sqlalchemy import BigInteger, Column, DateTime, Integer, String
+from sqlalchemy.sql import func
+
+from app.database import Base
+
+
+class VideoBlob(Base):
+    """내용(SHA-256)으로 이름 지은 비디오 파일 - 같은 내용을 올린 게시물이 함께 참조"""
+    __tablename__ = "video_blobs"
+
+    filename = Column(String(255), primary_key=True)  # <sha256><확장자> (Post.video_filename)
+    sha256 = Column(String(64), nullable=False, index=True)  # 업로드된 원본 내용의 해시
+    size = Column(BigInteger, nullable=False)  # 저장된 파일 크기
+    # 이 파일을 쓰는 게시물 수 (0이 되면 파일과 파생 파일 삭제)
+    ref_count = Column(Integer, nullable=False, default=1)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
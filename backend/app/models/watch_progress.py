@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey, UniqueConstraint
+from sqlalchemy.orm import relationship
+
+from app.database import Base
+
+
+class WatchProgress(Base):
+    __tablename__ = "watch_progress"
+    __table_args__ = (UniqueConstraint("user_id", "post_id", name="uq_watch_progress_user_post"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    post_id = Column(Integer, ForeignKey("posts.id"), nullable=False)
+    position = Column(Float, nullable=False)  # 초
+    duration = Column(Float, nullable=True)  # 플레이어가 보고한 전체 길이 (초)
+    # 플레이어가 위치를 보고한 시각 (DB에 기록한 시각이 아님, UTC)
+    updated_at = Column(DateTime(timezone=True), nullable=False)
+
+    # Relationships
+    post = relationship("Post", back_populates="watch_progress")
@@ -0,0 +1,481 @@
+"""
+MP4/MOV 컨테이너 유틸리티 모듈
+- 박스(atom) 구조 파싱 (ffmpeg 없이 표준 라이브러리만 사용)
+- faststart: moov 박스를 파일 앞으로 이동 (moov-at-end 업로드 재작성)
+- 비디오 트랙 키프레임 테이블 (stss/stts/stsc/stsz/stco로 시각과 byte offset 계산)
+- 미디어 정보 (길이, 해상도, 코덱, 비트레이트, faststart 여부 - moov 박스만 읽음)
+"""
+
+import os
+import shutil
+import struct
+import tempfile
+from typing import BinaryIO, Iterator, NamedTuple
+
+# faststart 대상 확장자 (ISO BMFF / QuickTime)
+FASTSTART_EXTENSIONS = {".mp4", ".mov"}
+
+# 하위 박스를 포함하는 컨테이너 박스 (chunk offset 테이블까지의 경로)
+_CONTAINER_BOXES = {b"moov", b"trak", b"mdia", b"minf", b"stbl"}
+
+_COPY_BUFFER_SIZE = 1024 * 1024
+
+
+class Mp4Error(Exception):
+    """MP4 구조를 해석할 수 없는 경우"""
+
+
+class Box(NamedTuple):
+    """박스 위치 정보"""
+    type: bytes
+    offset: int       # 박스 시작 위치 (헤더 포함)
+    size: int         # 박스 전체 크기 (헤더 포함)
+    header_size: int  # 8 또는 16 (64비트 크기)
+
+    @property
+    def end(self) -> int:
+        return self.offset + self.size
+
+
+def iter_boxes(f: BinaryIO, start: int, end: int) -> Iterator[Box]:
+    """
+    [start, end) 구간의 같은 레벨 박스 순회
+
+    Raises:
+        Mp4Error: 박스 크기가 잘못된 경우
+    """
+    offset = start
+    while offset + 8 <= end:
+        f.seek(offset)
+        header = f.read(8)
+        if len(header) < 8:
+            raise Mp4Error("Truncated box header")
+        size, box_type = struct.unpack(">I4s", header)
+        header_size = 8
+        if size == 1:
+            large = f.read(8)
+            if len(large) < 8:
+                raise Mp4Error("Truncated box header")
+            size = struct.unpack(">Q", large)[0]
+            header_size = 16
+        elif size == 0:
+            # 파일 끝까지 이어지는 박스
+            size = end - offset
+        if size < header_size or offset + size > end:
+            raise Mp4Error(f"Invalid size for box {box_type!r} at {offset}")
+        yield Box(box_type, offset, size, header_size)
+        offset += size
+
+
+def read_top_level_boxes(path: str) -> list[Box]:
+    """
+    파일의 최상위 박스 목록
+
+    Raises:
+        Mp4Error: MP4 구조가 아닌 경우
+    """
+    file_size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        boxes = list(iter_boxes(f, 0, file_size))
+    if not boxes or boxes[0].type not in (b"ftyp", b"wide", b"free", b"moov", b"mdat"):
+        raise Mp4Error("Not an MP4/MOV file")
+    return boxes
+
+
+def needs_faststart(boxes: list[Box]) -> bool:
+    """moov 박스가 첫 번째 mdat 박스보다 뒤에 있는지 확인"""
+    moov = next((box for box in boxes if box.type == b"moov"), None)
+    mdat = next((box for box in boxes if box.type == b"mdat"), None)
+    return moov is not None and mdat is not None and moov.offset > mdat.offset
+
+
+def _patch_chunk_offsets(moov: bytearray, base: int, end: int, shift_from: int, shift_to: int, delta: int) -> None:
+    """
+    moov 내부 stco/co64 테이블의 chunk offset 보정
+
+    [shift_from, shift_to) 구간을 가리키는 offset에만 delta를 더합니다.
+
+    Raises:
+        Mp4Error: 압축된 moov(cmov)이거나 32비트 offset 범위를 넘는 경우
+    """
+    offset = base
+    while offset + 8 <= end:
+        size, box_type = struct.unpack_from(">I4s", moov, offset)
+        header_size = 8
+        if size == 1:
+            size = struct.unpack_from(">Q", moov, offset + 8)[0]
+            header_size = 16
+        elif size == 0:
+            size = end - offset
+        if size < header_size or offset + size > end:
+            raise Mp4Error(f"Invalid size for box {box_type!r} in moov")
+
+        body = offset + header_size
+        if box_type == b"cmov":
+            raise Mp4Error("Compressed moov is not supported")
+        if box_type in _CONTAINER_BOXES:
+            _patch_chunk_offsets(moov, body, offset + size, shift_from, shift_to, delta)
+        elif box_type in (b"stco", b"co64"):
+            # version/flags(4) + entry_count(4) + offsets
+            entry_count = struct.unpack_from(">I", moov, body + 4)[0]
+            entry_format, entry_size = (">I", 4) if box_type == b"stco" else (">Q", 8)
+            if body + 8 + entry_count * entry_size > offset + size:
+                raise Mp4Error(f"Truncated {box_type.decode()} table")
+            for i in range(entry_count):
+                position = body + 8 + i * entry_size
+                chunk_offset = struct.unpack_from(entry_format, moov, position)[0]
+                if shift_from <= chunk_offset < shift_to:
+                    chunk_offset += delta
+                    if box_type == b"stco" and chunk_offset > 0xFFFFFFFF:
+                        raise Mp4Error("Chunk offset exceeds 32-bit stco range")
+                    struct.pack_into(entry_format, moov, position, chunk_offset)
+        offset += size
+
+
+def _copy_range(src: BinaryIO, dst: BinaryIO, start: int, length: int) -> None:
+    src.seek(start)
+    remaining = length
+    while remaining > 0:
+        chunk = src.read(min(_COPY_BUFFER_SIZE, remaining))
+        if not chunk:
+            raise Mp4Error("Unexpected end of file")
+        dst.write(chunk)
+        remaining -= len(chunk)
+
+
+def faststart(path: str) -> bool:
+    """
+    moov-at-end 파일을 moov가 앞에 오도록 재작성 (qt-faststart 방식)
+
+    - 첫 번째 mdat 앞에 moov를 두고, 이동한 구간을 가리키는 chunk offset을 보정
+    - 같은 디렉토리의 임시 파일에 쓴 뒤 rename으로 원자적으로 교체
+      (이미 열려 있는 스트림은 이전 파일을 끝까지 읽음)
+
+    Args:
+        path: 비디오 파일 경로
+
+    Returns:
+        재작성했으면 True, 이미 moov가 앞에 있으면 False
+
+    Raises:
+        Mp4Error: MP4 구조를 해석할 수 없는 경우
+    """
+    boxes = read_top_level_boxes(path)
+    if not needs_faststart(boxes):
+        return False
+
+    moov = next(box for box in boxes if box.type == b"moov")
+    insert_at = next(box for box in boxes if box.type == b"mdat").offset
+
+    with open(path, "rb") as src:
+        src.seek(moov.offset)
+        moov_data = bytearray(src.read(moov.size))
+        # moov 앞쪽 [insert_at, moov.offset) 구간이 moov 크기만큼 뒤로 밀림
+        _patch_chunk_offsets(
+            moov_data, moov.header_size, moov.size,
+            insert_at, moov.offset, moov.size
+        )
+
+        fd, tmp_path = tempfile.mkstemp(prefix=".faststart-", dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, "wb") as dst:
+                _copy_range(src, dst, 0, insert_at)
+                dst.write(moov_data)
+                _copy_range(src, dst, insert_at, moov.offset - insert_at)
+                tail_start = moov.end
+                _copy_range(src, dst, tail_start, os.path.getsize(path) - tail_start)
+                dst.flush()
+                os.fsync(dst.fileno())
+            shutil.copymode(path, tmp_path)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+    return True
+
+
+# ==================== 키프레임 테이블 ====================
+
+class KeyframeTable(NamedTuple):
+    """비디오 트랙의 키프레임 목록 (시각 순)"""
+    timescale: int      # 초당 시간 단위 수 (mdhd)
+    times: list[int]    # 디코딩 시각 (timescale 단위)
+    offsets: list[int]  # 키프레임 샘플의 파일 내 byte offset
+
+
+def _iter_buffer_boxes(data: bytes, start: int, end: int) -> Iterator[tuple[bytes, int, int]]:
+    """
+    메모리에 읽은 박스 구간 [start, end)의 같은 레벨 박스 순회
+
+    Yields:
+        (박스 타입, 본문 시작 위치, 박스 끝 위치)
+
+    Raises:
+        Mp4Error: 박스 크기가 잘못된 경우
+    """
+    offset = start
+    while offset + 8 <= end:
+        size, box_type = struct.unpack_from(">I4s", data, offset)
+        header_size = 8
+        if size == 1:
+            size = struct.unpack_from(">Q", data, offset + 8)[0]
+            header_size = 16
+        elif size == 0:
+            size = end - offset
+        if size < header_size or offset + size > end:
+            raise Mp4Error(f"Invalid size for box {box_type!r} in moov")
+        yield box_type, offset + header_size, offset + size
+        offset += size
+
+
+def _find_box(data: bytes, start: int, end: int, *path: bytes) -> tuple[int, int] | None:
+    """경로를 따라 하위 박스 검색 (본문 시작, 끝 위치)"""
+    for box_type in path:
+        found = next((
+            (body, box_end) for child_type, body, box_end in _iter_buffer_boxes(data, start, end)
+            if child_type == box_type
+        ), None)
+        if found is None:
+            return None
+        start, end = found
+    return start, end
+
+
+def _unpack_table(data: bytes, offset: int, count: int, fields: str) -> tuple[int, ...]:
+    """count개 항목의 big-endian 테이블 (항목당 fields 형식)"""
+    try:
+        return struct.unpack_from(f">{fields * count}", data, offset)
+    except struct.error:
+        raise Mp4Error("Truncated sample table")
+
+
+def _sample_table_keyframes(data: bytes, stbl: tuple[int, int], timescale: int) -> KeyframeTable:
+    """
+    stbl 박스의 샘플 테이블로 키프레임 시각/offset 계산
+
+    - stss가 없으면 모든 샘플이 키프레임
+    - 시각은 stts 기준 디코딩 시각 (편집 목록(elst)과 ctts는 반영하지 않음)
+    """
+    tables = {box_type: body for box_type, body, _ in _iter_buffer_boxes(data, *stbl)}
+    for required in (b"stts", b"stsc", b"stsz"):
+        if required not in tables:
+            raise Mp4Error(f"Missing {required.decode()} box")
+
+    # 샘플 크기 (stsz: version/flags, sample_size, sample_count, [sizes])
+    body = tables[b"stsz"]
+    sample_size, sample_count = struct.unpack_from(">II", data, body + 4)
+    sizes = None if sample_size else _unpack_table(data, body + 12, sample_count, "I")
+
+    # chunk offset (stco 또는 co64)
+    if b"stco" in tables:
+        body = tables[b"stco"]
+        chunk_offsets = _unpack_table(data, body + 8, struct.unpack_from(">I", data, body + 4)[0], "I")
+    elif b"co64" in tables:
+        body = tables[b"co64"]
+        chunk_offsets = _unpack_table(data, body + 8, struct.unpack_from(">I", data, body + 4)[0], "Q")
+    else:
+        raise Mp4Error("Missing chunk offset box")
+
+    # 키프레임 샘플 번호 (1부터 시작)
+    if b"stss" in tables:
+        body = tables[b"stss"]
+        sync_samples = sorted(_unpack_table(data, body + 8, struct.unpack_from(">I", data, body + 4)[0], "I"))
+    else:
+        sync_samples = range(1, sample_count + 1)
+
+    body = tables[b"stts"]
+    stts = _unpack_table(data, body + 8, struct.unpack_from(">I", data, body + 4)[0], "II")
+    body = tables[b"stsc"]
+    stsc = _unpack_table(data, body + 8, struct.unpack_from(">I", data, body + 4)[0], "III")
+
+    def chunks() -> Iterator[tuple[int, int, int]]:
+        """(chunk offset, chunk의 첫 샘플 번호, chunk의 샘플 수) 순회"""
+        first_sample = 1
+        runs = len(stsc) // 3
+        for run in range(runs):
+            first_chunk, samples_per_chunk = stsc[run * 3], stsc[run * 3 + 1]
+            last_chunk = stsc[(run + 1) * 3] - 1 if run + 1 < runs else len(chunk_offsets)
+            for chunk in range(first_chunk, last_chunk + 1):
+                if chunk > len(chunk_offsets):
+                    raise Mp4Error("Sample-to-chunk table exceeds chunk count")
+                yield chunk_offsets[chunk - 1], first_sample, samples_per_chunk
+                first_sample += samples_per_chunk
+
+    times = []
+    offsets = []
+    chunk_iter = chunks()
+    chunk_offset, chunk_first, chunk_samples = 0, 1, 0
+    stts_index = 0
+    stts_first, stts_time = 1, 0  # 현재 stts 항목의 첫 샘플 번호와 시각
+    for sample in sync_samples:
+        if not 1 <= sample <= sample_count:
+            raise Mp4Error("Sync sample out of range")
+        # 디코딩 시각
+        while stts_index * 2 < len(stts) and sample >= stts_first + stts[stts_index * 2]:
+            stts_first += stts[stts_index * 2]
+            stts_time += stts[stts_index * 2] * stts[stts_index * 2 + 1]
+            stts_index += 1
+        if stts_index * 2 >= len(stts):
+            raise Mp4Error("Time-to-sample table is shorter than sample count")
+        times.append(stts_time + (sample - stts_first) * stts[stts_index * 2 + 1])
+
+        # 샘플이 속한 chunk와 chunk 안의 위치
+        while sample >= chunk_first + chunk_samples:
+            try:
+                chunk_offset, chunk_first, chunk_samples = next(chunk_iter)
+            except StopIteration:
+                raise Mp4Error("Sample-to-chunk table is shorter than sample count")
+        if sizes is None:
+            offsets.append(chunk_offset + (sample - chunk_first) * sample_size)
+        else:
+            offsets.append(chunk_offset + sum(sizes[chunk_first - 1:sample - 1]))
+
+    return KeyframeTable(timescale, times, offsets)
+
+
+def _read_moov(path: str) -> tuple[list[Box], Box, bytes]:
+    """
+    최상위 박스 목록, moov 박스 위치와 내용
+
+    Raises:
+        Mp4Error: MP4 구조가 아니거나 moov 박스가 없는 경우
+    """
+    boxes = read_top_level_boxes(path)
+    moov = next((box for box in boxes if box.type == b"moov"), None)
+    if moov is None:
+        raise Mp4Error("Missing moov box")
+    with open(path, "rb") as f:
+        f.seek(moov.offset)
+        return boxes, moov, f.read(moov.size)
+
+
+def read_keyframes(path: str) -> KeyframeTable:
+    """
+    첫 번째 비디오 트랙의 키프레임 테이블 읽기 (moov 박스만 읽음)
+
+    Raises:
+        Mp4Error: MP4 구조가 아니거나 비디오 트랙/샘플 테이블이 없는 경우
+    """
+    _, moov, data = _read_moov(path)
+
+    for box_type, body, end in _iter_buffer_boxes(data, moov.header_size, moov.size):
+        if box_type == b"cmov":
+            raise Mp4Error("Compressed moov is not supported")
+        if box_type != b"trak":
+            continue
+        mdia = _find_box(data, body, end, b"mdia")
+        if mdia is None or _handler_type(data, mdia) != b"vide":
+            continue
+        mdhd = _find_box(data, *mdia, b"mdhd")
+        stbl = _find_box(data, *mdia, b"minf", b"stbl")
+        if mdhd is None or stbl is None:
+            raise Mp4Error("Incomplete video track")
+        # mdhd: version 1은 생성/수정 시각이 64비트
+        timescale_at = mdhd[0] + (20 if data[mdhd[0]] == 1 else 12)
+        timescale = struct.unpack_from(">I", data, timescale_at)[0]
+        if timescale == 0:
+            raise Mp4Error("Invalid media timescale")
+        return _sample_table_keyframes(data, stbl, timescale)
+
+    raise Mp4Error("No video track")
+
+
+def _handler_type(data: bytes, mdia: tuple[int, int]) -> bytes | None:
+    """트랙 종류 (vide, soun, ...)"""
+    hdlr = _find_box(data, *mdia, b"hdlr")
+    # hdlr: version/flags(4) + pre_defined(4) + handler_type(4)
+    return data[hdlr[0] + 8:hdlr[0] + 12] if hdlr is not None else None
+
+
+# ==================== 미디어 정보 ====================
+
+# 샘플 엔트리 fourcc → 코덱 이름 (ffprobe codec_name과 같게 맞춤)
+_CODEC_NAMES = {
+    b"avc1": "h264",
+    b"avc3": "h264",
+    b"hvc1": "hevc",
+    b"hev1": "hevc",
+    b"av01": "av1",
+    b"vp08": "vp8",
+    b"vp09": "vp9",
+    b"mp4v": "mpeg4",
+    b"mp4a": "aac",
+    b"Opus": "opus",
+    b"fLaC": "flac",
+    b"ac-3": "ac3",
+    b"ec-3": "eac3",
+    b".mp3": "mp3",
+}
+
+
+class MediaInfo(NamedTuple):
+    """비디오 파일의 미디어 정보 (알 수 없는 값은 None)"""
+    duration: float | None    # 초
+    width: int | None         # 첫 번째 비디오 트랙 (회전 행렬은 반영하지 않음)
+    height: int | None
+    video_codec: str | None   # h264, hevc, vp9, ...
+    audio_codec: str | None   # aac, opus, ...
+    bitrate: int | None       # 전체 평균 (bit/s)
+    faststart: bool | None    # moov가 mdat보다 앞 (MP4/MOV가 아니면 None)
+
+
+def _sample_entry_codec(data: bytes, mdia: tuple[int, int]) -> str | None:
+    """stsd 첫 번째 샘플 엔트리의 코덱"""
+    stsd = _find_box(data, *mdia, b"minf", b"stbl", b"stsd")
+    # stsd: version/flags(4) + entry_count(4) + 첫 엔트리 size(4) + format(4)
+    if stsd is None or stsd[0] + 16 > stsd[1]:
+        return None
+    fourcc = data[stsd[0] + 12:stsd[0] + 16]
+    # 모르는 코덱은 fourcc 그대로 (목록 필터와 맞추어 소문자)
+    return _CODEC_NAMES.get(fourcc, fourcc.decode("latin-1").strip().lower() or None)
+
+
+def read_media_info(path: str) -> MediaInfo:
+    """
+    moov 박스로 미디어 정보 읽기 (ffprobe 없이)
+
+    - 길이: mvhd (fragmented MP4처럼 0이면 None)
+    - 해상도: 첫 번째 비디오 트랙의 tkhd
+    - 코덱: 비디오/오디오 트랙별 첫 번째 샘플 엔트리
+    - 비트레이트: 파일 크기 / 길이
+
+    Raises:
+        Mp4Error: MP4 구조가 아니거나 moov 박스가 없는 경우
+    """
+    boxes, moov, data = _read_moov(path)
+    start = moov.header_size
+
+    duration = None
+    mvhd = _find_box(data, start, moov.size, b"mvhd")
+    if mvhd is not None:
+        # mvhd: version 1은 생성/수정 시각과 길이가 64비트
+        version1 = data[mvhd[0]] == 1
+        fields = ">IQ" if version1 else ">II"
+        try:
+            timescale, length = struct.unpack_from(fields, data, mvhd[0] + (20 if version1 else 12))
+        except struct.error:
+            raise Mp4Error("Truncated mvhd box")
+        if timescale and length:
+            duration = length / timescale
+
+    width = height = video_codec = audio_codec = None
+    for box_type, body, end in _iter_buffer_boxes(data, start, moov.size):
+        if box_type != b"trak":
+            continue
+        mdia = _find_box(data, body, end, b"mdia")
+        handler = _handler_type(data, mdia) if mdia is not None else None
+        if handler == b"vide" and video_codec is None:
+            video_codec = _sample_entry_codec(data, mdia)
+            tkhd = _find_box(data, body, end, b"tkhd")
+            # tkhd 마지막 8바이트: 표시 가로/세로 (16.16 고정소수점)
+            if tkhd is not None and tkhd[1] - tkhd[0] >= 84:
+                track_width, track_height = struct.unpack_from(">II", data, tkhd[1] - 8)
+                width, height = (track_width >> 16) or None, (track_height >> 16) or None
+        elif handler == b"soun" and audio_codec is None:
+            audio_codec = _sample_entry_codec(data, mdia)
+
+    bitrate = None
+    if duration:
+        bitrate = round(os.path.getsize(path) * 8 / duration)
+    return MediaInfo(duration, width, height, video_codec, audio_codec, bitrate, not needs_faststart(boxes))
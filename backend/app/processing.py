@@ -0,0 +1,383 @@
+"""
+업로드 후처리 작업 큐
+- 작업은 processing_jobs 테이블에 게시물 생성과 같은 트랜잭션으로 저장 (재시작해도 남은 작업을 이어서 처리)
+- 작업 종류별 우선순위: prepare(faststart 재작성 + 미디어 정보 + 키프레임 인덱스) > 썸네일 > 스프라이트 > HLS > 화질별 트랜스코딩
+- 작업 스레드 PROCESSING_WORKERS개가 우선순위 순으로 하나씩 가져가 실행
+  (조건부 UPDATE로 가져가므로 여러 프로세스가 같은 DB를 나눠 처리해도 한 작업은 한 곳에서만 실행)
+- 실패하면 PROCESSING_RETRY_DELAY부터 두 배씩 늘려가며 PROCESSING_MAX_ATTEMPTS번까지 시도
+- 실행 중인 작업은 PROCESSING_LEASE_SECONDS 동안 임대하고 실행하는 동안 주기적으로 연장
+  (오래 걸리는 작업이 다시 임대되지 않음, 프로세스가 종료되어 끝나지 않은 작업은 임대가 끝나면 다시 실행)
+
+무거운 처리(ffmpeg)는 별도 프로세스에서 실행되므로 작업 스레드는 대부분 기다리기만 합니다.
+"""
+
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Callable
+
+from sqlalchemy.orm import Session
+
+from app.config import (
+    PROCESSING_LEASE_SECONDS,
+    PROCESSING_MAX_ATTEMPTS,
+    PROCESSING_POLL_INTERVAL,
+    PROCESSING_RETRY_DELAY,
+    PROCESSING_WORKERS,
+)
+from app.database import SessionLocal
+from app.media_utils import (
+    faststart_for_post,
+    generate_sprite_for_post,
+    generate_thumbnails_for_post,
+    get_video_path,
+    index_keyframes_for_post,
+    invalidate_segments,
+    media_info_values,
+    package_hls_for_post,
+    probe_media,
+    transcode_renditions_for_post,
+)
+from app.metadata_cache import metadata_cache
+from app.models import Post, ProcessingJob, VideoBlob
+from app.stream_tickets import ticket_revocations
+from app.video_store import remove_video_files
+
+logger = logging.getLogger(__name__)
+
+# 클수록 먼저 실행
+JOB_PRIORITIES = {
+    "prepare": 40,
+    "thumbnails": 30,
+    "sprite": 20,
+    "hls": 10,
+    "renditions": 0,
+}
+
+
+def prepare_video(db: Session, post: Post) -> None:
+    """
+    faststart 재작성 → 미디어 정보 조회 → 키프레임 인덱스 생성
+
+    미디어 정보와 인덱스는 재작성한 파일 기준이므로 한 작업에서 순서대로 실행합니다.
+    같은 파일을 쓰는 게시물의 미디어 정보(ffprobe 결과 포함)를 함께 갱신하고,
+    재작성했으면 크기와 스트리밍 캐시도 갱신합니다.
+    """
+    video_filename = post.video_filename
+    rewritten = faststart_for_post(video_filename)
+    video_path = get_video_path(video_filename)
+    info = probe_media(video_path)
+
+    posts = db.query(Post).filter(Post.video_filename == video_filename).all()
+    if not posts:
+        # 처리하는 동안 마지막 게시물이 삭제됨
+        if rewritten:
+            remove_video_files(video_filename)
+        return
+    size = os.path.getsize(video_path) if rewritten else None
+    for shared in posts:
+        if info is not None:
+            for column, value in media_info_values(info).items():
+                setattr(shared, column, value)
+        if size is not None:
+            shared.video_size = size
+    if size is not None:
+        db.query(VideoBlob).filter(VideoBlob.filename == video_filename).update({"size": size})
+    db.commit()
+    if rewritten:
+        invalidate_segments(video_filename)
+        for shared in posts:
+            metadata_cache.invalidate(shared.id)
+            # 발급된 티켓의 파일 정보(크기, 수정 시각)가 바뀜
+            ticket_revocations.revoke_post(shared.id, db)
+    index_keyframes_for_post(video_filename)
+
+
+def _thumbnails(db: Session, post: Post) -> None:
+    generate_thumbnails_for_post(post.video_filename)
+
+
+def _sprite(db: Session, post: Post) -> None:
+    generate_sprite_for_post(post.video_filename)
+
+
+def _hls(db: Session, post: Post) -> None:
+    package_hls_for_post(post.video_filename)
+
+
+def _renditions(db: Session, post: Post) -> None:
+    transcode_renditions_for_post(db, post.id, post.video_filename)
+
+
+# 작업 종류 → 실행 함수 (실패 시 예외를 던지면 재시도)
+JOB_HANDLERS: dict[str, Callable[[Session, Post], None]] = {
+    "prepare": prepare_video,
+    "thumbnails": _thumbnails,
+    "sprite": _sprite,
+    "hls": _hls,
+    "renditions": _renditions,
+}
+
+
+class ProcessingQueue:
+    """
+    processing_jobs 테이블 기반 작업 큐와 작업 스레드
+
+    - new_job: 등록할 작업 생성 (게시물과 같은 트랜잭션으로 commit)
+    - wake: commit 후 호출하면 대기 중인 작업 스레드가 바로 시작
+    - run_next / run_pending: 현재 스레드에서 작업 실행 (작업 스레드 없이 처리할 때)
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        max_attempts: int,
+        retry_delay: float,
+        poll_interval: float,
+        lease_seconds: float,
+        session_factory=SessionLocal,
+    ) -> None:
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.session_factory = session_factory
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._threads: list[threading.Thread] = []
+        self._lock = threading.Lock()
+        self._reset_counters()
+
+    def _reset_counters(self) -> None:
+        self.running = 0
+        self.succeeded_total = 0
+        self.retried_total = 0
+        self.failed_total = 0
+
+    def configure(self, **options) -> None:
+        """설정 변경 (workers, max_attempts, retry_delay, poll_interval, lease_seconds, session_factory)"""
+        for name, value in options.items():
+            if not hasattr(self, name):
+                raise AttributeError(name)
+            setattr(self, name, value)
+
+    def new_job(self, kind: str, now: datetime | None = None) -> ProcessingJob:
+        """바로 실행할 수 있는 작업 (종류별 우선순위)"""
+        return ProcessingJob(
+            kind=kind,
+            priority=JOB_PRIORITIES[kind],
+            status="pending",
+            attempts=0,
+            max_attempts=self.max_attempts,
+            run_at=now or datetime.now(timezone.utc),
+        )
+
+    def wake(self) -> None:
+        """새 작업을 등록했음을 작업 스레드에 알림"""
+        self._wake.set()
+
+    def claim(self, db: Session, now: datetime | None = None) -> ProcessingJob | None:
+        """
+        실행할 작업 하나를 가져가 임대
+
+        대기 중이거나 임대가 끝난 작업 중 우선순위가 가장 높은 작업.
+        다른 워커가 먼저 가져간 작업은 조건부 UPDATE가 실패하므로 다음 후보를 시도합니다.
+        """
+        now = now or datetime.now(timezone.utc)
+        claimable = (
+            ProcessingJob.status.in_(("pending", "running")),
+            ProcessingJob.run_at <= now,
+        )
+        # 임대가 끝났는데 시도 횟수를 다 쓴 작업 (실행 중에 프로세스가 계속 종료됨)
+        db.query(ProcessingJob).filter(
+            *claimable, ProcessingJob.attempts >= ProcessingJob.max_attempts
+        ).update(
+            {"status": "failed", "finished_at": now, "last_error": "Lease expired"},
+            synchronize_session=False
+        )
+        db.commit()
+
+        candidates = (
+            db.query(ProcessingJob.id)
+            .filter(*claimable)
+            .order_by(ProcessingJob.priority.desc(), ProcessingJob.run_at, ProcessingJob.id)
+            .limit(self.workers + 1)
+            .all()
+        )
+        for (job_id,) in candidates:
+            claimed = db.query(ProcessingJob).filter(ProcessingJob.id == job_id, *claimable).update(
+                {
+                    "status": "running",
+                    "attempts": ProcessingJob.attempts + 1,
+                    "run_at": now + timedelta(seconds=self.lease_seconds),
+                    "started_at": now,
+                },
+                synchronize_session=False
+            )
+            db.commit()
+            if claimed:
+                return db.get(ProcessingJob, job_id)
+        return None
+
+    def _finish(self, db: Session, job_id: int, attempts: int, max_attempts: int, now: datetime,
+                error: Exception | None = None) -> None:
+        if error is None:
+            values = {"status": "succeeded", "finished_at": now, "last_error": None}
+            counter = "succeeded_total"
+        elif attempts < max_attempts:
+            delay = self.retry_delay * 2 ** (attempts - 1)
+            values = {"status": "pending", "run_at": now + timedelta(seconds=delay), "last_error": str(error)[:1000]}
+            counter = "retried_total"
+        else:
+            values = {"status": "failed", "finished_at": now, "last_error": str(error)[:1000]}
+            counter = "failed_total"
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+        # 실행 중 게시물이 삭제되었으면 작업 행도 없음
+        db.query(ProcessingJob).filter(
+            ProcessingJob.id == job_id, ProcessingJob.status == "running"
+        ).update(values, synchronize_session=False)
+        db.commit()
+
+    def _renew_lease(self, job_id: int, attempts: int) -> None:
+        # 다른 워커가 다시 임대했으면(시도 횟수 증가) 연장하지 않음
+        db = self.session_factory()
+        try:
+            db.query(ProcessingJob).filter(
+                ProcessingJob.id == job_id,
+                ProcessingJob.status == "running",
+                ProcessingJob.attempts == attempts,
+            ).update(
+                {"run_at": datetime.now(timezone.utc) + timedelta(seconds=self.lease_seconds)},
+                synchronize_session=False
+            )
+            db.commit()
+        except Exception as e:
+            logger.warning("Renewing lease of processing job %d failed: %s", job_id, e)
+        finally:
+            db.close()
+
+    @contextmanager
+    def _leased(self, job_id: int, attempts: int):
+        """작업을 실행하는 동안 임대 시간의 1/3마다 임대 연장"""
+        done = threading.Event()
+
+        def heartbeat() -> None:
+            while not done.wait(self.lease_seconds / 3):
+                self._renew_lease(job_id, attempts)
+
+        thread = threading.Thread(target=heartbeat, name=f"processing-lease-{job_id}", daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            done.set()
+            thread.join()
+
+    def run_next(self, now: datetime | None = None) -> bool:
+        """
+        작업 하나 실행
+
+        Args:
+            now: 기준 시각 (테스트용) - 없으면 임대는 가져간 시각, finished_at과 재시도 대기는 끝난 시각 기준
+
+        Returns:
+            실행할 작업이 있었으면 True
+        """
+        db = self.session_factory()
+        try:
+            job = self.claim(db, now or datetime.now(timezone.utc))
+            if job is None:
+                return False
+            job_id, kind, attempts, max_attempts = job.id, job.kind, job.attempts, job.max_attempts
+            post = job.post
+            with self._lock:
+                self.running += 1
+            try:
+                with self._leased(job_id, attempts):
+                    JOB_HANDLERS[kind](db, post)
+            except Exception as e:
+                db.rollback()
+                logger.warning("Processing job %d (%s) failed on attempt %d: %s", job_id, kind, attempts, e)
+                self._finish(db, job_id, attempts, max_attempts, now or datetime.now(timezone.utc), e)
+            else:
+                self._finish(db, job_id, attempts, max_attempts, now or datetime.now(timezone.utc))
+            finally:
+                with self._lock:
+                    self.running -= 1
+            return True
+        finally:
+            db.close()
+
+    def run_pending(self, now: datetime | None = None) -> int:
+        """
+        지금 실행할 수 있는 작업을 모두 실행 (재시도 대기 중인 작업 제외)
+
+        Returns:
+            실행한 작업 수
+        """
+        count = 0
+        while self.run_next(now):
+            count += 1
+        return count
+
+    def _run_next_logged(self) -> bool:
+        try:
+            return self.run_next()
+        except Exception as e:
+            logger.warning("Processing queue failed: %s", e)
+            return False
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            self._wake.clear()
+            while not self._stopping.is_set() and self._run_next_logged():
+                pass
+            self._wake.wait(self.poll_interval)
+
+    def start(self) -> None:
+        """작업 스레드 시작 (workers가 0이거나 이미 실행 중이면 무시)"""
+        if self._threads:
+            return
+        self._stopping.clear()
+        self._threads = [
+            threading.Thread(target=self._run, name=f"processing-{index}", daemon=True)
+            for index in range(self.workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self) -> None:
+        """작업 스레드 종료 (실행 중인 작업이 끝날 때까지 기다림)"""
+        self._stopping.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "max_attempts": self.max_attempts,
+            "running": self.running,
+            "succeeded_total": self.succeeded_total,
+            "retried_total": self.retried_total,
+            "failed_total": self.failed_total,
+        }
+
+    def reset(self) -> None:
+        """카운터 초기화 (테스트용)"""
+        self._reset_counters()
+
+
+# 프로세스 전역 작업 큐
+processing_queue = ProcessingQueue(
+    PROCESSING_WORKERS,
+    PROCESSING_MAX_ATTEMPTS,
+    PROCESSING_RETRY_DELAY,
+    PROCESSING_POLL_INTERVAL,
+    PROCESSING_LEASE_SECONDS,
+)
@@ -0,0 +1,138 @@
+"""
+시청 위치 (이어보기) 모듈
+- 플레이어가 몇 초마다 보고하는 위치를 사용자/게시물별 최신 값 하나로 합쳐 메모리에 보관
+- 주기 또는 대기 항목 수에 도달하면 한 트랜잭션으로 upsert (보고 시각이 더 최신인 경우만 갱신)
+- 조회는 메모리(아직 기록되지 않은 값) → DB 순
+- 종료 시 남은 위치 기록 (lifespan)
+"""
+
+from datetime import datetime, timezone
+from typing import NamedTuple
+
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+
+from app.config import PROGRESS_FLUSH_INTERVAL, PROGRESS_FLUSH_THRESHOLD
+from app.models import WatchProgress
+from app.write_behind import WriteBehindBuffer
+
+
+class ProgressEntry(NamedTuple):
+    """시청 위치"""
+    position: float  # 초
+    duration: float | None  # 초
+    updated_at: datetime  # 보고 시각 (UTC)
+
+    @classmethod
+    def from_row(cls, row: WatchProgress) -> "ProgressEntry":
+        updated_at = row.updated_at
+        # SQLite는 시간대를 저장하지 않음 (UTC로 기록)
+        if updated_at.tzinfo is None:
+            updated_at = updated_at.replace(tzinfo=timezone.utc)
+        return cls(row.position, row.duration, updated_at)
+
+
+class ProgressBuffer(WriteBehindBuffer):
+    """
+    시청 위치 coalescing 버퍼
+
+    - 대기 항목: (사용자, 게시물) → 최신 ProgressEntry (이전 보고는 덮어씀)
+    - 보고가 아무리 잦아도 flush 한 번에 (사용자, 게시물)당 한 행만 기록
+    """
+
+    name = "progress"
+
+    def record(self, user_id: int, post_id: int, position: float, duration: float | None = None) -> ProgressEntry:
+        """
+        시청 위치 보고 (메모리 갱신만, DB 접근 없음)
+
+        Returns:
+            기록한 위치 (보고 시각 포함)
+        """
+        entry = ProgressEntry(position, duration, datetime.now(timezone.utc))
+        with self._lock:
+            self._pending[(user_id, post_id)] = entry
+            self._recorded()
+        return entry
+
+    def get(self, user_id: int, post_id: int) -> ProgressEntry | None:
+        """아직 DB에 기록되지 않은 위치 (없으면 None)"""
+        with self._lock:
+            key = (user_id, post_id)
+            return self._pending.get(key) or self._flushing.get(key)
+
+    def get_user(self, user_id: int) -> dict[int, ProgressEntry]:
+        """사용자의 아직 기록되지 않은 위치 (게시물 ID → 위치)"""
+        with self._lock:
+            entries = {
+                post_id: entry for (owner, post_id), entry in self._flushing.items() if owner == user_id
+            }
+            entries.update(
+                (post_id, entry) for (owner, post_id), entry in self._pending.items() if owner == user_id
+            )
+        return entries
+
+    def discard(self, user_id: int | None = None, post_id: int | None = None) -> None:
+        """삭제된 사용자/게시물의 대기 중인 위치 제거"""
+        with self._lock:
+            for key in [
+                key for key in self._pending
+                if (user_id is not None and key[0] == user_id) or (post_id is not None and key[1] == post_id)
+            ]:
+                del self._pending[key]
+
+    def _merge(self, batch: dict[tuple[int, int], ProgressEntry]) -> None:
+        # 기록에 실패하는 동안 들어온 더 최신 보고는 유지
+        for key, entry in batch.items():
+            current = self._pending.get(key)
+            if current is None or current.updated_at < entry.updated_at:
+                self._pending[key] = entry
+
+    def _write(self, session: Session, batch: dict[tuple[int, int], ProgressEntry]) -> None:
+        """(사용자, 게시물) 행 upsert - 다른 워커가 기록한 더 최신 위치는 덮어쓰지 않음"""
+        rows = [
+            {
+                "user_id": user_id,
+                "post_id": post_id,
+                "position": entry.position,
+                "duration": entry.duration,
+                "updated_at": entry.updated_at,
+            }
+            for (user_id, post_id), entry in batch.items()
+        ]
+        statement = insert(WatchProgress)
+        statement = statement.on_conflict_do_update(
+            index_elements=["user_id", "post_id"],
+            set_={
+                "position": statement.excluded.position,
+                "duration": statement.excluded.duration,
+                "updated_at": statement.excluded.updated_at,
+            },
+            where=WatchProgress.updated_at <= statement.excluded.updated_at
+        )
+        session.execute(statement, rows)
+
+
+def load_progress(db: Session, user_id: int, post_ids: list[int]) -> dict[int, ProgressEntry]:
+    """
+    여러 게시물의 시청 위치 조회 (DB 조회 한 번 + 아직 기록되지 않은 위치)
+
+    Returns:
+        게시물 ID → 위치 (위치가 없는 게시물은 제외)
+    """
+    if not post_ids:
+        return {}
+    rows = db.query(WatchProgress).filter(
+        WatchProgress.user_id == user_id,
+        WatchProgress.post_id.in_(post_ids)
+    ).all()
+    entries = {row.post_id: ProgressEntry.from_row(row) for row in rows}
+    wanted = set(post_ids)
+    entries.update(
+        (post_id, entry) for post_id, entry in progress_buffer.get_user(user_id).items() if post_id in wanted
+    )
+    return entries
+
+
+# 프로세스 전역 시청 위치 버퍼
+progress_buffer = ProgressBuffer(PROGRESS_FLUSH_INTERVAL, PROGRESS_FLUSH_THRESHOLD)
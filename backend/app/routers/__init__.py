@@ -1,3 +1,3 @@
-from app.routers import examples, auth, posts, stream, permissions, admin
+from app.routers import examples, auth, posts, stream, permissions, admin, uploads
 
-__all__ = ["examples", "auth", "posts", "stream", "permissions", "admin"]
+__all__ = ["examples", "auth", "posts", "stream", "permissions", "admin", "uploads"]
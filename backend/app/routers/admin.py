@@ -2,19 +2,37 @@
 Admin API 라우터
 - 관리자 전용 사용자 관리
 - 관리자 전용 게시물 관리
+- 스트리밍 캐시 상태
+- 스트리밍 대역폭 할당 상태
+- 동시 스트림 수 / 대기열 상태
+- 게시물별/일별 조회수, 전송량 통계
+- 비디오 저장소 중복 제거 현황
+- 업로드 후처리 작업 큐 상태
 """
 
-import os
+from datetime import datetime, timedelta, timezone
 from typing import List
 
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import distinct, func
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
 
 from app.database import get_db
-from app.models import User, Post, PostPermission
+from app.models import User, Post, PostPermission, ProcessingJob, StreamStat, UploadSession, WatchProgress
 from app.schemas import UserResponse, UserAdminUpdate, PostListResponse
 from app.dependencies import get_current_admin
-from app.config import UPLOAD_DIR
+from app.segment_cache import segment_cache
+from app.clip_cache import clip_cache
+from app.metadata_cache import metadata_cache
+from app.bandwidth import bandwidth_scheduler
+from app.admission import stream_admission
+from app.analytics import analytics_collector
+from app.processing import processing_queue
+from app.progress import progress_buffer
+from app.upload_sessions import discard_session
+from app.stream_tickets import ticket_revocations
+from app.video_store import discard_unreferenced_video, release_video, storage_stats
 
 router = APIRouter(prefix="/api/admin", tags=["admin"])
 
@@ -42,6 +60,178 @@ def get_admin_stats(
     }
 
 
+@router.get("/cache")
+def get_cache_stats(
+    current_admin: User = Depends(get_current_admin)
+):
+    """
+    스트리밍 캐시 상태 조회 (관리자 전용)
+
+    - 핫 세그먼트 캐시 적중/미스, 사용량
+    - 메타데이터 캐시 적중/미스
+    - 클립 디스크 캐시 적중/미스, 사용량, 삭제 수
+    """
+    return {
+        "segments": segment_cache.stats(),
+        "metadata": metadata_cache.stats(),
+        "clips": clip_cache.stats()
+    }
+
+
+@router.get("/bandwidth")
+def get_bandwidth_stats(
+    current_admin: User = Depends(get_current_admin)
+):
+    """
+    스트리밍 대역폭 할당 상태 조회 (관리자 전용)
+
+    - 전체/사용자별 제한 속도
+    - 활성 사용자별 연결 수, 가중치, 현재 할당량, 최근 전송 속도
+    - 누적 전송량, 대기 횟수/시간
+    """
+    return bandwidth_scheduler.stats()
+
+
+@router.get("/streams")
+def get_stream_admission_stats(
+    current_admin: User = Depends(get_current_admin)
+):
+    """
+    동시 스트림 상태 조회 (관리자 전용)
+
+    - 워커/사용자별 최대 동시 스트림 수, 대기열 크기
+    - 현재 스트림 수 (사용자별), 대기 중인 요청 수 (재생 중인 세션 포함)
+    - 누적 허용/대기/거절/대기 시간 초과 횟수
+    """
+    return stream_admission.stats()
+
+
+@router.get("/analytics")
+def get_stream_analytics(
+    days: int = 30,
+    limit: int = 20,
+    post_id: int | None = None,
+    db: Session = Depends(get_db),
+    current_admin: User = Depends(get_current_admin)
+):
+    """
+    스트리밍 통계 조회 (관리자 전용)
+
+    - 메모리에 대기 중인 통계를 먼저 기록한 뒤 롤업 테이블에서 집계
+    - 최근 days일(UTC, 오늘 포함)의 전체 합계, 게시물별 합계 (전송량 순 상위 limit개), 일별 합계
+    - post_id를 지정하면 해당 게시물만 집계
+    - 집계기 상태 (대기 중인 항목, flush 횟수)
+    """
+    if not 1 <= days <= 365 or not 1 <= limit <= 100:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="days must be 1-365 and limit must be 1-100"
+        )
+
+    # 기록에 실패해도 대기열에 남아 다음 flush에서 다시 기록 (failed_flushes_total로 확인)
+    try:
+        analytics_collector.flush(db)
+    except SQLAlchemyError:
+        pass
+
+    since = datetime.now(timezone.utc).date() - timedelta(days=days - 1)
+    filters = [StreamStat.day >= since]
+    if post_id is not None:
+        filters.append(StreamStat.post_id == post_id)
+
+    views = func.coalesce(func.sum(StreamStat.views), 0)
+    bytes_served = func.coalesce(func.sum(StreamStat.bytes_served), 0)
+
+    total_views, total_bytes, viewers = db.query(
+        views, bytes_served, func.count(distinct(StreamStat.user_id))
+    ).filter(*filters).one()
+
+    post_rows = (
+        db.query(StreamStat.post_id, Post.title, views, bytes_served, func.count(distinct(StreamStat.user_id)))
+        .outerjoin(Post, Post.id == StreamStat.post_id)
+        .filter(*filters)
+        .group_by(StreamStat.post_id, Post.title)
+        .order_by(bytes_served.desc(), StreamStat.post_id)
+        .limit(limit)
+        .all()
+    )
+    day_rows = (
+        db.query(StreamStat.day, views, bytes_served)
+        .filter(*filters)
+        .group_by(StreamStat.day)
+        .order_by(StreamStat.day)
+        .all()
+    )
+
+    return {
+        "since": since.isoformat(),
+        "totals": {"views": total_views, "bytes_served": total_bytes, "viewers": viewers},
+        "posts": [
+            {"post_id": row[0], "title": row[1], "views": row[2], "bytes_served": row[3], "viewers": row[4]}
+            for row in post_rows
+        ],
+        "daily": [
+            {"day": row[0].isoformat(), "views": row[1], "bytes_served": row[2]}
+            for row in day_rows
+        ],
+        "collector": analytics_collector.stats()
+    }
+
+
+@router.get("/storage")
+def get_storage_stats(
+    limit: int = 20,
+    db: Session = Depends(get_db),
+    current_admin: User = Depends(get_current_admin)
+):
+    """
+    비디오 저장소 중복 제거 현황 (관리자 전용)
+
+    - 게시물 수, 저장된 파일 수, 여러 게시물이 공유하는 파일 수
+    - 게시물 기준 크기, 실제 저장 크기, 중복 제거로 아낀 크기
+    - 아낀 크기 순 공유 파일 상위 limit개 (참조 수 포함)
+    """
+    if not 1 <= limit <= 100:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="limit must be 1-100"
+        )
+    return storage_stats(db, limit)
+
+
+@router.get("/processing")
+def get_processing_stats(
+    db: Session = Depends(get_db),
+    current_admin: User = Depends(get_current_admin)
+):
+    """
+    업로드 후처리 작업 큐 상태 (관리자 전용)
+
+    - 상태별(pending, running, succeeded, failed) 작업 수 (모든 프로세스 합계)
+    - 이 프로세스의 작업 스레드 수, 실행 중인 작업 수, 누적 성공/재시도/실패 횟수
+    - 최근 실패한 작업 (최대 20개)
+    """
+    counts = dict(
+        db.query(ProcessingJob.status, func.count(ProcessingJob.id)).group_by(ProcessingJob.status).all()
+    )
+    failed = (
+        db.query(ProcessingJob)
+        .filter(ProcessingJob.status == "failed")
+        .order_by(ProcessingJob.finished_at.desc(), ProcessingJob.id.desc())
+        .limit(20)
+        .all()
+    )
+    return {
+        "jobs": {status_name: counts.get(status_name, 0) for status_name in ("pending", "running", "succeeded", "failed")},
+        "failed": [
+            {"id": job.id, "post_id": job.post_id, "kind": job.kind, "attempts": job.attempts,
+             "last_error": job.last_error}
+            for job in failed
+        ],
+        "queue": processing_queue.stats()
+    }
+
+
 # ==================== 사용자 관리 ====================
 
 @router.get("/users", response_model=List[UserResponse])
@@ -85,6 +275,7 @@ def update_user(
     사용자 정보 수정 (관리자 전용)
 
     - 자기 자신의 관리자 권한은 삭제하지 못하도록 방지
+    - 관리자 권한 해제/비활성화 시 스트림 티켓 폐기
     """
     user = db.query(User).filter(User.id == user_id).first()
     if not user:
@@ -118,6 +309,10 @@ def update_user(
     db.commit()
     db.refresh(user)
 
+    # 관리자 권한 해제 또는 비활성화 시 발급된 스트림 티켓 폐기
+    if user_data.is_admin is False or user_data.is_active is False:
+        ticket_revocations.revoke_user(user.id, db)
+
     return user
 
 
@@ -131,7 +326,8 @@ def delete_user(
     사용자 삭제 (관리자 전용)
 
     - 자기 자신은 삭제할 수 없음
-    - 해당 사용자의 게시물, 비디오 파일, 권한도 함께 삭제
+    - 해당 사용자의 게시물, 비디오 파일, 권한도 함께 삭제 (다른 게시물과 공유하는 비디오 파일은 유지)
+    - 진행 중인 업로드 세션과 받은 데이터도 삭제
     """
     user = db.query(User).filter(User.id == user_id).first()
     if not user:
@@ -149,20 +345,34 @@ def delete_user(
 
     # 해당 사용자에게 부여된 권한 삭제 (다른 사용자 게시물에 대한 권한)
     db.query(PostPermission).filter(PostPermission.user_id == user_id).delete()
+    # 해당 사용자의 시청 위치 삭제
+    db.query(WatchProgress).filter(WatchProgress.user_id == user_id).delete()
+    progress_buffer.discard(user_id=user_id)
+    # 해당 사용자의 업로드 세션과 받은 데이터 삭제
+    for upload in db.query(UploadSession).filter(UploadSession.user_id == user_id).all():
+        discard_session(db, upload)
 
     # 해당 사용자의 게시물 처리
     user_posts = db.query(Post).filter(Post.author_id == user_id).all()
+    post_ids = [post.id for post in user_posts]
+    unreferenced = set()
     for post in user_posts:
-        # 비디오 파일 삭제
-        video_path = os.path.join(UPLOAD_DIR, post.video_filename)
-        if os.path.exists(video_path):
-            os.remove(video_path)
+        # 비디오 파일 참조 해제 (다른 사용자의 게시물도 같은 파일을 쓰면 유지, 파일은 commit 뒤 삭제)
+        if release_video(db, post.video_filename):
+            unreferenced.add(post.video_filename)
+        metadata_cache.invalidate(post.id)
+        progress_buffer.discard(post_id=post.id)
         # 게시물에 부여된 권한 삭제 (Post의 cascade로 자동 삭제됨)
         db.delete(post)
 
     # 사용자 삭제
     db.delete(user)
     db.commit()
+    ticket_revocations.revoke_user(user_id, db)
+    for post_id in post_ids:
+        ticket_revocations.revoke_post(post_id, db)
+    for video_filename in unreferenced:
+        discard_unreferenced_video(db, video_filename)
 
     return {"message": "User deleted successfully"}
 
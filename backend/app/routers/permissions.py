@@ -13,6 +13,7 @@ from app.database import get_db
 from app.models import User, Post, PostPermission
 from app.schemas import PermissionCreate, PermissionResponse
 from app.dependencies import get_current_user
+from app.stream_tickets import ticket_revocations
 
 router = APIRouter(prefix="/api/posts/{post_id}/permissions", tags=["permissions"])
 
@@ -143,6 +144,7 @@ def delete_permission(
 
     - 게시물 작성자 또는 관리자만 권한 삭제 가능
     - 존재하지 않는 권한이면 404 Not Found
+    - 해당 사용자에게 발급된 스트림 티켓 폐기
     """
     check_permission_management_access(post_id, db, current_user)
 
@@ -160,5 +162,6 @@ def delete_permission(
 
     db.delete(permission)
     db.commit()
+    ticket_revocations.revoke_grant(post_id, user_id, db)
 
     return {"message": "Permission deleted successfully"}
@@ -1,23 +1,67 @@
 """
 Posts API 라우터
 - 게시물 CRUD
-- 파일 업로드
+- 파일 업로드 (본문 스트리밍 파싱, 원자적 게시, 같은 내용은 한 번만 저장)
+- 썸네일(포스터 이미지) 조회
+- 탐색 미리보기 스프라이트 시트 / WebVTT 조회
+- 시청 위치 (이어보기) 보고/조회
+- 업로드 후처리 상태 조회
+- 미디어 정보(길이, 해상도, 코덱 등)로 목록 필터
 """
 
+import asyncio
 import os
-import uuid
-import shutil
 from typing import List
 
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, status, Request
 from sqlalchemy.orm import Session
 from sqlalchemy import or_
 
 from app.database import get_db
 from app.models import User, Post, PostPermission
-from app.schemas import PostCreate, PostUpdate, PostResponse, PostListResponse
+from app.schemas import (
+    PostCreate,
+    PostUpdate,
+    PostResponse,
+    PostListResponse,
+    WatchProgressUpdate,
+    WatchProgressResponse,
+    ProcessingJobResponse,
+    ProcessingStatusResponse,
+)
 from app.dependencies import get_current_user, check_post_access
-from app.config import UPLOAD_DIR, MAX_FILE_SIZE, ALLOWED_EXTENSIONS
+from app.config import (
+    UPLOAD_DIR,
+    MAX_FILE_SIZE,
+    ALLOWED_EXTENSIONS,
+    HLS_ENABLED,
+    RENDITIONS_ENABLED,
+    SPRITES_ENABLED,
+    THUMBNAILS_ENABLED,
+    THUMBNAIL_WIDTHS,
+    THUMBNAIL_DEFAULT_WIDTH,
+)
+from app.media_utils import (
+    MEDIA_INFO_COLUMNS,
+    SPRITE_IMAGE,
+    SPRITE_VTT,
+    get_sprites_dir,
+    get_thumbnail_path,
+    media_info_values,
+    parse_thumbnail_widths,
+    probe_media,
+)
+from app.processing import processing_queue
+from app.progress import ProgressEntry, load_progress, progress_buffer
+from app.metadata_cache import metadata_cache
+from app.mp4_utils import MediaInfo
+from app.stream_tickets import ticket_revocations
+from app.stream_utils import immutable_cache_control, run_file_io, serve_file
+from app.upload_sessions import utc
+from app.upload_utils import discard_upload, receive_upload
+from app.video_store import (
+    StoredVideo, blob_filename, discard_unreferenced_video, release_video, store_video, sync_new_video
+)
 
 router = APIRouter(prefix="/api/posts", tags=["posts"])
 
@@ -33,18 +77,120 @@ def validate_file_extension(filename: str) -> str:
     return ext
 
 
-def generate_unique_filename(original_filename: str) -> str:
-    """UUID로 고유한 파일명 생성"""
-    ext = os.path.splitext(original_filename)[1].lower()
-    return f"{uuid.uuid4()}{ext}"
+def schedule_post_processing(post: Post, deduplicated: bool = False) -> None:
+    """
+    업로드 후처리 작업 등록 (게시물과 같은 트랜잭션으로 commit, commit 후 processing_queue.wake())
+
+    - prepare: faststart 재작성 + 키프레임 인덱스 (?t= 시간 기반 탐색)
+    - THUMBNAILS_ENABLED: 썸네일
+    - SPRITES_ENABLED: 탐색 미리보기 스프라이트
+    - HLS_ENABLED: HLS 패키징
+    - RENDITIONS_ENABLED: 화질별 트랜스코딩
+
+    deduplicated(같은 파일을 쓰는 게시물이 이미 있음)이면 파일 기준 파생 파일은 먼저 올린 게시물의 것을 그대로 쓰고,
+    게시물별로 기록하는 화질 단계만 등록합니다.
+    """
+    kinds = [] if deduplicated else ["prepare"]
+    if not deduplicated and THUMBNAILS_ENABLED:
+        kinds.append("thumbnails")
+    if not deduplicated and SPRITES_ENABLED:
+        kinds.append("sprite")
+    if not deduplicated and HLS_ENABLED:
+        kinds.append("hls")
+    if RENDITIONS_ENABLED:
+        kinds.append("renditions")
+    post.processing_jobs = [processing_queue.new_job(kind) for kind in kinds]
+
+
+def upload_media_info(db: Session, stored: StoredVideo, info: MediaInfo | None) -> dict:
+    """
+    업로드 시점 미디어 정보 (게시물 컬럼 값)
+
+    - 같은 파일을 쓰는 게시물이 있으면 그 값을 복사 (ffprobe 결과 포함)
+    - 없으면 게시 전에 임시 파일에서 조회한 info
+      (MP4/MOV는 moov 박스만 읽어 바로 조회, 그 외 형식은 prepare 작업에서 ffprobe로 조회)
+    - faststart 재작성 후 값(is_faststart 등)은 prepare 작업이 같은 파일의 게시물 모두에 갱신
+    """
+    if stored.deduplicated:
+        shared = db.query(Post).filter(Post.video_filename == stored.filename).first()
+        if shared is not None:
+            return {column: getattr(shared, column) for column in MEDIA_INFO_COLUMNS}
+    return media_info_values(info)
 
 
-@router.post("", response_model=PostResponse, status_code=status.HTTP_201_CREATED)
-def create_post(
-    title: str = Form(...),
-    description: str = Form(None),
-    is_public: str = Form("false"),
-    video: UploadFile = File(...),
+async def publish_post(db: Session, post: Post, temp_path: str, sha256: str) -> Post:
+    """
+    업로드 파일을 게시하고 게시물 저장 (POST /api/posts, 이어받기 업로드 완료 공용)
+
+    - post.video_original_name 확장자와 내용 해시로 파일명을 정하고
+      video_filename, video_size, 미디어 정보, 후처리 작업을 채움
+    - 새 내용이면 쓰기 트랜잭션 밖에서 미리 디스크에 기록(fsync), 미디어 정보도 미리 조회
+    - 참조 수 증가부터 commit까지는 await 없이 한 스레드에서 실행
+      (SQLite 쓰기 잠금을 잡은 채 이벤트 루프로 돌아가면 동시에 들어온 업로드가 잠금을 기다리다 실패)
+    - 호출한 쪽에서 미리 바꾼 내용(완료한 업로드 세션 삭제 등)도 함께 commit
+
+    Raises:
+        Exception: 기록, 게시 또는 저장 실패 (rollback 후 새로 게시한 파일은 삭제,
+            temp_path는 게시 전에 실패했으면 그대로 남음)
+    """
+    filename = blob_filename(sha256, post.video_original_name)
+    synced = await run_file_io(sync_new_video, temp_path, filename)
+    # 임시 파일도 확장자를 유지하므로 게시 전에 조회 (쓰기 트랜잭션 안에서 파일을 읽지 않음)
+    info = await run_file_io(probe_media, temp_path, False)
+
+    def save() -> None:
+        try:
+            stored = store_video(db, temp_path, filename, sha256, synced)
+            post.video_filename = stored.filename
+            post.video_size = stored.size
+            for column, value in upload_media_info(db, stored, info).items():
+                setattr(post, column, value)
+            # 업로드 후처리 작업 (게시물과 같은 트랜잭션으로 저장)
+            schedule_post_processing(post, stored.deduplicated)
+            db.add(post)
+            db.commit()
+        except Exception:
+            # 게시한 파일을 아무도 참조하지 않게 되었으면 삭제
+            db.rollback()
+            discard_unreferenced_video(db, filename)
+            raise
+
+    await asyncio.to_thread(save)
+    db.refresh(post)
+    processing_queue.wake()
+    return post
+
+
+# 업로드 폼 (본문을 직접 파싱하므로 OpenAPI 스키마를 따로 지정)
+CREATE_POST_OPENAPI = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["title", "video"],
+                    "properties": {
+                        "title": {"type": "string"},
+                        "description": {"type": "string"},
+                        "is_public": {"type": "string", "default": "false"},
+                        "video": {"type": "string", "format": "binary"},
+                    },
+                }
+            }
+        },
+    }
+}
+
+
+@router.post(
+    "",
+    response_model=PostResponse,
+    status_code=status.HTTP_201_CREATED,
+    openapi_extra=CREATE_POST_OPENAPI
+)
+async def create_post(
+    request: Request,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
@@ -52,67 +198,106 @@ def create_post(
     게시물 생성 + 파일 업로드
 
     - multipart/form-data로 제목, 설명, 공개여부, 비디오 파일 전송
-    - UUID로 파일명 생성 후 저장
+    - 본문을 받는 대로 업로드 디렉토리의 임시 파일에 기록 (디스크 쓰기 1회, SHA-256도 함께 계산)
+    - 확장자는 파일 데이터를 받기 전에, MAX_FILE_SIZE는 초과하는 즉시 확인
+    - 내용 해시로 파일명을 정해 rename으로 게시 (원자적)
+    - 같은 내용의 파일이 이미 있으면 임시 파일을 버리고 기존 파일을 참조 (업로드 후처리도 공유)
+    - MP4/MOV는 moov 박스만 읽어 미디어 정보(길이, 해상도, 코덱, 비트레이트, faststart 여부) 기록
+    - 파일을 디스크에 기록(fsync)하고 게시물과 후처리 작업을 저장하면 바로 응답
+    - 후처리(faststart 재작성, 키프레임 인덱스, 썸네일, 스프라이트, HLS, 화질별 트랜스코딩)는
+      작업 큐에서 실행 (진행 상황: GET /api/posts/{post_id}/processing)
     """
-    # is_public 문자열을 bool로 변환
-    is_public_bool = is_public.lower() in ("true", "1", "yes")
-
-    # 확장자 검증
-    validate_file_extension(video.filename)
-
-    # 업로드 디렉토리 생성
-    os.makedirs(UPLOAD_DIR, exist_ok=True)
+    upload = await receive_upload(
+        request,
+        file_field="video",
+        upload_dir=UPLOAD_DIR,
+        max_file_size=MAX_FILE_SIZE,
+        validate_filename=validate_file_extension,
+        required_fields=("title",),
+    )
 
-    # 고유한 파일명 생성
-    unique_filename = generate_unique_filename(video.filename)
-    file_path = os.path.join(UPLOAD_DIR, unique_filename)
+    # is_public 문자열을 bool로 변환
+    is_public_bool = upload.fields.get("is_public", "false").lower() in ("true", "1", "yes")
 
-    # 파일 저장 (shutil 사용)
+    new_post = Post(
+        title=upload.fields["title"],
+        description=upload.fields.get("description"),
+        video_original_name=upload.filename,
+        author_id=current_user.id,
+        is_public=is_public_bool,
+    )
     try:
-        # UploadFile의 file 객체를 직접 사용
-        video.file.seek(0)
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(video.file, buffer)
-
-        # 파일 크기 확인
-        file_size = os.path.getsize(file_path)
-
-        if file_size > MAX_FILE_SIZE:
-            os.remove(file_path)
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"File too large. Maximum size: {MAX_FILE_SIZE // (1024*1024)}MB"
-            )
-    except HTTPException:
-        raise
+        # 내용 기반 파일명으로 게시 (같은 내용이면 기존 파일 참조)
+        return await publish_post(db, new_post, upload.temp_path, upload.sha256)
     except Exception as e:
-        if os.path.exists(file_path):
-            os.remove(file_path)
+        db.rollback()
+        discard_upload(upload.temp_path)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to save file: {str(e)}"
         )
 
-    # Post 생성
-    new_post = Post(
-        title=title,
-        description=description,
-        video_filename=unique_filename,
-        video_original_name=video.filename,
-        video_size=file_size,
-        author_id=current_user.id,
-        is_public=is_public_bool
-    )
 
-    db.add(new_post)
-    db.commit()
-    db.refresh(new_post)
+def progress_response(post_id: int, entry: ProgressEntry | None) -> WatchProgressResponse:
+    """시청 위치 응답 생성 (기록이 없으면 처음부터)"""
+    if entry is None:
+        return WatchProgressResponse(post_id=post_id, position=0.0)
+    return WatchProgressResponse(post_id=post_id, **entry._asdict())
+
+
+def media_filters(
+    min_duration: float | None = None,
+    max_duration: float | None = None,
+    min_width: int | None = None,
+    max_width: int | None = None,
+    min_height: int | None = None,
+    max_height: int | None = None,
+    video_codec: str | None = None,
+    audio_codec: str | None = None,
+    faststart: bool | None = None,
+) -> list:
+    """
+    미디어 정보 목록 필터 조건
 
-    return new_post
+    - 범위는 양 끝 포함, 값을 모르는 게시물(NULL)은 제외
+    - 코덱은 대소문자 무시 (h264, hevc, vp9, aac, opus 등)
+
+    Raises:
+        HTTPException: 음수 범위이거나 최소가 최대보다 큰 경우 400
+    """
+    conditions = []
+    for name, column, low, high in (
+        ("duration", Post.duration, min_duration, max_duration),
+        ("width", Post.width, min_width, max_width),
+        ("height", Post.height, min_height, max_height),
+    ):
+        if (low is not None and low < 0) or (high is not None and high < 0):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"{name} filter must not be negative"
+            )
+        if low is not None and high is not None and low > high:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"min_{name} must not be greater than max_{name}"
+            )
+        if low is not None:
+            conditions.append(column >= low)
+        if high is not None:
+            conditions.append(column <= high)
+    if video_codec is not None:
+        conditions.append(Post.video_codec == video_codec.lower())
+    if audio_codec is not None:
+        conditions.append(Post.audio_codec == audio_codec.lower())
+    if faststart is not None:
+        conditions.append(Post.is_faststart == faststart)
+    return conditions
 
 
 @router.get("", response_model=List[PostListResponse])
 def get_posts(
+    include_progress: bool = False,
+    filters: list = Depends(media_filters),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
@@ -123,10 +308,13 @@ def get_posts(
     - public 게시물
     - 권한이 부여된 게시물
     - 관리자는 모든 게시물 조회 가능
+    - include_progress=true: 게시물마다 내 시청 위치 포함 (목록 전체에 DB 조회 한 번)
+    - 미디어 정보 필터: min_/max_duration(초), min_/max_width, min_/max_height, video_codec, audio_codec, faststart
     """
+    query = db.query(Post).filter(*filters)
     if current_user.is_admin:
         # 관리자는 모든 게시물 조회 가능
-        posts = db.query(Post).order_by(Post.created_at.desc()).all()
+        posts = query.order_by(Post.created_at.desc()).all()
     else:
         # 권한이 있는 게시물 ID 조회
         permission_post_ids = db.query(PostPermission.post_id).filter(
@@ -134,7 +322,7 @@ def get_posts(
         ).subquery()
 
         # 본인 작성, public, 권한 있는 게시물 조회
-        posts = db.query(Post).filter(
+        posts = query.filter(
             or_(
                 Post.author_id == current_user.id,
                 Post.is_public == True,
@@ -142,7 +330,16 @@ def get_posts(
             )
         ).order_by(Post.created_at.desc()).all()
 
-    return posts
+    if not include_progress:
+        return posts
+
+    progress = load_progress(db, current_user.id, [post.id for post in posts])
+    return [
+        PostListResponse.model_validate(post).model_copy(update={
+            "progress": progress_response(post.id, progress[post.id]) if post.id in progress else None
+        })
+        for post in posts
+    ]
 
 
 @router.get("/{post_id}", response_model=PostResponse)
@@ -160,6 +357,178 @@ async def get_post(
     return post
 
 
+@router.put("/{post_id}/progress", response_model=WatchProgressResponse)
+async def update_watch_progress(
+    post_id: int,
+    progress: WatchProgressUpdate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    시청 위치 보고 (플레이어가 몇 초마다 호출)
+
+    - 권한 체크 후 메모리 버퍼에 최신 위치만 보관 (DB 쓰기는 주기적으로 일괄 처리)
+    - duration을 넘는 위치는 duration으로 기록
+    """
+    await check_post_access(post_id, db, current_user)
+
+    position = progress.position
+    if progress.duration is not None:
+        position = min(position, progress.duration)
+    entry = progress_buffer.record(current_user.id, post_id, position, progress.duration)
+    return progress_response(post_id, entry)
+
+
+@router.get("/{post_id}/progress", response_model=WatchProgressResponse)
+async def get_watch_progress(
+    post_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    내 시청 위치 조회
+
+    - 아직 기록되지 않은 최신 보고가 있으면 그 위치, 없으면 DB에 기록된 위치
+    - 기록이 없으면 position 0
+    """
+    await check_post_access(post_id, db, current_user)
+
+    progress = load_progress(db, current_user.id, [post_id])
+    return progress_response(post_id, progress.get(post_id))
+
+
+def processing_status(jobs: list) -> str:
+    """
+    작업 상태로 게시물 후처리 상태 요약
+
+    - completed: 작업이 없거나 모두 성공
+    - pending: 아직 시작한 작업이 없음
+    - processing: 실행 중이거나 남은 작업이 있음 (재시도 대기 포함)
+    - failed: 남은 작업 없이 하나 이상 실패
+    """
+    statuses = {job.status for job in jobs}
+    if statuses & {"pending", "running"}:
+        started = "running" in statuses or any(job.attempts for job in jobs)
+        return "processing" if started else "pending"
+    return "failed" if "failed" in statuses else "completed"
+
+
+@router.get("/{post_id}/processing", response_model=ProcessingStatusResponse)
+async def get_processing_status(
+    post_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    업로드 후처리 진행 상황 조회 (클라이언트가 폴링)
+
+    - 권한 체크 후 작업별 상태, 시도 횟수, 재시도 예정 시각
+    - 실패 원인은 작성자/관리자에게만
+    """
+    post = await check_post_access(post_id, db, current_user)
+    show_errors = post.author_id == current_user.id or current_user.is_admin
+
+    jobs = [
+        ProcessingJobResponse(
+            kind=job.kind,
+            status=job.status,
+            priority=job.priority,
+            attempts=job.attempts,
+            max_attempts=job.max_attempts,
+            next_attempt_at=utc(job.run_at) if job.status == "pending" and job.attempts else None,
+            last_error=job.last_error if show_errors else None,
+            created_at=utc(job.created_at) if job.created_at else None,
+            started_at=utc(job.started_at) if job.started_at else None,
+            finished_at=utc(job.finished_at) if job.finished_at else None,
+        )
+        for job in sorted(post.processing_jobs, key=lambda job: (-job.priority, job.id))
+    ]
+    return ProcessingStatusResponse(post_id=post.id, status=processing_status(post.processing_jobs), jobs=jobs)
+
+
+def select_thumbnail_width(widths: list[int], requested: int | None) -> int:
+    """
+    응답할 썸네일 가로 크기 선택
+
+    - 지정하지 않으면 THUMBNAIL_DEFAULT_WIDTH 기준
+    - 요청 크기 이상인 것 중 가장 작은 크기, 모두 작으면 가장 큰 크기
+    """
+    target = THUMBNAIL_DEFAULT_WIDTH if requested is None else requested
+    return next((width for width in widths if width >= target), widths[-1])
+
+
+@router.get("/{post_id}/thumbnail")
+async def get_post_thumbnail(
+    post_id: int,
+    request: Request,
+    size: int | None = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    게시물 썸네일(포스터 이미지) 조회
+
+    - 권한 체크는 게시물 상세 조회와 동일
+    - ?size=가로 크기 (생성된 크기 중 가장 가까운 큰 크기)
+    - 강한 ETag, 긴 캐시 유효 시간 (비디오가 바뀌지 않으므로 immutable)
+    - 아직 생성되지 않았거나 ffmpeg가 없으면 404
+    """
+    post = await check_post_access(post_id, db, current_user)
+
+    width = select_thumbnail_width(parse_thumbnail_widths(THUMBNAIL_WIDTHS), size)
+    return await serve_file(
+        request,
+        get_thumbnail_path(post.video_filename, width),
+        "image/jpeg",
+        immutable_cache_control(bool(post.is_public))
+    )
+
+
+@router.get("/{post_id}/" + SPRITE_IMAGE)
+async def get_post_sprite(
+    post_id: int,
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    탐색 미리보기 스프라이트 시트 조회
+
+    - 권한 체크는 게시물 상세 조회와 동일
+    - 타일 좌표는 sprite.vtt 참고, 강한 ETag + immutable 캐시
+    - 아직 생성되지 않았거나 ffmpeg가 없으면 404
+    """
+    post = await check_post_access(post_id, db, current_user)
+    return await serve_file(
+        request,
+        os.path.join(get_sprites_dir(post.video_filename), SPRITE_IMAGE),
+        "image/jpeg",
+        immutable_cache_control(bool(post.is_public))
+    )
+
+
+@router.get("/{post_id}/" + SPRITE_VTT)
+async def get_post_sprite_vtt(
+    post_id: int,
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    탐색 미리보기 WebVTT 조회
+
+    - 시간 구간마다 sprite.jpg#xywh=x,y,w,h (이 URL 기준 상대 경로)
+    - 플레이어는 VTT와 스프라이트 이미지 한 장만 받아 hover 미리보기 표시
+    """
+    post = await check_post_access(post_id, db, current_user)
+    return await serve_file(
+        request,
+        os.path.join(get_sprites_dir(post.video_filename), SPRITE_VTT),
+        "text/vtt; charset=utf-8",
+        immutable_cache_control(bool(post.is_public))
+    )
+
+
 @router.put("/{post_id}", response_model=PostResponse)
 async def update_post(
     post_id: int,
@@ -171,6 +540,7 @@ async def update_post(
     게시물 수정
 
     - 작성자 또는 관리자만 수정 가능
+    - 비공개로 전환되면 발급된 스트림 티켓 폐기
     """
     post = db.query(Post).filter(Post.id == post_id).first()
     if not post:
@@ -186,6 +556,8 @@ async def update_post(
             detail="Not authorized to update this post"
         )
 
+    was_public = post.is_public
+
     # 수정할 필드만 업데이트
     update_data = post_data.model_dump(exclude_unset=True)
     for field, value in update_data.items():
@@ -194,6 +566,9 @@ async def update_post(
 
     db.commit()
     db.refresh(post)
+    metadata_cache.invalidate(post.id)
+    if was_public and not post.is_public:
+        ticket_revocations.revoke_post(post.id, db)
 
     return post
 
@@ -208,7 +583,7 @@ async def delete_post(
     게시물 삭제
 
     - 작성자 또는 관리자만 삭제 가능
-    - 연관된 비디오 파일도 삭제
+    - 연관된 비디오 파일과 파생 파일(HLS 등)도 삭제 (같은 파일을 쓰는 다른 게시물이 없을 때만)
     """
     post = db.query(Post).filter(Post.id == post_id).first()
     if not post:
@@ -224,13 +599,18 @@ async def delete_post(
             detail="Not authorized to delete this post"
         )
 
-    # 비디오 파일 삭제
-    video_path = os.path.join(UPLOAD_DIR, post.video_filename)
-    if os.path.exists(video_path):
-        os.remove(video_path)
+    # 비디오 파일 참조 해제 (마지막 참조이면 commit 뒤 파일 삭제)
+    video_filename = post.video_filename
+    last_reference = release_video(db, video_filename)
+    metadata_cache.invalidate(post.id)
+    progress_buffer.discard(post_id=post.id)
 
-    # 게시물 삭제 (cascade로 권한도 함께 삭제)
+    # 게시물 삭제 (cascade로 권한, 시청 위치도 함께 삭제)
+    post_id = post.id
     db.delete(post)
     db.commit()
+    ticket_revocations.revoke_post(post_id, db)
+    if last_reference:
+        discard_unreferenced_video(db, video_filename)
 
     return {"message": "Post deleted successfully"}
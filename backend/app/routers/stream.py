@@ -1,21 +1,94 @@
 """
 Stream API 라우터
 - MP4 비디오 스트리밍
-- Range 요청 지원
+- Range 요청 지원 (RFC 7233: suffix, multi-range, HEAD)
+- sendfile 기반 zero-copy 전송
+- 리버스 프록시 offload 모드
+- 비동기 파일 I/O (이벤트 루프 블로킹 방지)
+- 조건부 요청 (ETag, Last-Modified, If-Range) 및 캐시 정책
+- 핫 세그먼트 캐시 (비디오 앞/끝 구간)
+- 메타데이터 캐시 (Range 요청마다 반복되는 stat 제거)
+- 서명된 스트림 티켓 (Range 요청마다 DB 권한 조회 생략)
+- HLS 플레이리스트/세그먼트
+- 화질(rendition) 선택 (?rendition=, 대역폭 힌트 ?bw= 또는 Downlink 헤더)
+- 시간 기반 탐색 (?t=초 → 키프레임 인덱스로 byte 구간 계산)
+- 사용자별/전체 대역폭 제어 (작성자/관리자 우선)
+- 동시 스트림 수 제한 (대기열, 503 + Retry-After, 재생 중인 세션 우선)
+- 조회수/전송량 통계 집계 (메모리에 모아 일괄 기록)
+- 구간 클립 (키프레임 기준 stream copy, 디스크 LRU 캐시)
 """
 
+import asyncio
+import math
 import os
-from fastapi import APIRouter, Depends, HTTPException, status, Request
-from fastapi.responses import StreamingResponse, Response
+import re
+from datetime import datetime, timezone
+from functools import partial
+from typing import NamedTuple
+from urllib.parse import quote
+
+from fastapi import APIRouter, Cookie, Depends, HTTPException, status, Request, Response
 from sqlalchemy.orm import Session
 
+from app.admission import AdmissionRejected, StreamSlot, stream_admission
+from app.analytics import analytics_collector
+from app.bandwidth import bandwidth_scheduler
 from app.database import get_db
-from app.models import User
+from app.models import User, Post
+from app.schemas import StreamTicketResponse
 from app.dependencies import get_current_user, check_post_access
-from app.config import UPLOAD_DIR
+from app.config import (
+    UPLOAD_DIR,
+    STREAM_OFFLOAD_MODE,
+    STREAM_OFFLOAD_PREFIX,
+    STREAM_CACHE_CONTROL_PUBLIC,
+    STREAM_CACHE_CONTROL_PRIVATE,
+    RENDITION_BANDWIDTH_HEADROOM,
+    ANALYTICS_ENABLED,
+    CLIP_MAX_SECONDS,
+)
+from app.metadata_cache import RenditionMetadata, StreamMetadata, metadata_cache
+from app.keyframe_index import KeyframeIndex, keyframe_index_cache
+from app.media_utils import (
+    HLS_PLAYLIST,
+    MediaProcessingError,
+    ffmpeg_available,
+    get_hls_dir,
+    get_keyframe_index_path,
+    get_rendition_path,
+    rendition_cache_key,
+    submit_clip,
+)
+from app.stream_tickets import InvalidStreamTicket, create_stream_ticket, ticket_revocations, verify_stream_ticket
+from app.stream_utils import (
+    RangeNotSatisfiable,
+    build_offload_response,
+    build_range_response,
+    format_http_date,
+    if_range_matches,
+    is_not_modified,
+    immutable_cache_control,
+    make_etag,
+    run_file_io,
+    serve_file,
+)
 
 router = APIRouter(prefix="/api/stream", tags=["stream"])
 
+# HLS 세그먼트 파일명 (경로 조작 방지)
+HLS_SEGMENT_NAME_PATTERN = re.compile(r"seg_\d{5}\.ts")
+
+# 원본 파일을 명시적으로 요청하는 rendition 값
+ORIGINAL_RENDITION = "original"
+
+
+class StreamAccess(NamedTuple):
+    """스트리밍 권한 확인 결과"""
+    post: Post | None  # 티켓 인증 경로에서는 None (DB 조회 없음)
+    user_id: int
+    is_admin: bool = False
+    ticket_file: dict | None = None  # 티켓에 서명된 파일 정보 (ticket_file_claim)
+
 
 def get_content_type(filename: str) -> str:
     """파일 확장자에 따른 Content-Type 반환"""
@@ -28,100 +101,660 @@ def get_content_type(filename: str) -> str:
     return content_types.get(ext, "application/octet-stream")
 
 
-def ranged_file_generator(file_path: str, start: int, end: int, chunk_size: int = 1024 * 1024):
-    """Range 요청에 대한 파일 청크 생성기"""
-    with open(file_path, "rb") as f:
-        f.seek(start)
-        remaining = end - start + 1
-        while remaining > 0:
-            chunk = f.read(min(chunk_size, remaining))
-            if not chunk:
-                break
-            remaining -= len(chunk)
-            yield chunk
+def _file_metadata(
+    video_filename: str,
+    path: str,
+    size: int,
+    mtime_ns: int,
+    is_public: bool,
+    author_id: int | None = None,
+    renditions: tuple[RenditionMetadata, ...] = ()
+) -> StreamMetadata:
+    return StreamMetadata(
+        video_filename=video_filename,
+        path=path,
+        size=size,
+        mtime=mtime_ns / 1e9,
+        mtime_ns=mtime_ns,
+        content_type=get_content_type(path),
+        etag=make_etag(size, mtime_ns),
+        is_public=is_public,
+        author_id=author_id,
+        renditions=renditions,
+    )
 
 
-@router.get("/{post_id}")
-async def stream_video(
+def ticket_file_claim(metadata: StreamMetadata) -> dict:
+    """
+    티켓에 서명해 넣을 파일 정보 (URL에 들어가므로 짧은 키 사용)
+
+    f: 비디오 파일명, s: 크기, m: 수정 시각(ns), p: 공개 여부, a: 작성자 ID,
+    r: 화질 목록 [이름, 가로, 세로, 비트레이트, 파일명, 크기, 수정 시각(ns)]
+    """
+    return {
+        "f": metadata.video_filename,
+        "s": metadata.size,
+        "m": metadata.mtime_ns,
+        "p": metadata.is_public,
+        "a": metadata.author_id,
+        "r": [
+            [r.name, r.width, r.height, r.bitrate, os.path.basename(r.file.path), r.file.size, r.file.mtime_ns]
+            for r in metadata.renditions
+        ],
+    }
+
+
+def metadata_from_ticket(claim: dict) -> StreamMetadata:
+    """
+    티켓의 파일 정보로 메타데이터 구성 (DB, stat 조회 없음)
+
+    파일을 재작성하면 게시물의 티켓을 폐기하므로 유효한 티켓의 정보는 현재 파일과 일치합니다.
+
+    Raises:
+        HTTPException: 파일 정보 형식이 잘못된 경우 401 에러
+    """
+    try:
+        video_filename = claim["f"]
+        if os.path.basename(video_filename) != video_filename:
+            raise ValueError(video_filename)
+        is_public, author_id = bool(claim["p"]), claim["a"]
+        renditions = tuple(
+            RenditionMetadata(
+                name=name,
+                width=width,
+                height=height,
+                bitrate=bitrate,
+                file=_file_metadata(
+                    rendition_cache_key(video_filename, filename),
+                    get_rendition_path(video_filename, filename),
+                    size,
+                    mtime_ns,
+                    is_public,
+                    author_id
+                ),
+            )
+            for name, width, height, bitrate, filename, size, mtime_ns in claim["r"]
+            if os.path.basename(filename) == filename
+        )
+        return _file_metadata(
+            video_filename,
+            os.path.join(UPLOAD_DIR, video_filename),
+            int(claim["s"]),
+            int(claim["m"]),
+            is_public,
+            author_id,
+            renditions
+        )
+    except (KeyError, TypeError, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid stream ticket: Malformed ticket"
+        )
+
+
+async def get_stream_metadata(
+    post_id: int,
+    db: Session,
+    post: Post | None = None,
+    ticket_file: dict | None = None
+) -> StreamMetadata:
+    """
+    게시물 비디오의 스트리밍 메타데이터 조회
+
+    - 메타데이터 캐시에 있으면 stat 없이 반환
+      (post가 없으면 티켓 인증 경로이므로 DB도 조회하지 않음)
+    - 티켓 인증 경로의 캐시 미스는 티켓에 서명된 파일 정보로 구성 (DB, stat 조회 없음)
+    - 없으면 파일 정보를 조회(스레드 풀)해 캐시에 저장
+    - 화질(rendition) 파일 정보도 함께 조회 (파일이 없는 화질은 제외)
+
+    Raises:
+        HTTPException: 게시물 또는 비디오 파일이 없는 경우 404 에러
+    """
+    metadata = metadata_cache.get(post_id)
+    if metadata is not None and (post is None or metadata.video_filename == post.video_filename):
+        return metadata
+
+    if post is None and ticket_file is not None:
+        metadata = metadata_from_ticket(ticket_file)
+        metadata_cache.put(post_id, metadata)
+        return metadata
+
+    if post is None:
+        post = db.query(Post).filter(Post.id == post_id).first()
+        if not post:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Post not found"
+            )
+    video_filename = post.video_filename
+
+    # 비디오 파일 경로
+    video_path = os.path.join(UPLOAD_DIR, video_filename)
+
+    # 파일 정보 조회 (디스크 접근은 스레드 풀에서)
+    try:
+        file_stat = await run_file_io(os.stat, video_path)
+    except FileNotFoundError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Video file not found"
+        )
+
+    is_public = bool(post.is_public)
+    renditions = []
+    for rendition in post.renditions:
+        rendition_path = get_rendition_path(video_filename, rendition.filename)
+        try:
+            rendition_stat = await run_file_io(os.stat, rendition_path)
+        except FileNotFoundError:
+            continue
+        renditions.append(RenditionMetadata(
+            name=rendition.name,
+            width=rendition.width,
+            height=rendition.height,
+            bitrate=rendition.bitrate,
+            file=_file_metadata(
+                rendition_cache_key(video_filename, rendition.filename),
+                rendition_path,
+                rendition_stat.st_size,
+                rendition_stat.st_mtime_ns,
+                is_public,
+                post.author_id
+            ),
+        ))
+
+    metadata = _file_metadata(
+        video_filename,
+        video_path,
+        file_stat.st_size,
+        file_stat.st_mtime_ns,
+        is_public,
+        post.author_id,
+        tuple(renditions)
+    )
+    metadata_cache.put(post_id, metadata)
+    return metadata
+
+
+def parse_downlink(downlink: str | None) -> int | None:
+    """Downlink 클라이언트 힌트(Mbps)를 bits/s로 변환"""
+    if downlink is None:
+        return None
+    try:
+        value = float(downlink)
+    except ValueError:
+        return None
+    return int(value * 1000 * 1000) if value > 0 else None
+
+
+def select_rendition(
+    metadata: StreamMetadata,
+    rendition: str | None,
+    bandwidth: int | None
+) -> RenditionMetadata | None:
+    """
+    응답할 화질 선택
+
+    - rendition 이름을 지정하면 해당 화질 ("original"이면 원본)
+    - 대역폭 힌트(bits/s)만 있으면 여유분을 두고 넘지 않는 가장 높은 화질,
+      모두 넘으면 가장 낮은 화질
+    - 둘 다 없거나 화질이 없으면 원본
+
+    Returns:
+        선택한 화질, 원본이면 None
+
+    Raises:
+        HTTPException: 지정한 화질이 없는 경우 404 에러
+    """
+    if rendition is not None:
+        if rendition == ORIGINAL_RENDITION:
+            return None
+        for candidate in metadata.renditions:
+            if candidate.name == rendition:
+                return candidate
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Rendition not found"
+        )
+
+    if bandwidth is None or not metadata.renditions:
+        return None
+
+    budget = bandwidth * RENDITION_BANDWIDTH_HEADROOM
+    by_bitrate = sorted(metadata.renditions, key=lambda r: r.bitrate)
+    fitting = [r for r in by_bitrate if r.bitrate <= budget]
+    return fitting[-1] if fitting else by_bitrate[0]
+
+
+async def authorize_stream(
+    post_id: int,
+    ticket: str | None,
+    access_token: str | None,
+    db: Session
+) -> StreamAccess:
+    """
+    스트리밍 권한 확인
+
+    - 티켓이 있으면 서명/만료/폐기 여부만 검증
+      (다른 워커의 폐기 기록은 STREAM_TICKET_REVOCATION_SYNC초에 한 번만 DB에서 읽음)
+    - 없으면 쿠키 JWT로 사용자 조회 후 check_post_access
+
+    Returns:
+        StreamAccess (티켓 인증 경로에서는 post가 None이고 관리자 여부를 알 수 없음)
+
+    Raises:
+        HTTPException: 티켓이 유효하지 않은 경우 401 에러
+    """
+    if ticket is not None:
+        ticket_revocations.sync(db)
+        try:
+            verified = verify_stream_ticket(ticket, post_id)
+        except InvalidStreamTicket as e:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail=f"Invalid stream ticket: {e}"
+            )
+        return StreamAccess(None, verified.user_id, ticket_file=verified.file)
+
+    current_user = await get_current_user(access_token, db)
+    post = await check_post_access(post_id, db, current_user)
+    return StreamAccess(post, current_user.id, bool(current_user.is_admin))
+
+
+def stream_throttle(access: StreamAccess, metadata: StreamMetadata):
+    """
+    응답용 대역폭 제어 핸들 (제한이 없으면 None)
+
+    게시물 작성자와 관리자는 공정 분배에서 가중치를 받습니다.
+    """
+    priority = access.is_admin or access.user_id == metadata.author_id
+    return bandwidth_scheduler.throttle(access.user_id, priority)
+
+
+async def get_keyframe_index(video_filename: str, metadata: StreamMetadata) -> KeyframeIndex | None:
+    """
+    스트리밍할 파일의 키프레임 인덱스 (메모리 캐시 → 인덱스 파일 → moov 파싱, 스레드 풀)
+
+    Args:
+        video_filename: 게시물 비디오 파일명 (인덱스 파일 위치 기준)
+        metadata: 스트리밍할 파일 (원본 또는 화질)
+
+    Returns:
+        인덱스를 만들 수 없는 파일(MP4/MOV가 아닌 경우 등)이면 None
+    """
+    index_path = get_keyframe_index_path(video_filename, metadata.path)
+    try:
+        return await run_file_io(
+            keyframe_index_cache.get, metadata.path, index_path, metadata.size, metadata.mtime_ns
+        )
+    except OSError:
+        return None
+
+
+async def acquire_stream_slot(access: StreamAccess, post_id: int) -> StreamSlot:
+    """
+    동시 스트림 자리 확보 (자리가 없으면 대기열에서 잠시 대기)
+
+    같은 사용자/게시물의 스트림이 최근에 있었으면 재생 중인 세션으로 보고 우선 처리합니다.
+
+    Raises:
+        HTTPException: 대기열이 가득 찼거나 대기 시간이 지난 경우 503 에러 (Retry-After)
+    """
+    try:
+        return await stream_admission.acquire(access.user_id, post_id)
+    except AdmissionRejected as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)}
+        )
+
+
+async def prepare_stream(
     post_id: int,
     request: Request,
+    db: Session,
+    access: StreamAccess,
+    rendition: str | None = None,
+    bandwidth: int | None = None,
+    seek: float | None = None
+) -> Response:
+    """
+    요청에 맞는 스트리밍 응답 생성 (GET/HEAD 공통, 권한 확인 후 호출)
+
+    - 파일 메타데이터(캐시 또는 stat)만 조회하고 파일은 열지 않음
+    - 화질 선택 (이름 또는 대역폭 힌트, 화질 파일은 offload 대상이 아님)
+    - 조건부 요청 처리 (If-None-Match/If-Modified-Since → 304, If-Range)
+    - Range 요청 처리 (suffix, multi-range, 416)
+    - 시간 기반 탐색: seek(초) 이전의 가장 가까운 키프레임부터 파일 끝까지 206 응답
+      (Range 헤더 대신 사용, 인덱스가 없는 파일은 무시)
+    - 본문 전송에 대역폭 제어 적용
+    - GET 본문 전송은 동시 스트림 자리를 확보한 뒤 시작 (전송이 끝나면 반환)
+    - GET 본문 전송이 끝나면 조회수/전송량 집계 (DB 쓰기 없음)
+    """
+    if seek is not None and (not math.isfinite(seek) or seek < 0):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid seek time"
+        )
+
+    # 파일 메타데이터 (캐시 또는 stat)
+    metadata = await get_stream_metadata(post_id, db, access.post, access.ticket_file)
+    video_filename = metadata.video_filename
+
+    # 화질 선택 (Downlink 헤더는 명시적인 값이 없을 때만 사용)
+    hinted = False
+    if rendition is None and bandwidth is None:
+        bandwidth = parse_downlink(request.headers.get("downlink"))
+        hinted = bandwidth is not None and bool(metadata.renditions)
+    selected = select_rendition(metadata, rendition, bandwidth)
+    extra_headers = {}
+    if selected is not None:
+        metadata = selected.file
+        extra_headers["X-Rendition"] = selected.name
+    if hinted:
+        extra_headers["Vary"] = "Downlink"
+
+    file_size = metadata.size
+    mtime = metadata.mtime
+    etag = metadata.etag
+
+    # 검증자 및 캐시 정책
+    cache_headers = {
+        "ETag": etag,
+        "Last-Modified": format_http_date(mtime),
+        "Cache-Control": (
+            STREAM_CACHE_CONTROL_PUBLIC if metadata.is_public else STREAM_CACHE_CONTROL_PRIVATE
+        ),
+        **extra_headers,
+    }
+
+    # 조건부 GET: 변경이 없으면 헤더만 응답
+    if is_not_modified(request.headers, etag, mtime):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=cache_headers)
+
+    # offload 모드: 프록시가 파일 전송 (Range 포함, 시간 기반 탐색은 직접 전송)
+    if STREAM_OFFLOAD_MODE and selected is None and seek is None:
+        return build_offload_response(
+            STREAM_OFFLOAD_MODE,
+            UPLOAD_DIR,
+            metadata.video_filename,
+            metadata.content_type,
+            prefix=STREAM_OFFLOAD_PREFIX,
+            headers=cache_headers
+        )
+
+    # If-Range가 현재 파일과 다르면 Range 무시 (전체 전송)
+    range_header = request.headers.get("range")
+    if range_header and not if_range_matches(request.headers.get("if-range"), etag, mtime):
+        range_header = None
+
+    # 시간 기반 탐색: 키프레임 인덱스 한 번 조회로 byte 구간 결정
+    if seek is not None:
+        keyframes = await get_keyframe_index(video_filename, metadata)
+        if keyframes is not None:
+            keyframe_time, offset = keyframes.lookup(seek)
+            range_header = f"bytes={offset}-"
+            cache_headers["X-Seek-Time"] = f"{keyframe_time:.3f}"
+
+    # 본문을 보내는 GET만 자리 확보 (HEAD, 304, offload는 파일을 열지 않음)
+    slot = await acquire_stream_slot(access, post_id) if request.method == "GET" else None
+    on_sent = (
+        partial(analytics_collector.record, post_id, access.user_id)
+        if ANALYTICS_ENABLED and request.method == "GET" else None
+    )
+
+    try:
+        return build_range_response(
+            metadata.path,
+            file_size,
+            metadata.content_type,
+            range_header,
+            headers=cache_headers,
+            cache_key=(metadata.video_filename, etag),
+            throttle=stream_throttle(access, metadata),
+            slot=slot,
+            on_sent=on_sent
+        )
+    except RangeNotSatisfiable:
+        if slot is not None:
+            slot.release()
+        raise HTTPException(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            detail="Requested range not satisfiable",
+            headers={"Content-Range": f"bytes */{file_size}"}
+        )
+    except BaseException:
+        # 응답을 만들지 못하면 (파일을 읽지 못함 등) 자리를 넘길 곳이 없음
+        if slot is not None:
+            slot.release()
+        raise
+
+
+@router.post("/{post_id}/ticket", response_model=StreamTicketResponse)
+async def issue_stream_ticket(
+    post_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """
-    MP4 비디오 스트리밍
+    스트림 티켓 발급
 
-    - 권한 체크 후 비디오 스트리밍
-    - Range 요청 지원 (부분 다운로드)
+    - 권한 체크 후 (사용자, 게시물, 만료 시각, 파일 정보)에 서명한 티켓 발급
+    - 이후 Range 요청은 ?ticket=... 으로 DB 조회 없이 인증
+      (메타데이터 캐시에 없으면 티켓의 파일 정보 사용)
     """
-    # 권한 체크
     post = await check_post_access(post_id, db, current_user)
+    metadata = await get_stream_metadata(post_id, db, post)
+
+    ticket, expires_at = create_stream_ticket(current_user.id, post_id, ticket_file_claim(metadata))
+
+    return StreamTicketResponse(
+        ticket=ticket,
+        expires_at=datetime.fromtimestamp(expires_at / 1000, tz=timezone.utc),
+        stream_url=f"{router.prefix}/{post_id}?ticket={ticket}"
+    )
+
+
+def _read_text(path: str) -> str:
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def add_ticket_to_playlist(playlist: str, ticket: str) -> str:
+    """
+    플레이리스트의 세그먼트 URI에 스트림 티켓 추가
+
+    세그먼트는 상대 경로로 요청되므로 쿼리 문자열이 전달되지 않습니다.
+    티켓으로 플레이리스트를 받은 클라이언트도 세그먼트를 받을 수 있도록 추가합니다.
+    """
+    suffix = f"?ticket={quote(ticket)}"
+    lines = [
+        line + suffix if line and not line.startswith("#") else line
+        for line in playlist.splitlines()
+    ]
+    return "\n".join(lines) + "\n"
 
-    # 비디오 파일 경로
-    video_path = os.path.join(UPLOAD_DIR, post.video_filename)
 
-    if not os.path.exists(video_path):
+@router.get("/{post_id}/hls/" + HLS_PLAYLIST)
+async def get_hls_playlist(
+    post_id: int,
+    ticket: str | None = None,
+    access_token: str | None = Cookie(default=None),
+    db: Session = Depends(get_db)
+):
+    """
+    HLS 플레이리스트 조회
+
+    - 스트리밍과 같은 권한 규칙 (쿠키 JWT 또는 스트림 티켓)
+    - 패키징이 끝나지 않았거나 비활성화된 경우 404
+    """
+    access = await authorize_stream(post_id, ticket, access_token, db)
+    metadata = await get_stream_metadata(post_id, db, access.post, access.ticket_file)
+
+    playlist_path = os.path.join(get_hls_dir(metadata.video_filename), HLS_PLAYLIST)
+    try:
+        playlist = await run_file_io(_read_text, playlist_path)
+    except FileNotFoundError:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail="Video file not found"
+            detail="HLS playlist not available"
         )
 
-    file_size = os.path.getsize(video_path)
-    content_type = get_content_type(post.video_filename)
+    if ticket is not None:
+        playlist = add_ticket_to_playlist(playlist, ticket)
+
+    return Response(
+        content=playlist,
+        media_type="application/vnd.apple.mpegurl",
+        headers={
+            "Cache-Control": (
+                STREAM_CACHE_CONTROL_PUBLIC if metadata.is_public else STREAM_CACHE_CONTROL_PRIVATE
+            )
+        }
+    )
 
-    # Range 헤더 확인
-    range_header = request.headers.get("range")
 
-    if range_header:
-        # Range 요청 처리
-        # 형식: bytes=start-end 또는 bytes=start-
-        range_str = range_header.replace("bytes=", "")
-        range_parts = range_str.split("-")
+@router.get("/{post_id}/hls/{segment_name}")
+async def get_hls_segment(
+    post_id: int,
+    segment_name: str,
+    request: Request,
+    ticket: str | None = None,
+    access_token: str | None = Cookie(default=None),
+    db: Session = Depends(get_db)
+):
+    """
+    HLS 세그먼트 조회
+
+    - 세그먼트는 불변이므로 긴 캐시 유효 시간(immutable) 적용
+    """
+    if not HLS_SEGMENT_NAME_PATTERN.fullmatch(segment_name):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Segment not found"
+        )
+
+    access = await authorize_stream(post_id, ticket, access_token, db)
+    metadata = await get_stream_metadata(post_id, db, access.post, access.ticket_file)
+
+    segment_path = os.path.join(get_hls_dir(metadata.video_filename), segment_name)
+    return await serve_file(
+        request,
+        segment_path,
+        "video/mp2t",
+        immutable_cache_control(metadata.is_public),
+        throttle=stream_throttle(access, metadata)
+    )
+
 
-        start = int(range_parts[0]) if range_parts[0] else 0
-        end = int(range_parts[1]) if range_parts[1] else file_size - 1
+@router.get("/{post_id}/clip")
+async def get_clip(
+    post_id: int,
+    request: Request,
+    start: float,
+    end: float,
+    ticket: str | None = None,
+    access_token: str | None = Cookie(default=None),
+    db: Session = Depends(get_db)
+):
+    """
+    구간 클립 조회 (start~end초를 재인코딩 없이 잘라낸 MP4)
+
+    - 스트리밍과 같은 권한 규칙 (쿠키 JWT 또는 스트림 티켓)
+    - start는 이전 키프레임으로 맞춤 (X-Clip-Start 헤더, 인덱스가 없는 파일은 그대로)
+    - (게시물, 시작, 끝)별로 디스크에 캐시하고 반복 요청은 캐시에서 전송
+      (Range, ETag/304, immutable 캐시, 대역폭 제어)
+    - 최대 길이는 CLIP_MAX_SECONDS
+
+    Raises:
+        HTTPException: 구간이 잘못된 경우 400, ffmpeg가 없으면 503, 추출 실패 시 500
+    """
+    if not (math.isfinite(start) and math.isfinite(end)) or start < 0 or end <= start:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid clip range"
+        )
+    if end - start > CLIP_MAX_SECONDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Clip must be at most {CLIP_MAX_SECONDS:g} seconds"
+        )
 
-        # 범위 유효성 검사
-        if start >= file_size:
+    access = await authorize_stream(post_id, ticket, access_token, db)
+    metadata = await get_stream_metadata(post_id, db, access.post, access.ticket_file)
+
+    # 키프레임에 맞춰 시작 (stream copy는 키프레임에서만 자를 수 있음, 캐시 적중률도 높아짐)
+    keyframes = await get_keyframe_index(metadata.video_filename, metadata)
+    if keyframes is not None:
+        start = keyframes.lookup(start)[0]
+    start, end = round(start, 3), round(end, 3)
+
+    try:
+        clip_path = await asyncio.wrap_future(submit_clip(metadata.video_filename, start, end))
+    except MediaProcessingError as e:
+        if not ffmpeg_available():
             raise HTTPException(
-                status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
-                detail="Requested range not satisfiable"
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Clip extraction not available"
             )
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Clip extraction failed: {e}"
+        )
 
-        if end >= file_size:
-            end = file_size - 1
+    response = await serve_file(
+        request,
+        clip_path,
+        "video/mp4",
+        immutable_cache_control(metadata.is_public),
+        throttle=stream_throttle(access, metadata)
+    )
+    response.headers["X-Clip-Start"] = f"{start:.3f}"
+    response.headers["X-Clip-End"] = f"{end:.3f}"
+    return response
 
-        content_length = end - start + 1
 
-        headers = {
-            "Content-Range": f"bytes {start}-{end}/{file_size}",
-            "Accept-Ranges": "bytes",
-            "Content-Length": str(content_length),
-            "Content-Type": content_type,
-        }
+@router.get("/{post_id}")
+async def stream_video(
+    post_id: int,
+    request: Request,
+    ticket: str | None = None,
+    rendition: str | None = None,
+    bw: int | None = None,
+    t: float | None = None,
+    access_token: str | None = Cookie(default=None),
+    db: Session = Depends(get_db)
+):
+    """
+    MP4 비디오 스트리밍
 
-        return StreamingResponse(
-            ranged_file_generator(str(video_path), start, end),
-            status_code=status.HTTP_206_PARTIAL_CONTENT,
-            headers=headers,
-            media_type=content_type
-        )
-    else:
-        # 전체 파일 전송
-        def file_generator():
-            with open(video_path, "rb") as f:
-                while chunk := f.read(1024 * 1024):  # 1MB 청크
-                    yield chunk
-
-        headers = {
-            "Accept-Ranges": "bytes",
-            "Content-Length": str(file_size),
-            "Content-Type": content_type,
-        }
+    - 권한 체크 후 비디오 스트리밍 (쿠키 JWT 또는 스트림 티켓)
+    - Range 요청 지원 (부분 다운로드, suffix, multipart/byteranges)
+    - offload 모드에서는 프록시에 파일 전송 위임
+    - 화질 선택: ?rendition=720p, 대역폭 힌트 ?bw=(bits/s) 또는 Downlink 헤더
+    - 시간 기반 탐색: ?t=93.5 → 해당 시각 이전 키프레임부터 206 응답 (X-Seek-Time 헤더)
+    - 동시 스트림 수 제한을 넘으면 잠시 대기, 대기열이 가득 차면 503 + Retry-After
+    """
+    access = await authorize_stream(post_id, ticket, access_token, db)
+    return await prepare_stream(post_id, request, db, access, rendition, bw, t)
 
-        return StreamingResponse(
-            file_generator(),
-            status_code=status.HTTP_200_OK,
-            headers=headers,
-            media_type=content_type
-        )
+
+@router.head("/{post_id}")
+async def stream_video_head(
+    post_id: int,
+    request: Request,
+    ticket: str | None = None,
+    rendition: str | None = None,
+    bw: int | None = None,
+    t: float | None = None,
+    access_token: str | None = Cookie(default=None),
+    db: Session = Depends(get_db)
+):
+    """
+    비디오 메타데이터 조회 (HEAD)
+
+    - GET과 같은 헤더를 반환하지만 파일을 열거나 읽지 않음
+    """
+    access = await authorize_stream(post_id, ticket, access_token, db)
+    return await prepare_stream(post_id, request, db, access, rendition, bw, t)
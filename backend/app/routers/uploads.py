@@ -0,0 +1,308 @@
+"""
+Uploads API 라우터 (이어받기 업로드)
+- 업로드 세션 생성 (게시물 정보 + 파일 크기)
+- 청크 PUT (병렬/순서 무관, 같은 청크 재전송 가능)
+- 받은 위치 조회 (연결이 끊긴 뒤 재개)
+- 완료 (게시물 생성) / 취소
+"""
+
+import asyncio
+import os
+import uuid
+from datetime import datetime, timezone
+
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+
+from app.config import (
+    MAX_FILE_SIZE,
+    UPLOAD_CHUNK_SIZE,
+    UPLOAD_MAX_CHUNK_SIZE,
+    UPLOAD_MAX_SESSIONS_PER_USER,
+    UPLOAD_MIN_CHUNK_SIZE,
+)
+from app.database import get_db
+from app.dependencies import get_current_user
+from app.models import Post, UploadChunk, UploadSession, User
+from app.routers.posts import publish_post, validate_file_extension
+from app.schemas import PostResponse, UploadSessionCreate, UploadSessionResponse
+from app.stream_utils import run_file_io
+from app.upload_sessions import (
+    chunk_count,
+    chunk_range,
+    create_session_file,
+    discard_session,
+    receive_chunk,
+    remove_session_file,
+    session_expiry,
+    session_file_path,
+    utc,
+)
+from app.upload_utils import file_too_large
+from app.video_store import file_sha256
+
+router = APIRouter(prefix="/api/uploads", tags=["uploads"])
+
+
+def get_upload_session(upload_id: str, db: Session, current_user: User) -> UploadSession:
+    """
+    본인의 만료되지 않은 업로드 세션 조회
+
+    Raises:
+        HTTPException: 세션이 없거나 다른 사용자의 세션이거나 만료된 경우 404
+    """
+    session = db.query(UploadSession).filter(UploadSession.id == upload_id).first()
+    if (
+        session is None
+        or session.user_id != current_user.id
+        or utc(session.expires_at) < datetime.now(timezone.utc)
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Upload not found"
+        )
+    return session
+
+
+def session_response(db: Session, session: UploadSession) -> UploadSessionResponse:
+    """받은 청크 목록으로 재개 위치 계산"""
+    received = dict(
+        db.query(UploadChunk.index, UploadChunk.size).filter(UploadChunk.session_id == session.id).all()
+    )
+    count = chunk_count(session.size, session.chunk_size)
+    missing = [index for index in range(count) if index not in received]
+    return UploadSessionResponse(
+        id=session.id,
+        filename=session.filename,
+        size=session.size,
+        chunk_size=session.chunk_size,
+        chunk_count=count,
+        received_bytes=sum(received.values()),
+        offset=missing[0] * session.chunk_size if missing else session.size,
+        missing_chunks=missing,
+        expires_at=utc(session.expires_at),
+    )
+
+
+@router.post("", response_model=UploadSessionResponse, status_code=status.HTTP_201_CREATED)
+def create_upload(
+    upload_data: UploadSessionCreate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    업로드 세션 생성
+
+    - 확장자, 파일 크기(MAX_FILE_SIZE)는 데이터를 받기 전에 확인
+    - chunk_size 미지정 시 UPLOAD_CHUNK_SIZE
+    - 전체 크기의 sparse 데이터 파일을 미리 만들어 청크를 순서와 무관하게 기록
+    - 마지막 청크 이후 UPLOAD_SESSION_TTL 동안 유지
+    """
+    validate_file_extension(upload_data.filename)
+    if upload_data.size > MAX_FILE_SIZE:
+        raise file_too_large(MAX_FILE_SIZE)
+
+    chunk_size = upload_data.chunk_size or UPLOAD_CHUNK_SIZE
+    if not UPLOAD_MIN_CHUNK_SIZE <= chunk_size <= UPLOAD_MAX_CHUNK_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"chunk_size must be between {UPLOAD_MIN_CHUNK_SIZE} and {UPLOAD_MAX_CHUNK_SIZE}"
+        )
+
+    open_sessions = db.query(UploadSession).filter(
+        UploadSession.user_id == current_user.id,
+        UploadSession.expires_at >= datetime.now(timezone.utc)
+    ).count()
+    if open_sessions >= UPLOAD_MAX_SESSIONS_PER_USER:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=f"Too many open uploads. Maximum: {UPLOAD_MAX_SESSIONS_PER_USER}"
+        )
+
+    session = UploadSession(
+        id=uuid.uuid4().hex,
+        user_id=current_user.id,
+        title=upload_data.title,
+        description=upload_data.description,
+        is_public=upload_data.is_public,
+        filename=upload_data.filename,
+        size=upload_data.size,
+        chunk_size=chunk_size,
+        expires_at=session_expiry(),
+    )
+    path = session_file_path(session)
+    create_session_file(path, session.size)
+    try:
+        db.add(session)
+        db.commit()
+    except Exception:
+        remove_session_file(path)
+        raise
+    return session_response(db, session)
+
+
+@router.get("/{upload_id}", response_model=UploadSessionResponse)
+def get_upload(
+    upload_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    업로드 상태 조회 (재개 위치)
+
+    - offset: 순서대로 보내는 클라이언트가 이어서 보낼 위치
+    - missing_chunks: 병렬로 보내는 클라이언트가 다시 보낼 청크 번호
+    """
+    session = get_upload_session(upload_id, db, current_user)
+    return session_response(db, session)
+
+
+@router.put("/{upload_id}/chunks/{index}", response_model=UploadSessionResponse)
+async def put_chunk(
+    upload_id: str,
+    index: int,
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    청크 업로드 (요청 본문 = 청크 데이터)
+
+    - 청크 i는 i * chunk_size 위치에 기록 (마지막 청크만 짧음)
+    - 본문은 정확히 청크 길이여야 함 (Content-Length가 다르면 받기 전에, 길면 초과 즉시 거부)
+    - 여러 청크를 동시에 보내거나 같은 청크를 다시 보내도 됨
+    - 받을 때마다 세션 만료 시각 연장
+    """
+    session = get_upload_session(upload_id, db, current_user)
+    if session.completing:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Upload is being completed"
+        )
+    if not 0 <= index < chunk_count(session.size, session.chunk_size):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Chunk index out of range"
+        )
+
+    offset, length = chunk_range(session, index)
+    content_length = request.headers.get("content-length")
+    if content_length is not None and content_length != str(length):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Chunk {index} must be {length} bytes"
+        )
+
+    try:
+        await receive_chunk(request, session_file_path(session), offset, length)
+    except FileNotFoundError:
+        raise HTTPException(
+            status_code=status.HTTP_410_GONE,
+            detail="Upload data is no longer available"
+        )
+
+    # 기록하는 동안 완료/취소/만료되지 않았는지 확인하면서 만료 시각 연장
+    updated = db.query(UploadSession).filter(
+        UploadSession.id == session.id,
+        UploadSession.completing == False
+    ).update({"expires_at": session_expiry()})
+    if not updated:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Upload is no longer accepting chunks"
+        )
+    db.execute(
+        insert(UploadChunk)
+        .values(session_id=session.id, index=index, size=length)
+        .on_conflict_do_nothing(index_elements=["session_id", "index"])
+    )
+    db.commit()
+    db.refresh(session)
+    return session_response(db, session)
+
+
+@router.post("/{upload_id}/complete", response_model=PostResponse, status_code=status.HTTP_201_CREATED)
+async def complete_upload(
+    upload_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    업로드 완료 → 게시물 생성
+
+    - 모든 청크를 받았어야 함 (아니면 409, 빠진 청크 수 포함)
+    - 청크를 순서와 무관하게 받았으므로 여기서 한 번 읽어 SHA-256 계산
+    - 내용 해시로 파일명을 정해 게시, 같은 내용의 파일이 이미 있으면 그 파일을 참조 (POST /api/posts와 같음)
+    - 디스크에 기록(fsync)한 뒤 rename으로 게시 (원자적)
+    - 미디어 정보 기록 (POST /api/posts와 같음)
+    - 세션 삭제와 함께 게시물 생성과 같은 업로드 후처리 작업 등록
+    - 실패하면 500: 받은 파일이 남아 있으면 세션을 되돌려 다시 완료하거나 취소할 수 있고,
+      게시 단계에서 파일을 이미 옮겼으면 세션도 삭제 (새로 게시한 파일은 참조가 없으면 삭제)
+    """
+    session = get_upload_session(upload_id, db, current_user)
+    missing = session_response(db, session).missing_chunks
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Upload incomplete: {len(missing)} chunks missing"
+        )
+
+    # 동시에 들어온 완료 요청 중 하나만 처리
+    claimed = db.query(UploadSession).filter(
+        UploadSession.id == session.id,
+        UploadSession.completing == False
+    ).update({"completing": True, "expires_at": session_expiry()})
+    db.commit()
+    if not claimed:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Upload is being completed"
+        )
+
+    path = session_file_path(session)
+    new_post = Post(
+        title=session.title,
+        description=session.description,
+        video_original_name=session.filename,
+        author_id=current_user.id,
+        is_public=session.is_public,
+    )
+    try:
+        sha256 = await asyncio.to_thread(file_sha256, path)
+        # 세션 삭제는 게시물과 같은 트랜잭션으로 commit
+        db.delete(session)
+        return await publish_post(db, new_post, path, sha256)
+    except Exception as e:
+        db.rollback()
+        if await run_file_io(os.path.exists, path):
+            # 받은 파일이 그대로 있음 → 다시 완료하거나 취소할 수 있음
+            session.completing = False
+        else:
+            # 게시 단계에서 파일을 옮기거나 버린 뒤 실패 → 세션을 되살릴 수 없으므로 삭제
+            db.delete(session)
+        db.commit()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to save file: {str(e)}"
+        )
+
+
+@router.delete("/{upload_id}")
+def cancel_upload(
+    upload_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """업로드 취소 (세션과 받은 데이터 삭제)"""
+    session = get_upload_session(upload_id, db, current_user)
+    if session.completing:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Upload is being completed"
+        )
+    discard_session(db, session)
+    db.commit()
+
+    return {"message": "Upload cancelled"}
@@ -1,7 +1,20 @@
 from app.schemas.example import ExampleCreate, ExampleResponse
 from app.schemas.user import UserRegister, UserLogin, Token, UserResponse, UserAdminUpdate
-from app.schemas.post import PostBase, PostCreate, PostUpdate, PostResponse, PostListResponse
+from app.schemas.post import (
+    PostBase,
+    PostCreate,
+    PostUpdate,
+    PostResponse,
+    PostListResponse,
+    RenditionResponse,
+    WatchProgressUpdate,
+    WatchProgressResponse,
+    ProcessingJobResponse,
+    ProcessingStatusResponse,
+)
 from app.schemas.permission import PermissionCreate, PermissionResponse
+from app.schemas.stream import StreamTicketResponse
+from app.schemas.upload import UploadSessionCreate, UploadSessionResponse
 
 __all__ = [
     # Example
@@ -19,7 +32,17 @@ __all__ = [
     "PostUpdate",
     "PostResponse",
     "PostListResponse",
+    "RenditionResponse",
+    "WatchProgressUpdate",
+    "WatchProgressResponse",
+    "ProcessingJobResponse",
+    "ProcessingStatusResponse",
     # Permission
     "PermissionCreate",
     "PermissionResponse",
+    # Stream
+    "StreamTicketResponse",
+    # Upload
+    "UploadSessionCreate",
+    "UploadSessionResponse",
 ]
@@ -1,11 +1,13 @@
 """
 Post 스키마 정의
 - 게시물 생성, 수정, 응답용 스키마
+- 시청 위치 (이어보기) 스키마
+- 업로드 후처리 상태 스키마
 """
 
 from datetime import datetime
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import List, Optional
 
 from app.schemas.user import UserResponse
 
@@ -28,6 +30,32 @@ class PostUpdate(BaseModel):
     is_public: Optional[bool] = None
 
 
+class RenditionResponse(BaseModel):
+    """화질(rendition) 응답 스키마"""
+    name: str
+    width: int
+    height: int
+    bitrate: int
+    size: int
+
+    class Config:
+        from_attributes = True
+
+
+class WatchProgressUpdate(BaseModel):
+    """시청 위치 보고 스키마 (초)"""
+    position: float = Field(ge=0, allow_inf_nan=False)
+    duration: Optional[float] = Field(default=None, gt=0, allow_inf_nan=False)
+
+
+class WatchProgressResponse(BaseModel):
+    """시청 위치 응답 스키마 (기록이 없으면 position 0, updated_at None)"""
+    post_id: int
+    position: float
+    duration: Optional[float] = None
+    updated_at: Optional[datetime] = None
+
+
 class PostResponse(BaseModel):
     """게시물 상세 응답 스키마"""
     id: int
@@ -36,11 +64,20 @@ class PostResponse(BaseModel):
     video_filename: str
     video_original_name: str
     video_size: int
+    # 미디어 정보 (조회 전이거나 알 수 없으면 None)
+    duration: Optional[float] = None
+    width: Optional[int] = None
+    height: Optional[int] = None
+    video_codec: Optional[str] = None
+    audio_codec: Optional[str] = None
+    bitrate: Optional[int] = None
+    is_faststart: Optional[bool] = None
     author_id: int
     is_public: bool
     created_at: datetime
     updated_at: Optional[datetime]
     author: UserResponse
+    renditions: List[RenditionResponse] = []
 
     class Config:
         from_attributes = True
@@ -54,11 +91,44 @@ class PostListResponse(BaseModel):
     video_filename: str
     video_original_name: str
     video_size: int
+    # 미디어 정보 (조회 전이거나 알 수 없으면 None)
+    duration: Optional[float] = None
+    width: Optional[int] = None
+    height: Optional[int] = None
+    video_codec: Optional[str] = None
+    audio_codec: Optional[str] = None
+    bitrate: Optional[int] = None
+    is_faststart: Optional[bool] = None
     author_id: int
     is_public: bool
     created_at: datetime
     updated_at: Optional[datetime]
     author: UserResponse
+    # GET /api/posts?include_progress=true 인 경우에만 채움
+    progress: Optional[WatchProgressResponse] = None
 
     class Config:
         from_attributes = True
+
+
+class ProcessingJobResponse(BaseModel):
+    """업로드 후처리 작업 응답 스키마"""
+    kind: str  # prepare, thumbnails, sprite, hls, renditions
+    status: str  # pending, running, succeeded, failed
+    priority: int
+    attempts: int
+    max_attempts: int
+    # 재시도 대기 중이면 다음 시도 시각
+    next_attempt_at: Optional[datetime] = None
+    # 마지막 실패 원인 (작성자/관리자에게만)
+    last_error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+
+class ProcessingStatusResponse(BaseModel):
+    """게시물 업로드 후처리 상태 응답 스키마"""
+    post_id: int
+    status: str  # pending, processing, completed, failed
+    jobs: List[ProcessingJobResponse]
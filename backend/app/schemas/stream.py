@@ -0,0 +1,14 @@
+"""
+Stream 스키마 정의
+- 스트림 티켓 응답용 스키마
+"""
+
+from datetime import datetime
+from pydantic import BaseModel
+
+
+class StreamTicketResponse(BaseModel):
+    """스트림 티켓 응답 스키마"""
+    ticket: str
+    expires_at: datetime
+    stream_url: str
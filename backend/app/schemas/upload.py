@@ -0,0 +1,35 @@
+"""
+Upload 스키마 정의
+- 이어받기 업로드 세션 생성, 상태 응답용 스키마
+"""
+
+from datetime import datetime
+from pydantic import BaseModel, Field
+from typing import List, Optional
+
+from app.schemas.post import PostCreate
+
+
+class UploadSessionCreate(PostCreate):
+    """업로드 세션 생성 스키마 (완료 시 만들 게시물 정보 + 파일 정보)"""
+    filename: str = Field(min_length=1, max_length=255)
+    size: int = Field(gt=0)
+    chunk_size: Optional[int] = None
+
+
+class UploadSessionResponse(BaseModel):
+    """
+    업로드 세션 상태 응답 스키마
+
+    - offset: 처음부터 빠짐없이 받은 바이트 수 (순서대로 보내는 클라이언트의 재개 위치)
+    - missing_chunks: 아직 받지 않은 청크 번호 (병렬/순서 무관 전송의 재개 목록)
+    """
+    id: str
+    filename: str
+    size: int
+    chunk_size: int
+    chunk_count: int
+    received_bytes: int
+    offset: int
+    missing_chunks: List[int]
+    expires_at: datetime
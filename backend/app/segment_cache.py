@@ -0,0 +1,130 @@
+"""
+핫 세그먼트 캐시 모듈
+- 비디오 앞부분(ftyp/moov)과 끝부분(moov-at-end) 바이트를 메모리에 캐시
+- 프로세스 전역, 바이트 예산 기반 LRU
+- 적중/미스 카운터
+"""
+
+import threading
+from collections import OrderedDict
+
+from app.config import STREAM_SEGMENT_CACHE_BYTES, STREAM_SEGMENT_BYTES
+
+
+class SegmentCache:
+    """
+    비디오 파일별 핫 세그먼트 LRU 캐시
+
+    - 키: (video_filename, etag, 세그먼트 시작 위치)
+      ETag를 포함하므로 파일이 바뀌면 이전 세그먼트는 사용되지 않음
+    - 저장된 바이트 합계가 max_bytes를 넘으면 가장 오래 사용하지 않은 세그먼트부터 제거
+    - 관리자 API(동기 함수, 스레드 풀)에서도 무효화하므로 lock으로 보호
+    """
+
+    def __init__(self, max_bytes: int, segment_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self.segment_bytes = segment_bytes
+        self._entries: OrderedDict[tuple[str, str, int], bytes] = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def segment_bounds(self, file_size: int, offset: int) -> tuple[int, int] | None:
+        """
+        offset이 속한 캐시 대상 세그먼트 범위 반환
+
+        Args:
+            file_size: 파일 크기
+            offset: 요청 시작 위치
+
+        Returns:
+            (세그먼트 시작, 세그먼트 끝) - 끝은 포함하지 않음.
+            앞/끝 세그먼트에 속하지 않으면 None
+        """
+        if self.max_bytes <= 0 or self.segment_bytes <= 0:
+            return None
+        head_end = min(self.segment_bytes, file_size)
+        if offset < head_end:
+            return (0, head_end)
+        tail_start = max(head_end, file_size - self.segment_bytes)
+        if tail_start <= offset < file_size:
+            return (tail_start, file_size)
+        return None
+
+    def get(self, key: tuple[str, str], segment_start: int) -> bytes | None:
+        """세그먼트 조회 (적중 시 LRU 순서 갱신)"""
+        entry_key = (*key, segment_start)
+        with self._lock:
+            data = self._entries.get(entry_key)
+            if data is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(entry_key)
+            self.hits += 1
+            return data
+
+    def put(self, key: tuple[str, str], segment_start: int, data: bytes) -> None:
+        """세그먼트 저장 후 예산을 넘으면 오래된 세그먼트 제거"""
+        if len(data) > self.max_bytes:
+            return
+        entry_key = (*key, segment_start)
+        with self._lock:
+            previous = self._entries.pop(entry_key, None)
+            if previous is not None:
+                self._size -= len(previous)
+            self._entries[entry_key] = data
+            self._size += len(data)
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    def invalidate(self, filename: str) -> int:
+        """
+        비디오 파일의 모든 세그먼트 제거
+
+        Returns:
+            제거된 세그먼트 수
+        """
+        with self._lock:
+            keys = [entry_key for entry_key in self._entries if entry_key[0] == filename]
+            for entry_key in keys:
+                self._size -= len(self._entries.pop(entry_key))
+            return len(keys)
+
+    def invalidate_prefix(self, prefix: str) -> int:
+        """
+        키가 prefix로 시작하는 파일(화질 파일 등)의 모든 세그먼트 제거
+
+        Returns:
+            제거된 세그먼트 수
+        """
+        with self._lock:
+            keys = [entry_key for entry_key in self._entries if entry_key[0].startswith(prefix)]
+            for entry_key in keys:
+                self._size -= len(self._entries.pop(entry_key))
+            return len(keys)
+
+    def clear(self) -> None:
+        """캐시 및 카운터 초기화"""
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        """캐시 상태 (모니터링용)"""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+                "bytes": self._size,
+                "max_bytes": self.max_bytes,
+                "segment_bytes": self.segment_bytes,
+            }
+
+
+# 프로세스 전역 캐시
+segment_cache = SegmentCache(STREAM_SEGMENT_CACHE_BYTES, STREAM_SEGMENT_BYTES)
@@ -0,0 +1,104 @@
+"""
+서버 실행 모듈
+- ASGI http.response.zerocopysend 확장을 지원하는 uvicorn HTTP 프로토콜
+  (FileRangeResponse가 넘긴 파일 구간을 loop.sendfile → os.sendfile로 전송, Python이 payload를 읽지 않음)
+- python -m app.server 로 실행 (uvicorn app.main:app 대신)
+"""
+
+import argparse
+import asyncio
+
+import uvicorn
+from uvicorn.protocols.http.httptools_impl import HttpToolsProtocol, RequestResponseCycle
+
+from app.stream_utils import ZEROCOPY_EXTENSION
+
+
+class SendfileHttpProtocol(HttpToolsProtocol):
+    """
+    zero-copy 전송을 지원하는 httptools 기반 HTTP 프로토콜
+
+    요청마다 만들어지는 RequestResponseCycle의 send를 감싸 zerocopysend 메시지를 처리합니다.
+    asyncio 기본 이벤트 루프의 평문(TLS 아님) 연결에서만 확장을 알립니다.
+    (uvloop는 loop.sendfile을 지원하지 않고, TLS 연결은 커널이 암호화하지 못해 읽어서 보내야 함)
+    그 밖의 연결에서는 FileRangeResponse가 스레드 풀에서 읽어 청크 단위로 전송합니다.
+    """
+
+    def on_headers_complete(self) -> None:
+        existing_cycle = self.cycle
+        super().on_headers_complete()
+        # 업그레이드 요청 등으로 새 cycle을 만들지 않은 경우
+        if self.cycle is existing_cycle or not self._sendfile_supported():
+            return
+        self.scope.setdefault("extensions", {})[ZEROCOPY_EXTENSION] = {}
+        self.cycle.send = _zerocopy_send(self.cycle, self.loop)
+
+    def _sendfile_supported(self) -> bool:
+        return (
+            isinstance(self.loop, asyncio.BaseEventLoop)
+            and self.transport.get_extra_info("sslcontext") is None
+        )
+
+
+def _zerocopy_send(cycle: RequestResponseCycle, loop: asyncio.AbstractEventLoop):
+    """cycle의 send를 감싸 zerocopysend 메시지는 sendfile로, 나머지는 기존 send로 처리"""
+    send = cycle.send
+
+    async def zerocopy_send(message: dict) -> None:
+        if message["type"] != ZEROCOPY_EXTENSION:
+            await send(message)
+            return
+
+        if cycle.flow.write_paused and not cycle.disconnected:
+            await cycle.flow.drain()
+        if cycle.disconnected or cycle.transport.is_closing():
+            return
+        if not cycle.response_started or cycle.response_complete:
+            raise RuntimeError(f"Unexpected ASGI message '{ZEROCOPY_EXTENSION}'.")
+
+        count = message["count"]
+        if count > 0 and cycle.scope["method"] != "HEAD":
+            if not cycle.chunked_encoding:
+                if count > cycle.expected_content_length:
+                    raise RuntimeError("Response content longer than Content-Length")
+                cycle.expected_content_length -= count
+            try:
+                if cycle.chunked_encoding:
+                    cycle.transport.write(b"%x\r\n" % count)
+                # 쓰기 버퍼가 비워진 뒤 소켓에 직접 os.sendfile
+                await loop.sendfile(cycle.transport, message["file"], message["offset"], count)
+                if cycle.chunked_encoding:
+                    cycle.transport.write(b"\r\n")
+            except OSError:
+                # 전송 중 클라이언트 연결 끊김: 일반 본문 전송과 같이 이후 메시지를 무시
+                cycle.disconnected = True
+                return
+
+        if not message.get("more_body", False):
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+    return zerocopy_send
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="zero-copy 전송을 지원하는 uvicorn 서버 실행")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args()
+
+    uvicorn.run(
+        "app.main:app",
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        http=SendfileHttpProtocol,
+        loop="asyncio",
+    )
+
+
+if __name__ == "__main__":
+    # 워커 프로세스에 설정을 넘길 때 프로토콜 클래스를 app.server 모듈 경로로 참조하도록 다시 import
+    from app.server import main as run_server
+
+    run_server()
@@ -0,0 +1,224 @@
+"""
+스트림 티켓 모듈
+- (사용자, 게시물, 만료 시각, 파일 정보)에 대한 HMAC 서명 티켓 발급 및 검증
+- 검증은 CPU만 사용 (DB 조회 없음), 파일 정보로 메타데이터 캐시 미스에도 DB 조회 없이 스트리밍
+- 권한 삭제, 비공개 전환, 게시물/사용자 삭제, 파일 재작성 시 티켓 폐기
+
+폐기 목록은 프로세스 메모리에서 확인하고, DB(ticket_revocations)에도 기록해 워커끼리 공유합니다.
+각 워커는 STREAM_TICKET_REVOCATION_SYNC초에 한 번 새 폐기 기록을 읽어 오므로,
+다른 워커에서 폐기한 티켓은 최대 그 시간 동안 유효할 수 있습니다.
+"""
+
+import base64
+import hashlib
+import hmac
+import json
+import threading
+import time
+from typing import NamedTuple
+
+from sqlalchemy.orm import Session
+
+from app.auth_utils import SECRET_KEY
+from app.config import STREAM_TICKET_REVOCATION_SYNC, STREAM_TICKET_TTL
+from app.models import TicketRevocation
+
+
+class InvalidStreamTicket(Exception):
+    """티켓 형식 오류, 서명 불일치, 만료, 폐기된 경우"""
+
+
+class StreamTicket(NamedTuple):
+    """검증한 티켓 내용"""
+    user_id: int
+    file: dict | None  # 발급할 때의 스트리밍 파일 정보 (없는 티켓은 캐시 미스 시 DB 조회)
+
+
+def _now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+def _sign(payload: str) -> str:
+    """페이로드 HMAC-SHA256 서명 (base64url)"""
+    digest = hmac.new(SECRET_KEY.encode("utf-8"), payload.encode("utf-8"), hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(digest).rstrip(b"=").decode("ascii")
+
+
+def _encode_file(file: dict) -> str:
+    """파일 정보를 티켓에 넣을 base64url JSON으로 변환"""
+    data = json.dumps(file, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _decode_file(value: str) -> dict:
+    try:
+        file = json.loads(base64.urlsafe_b64decode(value + "=" * (-len(value) % 4)))
+    except ValueError:
+        raise InvalidStreamTicket("Malformed ticket")
+    if not isinstance(file, dict):
+        raise InvalidStreamTicket("Malformed ticket")
+    return file
+
+
+class TicketRevocations:
+    """
+    티켓 폐기 목록
+
+    - 게시물 단위, 사용자 단위, (게시물, 사용자) 권한 단위로 폐기 시각을 기록
+    - 폐기 시각 이전에 발급된 티켓은 무효
+    - 티켓 TTL이 지난 기록은 의미가 없으므로 정리
+    - db를 넘기면 DB에도 기록하고 commit (호출한 쪽의 변경을 commit한 뒤 호출)
+      → 다른 워커가 sync로 읽어 반영
+    """
+
+    def __init__(self, ttl: int, sync_interval: float) -> None:
+        self.ttl_ms = ttl * 1000
+        self.sync_interval = sync_interval
+        self._posts: dict[int, int] = {}
+        self._users: dict[int, int] = {}
+        self._grants: dict[tuple[int, int], int] = {}
+        self._last_id = 0  # 마지막으로 읽은 DB 폐기 기록 id
+        self._synced_at: float | None = None
+        self._lock = threading.Lock()
+
+    def revoke_post(self, post_id: int, db: Session | None = None) -> None:
+        """게시물에 대해 발급된 모든 티켓 폐기"""
+        self._revoke(self._posts, post_id, db, post_id=post_id)
+
+    def revoke_user(self, user_id: int, db: Session | None = None) -> None:
+        """사용자에게 발급된 모든 티켓 폐기"""
+        self._revoke(self._users, user_id, db, user_id=user_id)
+
+    def revoke_grant(self, post_id: int, user_id: int, db: Session | None = None) -> None:
+        """특정 사용자의 특정 게시물 티켓 폐기"""
+        self._revoke(self._grants, (post_id, user_id), db, post_id=post_id, user_id=user_id)
+
+    def sync(self, db: Session, force: bool = False) -> None:
+        """
+        다른 워커가 DB에 기록한 폐기를 메모리 목록에 반영
+
+        sync_interval초에 한 번만 조회합니다 (force이면 바로 조회).
+        """
+        now = time.monotonic()
+        with self._lock:
+            if not force and self._synced_at is not None and now - self._synced_at < self.sync_interval:
+                return
+            self._synced_at = now
+            last_id = self._last_id
+        rows = (
+            db.query(TicketRevocation.id, TicketRevocation.post_id, TicketRevocation.user_id,
+                     TicketRevocation.revoked_at)
+            .filter(TicketRevocation.id > last_id, TicketRevocation.revoked_at >= _now_ms() - self.ttl_ms)
+            .order_by(TicketRevocation.id)
+            .all()
+        )
+        with self._lock:
+            for row in rows:
+                if row.user_id is None:
+                    table, key = self._posts, row.post_id
+                elif row.post_id is None:
+                    table, key = self._users, row.user_id
+                else:
+                    table, key = self._grants, (row.post_id, row.user_id)
+                table[key] = max(table.get(key, 0), row.revoked_at)
+                self._last_id = max(self._last_id, row.id)
+
+    def is_revoked(self, user_id: int, post_id: int, issued_at: int) -> bool:
+        """티켓이 폐기 시각 이전에 발급되었는지 확인"""
+        with self._lock:
+            return any(
+                revoked_at is not None and issued_at <= revoked_at
+                for revoked_at in (
+                    self._posts.get(post_id),
+                    self._users.get(user_id),
+                    self._grants.get((post_id, user_id)),
+                )
+            )
+
+    def clear(self) -> None:
+        """폐기 목록 초기화"""
+        with self._lock:
+            self._posts.clear()
+            self._users.clear()
+            self._grants.clear()
+            self._last_id = 0
+            self._synced_at = None
+
+    def _revoke(self, table: dict, key, db: Session | None, **columns) -> None:
+        now = _now_ms()
+        with self._lock:
+            table[key] = now
+            self._prune(now)
+        if db is not None:
+            db.add(TicketRevocation(revoked_at=now, **columns))
+            db.query(TicketRevocation).filter(TicketRevocation.revoked_at < now - self.ttl_ms).delete(
+                synchronize_session=False
+            )
+            db.commit()
+
+    def _prune(self, now: int) -> None:
+        """TTL보다 오래된 폐기 기록 제거 (그 이전 티켓은 이미 만료됨)"""
+        cutoff = now - self.ttl_ms
+        for table in (self._posts, self._users, self._grants):
+            for key in [key for key, revoked_at in table.items() if revoked_at < cutoff]:
+                del table[key]
+
+
+# 프로세스 전역 폐기 목록
+ticket_revocations = TicketRevocations(STREAM_TICKET_TTL, STREAM_TICKET_REVOCATION_SYNC)
+
+
+def create_stream_ticket(
+    user_id: int, post_id: int, file: dict | None = None, ttl: int = STREAM_TICKET_TTL
+) -> tuple[str, int]:
+    """
+    스트림 티켓 발급
+
+    Args:
+        user_id: 사용자 ID
+        post_id: 게시물 ID
+        file: 스트리밍 파일 정보 (JSON으로 직렬화할 수 있는 값, 서명에 포함)
+        ttl: 유효 시간 (초)
+
+    Returns:
+        (티켓 문자열, 만료 시각(유닉스 밀리초)) 튜플
+    """
+    issued_at = _now_ms()
+    expires_at = issued_at + ttl * 1000
+    payload = f"{user_id}.{post_id}.{expires_at}.{issued_at}"
+    if file is not None:
+        payload += f".{_encode_file(file)}"
+    return f"{payload}.{_sign(payload)}", expires_at
+
+
+def verify_stream_ticket(ticket: str, post_id: int) -> StreamTicket:
+    """
+    스트림 티켓 검증 (DB 조회 없음)
+
+    Args:
+        ticket: 티켓 문자열
+        post_id: 요청한 게시물 ID
+
+    Returns:
+        StreamTicket (사용자 ID, 파일 정보)
+
+    Raises:
+        InvalidStreamTicket: 형식 오류, 서명 불일치, 다른 게시물, 만료, 폐기된 경우
+    """
+    payload, _, signature = ticket.rpartition(".")
+    parts = payload.split(".")
+    if len(parts) not in (4, 5) or not all(part.isdigit() for part in parts[:4]):
+        raise InvalidStreamTicket("Malformed ticket")
+
+    if not hmac.compare_digest(signature, _sign(payload)):
+        raise InvalidStreamTicket("Invalid signature")
+
+    user_id, ticket_post_id, expires_at, issued_at = (int(part) for part in parts[:4])
+    if ticket_post_id != post_id:
+        raise InvalidStreamTicket("Ticket issued for another post")
+    if expires_at <= _now_ms():
+        raise InvalidStreamTicket("Ticket expired")
+    if ticket_revocations.is_revoked(user_id, post_id, issued_at):
+        raise InvalidStreamTicket("Ticket revoked")
+
+    return StreamTicket(user_id, _decode_file(parts[4]) if len(parts) == 5 else None)
@@ -0,0 +1,873 @@
+"""
+스트리밍 유틸리티 모듈
+- 파일 구간(offset, length) 응답
+- sendfile 기반 zero-copy 전송
+- 리버스 프록시 offload (X-Accel-Redirect / X-Sendfile)
+- 전용 스레드 풀 기반 비동기 파일 I/O + 읽기 선행(read-ahead)
+- 구간 길이/전송 속도 기반 청크 크기 조절 + posix_fadvise 힌트
+- 대역폭 제어 (StreamThrottle) 적용
+- 전송이 끝나면 동시 스트림 자리 (StreamSlot) 반환, 전송량 콜백 호출
+- Range 헤더 파싱 (RFC 7233: suffix, multi-range)
+- 조건부 요청 검증자 (ETag, Last-Modified, If-Range)
+- 핫 세그먼트 캐시 조회 (비디오 앞/끝 구간)
+- 불변 파생 파일(HLS 세그먼트 등) 응답
+"""
+
+import asyncio
+import os
+import re
+import secrets
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from datetime import timezone
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Callable
+from urllib.parse import quote
+
+from fastapi import HTTPException, Request, status
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+from app.admission import StreamSlot
+from app.bandwidth import StreamThrottle
+from app.config import FILE_IO_THREADS, STREAM_DONTNEED_MIN_BYTES, STREAM_FADVISE
+from app.segment_cache import segment_cache
+
+# ASGI zero-copy send 확장 (서버가 os.sendfile로 전송)
+ZEROCOPY_EXTENSION = "http.response.zerocopysend"
+
+# 확장을 지원하지 않는 서버에서 사용하는 청크 크기
+# - 긴 구간은 CHUNK_SIZE로 시작해 전송 속도에 맞춰 MIN~MAX 사이에서 조절
+# - MAX_CHUNK_SIZE 이하의 짧은 구간(moov 등)은 한 번에 읽음
+CHUNK_SIZE = 1024 * 1024  # 1MB
+MIN_CHUNK_SIZE = 64 * 1024  # 64KB
+MAX_CHUNK_SIZE = 4 * 1024 * 1024  # 4MB
+# 청크 하나를 전송하는 데 걸리도록 맞추는 시간 (초)
+CHUNK_TARGET_SECONDS = 0.25
+# 전송 속도 이동 평균 가중치
+SEND_RATE_ALPHA = 0.3
+# 연결당 미리 읽어두는 청크 수 (연결당 버퍼 = 청크 크기 * (READ_AHEAD_CHUNKS + 1))
+READ_AHEAD_CHUNKS = 2
+# 청크 크기 정렬 단위 (페이지 크기)
+_PAGE_SIZE = 4096
+
+_FADVISE_SUPPORTED = hasattr(os, "posix_fadvise")
+
+# Range 구간 형식: start-end, start-, -suffix
+_RANGE_SPEC_PATTERN = re.compile(r"(\d*)\s*-\s*(\d*)", re.ASCII)
+# 이 간격(바이트) 이하로 떨어진 구간은 병합 (multipart 파트 헤더 크기 수준)
+RANGE_COALESCE_GAP = 80
+# multipart 응답의 최대 구간 수
+MAX_RANGES = 16
+
+# 내용이 바뀌지 않는 파생 파일의 캐시 유효 시간 (1년)
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+# 파일 I/O 전용 스레드 풀 (이벤트 루프를 막지 않도록 디스크 읽기를 위임)
+_file_io_executor = ThreadPoolExecutor(
+    max_workers=FILE_IO_THREADS, thread_name_prefix="file-io"
+)
+
+# offload 모드별 헤더 이름
+OFFLOAD_HEADERS = {
+    "x-accel": "X-Accel-Redirect",
+    "x-sendfile": "X-Sendfile",
+}
+
+
+async def run_file_io(func, *args):
+    """
+    블로킹 파일 I/O 호출을 전용 스레드 풀에서 실행
+
+    Args:
+        func: 실행할 함수 (os.stat, open 등)
+        *args: 함수 인자
+
+    Returns:
+        함수 반환값
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_file_io_executor, func, *args)
+
+
+async def run_file_io_shielded(func, *args, on_cancel: Callable | None = None):
+    """
+    run_file_io와 같지만 취소되어도 스레드 작업이 끝날 때까지 기다린 뒤 취소를 전달
+
+    run_in_executor 퓨처를 취소해도 이미 시작된 스레드 작업은 멈추지 않으므로,
+    그대로 취소를 전달하면 호출자가 아직 쓰고 있는 파일 디스크립터를 닫을 수 있습니다.
+
+    Args:
+        func: 실행할 함수
+        *args: 함수 인자
+        on_cancel: 취소된 경우 작업 결과로 호출할 정리 함수 (예: 방금 연 파일 닫기)
+
+    Returns:
+        함수 반환값
+    """
+    future = asyncio.ensure_future(run_file_io(func, *args))
+    try:
+        return await asyncio.shield(future)
+    except asyncio.CancelledError:
+        while not future.done():
+            try:
+                await asyncio.wait([future])
+            except asyncio.CancelledError:
+                pass
+        if on_cancel is not None and not future.cancelled() and future.exception() is None:
+            on_cancel(future.result())
+        raise
+
+
+def _read_chunk(fd: int, size: int, offset: int) -> bytes:
+    """파일 디스크립터의 offset 위치에서 size 바이트 읽기"""
+    return os.pread(fd, size, offset)
+
+
+def _advise(fd: int, hints: list[tuple[int, int, int]]) -> None:
+    """posix_fadvise 힌트 적용 (힌트 실패는 전송에 영향 없음)"""
+    for offset, length, advice in hints:
+        try:
+            os.posix_fadvise(fd, offset, length, advice)
+        except OSError:
+            pass
+
+
+def _read_chunk_with_hints(fd: int, size: int, offset: int, hints: list[tuple[int, int, int]]) -> bytes:
+    """
+    힌트를 적용한 뒤 청크 읽기
+
+    힌트를 읽기 작업과 함께 실행해 fd를 닫기 전에 모든 fadvise 호출이 끝나도록 합니다.
+    """
+    if hints:
+        _advise(fd, hints)
+    return _read_chunk(fd, size, offset)
+
+
+def _read_segment(path: str, offset: int, length: int) -> bytes:
+    """파일의 세그먼트 전체 읽기 (캐시 적재용)"""
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        return os.pread(fd, length, offset)
+    finally:
+        os.close(fd)
+
+
+def _wait_and_close(fd: int, futures: list[Future]) -> None:
+    """진행 중인 읽기가 끝난 뒤 파일 디스크립터 닫기"""
+    wait(futures)
+    os.close(fd)
+
+
+def _close_when_idle(fd: int, pending: deque) -> None:
+    """
+    남은 선행 읽기를 취소하고 파일 디스크립터 닫기
+
+    이미 실행 중인 읽기가 있으면 끝날 때까지 기다린 뒤 닫습니다.
+    (읽는 도중 fd 번호가 다른 파일에 재사용되는 것을 방지)
+    """
+    running = [future for future, _ in pending if not future.cancel()]
+    if running:
+        _file_io_executor.submit(_wait_and_close, fd, running)
+    else:
+        os.close(fd)
+
+
+class ChunkSizer:
+    """
+    응답 하나의 청크 크기 결정
+
+    - 구간이 MAX_CHUNK_SIZE 이하이면 한 번에 읽음 (작은 moov 요청에 불필요한 분할 없음)
+    - 긴 구간은 CHUNK_SIZE로 시작해, 관측한 전송 속도로 CHUNK_TARGET_SECONDS 분량을 맞춤
+      (빠른 클라이언트는 큰 청크로 호출 수를 줄이고, 느린 클라이언트는 작은 청크로 버퍼를 줄임)
+    """
+
+    def __init__(self, length: int) -> None:
+        self.length = length
+        self.rate: float | None = None  # bytes/s 이동 평균
+
+    def next_size(self, remaining: int) -> int:
+        """다음 청크 크기"""
+        if self.length <= MAX_CHUNK_SIZE:
+            return remaining
+        if self.rate is None:
+            size = CHUNK_SIZE
+        else:
+            size = int(self.rate * CHUNK_TARGET_SECONDS)
+        size = max(MIN_CHUNK_SIZE, min(size, MAX_CHUNK_SIZE))
+        if size > _PAGE_SIZE:
+            size -= size % _PAGE_SIZE
+        # 남은 양이 너무 작게 남지 않도록 마지막 청크에 합침
+        if remaining - size < MIN_CHUNK_SIZE and remaining <= MAX_CHUNK_SIZE:
+            return remaining
+        return min(size, remaining)
+
+    def record(self, nbytes: int, seconds: float) -> None:
+        """청크 전송 결과로 전송 속도 갱신"""
+        rate = nbytes / max(seconds, 1e-4)
+        if self.rate is None:
+            self.rate = rate
+        else:
+            self.rate = SEND_RATE_ALPHA * rate + (1 - SEND_RATE_ALPHA) * self.rate
+
+
+class RangeNotSatisfiable(Exception):
+    """Range 헤더의 모든 구간이 파일 범위를 벗어난 경우"""
+
+
+def parse_range_header(range_header: str, file_size: int) -> list[tuple[int, int]] | None:
+    """
+    Range 헤더 파싱 (RFC 7233)
+
+    - bytes=start-end, bytes=start-, bytes=-suffix 형식 지원
+    - 쉼표로 구분된 여러 구간 지원
+
+    Args:
+        range_header: Range 헤더 값
+        file_size: 파일 크기
+
+    Returns:
+        (start, end) 목록 (end 포함). 헤더 형식이 잘못된 경우 None (헤더 무시)
+
+    Raises:
+        RangeNotSatisfiable: 만족 가능한 구간이 하나도 없는 경우
+    """
+    unit, _, range_set = range_header.partition("=")
+    if unit.strip().lower() != "bytes" or not range_set.strip():
+        return None
+
+    ranges = []
+    for spec in range_set.split(","):
+        spec = spec.strip()
+        if not spec:
+            continue
+        match = _RANGE_SPEC_PATTERN.fullmatch(spec)
+        if not match:
+            return None
+        first, last = match.groups()
+
+        if not first:
+            # suffix 구간: 마지막 N 바이트
+            if not last:
+                return None
+            suffix_length = int(last)
+            if suffix_length == 0 or file_size == 0:
+                continue
+            ranges.append((max(0, file_size - suffix_length), file_size - 1))
+            continue
+
+        start = int(first)
+        if last and int(last) < start:
+            return None
+        if start >= file_size:
+            continue
+        end = min(int(last), file_size - 1) if last else file_size - 1
+        ranges.append((start, end))
+
+    if not ranges:
+        raise RangeNotSatisfiable()
+    return ranges
+
+
+def coalesce_ranges(
+    ranges: list[tuple[int, int]],
+    gap: int = RANGE_COALESCE_GAP,
+    max_ranges: int = MAX_RANGES,
+) -> list[tuple[int, int]]:
+    """
+    겹치거나 가까운 구간 병합
+
+    - 겹치거나 gap 바이트 이하로 떨어진 구간은 하나로 병합
+      (multipart 파트 헤더보다 작은 간격은 그대로 전송하는 편이 저렴)
+    - 병합 후에도 max_ranges를 넘으면 전체를 하나의 구간으로 병합
+
+    Args:
+        ranges: (start, end) 목록
+        gap: 병합할 최대 간격 (바이트)
+        max_ranges: 최대 구간 수
+
+    Returns:
+        정렬 및 병합된 (start, end) 목록
+    """
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1 + gap:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+
+    if len(merged) > max_ranges:
+        merged = [(merged[0][0], max(end for _, end in merged))]
+    return merged
+
+
+def make_etag(file_size: int, mtime_ns: int) -> str:
+    """
+    파일 크기와 수정 시각으로 strong ETag 생성
+
+    Args:
+        file_size: 파일 크기
+        mtime_ns: 파일 수정 시각 (나노초)
+
+    Returns:
+        따옴표로 감싼 ETag 문자열
+    """
+    return f'"{file_size:x}-{mtime_ns:x}"'
+
+
+def format_http_date(timestamp: float) -> str:
+    """유닉스 시각을 HTTP 날짜 형식으로 변환"""
+    return formatdate(timestamp, usegmt=True)
+
+
+def _parse_http_date(value: str) -> float | None:
+    """HTTP 날짜를 유닉스 시각으로 변환 (형식 오류 시 None)"""
+    try:
+        parsed = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def _etag_list(header: str) -> list[str]:
+    """If-None-Match 등의 ETag 목록 파싱 (W/ 접두사 제거)"""
+    return [tag.strip().removeprefix("W/") for tag in header.split(",") if tag.strip()]
+
+
+def is_not_modified(headers, etag: str, mtime: float) -> bool:
+    """
+    조건부 GET 평가 (RFC 7232)
+
+    - If-None-Match가 있으면 ETag 비교 (weak 비교)
+    - 없으면 If-Modified-Since와 수정 시각 비교
+
+    Args:
+        headers: 요청 헤더
+        etag: 현재 ETag
+        mtime: 파일 수정 시각 (유닉스 시각)
+
+    Returns:
+        304 Not Modified로 응답해야 하면 True
+    """
+    if_none_match = headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = _etag_list(if_none_match)
+        return "*" in tags or etag in tags
+
+    if_modified_since = headers.get("if-modified-since")
+    if if_modified_since is not None:
+        since = _parse_http_date(if_modified_since)
+        # HTTP 날짜는 초 단위이므로 초 단위로 비교
+        return since is not None and int(mtime) <= since
+
+    return False
+
+
+def if_range_matches(if_range: str | None, etag: str, mtime: float) -> bool:
+    """
+    If-Range 평가 (RFC 7233)
+
+    - ETag: strong 비교 (W/ 태그는 항상 불일치)
+    - 날짜: Last-Modified와 정확히 일치해야 함
+
+    Returns:
+        Range를 적용해도 되면 True, 전체 파일을 보내야 하면 False
+    """
+    if if_range is None:
+        return True
+    if_range = if_range.strip()
+    if if_range.startswith('"') or if_range.startswith("W/"):
+        return if_range == etag
+    since = _parse_http_date(if_range)
+    return since is not None and int(mtime) == since
+
+
+class FileRangeResponse(Response):
+    """
+    파일의 (offset, length) 구간을 전송하는 응답
+
+    - 서버가 ASGI zero-copy send 확장을 지원하면 파일 객체와 구간만 넘기고
+      실제 전송은 서버가 os.sendfile로 수행 (Python이 payload를 읽지 않음)
+    - 지원하지 않는 서버에서는 전용 스레드 풀에서 os.pread로 읽어 청크 단위 전송
+      (다음 청크를 미리 읽어 두어 디스크 대기와 네트워크 전송을 겹침)
+      기본 uvicorn은 확장을 지원하지 않으므로 python -m app.server(app.server.SendfileHttpProtocol)로
+      실행하거나 STREAM_OFFLOAD_MODE(X-Accel-Redirect / X-Sendfile)로 프록시에 전송을 맡겨야 함
+    - HEAD 요청에는 파일을 열지 않고 헤더만 전송
+    - cache_key가 주어지면 구간 앞부분이 핫 세그먼트(파일 앞/끝)에 속할 때
+      디스크 대신 세그먼트 캐시에서 전송 (zero-copy 경로는 커널 페이지 캐시 사용)
+    - throttle이 주어지면 본문을 보내는 동안 대역폭 할당량에 맞춰 대기
+    - slot이 주어지면 전송이 끝나거나 중단될 때 동시 스트림 자리 반환
+    - on_sent가 주어지면 전송이 끝나거나 중단될 때 실제로 보낸 본문 크기로 호출 (통계 집계)
+    """
+
+    def __init__(
+        self,
+        path: str,
+        offset: int,
+        length: int,
+        status_code: int = 200,
+        headers: dict | None = None,
+        media_type: str | None = None,
+        file_size: int | None = None,
+        cache_key: tuple[str, str] | None = None,
+        throttle: StreamThrottle | None = None,
+        slot: StreamSlot | None = None,
+        on_sent: Callable[[int], None] | None = None,
+    ) -> None:
+        self.path = path
+        self.throttle = throttle
+        self.slot = slot
+        self.on_sent = on_sent
+        self.bytes_sent = 0
+        # 전송할 파트 목록: (파트 앞에 붙는 바이트, offset, length)
+        self.parts = [(b"", offset, length)]
+        self.trailer = b""
+        self.file_size = file_size
+        self.cache_key = cache_key
+        self.status_code = status_code
+        self.media_type = media_type
+        self.background = None
+        self.init_headers(headers)
+
+    @property
+    def content_length(self) -> int:
+        """본문 전체 길이"""
+        return sum(len(prefix) + length for prefix, _, length in self.parts) + len(self.trailer)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        async def counting_send(message: dict) -> None:
+            await send(message)
+            if message["type"] == ZEROCOPY_EXTENSION:
+                self.bytes_sent += message["count"]
+            elif message["type"] == "http.response.body":
+                self.bytes_sent += len(message.get("body", b""))
+
+        try:
+            await self._send_response(scope, counting_send if self.on_sent is not None else send)
+        finally:
+            if self.slot is not None:
+                self.slot.release()
+            if self.on_sent is not None:
+                self.on_sent(self.bytes_sent)
+
+    async def _send_response(self, scope: Scope, send: Send) -> None:
+        await send({
+            "type": "http.response.start",
+            "status": self.status_code,
+            "headers": self.raw_headers,
+        })
+
+        if scope.get("method") == "HEAD" or self.content_length <= 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        if self.throttle is not None:
+            self.throttle.open()
+        try:
+            if ZEROCOPY_EXTENSION in scope.get("extensions", {}):
+                await self._send_zerocopy(send)
+            else:
+                await self._send_chunks(send)
+        finally:
+            if self.throttle is not None:
+                self.throttle.close()
+
+    async def _send_zerocopy(self, send: Send) -> None:
+        """
+        파일 객체와 구간을 서버에 넘겨 sendfile로 전송
+
+        대역폭 제어 중에는 구간을 CHUNK_SIZE 단위로 나눠 할당량만큼씩 넘깁니다.
+        """
+        f = await run_file_io(open, self.path, "rb")
+        try:
+            for index, (prefix, offset, length) in enumerate(self.parts):
+                is_last = index == len(self.parts) - 1 and not self.trailer
+                if prefix:
+                    await send({"type": "http.response.body", "body": prefix, "more_body": True})
+                step = length if self.throttle is None else CHUNK_SIZE
+                end = offset + length
+                while True:
+                    count = min(step, end - offset)
+                    if self.throttle is not None:
+                        await self.throttle.consume(count)
+                    await send({
+                        "type": ZEROCOPY_EXTENSION,
+                        "file": f,
+                        "offset": offset,
+                        "count": count,
+                        "more_body": offset + count < end or not is_last,
+                    })
+                    offset += count
+                    if offset >= end:
+                        break
+            if self.trailer:
+                await send({"type": "http.response.body", "body": self.trailer, "more_body": False})
+        finally:
+            f.close()
+
+    async def _send_chunks(self, send: Send) -> None:
+        """스레드 풀에서 구간을 읽어 청크 단위 전송 (zero-copy 미지원 서버용)"""
+        fd = await run_file_io(os.open, self.path, os.O_RDONLY)
+        pending = deque()  # (Future, 요청한 크기)
+        try:
+            for index, (prefix, offset, length) in enumerate(self.parts):
+                is_last = index == len(self.parts) - 1 and not self.trailer
+                if prefix:
+                    await send({"type": "http.response.body", "body": prefix, "more_body": True})
+                offset, length = await self._send_cached(send, offset, length, is_last)
+                if length <= 0:
+                    continue
+                complete = await self._send_window(send, fd, offset, length, is_last, pending)
+                if not complete:
+                    return
+            if self.trailer:
+                await send({"type": "http.response.body", "body": self.trailer, "more_body": False})
+        finally:
+            _close_when_idle(fd, pending)
+
+    async def _send_cached(
+        self,
+        send: Send,
+        offset: int,
+        length: int,
+        is_last: bool,
+    ) -> tuple[int, int]:
+        """
+        구간 앞부분이 핫 세그먼트에 속하면 세그먼트 캐시에서 전송
+
+        캐시 미스인 경우 세그먼트 전체를 스레드 풀에서 읽어 캐시에 저장합니다.
+
+        Returns:
+            캐시로 전송하고 남은 (offset, length)
+        """
+        if self.cache_key is None or self.file_size is None:
+            return offset, length
+        bounds = segment_cache.segment_bounds(self.file_size, offset)
+        if bounds is None:
+            return offset, length
+
+        segment_start, segment_end = bounds
+        data = segment_cache.get(self.cache_key, segment_start)
+        if data is None:
+            data = await run_file_io(
+                _read_segment, self.path, segment_start, segment_end - segment_start
+            )
+            if len(data) == segment_end - segment_start:
+                segment_cache.put(self.cache_key, segment_start, data)
+
+        chunk = data[offset - segment_start:offset - segment_start + length]
+        if not chunk:
+            return offset, length
+        offset += len(chunk)
+        length -= len(chunk)
+        if self.throttle is not None:
+            await self.throttle.consume(len(chunk))
+        await send({
+            "type": "http.response.body",
+            "body": chunk,
+            "more_body": length > 0 or not is_last,
+        })
+        return offset, length
+
+    async def _send_window(
+        self,
+        send: Send,
+        fd: int,
+        offset: int,
+        length: int,
+        is_last: bool,
+        pending: deque,
+    ) -> bool:
+        """
+        하나의 구간을 read-ahead로 읽어 전송
+
+        - 청크 크기는 ChunkSizer가 구간 길이와 전송 속도로 결정
+        - posix_fadvise 힌트 (읽기 작업과 함께 스레드 풀에서 실행)
+          - 여러 청크로 나뉘는 구간: SEQUENTIAL, read-ahead 다음 구간 WILLNEED
+          - STREAM_DONTNEED_MIN_BYTES 이상인 구간: 전송한 구간 DONTNEED
+
+        Returns:
+            구간 전체를 전송했으면 True, 파일이 도중에 잘렸으면 False
+        """
+        end = offset + length
+        position = offset
+        sent = 0
+        sizer = ChunkSizer(length)
+        fadvise = STREAM_FADVISE and _FADVISE_SUPPORTED and length > MAX_CHUNK_SIZE
+        drop_sent = fadvise and 0 < STREAM_DONTNEED_MIN_BYTES <= length
+        hints = [(offset, length, os.POSIX_FADV_SEQUENTIAL)] if fadvise else []
+        while sent < length:
+            # 현재 청크 + READ_AHEAD_CHUNKS개까지 읽기 요청
+            while len(pending) <= READ_AHEAD_CHUNKS and position < end:
+                size = sizer.next_size(end - position)
+                if fadvise and position + size < end:
+                    hints.append((position + size, min(size, end - position - size), os.POSIX_FADV_WILLNEED))
+                future = _file_io_executor.submit(_read_chunk_with_hints, fd, size, position, hints)
+                pending.append((future, size))
+                position += size
+                hints = []
+
+            future, size = pending.popleft()
+            chunk = await asyncio.wrap_future(future)
+            chunk_offset = offset + sent
+            sent += len(chunk)
+            truncated = len(chunk) < size
+            # 대역폭 제어 대기 시간도 전송 속도에 포함 (제한된 속도에 맞춰 청크 축소)
+            started = time.monotonic()
+            if self.throttle is not None:
+                await self.throttle.consume(len(chunk))
+            await send({
+                "type": "http.response.body",
+                "body": chunk,
+                "more_body": not truncated and (sent < length or not is_last),
+            })
+            sizer.record(len(chunk), time.monotonic() - started)
+            if truncated:
+                # 파일이 도중에 잘린 경우 응답 종료
+                return False
+            if drop_sent:
+                # 다음 읽기 작업과 함께 적용
+                hints.append((chunk_offset, len(chunk), os.POSIX_FADV_DONTNEED))
+        return True
+
+
+class MultipartRangeResponse(FileRangeResponse):
+    """
+    여러 구간을 multipart/byteranges로 전송하는 응답 (RFC 7233)
+    """
+
+    def __init__(
+        self,
+        path: str,
+        ranges: list[tuple[int, int]],
+        file_size: int,
+        content_type: str,
+        headers: dict | None = None,
+        cache_key: tuple[str, str] | None = None,
+        throttle: StreamThrottle | None = None,
+        slot: StreamSlot | None = None,
+        on_sent: Callable[[int], None] | None = None,
+    ) -> None:
+        self.path = path
+        self.file_size = file_size
+        self.cache_key = cache_key
+        self.throttle = throttle
+        self.slot = slot
+        self.on_sent = on_sent
+        self.bytes_sent = 0
+        boundary = secrets.token_hex(16)
+        self.parts = []
+        for index, (start, end) in enumerate(ranges):
+            prefix = (
+                ("\r\n" if index else "")
+                + f"--{boundary}\r\n"
+                + f"Content-Type: {content_type}\r\n"
+                + f"Content-Range: bytes {start}-{end}/{file_size}\r\n\r\n"
+            )
+            self.parts.append((prefix.encode("latin-1"), start, end - start + 1))
+        self.trailer = f"\r\n--{boundary}--\r\n".encode("latin-1")
+        self.status_code = 206
+        self.media_type = None
+        self.background = None
+
+        headers = dict(headers or {})
+        headers["Content-Type"] = f"multipart/byteranges; boundary={boundary}"
+        headers["Content-Length"] = str(self.content_length)
+        self.init_headers(headers)
+
+
+def build_range_response(
+    path: str,
+    file_size: int,
+    content_type: str,
+    range_header: str | None,
+    headers: dict | None = None,
+    cache_key: tuple[str, str] | None = None,
+    throttle: StreamThrottle | None = None,
+    slot: StreamSlot | None = None,
+    on_sent: Callable[[int], None] | None = None,
+) -> FileRangeResponse:
+    """
+    Range 헤더에 맞는 파일 응답 생성
+
+    - Range 없음 (또는 형식 오류): 200 전체 전송
+    - 구간 1개: 206 + Content-Range
+    - 구간 여러 개: 206 multipart/byteranges
+
+    Args:
+        path: 파일 경로
+        file_size: 파일 크기
+        content_type: 파일 Content-Type
+        range_header: Range 헤더 값
+        headers: 추가 응답 헤더
+        cache_key: 핫 세그먼트 캐시 키 (video_filename, etag)
+        throttle: 대역폭 제어 핸들
+        slot: 전송이 끝나면 반환할 동시 스트림 자리
+        on_sent: 전송이 끝나면 보낸 본문 크기로 호출할 콜백
+
+    Returns:
+        FileRangeResponse 또는 MultipartRangeResponse
+
+    Raises:
+        RangeNotSatisfiable: 만족 가능한 구간이 없는 경우
+    """
+    base_headers = {"Accept-Ranges": "bytes", **(headers or {})}
+
+    ranges = parse_range_header(range_header, file_size) if range_header else None
+    if ranges is None:
+        return FileRangeResponse(
+            path,
+            0,
+            file_size,
+            status_code=200,
+            headers={
+                **base_headers,
+                "Content-Length": str(file_size),
+                "Content-Type": content_type,
+            },
+            media_type=content_type,
+            file_size=file_size,
+            cache_key=cache_key,
+            throttle=throttle,
+            slot=slot,
+            on_sent=on_sent
+        )
+
+    ranges = coalesce_ranges(ranges)
+    if len(ranges) > 1:
+        return MultipartRangeResponse(
+            path, ranges, file_size, content_type,
+            headers=base_headers, cache_key=cache_key, throttle=throttle, slot=slot, on_sent=on_sent
+        )
+
+    start, end = ranges[0]
+    return FileRangeResponse(
+        path,
+        start,
+        end - start + 1,
+        status_code=206,
+        headers={
+            **base_headers,
+            "Content-Range": f"bytes {start}-{end}/{file_size}",
+            "Content-Length": str(end - start + 1),
+            "Content-Type": content_type,
+        },
+        media_type=content_type,
+        file_size=file_size,
+        cache_key=cache_key,
+        throttle=throttle,
+        slot=slot,
+        on_sent=on_sent
+    )
+
+
+def build_offload_response(
+    mode: str,
+    upload_dir: str,
+    filename: str,
+    content_type: str,
+    prefix: str = "/protected/videos/",
+    headers: dict | None = None,
+) -> Response:
+    """
+    리버스 프록시에 파일 전송을 위임하는 응답 생성
+
+    앱은 인증/권한 확인만 수행하고, 프록시가 헤더에 지정된 파일을
+    Range 요청까지 포함해 직접 전송합니다.
+
+    Args:
+        mode: offload 모드 ("x-accel" 또는 "x-sendfile")
+        upload_dir: 비디오 저장 디렉토리
+        filename: 저장된 비디오 파일명
+        content_type: 비디오 Content-Type
+        prefix: nginx internal location 경로 (x-accel 모드)
+        headers: 추가 응답 헤더 (Cache-Control 등)
+
+    Returns:
+        본문 없이 offload 헤더만 포함한 응답
+
+    Raises:
+        ValueError: 알 수 없는 offload 모드인 경우
+    """
+    header_name = OFFLOAD_HEADERS.get(mode)
+    if header_name is None:
+        raise ValueError(f"Unknown stream offload mode: {mode}")
+
+    if mode == "x-accel":
+        location = prefix.rstrip("/") + "/" + quote(filename)
+    else:
+        location = os.path.abspath(os.path.join(upload_dir, filename))
+
+    response_headers = {
+        **(headers or {}),
+        header_name: location,
+        "Accept-Ranges": "bytes",
+        "Content-Type": content_type,
+    }
+    response = Response(status_code=200, headers=response_headers)
+    # 본문 길이는 프록시가 실제 파일 기준으로 설정
+    del response.headers["content-length"]
+    return response
+
+
+def immutable_cache_control(is_public: bool) -> str:
+    """
+    내용이 바뀌지 않는 파일(HLS 세그먼트, 썸네일 등)의 Cache-Control
+
+    Args:
+        is_public: 공개 게시물 여부 (공개면 공유 캐시 허용)
+    """
+    scope = "public" if is_public else "private"
+    return f"{scope}, max-age={IMMUTABLE_MAX_AGE}, immutable"
+
+
+async def serve_file(
+    request: Request,
+    path: str,
+    content_type: str,
+    cache_control: str,
+    throttle: StreamThrottle | None = None,
+) -> Response:
+    """
+    디스크 파일 응답 (파생 파일용, 권한 확인 후 호출)
+
+    - ETag/Last-Modified 검증자와 조건부 요청(304) 처리
+    - Range 요청 처리 (416 포함)
+
+    Raises:
+        HTTPException: 파일이 없는 경우 404, 범위가 잘못된 경우 416 에러
+    """
+    try:
+        file_stat = await run_file_io(os.stat, path)
+    except FileNotFoundError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="File not found"
+        )
+
+    etag = make_etag(file_stat.st_size, file_stat.st_mtime_ns)
+    headers = {
+        "ETag": etag,
+        "Last-Modified": format_http_date(file_stat.st_mtime),
+        "Cache-Control": cache_control,
+    }
+    if is_not_modified(request.headers, etag, file_stat.st_mtime):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    range_header = request.headers.get("range")
+    if range_header and not if_range_matches(request.headers.get("if-range"), etag, file_stat.st_mtime):
+        range_header = None
+
+    try:
+        return build_range_response(
+            path, file_stat.st_size, content_type, range_header, headers=headers, throttle=throttle
+        )
+    except RangeNotSatisfiable:
+        raise HTTPException(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            detail="Requested range not satisfiable",
+            headers={"Content-Range": f"bytes */{file_stat.st_size}"}
+        )
@@ -0,0 +1,344 @@
+"""
+이어받기 업로드 모듈
+- 세션 데이터 파일: UPLOAD_DIR/.session-<id><확장자> (전체 크기의 sparse 파일, 청크는 자기 offset에 기록)
+- 청크마다 독립적으로 기록하므로 병렬/순서 무관 전송 가능
+- 세션 상태는 DB(upload_sessions, upload_chunks)에 저장 (재시작 후에도 이어받기 가능)
+- 완료 시 같은 디렉토리 안에서 rename으로 게시 (원자적)
+- 정리 스레드: 만료된 세션과 데이터 파일, 중단된 업로드/후처리의 임시 파일 삭제 (lifespan)
+"""
+
+import logging
+import math
+import os
+import shutil
+import threading
+from datetime import datetime, timedelta, timezone
+
+from fastapi import HTTPException, Request, status
+from sqlalchemy.orm import Session
+
+from app.config import DERIVATIVES_DIR, UPLOAD_DIR, UPLOAD_SESSION_TTL, UPLOAD_SWEEP_INTERVAL, UPLOAD_WRITE_BYTES
+from app.database import SessionLocal
+from app.models import UploadSession
+from app.stream_utils import run_file_io_shielded
+from app.upload_utils import TEMP_PREFIX
+
+logger = logging.getLogger(__name__)
+
+SESSION_PREFIX = ".session-"
+
+# 후처리가 쓰고 rename하는 임시 파일/디렉토리 (작업 중 프로세스가 종료되면 남음)
+# - UPLOAD_DIR: faststart 재작성 (mp4_utils)
+# - DERIVATIVES_DIR 아래: 클립, 화질, 키프레임 인덱스, HLS/썸네일/스프라이트 준비 디렉토리 (media_utils, keyframe_index)
+PIPELINE_TEMP_PREFIXES = (
+    ".faststart-", ".clip-", ".rendition-", ".keyframes-", ".hls-", ".thumbnails-", ".sprites-",
+)
+
+
+def utc(value: datetime) -> datetime:
+    """SQLite는 시간대를 저장하지 않음 (UTC로 기록)"""
+    return value if value.tzinfo is not None else value.replace(tzinfo=timezone.utc)
+
+
+def session_expiry(now: datetime | None = None) -> datetime:
+    """지금(또는 now)부터 UPLOAD_SESSION_TTL 뒤"""
+    return (now or datetime.now(timezone.utc)) + timedelta(seconds=UPLOAD_SESSION_TTL)
+
+
+def chunk_count(size: int, chunk_size: int) -> int:
+    return math.ceil(size / chunk_size)
+
+
+def chunk_range(session: UploadSession, index: int) -> tuple[int, int]:
+    """청크의 (offset, 길이) - 마지막 청크만 짧을 수 있음"""
+    offset = index * session.chunk_size
+    return offset, min(session.chunk_size, session.size - offset)
+
+
+def session_file_path(session: UploadSession) -> str:
+    """세션 데이터 파일 경로 (게시할 파일과 같은 디렉토리, 확장자 유지)"""
+    ext = os.path.splitext(session.filename)[1].lower()
+    return os.path.join(UPLOAD_DIR, f"{SESSION_PREFIX}{session.id}{ext}")
+
+
+def create_session_file(path: str, size: int) -> None:
+    """전체 크기의 sparse 파일 생성 (받은 청크만큼만 디스크 사용)"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+    try:
+        os.ftruncate(fd, size)
+    finally:
+        os.close(fd)
+
+
+def _allocated_bytes(path: str) -> int:
+    """파일이 실제로 차지하는 디스크 크기 (sparse 파일은 받은 청크만큼)"""
+    file_stat = os.stat(path)
+    blocks = getattr(file_stat, "st_blocks", None)
+    return blocks * 512 if blocks is not None else file_stat.st_size
+
+
+def _tree_allocated_bytes(path: str) -> int:
+    """디렉토리 안 파일들이 차지하는 디스크 크기"""
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        for name in filenames:
+            try:
+                total += _allocated_bytes(os.path.join(dirpath, name))
+            except FileNotFoundError:
+                pass
+    return total
+
+
+def remove_session_file(path: str) -> int:
+    """
+    데이터 파일 삭제 (없으면 무시)
+
+    Returns:
+        회수한 디스크 크기
+    """
+    try:
+        reclaimed = _allocated_bytes(path)
+        os.remove(path)
+    except FileNotFoundError:
+        return 0
+    return reclaimed
+
+
+def discard_session(db: Session, session: UploadSession) -> int:
+    """
+    세션과 데이터 파일 삭제 (commit은 호출한 쪽에서)
+
+    Returns:
+        회수한 디스크 크기
+    """
+    reclaimed = remove_session_file(session_file_path(session))
+    db.delete(session)
+    return reclaimed
+
+
+def _pwrite_all(fd: int, data: bytearray, offset: int) -> None:
+    view = memoryview(data)
+    while view:
+        written = os.pwrite(fd, view, offset)
+        view = view[written:]
+        offset += written
+
+
+async def receive_chunk(request: Request, path: str, offset: int, length: int) -> None:
+    """
+    요청 본문(청크 하나)을 데이터 파일의 offset에 기록
+
+    같은 파일의 다른 청크와 겹치지 않으므로 여러 요청이 동시에 기록해도 됩니다.
+
+    Args:
+        request: 청크 PUT 요청 (본문을 아직 읽지 않은 상태)
+        path: 세션 데이터 파일
+        offset: 청크 시작 위치
+        length: 청크 길이 (본문이 정확히 이 길이여야 함)
+
+    Raises:
+        HTTPException: 본문이 청크 길이보다 길거나(초과 즉시 중단) 짧은 경우 400
+        FileNotFoundError: 데이터 파일이 없는 경우
+    """
+    fd = await run_file_io_shielded(os.open, path, os.O_WRONLY, on_cancel=os.close)
+    try:
+        received = 0
+        position = offset
+        pending = bytearray()
+        async for chunk in request.stream():
+            received += len(chunk)
+            if received > length:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Chunk larger than expected ({length} bytes)"
+                )
+            pending += chunk
+            if len(pending) >= UPLOAD_WRITE_BYTES:
+                data, pending = pending, bytearray()
+                await run_file_io_shielded(_pwrite_all, fd, data, position)
+                position += len(data)
+        if received != length:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Incomplete chunk: received {received} of {length} bytes"
+            )
+        if pending:
+            await run_file_io_shielded(_pwrite_all, fd, pending, position)
+    finally:
+        os.close(fd)
+
+
+class UploadSweeper:
+    """
+    만료된 업로드 정리
+
+    - 만료 시각이 지난 세션: DB 행(청크 포함)과 데이터 파일 삭제
+    - 세션 행이 없는 데이터 파일, 중단된 스트리밍 업로드와 후처리의 임시 파일:
+      UPLOAD_SESSION_TTL보다 오래 수정되지 않았으면 삭제 (프로세스가 중간에 종료된 경우)
+    """
+
+    def __init__(self, sweep_interval: float, session_ttl: float, session_factory=SessionLocal) -> None:
+        self.sweep_interval = sweep_interval
+        self.session_ttl = session_ttl
+        self.session_factory = session_factory
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._reset_counters()
+
+    def _reset_counters(self) -> None:
+        self.sweeps_total = 0
+        self.expired_sessions_total = 0
+        self.removed_files_total = 0
+        self.reclaimed_bytes_total = 0
+        self.last_sweep_at: datetime | None = None
+
+    def configure(self, **options) -> None:
+        """설정 변경 (sweep_interval, session_ttl, session_factory)"""
+        for name, value in options.items():
+            if not hasattr(self, name):
+                raise AttributeError(name)
+            setattr(self, name, value)
+
+    def sweep(self, db: Session | None = None, now: datetime | None = None) -> dict:
+        """
+        만료된 세션과 남은 임시 파일 삭제
+
+        Args:
+            db: 사용할 DB 세션 (없으면 session_factory로 생성)
+            now: 기준 시각 (테스트용, 기본 현재 UTC)
+
+        Returns:
+            {"expired_sessions", "removed_files", "reclaimed_bytes"}
+        """
+        now = now or datetime.now(timezone.utc)
+        session = db if db is not None else self.session_factory()
+        try:
+            # 완료 처리 중에 프로세스가 종료되어 남은 세션도 만료되면 삭제
+            expired = session.query(UploadSession).filter(UploadSession.expires_at < now).all()
+            reclaimed = sum(discard_session(session, upload) for upload in expired)
+            session.commit()
+            live_ids = {row.id for row in session.query(UploadSession.id)}
+        finally:
+            if db is None:
+                session.close()
+
+        cutoff = now.timestamp() - self.session_ttl
+        removed_files, orphan_bytes = self._remove_orphans(live_ids, cutoff)
+        removed_temps, temp_bytes = self._remove_pipeline_temps(cutoff)
+        removed_files += removed_temps
+        orphan_bytes += temp_bytes
+        result = {
+            "expired_sessions": len(expired),
+            "removed_files": len(expired) + removed_files,
+            "reclaimed_bytes": reclaimed + orphan_bytes,
+        }
+        self.sweeps_total += 1
+        self.expired_sessions_total += result["expired_sessions"]
+        self.removed_files_total += result["removed_files"]
+        self.reclaimed_bytes_total += result["reclaimed_bytes"]
+        self.last_sweep_at = now
+        if result["removed_files"]:
+            logger.info(
+                "Upload sweep removed %d sessions, %d files, %d bytes",
+                result["expired_sessions"], result["removed_files"], result["reclaimed_bytes"]
+            )
+        return result
+
+    @staticmethod
+    def _remove_orphans(live_ids: set[str], cutoff: float) -> tuple[int, int]:
+        if not os.path.isdir(UPLOAD_DIR):
+            return 0, 0
+        removed = reclaimed = 0
+        for entry in os.scandir(UPLOAD_DIR):
+            if entry.name.startswith(SESSION_PREFIX):
+                session_id = entry.name[len(SESSION_PREFIX):].split(".", 1)[0]
+                if session_id in live_ids:
+                    continue
+            elif not entry.name.startswith((TEMP_PREFIX,) + PIPELINE_TEMP_PREFIXES):
+                continue
+            try:
+                if entry.stat().st_mtime >= cutoff:
+                    continue
+                size = _allocated_bytes(entry.path)
+                os.remove(entry.path)
+            except FileNotFoundError:
+                continue
+            removed += 1
+            reclaimed += size
+        return removed, reclaimed
+
+    @staticmethod
+    def _remove_pipeline_temps(cutoff: float) -> tuple[int, int]:
+        """파생 파일 디렉토리 아래 오래된 후처리 임시 파일/디렉토리 삭제"""
+        removed = reclaimed = 0
+        for dirpath, dirnames, filenames in os.walk(DERIVATIVES_DIR):
+            stale_dirs = [name for name in dirnames if name.startswith(PIPELINE_TEMP_PREFIXES)]
+            # 준비 디렉토리는 통째로 삭제하고 안으로 들어가지 않음
+            dirnames[:] = [name for name in dirnames if name not in stale_dirs]
+            for name in stale_dirs + [name for name in filenames if name.startswith(PIPELINE_TEMP_PREFIXES)]:
+                path = os.path.join(dirpath, name)
+                try:
+                    if os.stat(path).st_mtime >= cutoff:
+                        continue
+                    if name in stale_dirs:
+                        size = _tree_allocated_bytes(path)
+                        shutil.rmtree(path)
+                    else:
+                        size = _allocated_bytes(path)
+                        os.remove(path)
+                except FileNotFoundError:
+                    continue
+                removed += 1
+                reclaimed += size
+        return removed, reclaimed
+
+    def _sweep_logged(self) -> None:
+        try:
+            self.sweep()
+        except Exception as e:
+            logger.warning("Upload sweep failed: %s", e)
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            self._wake.wait(self.sweep_interval)
+            self._wake.clear()
+            if self._stopping.is_set():
+                break
+            self._sweep_logged()
+
+    def start(self) -> None:
+        """주기적으로 정리하는 스레드 시작 (이미 실행 중이면 무시)"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="upload-sweeper", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """정리 스레드 종료"""
+        self._stopping.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def stats(self) -> dict:
+        return {
+            "sweep_interval": self.sweep_interval,
+            "session_ttl": self.session_ttl,
+            "sweeps_total": self.sweeps_total,
+            "expired_sessions_total": self.expired_sessions_total,
+            "removed_files_total": self.removed_files_total,
+            "reclaimed_bytes_total": self.reclaimed_bytes_total,
+            "last_sweep_at": self.last_sweep_at.isoformat() if self.last_sweep_at else None,
+        }
+
+    def reset(self) -> None:
+        """카운터 초기화 (테스트용)"""
+        self._reset_counters()
+
+
+# 프로세스 전역 업로드 정리기
+upload_sweeper = UploadSweeper(UPLOAD_SWEEP_INTERVAL, UPLOAD_SESSION_TTL)
@@ -0,0 +1,273 @@
+"""
+스트리밍 업로드 모듈
+- multipart/form-data 본문을 받는 대로 파싱 (python-multipart)
+- 비디오 파트는 업로드 디렉토리의 임시 파일에 바로 기록 (디스크 쓰기 1회, 메모리는 쓰기 단위만큼)
+- MAX_FILE_SIZE를 넘는 순간 중단 (Content-Length가 크면 본문을 받기 전에 거부)
+- 기록하면서 SHA-256 계산 (내용 기반 저장/중복 제거용, 파일을 다시 읽지 않음)
+- 완료 후 같은 파일 시스템 안에서 rename으로 게시 (원자적)
+
+FastAPI의 UploadFile은 본문 전체를 임시 파일에 받아 둔 뒤 핸들러를 호출하므로
+업로드 디렉토리로 다시 복사하면 디스크에 두 번 쓰고, 크기 제한도 다 받은 뒤에야 확인할 수 있습니다.
+"""
+
+import hashlib
+import os
+import tempfile
+from typing import Callable, NamedTuple
+
+from fastapi import HTTPException, Request, status
+from fastapi.exceptions import RequestValidationError
+from multipart.multipart import MultipartParseError, MultipartParser, parse_options_header
+
+from app.config import UPLOAD_FORM_MAX_BYTES, UPLOAD_WRITE_BYTES
+from app.stream_utils import run_file_io_shielded
+
+TEMP_PREFIX = ".upload-"
+
+
+class UploadedForm(NamedTuple):
+    """스트리밍으로 받은 폼"""
+    fields: dict[str, str]  # 비디오 외 폼 필드
+    filename: str  # 클라이언트가 보낸 원본 파일명
+    temp_path: str  # 업로드 디렉토리 안의 임시 파일 (publish_upload로 게시)
+    size: int
+    sha256: str  # 파일 내용의 SHA-256 (hex)
+
+
+def file_too_large(max_file_size: int) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail=f"File too large. Maximum size: {max_file_size // (1024*1024)}MB"
+    )
+
+
+def _decode(data: bytes, charset: str) -> str:
+    try:
+        return data.decode(charset)
+    except (UnicodeDecodeError, LookupError):
+        return data.decode("latin-1")
+
+
+def _create_temp(upload_dir: str, suffix: str) -> tuple[int, str]:
+    os.makedirs(upload_dir, exist_ok=True)
+    return tempfile.mkstemp(prefix=TEMP_PREFIX, suffix=suffix, dir=upload_dir)
+
+
+def _write_all(fd: int, data: bytearray) -> None:
+    view = memoryview(data)
+    while view:
+        written = os.write(fd, view)
+        view = view[written:]
+
+
+def _close_temp(created: tuple[int, str]) -> None:
+    fd, temp_path = created
+    os.close(fd)
+    discard_upload(temp_path)
+
+
+def _write_hashed(fd: int, data: bytearray, digest) -> None:
+    """기록하면서 해시 갱신 (파일 I/O 스레드에서 실행, hashlib은 GIL을 놓고 계산)"""
+    digest.update(data)
+    _write_all(fd, data)
+
+
+class _UploadParser:
+    """
+    python-multipart 콜백 처리
+
+    콜백 안에서는 블로킹 I/O를 하지 않고 파일 데이터를 pending에 모으기만 합니다.
+    실제 기록은 receive_upload가 파일 I/O 스레드에서 수행합니다.
+    """
+
+    def __init__(self, file_field: str, max_file_size: int, charset: str,
+                 validate_filename: Callable[[str], object]) -> None:
+        self.file_field = file_field
+        self.max_file_size = max_file_size
+        self.charset = charset
+        self.validate_filename = validate_filename
+        self.fields: dict[str, str] = {}
+        self.filename: str | None = None
+        self.file_size = 0
+        self.form_bytes = 0
+        self.pending = bytearray()
+        self._header_field = b""
+        self._header_value = b""
+        self._disposition = b""
+        self._name: str | None = None
+        self._in_file = False
+        self._data = bytearray()
+
+    def _count_form_bytes(self, size: int) -> None:
+        self.form_bytes += size
+        if self.form_bytes > UPLOAD_FORM_MAX_BYTES:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Form fields too large. Maximum size: {UPLOAD_FORM_MAX_BYTES // 1024}KB"
+            )
+
+    def on_part_begin(self) -> None:
+        self._disposition = b""
+        self._name = None
+        self._in_file = False
+        self._data = bytearray()
+
+    def on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._count_form_bytes(end - start)
+        self._header_field += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._count_form_bytes(end - start)
+        self._header_value += data[start:end]
+
+    def on_header_end(self) -> None:
+        if self._header_field.lower() == b"content-disposition":
+            self._disposition = self._header_value
+        self._header_field = b""
+        self._header_value = b""
+
+    def on_headers_finished(self) -> None:
+        _, options = parse_options_header(self._disposition)
+        if b"name" not in options:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail='The Content-Disposition header field "name" must be provided.'
+            )
+        self._name = _decode(options[b"name"], self.charset)
+        if b"filename" not in options:
+            return
+        if self._name != self.file_field or self.filename is not None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unexpected file field: {self._name}"
+            )
+        filename = _decode(options[b"filename"], self.charset)
+        # 확장자가 허용되지 않으면 파일 데이터를 받기 전에 거부
+        self.validate_filename(filename)
+        self.filename = filename
+        self._in_file = True
+
+    def on_part_data(self, data: bytes, start: int, end: int) -> None:
+        size = end - start
+        if self._in_file:
+            self.file_size += size
+            if self.file_size > self.max_file_size:
+                raise file_too_large(self.max_file_size)
+            self.pending += data[start:end]
+        else:
+            self._count_form_bytes(size)
+            self._data += data[start:end]
+
+    def on_part_end(self) -> None:
+        if not self._in_file and self._name is not None:
+            self.fields[self._name] = _decode(bytes(self._data), self.charset)
+        self._in_file = False
+
+    def callbacks(self) -> dict:
+        return {
+            "on_part_begin": self.on_part_begin,
+            "on_part_data": self.on_part_data,
+            "on_part_end": self.on_part_end,
+            "on_header_field": self.on_header_field,
+            "on_header_value": self.on_header_value,
+            "on_header_end": self.on_header_end,
+            "on_headers_finished": self.on_headers_finished,
+        }
+
+
+async def receive_upload(
+    request: Request,
+    file_field: str,
+    upload_dir: str,
+    max_file_size: int,
+    validate_filename: Callable[[str], object],
+    required_fields: tuple[str, ...] = (),
+) -> UploadedForm:
+    """
+    multipart/form-data 본문을 받는 대로 파싱해 파일 파트를 업로드 디렉토리의 임시 파일에 기록
+
+    Args:
+        request: 업로드 요청 (본문을 아직 읽지 않은 상태)
+        file_field: 파일 파트 이름 (이 파트 하나만 허용)
+        upload_dir: 파일을 게시할 디렉토리 (임시 파일도 여기에 만들어 rename이 원자적)
+        max_file_size: 최대 파일 크기
+        validate_filename: 파일명 검증 (파일 데이터를 받기 전에 호출, 실패 시 HTTPException)
+        required_fields: 필수 폼 필드
+
+    Returns:
+        UploadedForm (임시 파일은 호출한 쪽이 publish_upload 또는 discard_upload로 처리)
+
+    Raises:
+        HTTPException: 파일 또는 폼 필드가 너무 큰 경우(400, 초과 즉시 중단), 잘못된 multipart 본문(400)
+        RequestValidationError: 필수 필드 또는 파일이 없는 경우 (422)
+    """
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    if content_type != b"multipart/form-data" or b"boundary" not in params:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Expected multipart/form-data with a boundary"
+        )
+    content_length = request.headers.get("content-length")
+    if content_length is not None and content_length.isdigit() \
+            and int(content_length) > max_file_size + UPLOAD_FORM_MAX_BYTES:
+        raise file_too_large(max_file_size)
+
+    charset = params.get(b"charset", b"utf-8").decode("latin-1")
+    handler = _UploadParser(file_field, max_file_size, charset, validate_filename)
+    parser = MultipartParser(params[b"boundary"], handler.callbacks())
+
+    fd: int | None = None
+    temp_path: str | None = None
+    digest = hashlib.sha256()
+    try:
+        try:
+            async for chunk in request.stream():
+                parser.write(chunk)
+                if fd is None and handler.filename is not None:
+                    # 확장자 유지 (moov 재작성 등 확장자 기준 후처리)
+                    suffix = os.path.splitext(handler.filename)[1].lower()
+                    fd, temp_path = await run_file_io_shielded(
+                        _create_temp, upload_dir, suffix, on_cancel=_close_temp
+                    )
+                if fd is not None and len(handler.pending) >= UPLOAD_WRITE_BYTES:
+                    data, handler.pending = handler.pending, bytearray()
+                    await run_file_io_shielded(_write_hashed, fd, data, digest)
+            parser.finalize()
+        except MultipartParseError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid multipart body: {e}"
+            )
+
+        missing = [name for name in required_fields if name not in handler.fields]
+        if fd is None:
+            missing.append(file_field)
+        if missing:
+            raise RequestValidationError([
+                {"type": "missing", "loc": ("body", name), "msg": "Field required", "input": None}
+                for name in missing
+            ])
+        if handler.pending:
+            await run_file_io_shielded(_write_hashed, fd, handler.pending, digest)
+    except BaseException:
+        # 제한 초과, 클라이언트 연결 끊김 등 - 받던 파일 삭제
+        # (기록은 shielded로 실행되므로 여기 도달하면 스레드에서 쓰는 중인 기록이 없음)
+        if fd is not None:
+            os.close(fd)
+            discard_upload(temp_path)
+        raise
+    os.close(fd)
+    return UploadedForm(handler.fields, handler.filename, temp_path, handler.file_size, digest.hexdigest())
+
+
+def publish_upload(temp_path: str, file_path: str) -> None:
+    """임시 파일을 최종 경로로 게시 (같은 디렉토리 안의 rename이므로 원자적)"""
+    os.replace(temp_path, file_path)
+
+
+def discard_upload(temp_path: str) -> None:
+    """임시 파일 삭제 (없으면 무시)"""
+    try:
+        os.remove(temp_path)
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,207 @@
+"""
+내용 기반 비디오 저장 모듈 (중복 제거)
+- 저장 파일명: <업로드 내용의 SHA-256><확장자> (스트리밍 업로드는 받으면서 계산한 해시 사용)
+- 같은 내용을 다시 올리면 확장자가 달라도 기존 파일을 함께 참조 (디스크 쓰기, 업로드 후처리 생략)
+- 게시 전에 fsync (응답 후 작업 큐가 처리할 파일이 디스크에 남아 있도록, 새 내용이면 쓰기 트랜잭션 밖에서)
+- video_blobs.ref_count: 파일을 참조하는 게시물 수, 0이 되면 파일과 파생 파일 삭제
+- 참조 수를 늘린 쓰기 트랜잭션 안에서 파일을 게시하고, 삭제는 참조 해제를 commit한 뒤
+  참조가 없는지 다시 확인하는 쓰기 트랜잭션 안에서 실행 (commit이 실패하면 파일이 남음)
+  (SQLite는 쓰기 트랜잭션을 하나씩 실행하므로 같은 내용의 업로드와 삭제가 엇갈려도 참조 중인 파일이 지워지지 않음)
+- 쓰기 트랜잭션은 commit까지 await 없이 한 스레드에서 실행 (잠금을 잡은 채 이벤트 루프로 돌아가지 않음)
+- video_blobs 행이 없는 파일(이전 UUID 파일명)은 게시물 하나가 단독으로 참조
+"""
+
+import hashlib
+import os
+from typing import NamedTuple
+
+from sqlalchemy import case, func
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+
+from app.media_utils import get_video_path, invalidate_segments, remove_derivatives
+from app.models import Post, VideoBlob
+from app.upload_utils import discard_upload, publish_upload
+
+
+class StoredVideo(NamedTuple):
+    """게시된 비디오 파일"""
+    filename: str  # Post.video_filename
+    size: int
+    deduplicated: bool  # 같은 파일을 쓰는 게시물이 이미 있음 (파일 기준 후처리를 공유)
+
+
+def blob_filename(sha256: str, original_filename: str) -> str:
+    """새 내용의 파일명: 내용 해시 + 원본 확장자 (확장자 기준 후처리가 그대로 동작)"""
+    ext = os.path.splitext(original_filename)[1].lower()
+    return f"{sha256}{ext}"
+
+
+def file_sha256(path: str) -> str:
+    """파일 내용의 SHA-256 (이어받기 업로드처럼 순서대로 받지 않은 파일용)"""
+    with open(path, "rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+def fsync_file(path: str) -> None:
+    """파일 내용을 디스크에 기록"""
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def sync_new_video(temp_path: str, filename: str) -> bool:
+    """
+    새 내용이면 업로드 임시 파일을 쓰기 트랜잭션 밖에서 미리 디스크에 기록
+
+    Returns:
+        기록했으면 True (store_video의 synced 인자)
+    """
+    if os.path.exists(get_video_path(filename)):
+        return False
+    fsync_file(temp_path)
+    return True
+
+
+def store_video(db: Session, temp_path: str, filename: str, sha256: str, synced: bool) -> StoredVideo:
+    """
+    업로드 임시 파일을 내용 기반 파일명으로 게시하고 참조 수 증가
+
+    같은 내용의 파일이 이미 있으면(다른 확장자로 올린 경우 포함) 그 파일을 참조합니다.
+    쓰기 트랜잭션을 시작하므로 commit까지 await 없이 실행해야 합니다 (asyncio.to_thread 등).
+    commit은 호출한 쪽에서 게시물 생성과 함께 합니다 (실패하면 rollback).
+
+    Args:
+        db: 데이터베이스 세션
+        temp_path: 업로드 디렉토리 안의 임시 파일 (게시하거나 삭제, 실패하면 그대로 둠)
+        filename: blob_filename()으로 정한 파일명 (같은 내용의 파일이 없을 때 사용)
+        sha256: 임시 파일 내용의 SHA-256
+        synced: sync_new_video()로 임시 파일을 이미 기록했는지
+
+    Returns:
+        StoredVideo (filename은 실제로 참조하는 파일명)
+
+    Raises:
+        OSError: 기록 또는 게시 실패
+    """
+    # 빈 갱신으로 쓰기 트랜잭션을 시작한 뒤 같은 내용의 파일 조회 (확인과 참조 사이에 삭제되지 않음)
+    sha_filter = VideoBlob.sha256 == sha256
+    db.query(VideoBlob).filter(sha_filter).update({"ref_count": VideoBlob.ref_count}, synchronize_session=False)
+    existing = db.query(VideoBlob.filename).filter(sha_filter).order_by(VideoBlob.filename).first()
+    if existing is not None:
+        filename = existing.filename
+    path = get_video_path(filename)
+    # 참조 수 증가 → commit 전까지 다른 요청이 이 파일을 삭제하지 못함
+    db.execute(
+        insert(VideoBlob)
+        .values(filename=filename, sha256=sha256, size=0, ref_count=1)
+        .on_conflict_do_update(index_elements=["filename"], set_={"ref_count": VideoBlob.ref_count + 1})
+    )
+    # 파일만 남아 있고(이전 업로드가 commit 전에 중단 등) 참조하는 게시물이 없으면 후처리를 새로 실행
+    deduplicated = db.query(Post.id).filter(Post.video_filename == filename).first() is not None
+    if os.path.exists(path):
+        discard_upload(temp_path)
+    else:
+        if not synced:
+            # 확인한 직후 마지막 참조가 삭제됨
+            fsync_file(temp_path)
+        publish_upload(temp_path, path)
+    size = os.path.getsize(path)
+    db.query(VideoBlob).filter(VideoBlob.filename == filename).update({"size": size})
+    return StoredVideo(filename, size, deduplicated)
+
+
+def remove_video_files(video_filename: str) -> None:
+    """비디오 파일, 파생 파일, 캐시된 세그먼트(화질 파일 포함) 삭제"""
+    try:
+        os.remove(get_video_path(video_filename))
+    except FileNotFoundError:
+        pass
+    remove_derivatives(video_filename)
+    invalidate_segments(video_filename)
+
+
+def release_video(db: Session, video_filename: str) -> bool:
+    """
+    게시물 하나의 참조 해제
+
+    commit은 호출한 쪽에서 게시물 삭제와 함께 합니다.
+    마지막 참조였으면 commit한 뒤 discard_unreferenced_video로 파일과 파생 파일을 삭제해야 합니다.
+    (commit 전에 지우면 commit이 실패했을 때 남은 게시물이 없는 파일을 가리킴)
+
+    Returns:
+        마지막 참조였으면 True
+    """
+    # 참조 수 감소로 쓰기 트랜잭션 시작 → 같은 내용의 업로드와 엇갈리지 않음
+    blob_filter = VideoBlob.filename == video_filename
+    updated = db.query(VideoBlob).filter(blob_filter).update(
+        {"ref_count": VideoBlob.ref_count - 1}, synchronize_session=False
+    )
+    if updated:
+        if db.query(VideoBlob.ref_count).filter(blob_filter).scalar() > 0:
+            return False
+        db.query(VideoBlob).filter(blob_filter).delete(synchronize_session=False)
+    return True
+
+
+def discard_unreferenced_video(db: Session, video_filename: str) -> None:
+    """
+    참조가 없는 비디오 파일과 파생 파일 삭제 (commit 포함)
+
+    - release_video로 마지막 참조를 해제하고 commit한 뒤
+    - store_video 뒤 commit하지 못하고 rollback한 경우
+      (참조 수 증가가 취소되었으므로, 행이 없으면 이 업로드가 새로 게시한 파일)
+    그 사이 같은 내용을 다시 올렸으면 행이 있으므로 파일을 유지합니다.
+    """
+    # 빈 갱신으로 쓰기 트랜잭션 시작 → 같은 내용의 업로드와 엇갈리지 않음
+    blob_filter = VideoBlob.filename == video_filename
+    db.query(VideoBlob).filter(blob_filter).update({"ref_count": VideoBlob.ref_count}, synchronize_session=False)
+    if db.query(VideoBlob.filename).filter(blob_filter).first() is None:
+        remove_video_files(video_filename)
+    db.commit()
+
+
+def storage_stats(db: Session, limit: int = 20) -> dict:
+    """
+    저장소 중복 제거 현황
+
+    - logical_bytes: 게시물별 비디오 크기 합계 (중복 제거가 없었다면 필요한 크기)
+    - stored_bytes: 실제로 저장한 크기
+    - saved_bytes: 중복 제거로 아낀 크기 (공유 파일 크기 × 추가 참조 수)
+    - shared: 여러 게시물이 참조하는 파일 (아낀 크기 순 상위 limit개)
+    """
+    saved = VideoBlob.size * (VideoBlob.ref_count - 1)
+    blobs, shared_blobs, saved_bytes = db.query(
+        func.count(VideoBlob.filename),
+        func.coalesce(func.sum(case((VideoBlob.ref_count > 1, 1), else_=0)), 0),
+        func.coalesce(func.sum(saved), 0),
+    ).one()
+    posts, logical_bytes = db.query(func.count(Post.id), func.coalesce(func.sum(Post.video_size), 0)).one()
+    shared_rows = (
+        db.query(VideoBlob)
+        .filter(VideoBlob.ref_count > 1)
+        .order_by(saved.desc(), VideoBlob.filename)
+        .limit(limit)
+        .all()
+    )
+
+    return {
+        "posts": posts,
+        "blobs": blobs,
+        "shared_blobs": shared_blobs,
+        "logical_bytes": logical_bytes,
+        "stored_bytes": logical_bytes - saved_bytes,
+        "saved_bytes": saved_bytes,
+        "shared": [
+            {
+                "filename": blob.filename,
+                "sha256": blob.sha256,
+                "size": blob.size,
+                "ref_count": blob.ref_count,
+                "saved_bytes": blob.size * (blob.ref_count - 1),
+            }
+            for blob in shared_rows
+        ],
+    }
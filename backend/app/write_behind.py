@@ -0,0 +1,166 @@
+"""
+write-behind 버퍼 모듈
+- 요청 경로에서는 lock 하나로 보호되는 dict만 갱신 (DB 접근 없음)
+- 주기 또는 대기 항목 수에 도달하면 별도 스레드에서 한 트랜잭션으로 일괄 기록
+- 기록에 실패한 항목은 대기열로 되돌려 다음 flush에서 다시 기록
+- 종료 시 남은 항목 기록 (lifespan)
+
+요청마다 UPDATE를 실행하면 SQLite 쓰기 잠금을 두고 요청이 경쟁하므로
+자주 갱신되는 값(스트리밍 통계, 시청 위치)은 이 버퍼에 모아서 기록합니다.
+"""
+
+import logging
+import threading
+from datetime import datetime, timezone
+
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindBuffer:
+    """
+    일괄 기록 버퍼 기반 클래스
+
+    하위 클래스는 _pending에 항목을 모으고 다음을 구현합니다.
+    - _write(session, batch): batch를 session에 기록 (commit은 기반 클래스가 수행)
+    - _merge(batch): 기록에 실패한 batch를 대기열에 다시 합침 (lock 안에서 호출)
+    """
+
+    name = "write-behind"
+
+    def __init__(self, flush_interval: float, flush_threshold: int, session_factory=SessionLocal) -> None:
+        self.flush_interval = flush_interval
+        self.flush_threshold = flush_threshold
+        self.session_factory = session_factory
+        self._pending: dict = {}
+        # 기록 중인 batch (commit 전까지 조회할 수 있도록 보관)
+        self._flushing: dict = {}
+        self._lock = threading.Lock()
+        # flush는 한 번에 하나씩 (주기 스레드와 요청 경로의 flush가 겹칠 수 있음)
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._reset_counters()
+
+    def _reset_counters(self) -> None:
+        self.recorded_total = 0
+        self.flushes_total = 0
+        self.flushed_rows_total = 0
+        self.failed_flushes_total = 0
+        self.last_flush_at: datetime | None = None
+
+    def configure(self, **options) -> None:
+        """설정 변경 (flush_interval, flush_threshold, session_factory 등)"""
+        for name, value in options.items():
+            if not hasattr(self, name):
+                raise AttributeError(name)
+            setattr(self, name, value)
+
+    def _recorded(self) -> None:
+        """항목 갱신 후 호출 (lock 안에서) - 대기 항목 수가 기준을 넘으면 flush 스레드를 깨움"""
+        self.recorded_total += 1
+        if len(self._pending) >= self.flush_threshold:
+            self._wake.set()
+
+    def _write(self, session: Session, batch: dict) -> None:
+        raise NotImplementedError
+
+    def _merge(self, batch: dict) -> None:
+        raise NotImplementedError
+
+    def flush(self, db: Session | None = None) -> int:
+        """
+        대기 중인 항목을 한 트랜잭션으로 기록
+
+        Args:
+            db: 사용할 DB 세션 (없으면 session_factory로 생성)
+
+        Returns:
+            기록한 항목 수
+
+        Raises:
+            Exception: DB 기록 실패 (항목은 대기열로 돌아가 다음 flush에서 다시 기록)
+        """
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+                self._flushing = batch
+            if not batch:
+                return 0
+
+            session = db if db is not None else self.session_factory()
+            try:
+                self._write(session, batch)
+                session.commit()
+            except Exception:
+                session.rollback()
+                with self._lock:
+                    self._merge(batch)
+                self.failed_flushes_total += 1
+                raise
+            finally:
+                with self._lock:
+                    self._flushing = {}
+                if db is None:
+                    session.close()
+
+            self.flushes_total += 1
+            self.flushed_rows_total += len(batch)
+            self.last_flush_at = datetime.now(timezone.utc)
+            return len(batch)
+
+    def _flush_logged(self) -> None:
+        try:
+            self.flush()
+        except Exception as e:
+            logger.warning("%s flush failed, will retry: %s", self.name, e)
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            if self._stopping.is_set():
+                break
+            self._flush_logged()
+
+    def start(self) -> None:
+        """주기적으로 flush하는 스레드 시작 (이미 실행 중이면 무시)"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name=f"{self.name}-flush", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """flush 스레드 종료 후 남은 항목 기록"""
+        self._stopping.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self._flush_logged()
+
+    def stats(self) -> dict:
+        """대기 항목 수와 flush 카운터"""
+        with self._lock:
+            pending_rows = len(self._pending)
+        return {
+            "flush_interval": self.flush_interval,
+            "flush_threshold": self.flush_threshold,
+            "pending_rows": pending_rows,
+            "recorded_total": self.recorded_total,
+            "flushes_total": self.flushes_total,
+            "flushed_rows_total": self.flushed_rows_total,
+            "failed_flushes_total": self.failed_flushes_total,
+            "last_flush_at": self.last_flush_at.isoformat() if self.last_flush_at else None,
+        }
+
+    def reset(self) -> None:
+        """대기 항목과 카운터 초기화 (테스트용)"""
+        with self._lock:
+            self._pending.clear()
+            self._reset_counters()
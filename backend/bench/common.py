@@ -0,0 +1,92 @@
+"""
+벤치마크 공통 설정
+- 임시 SQLite DB / 업로드 디렉토리
+- 테스트 사용자, 게시물, 인증 쿠키 생성
+"""
+
+import os
+import tempfile
+from contextlib import contextmanager
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.main import app
+from app.database import Base, get_db
+from app.models import User, Post
+from app.auth_utils import hash_password, create_access_token
+from app.routers import posts, stream
+from app import config, media_utils
+
+
+@contextmanager
+def bench_environment(video_size: int = 32 * 1024 * 1024, is_public: bool = True):
+    """
+    임시 DB와 업로드 디렉토리를 구성하고 게시물 1개를 생성
+
+    Yields:
+        (app, post_id, cookies) 튜플
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        engine = create_engine(
+            f"sqlite:///{os.path.join(tmp_dir, 'bench.db')}",
+            connect_args={"check_same_thread": False},
+        )
+        SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        Base.metadata.create_all(bind=engine)
+
+        def override_get_db():
+            db = SessionLocal()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        upload_dir = os.path.join(tmp_dir, "videos")
+        os.makedirs(upload_dir)
+        patched = [config, posts, stream, media_utils]
+        originals = [module.UPLOAD_DIR for module in patched]
+        for module in patched:
+            module.UPLOAD_DIR = upload_dir
+        app.dependency_overrides[get_db] = override_get_db
+
+        filename = "bench.mp4"
+        with open(os.path.join(upload_dir, filename), "wb") as f:
+            f.write(os.urandom(video_size))
+
+        db = SessionLocal()
+        user = User(
+            email="bench@example.com",
+            hashed_password=hash_password("benchpassword"),
+            full_name="Bench User",
+        )
+        db.add(user)
+        db.commit()
+        post = Post(
+            title="Bench Video",
+            video_filename=filename,
+            video_original_name=filename,
+            video_size=video_size,
+            author_id=user.id,
+            is_public=is_public,
+        )
+        db.add(post)
+        db.commit()
+        post_id, user_id = post.id, user.id
+        db.close()
+
+        cookies = {"access_token": create_access_token(data={"sub": str(user_id)})}
+        try:
+            yield app, post_id, cookies
+        finally:
+            app.dependency_overrides.pop(get_db, None)
+            for module, original in zip(patched, originals):
+                module.UPLOAD_DIR = original
+            engine.dispose()
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """정렬된 값 목록에서 백분위수 계산"""
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
@@ -0,0 +1,81 @@
+"""
+스트리밍 중 작은 API 호출 지연시간 벤치마크
+
+대용량 스트림 여러 개를 전송하는 동안 /api/health 지연시간(p50/p99)을 측정합니다.
+느린 디스크(콜드 페이지 캐시)를 흉내내기 위해 청크 읽기마다 지연을 추가합니다.
+
+- inline: 이벤트 루프에서 직접 읽기 (기존 generator 방식과 동일)
+- threaded: 전용 스레드 풀 + read-ahead (현재 구현)
+
+실행: cd backend && python -m bench.stream_latency
+"""
+
+import asyncio
+import time
+from concurrent.futures import Executor, Future
+
+import httpx
+
+from app import stream_utils
+from bench.common import bench_environment, percentile
+
+CONCURRENT_STREAMS = 8
+PROBE_REQUESTS = 200
+DISK_DELAY = 0.005  # 청크 읽기당 5ms
+
+
+class InlineExecutor(Executor):
+    """호출한 스레드(이벤트 루프)에서 바로 실행하는 executor"""
+
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        future.set_result(fn(*args, **kwargs))
+        return future
+
+
+def slow_read_chunk(fd: int, size: int, offset: int) -> bytes:
+    time.sleep(DISK_DELAY)
+    return original_read_chunk(fd, size, offset)
+
+
+original_read_chunk = stream_utils._read_chunk
+
+
+async def measure(app, post_id: int, cookies: dict) -> list[float]:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", cookies=cookies) as client:
+        streams = [
+            asyncio.create_task(client.get(f"/api/stream/{post_id}"))
+            for _ in range(CONCURRENT_STREAMS)
+        ]
+        await asyncio.sleep(0.05)
+
+        latencies = []
+        for _ in range(PROBE_REQUESTS):
+            start = time.perf_counter()
+            await client.get("/api/health")
+            latencies.append((time.perf_counter() - start) * 1000)
+            await asyncio.sleep(0.001)
+
+        await asyncio.gather(*streams)
+    return latencies
+
+
+def main() -> None:
+    stream_utils._read_chunk = slow_read_chunk
+    threaded_executor = stream_utils._file_io_executor
+
+    print(f"{'mode':<10} {'p50 (ms)':>10} {'p99 (ms)':>10} {'max (ms)':>10}")
+    with bench_environment() as (app, post_id, cookies):
+        for mode, executor in (("inline", InlineExecutor()), ("threaded", threaded_executor)):
+            stream_utils._file_io_executor = executor
+            latencies = asyncio.run(measure(app, post_id, cookies))
+            print(
+                f"{mode:<10} {percentile(latencies, 50):>10.2f} "
+                f"{percentile(latencies, 99):>10.2f} {max(latencies):>10.2f}"
+            )
+    stream_utils._file_io_executor = threaded_executor
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Range 요청당 파일 시스템 호출 수 마이크로벤치마크
+
+같은 재생 세션에서 연속 Range 요청을 보내며 요청당 호출 수를 셉니다.
+- 파일 시스템: os.stat / os.open / os.pread / os.close
+- DB: 실행된 SQL 문 수
+
+- no-cache: 메타데이터 캐시 비활성화 (요청마다 stat)
+- cache: 메타데이터 캐시 사용 (현재 구현)
+
+실행: cd backend && python -m bench.stream_syscalls
+"""
+
+import os
+from collections import Counter
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.metadata_cache import metadata_cache
+from app.segment_cache import segment_cache
+from bench.common import bench_environment
+
+RANGE_REQUESTS = 50
+RANGE_SIZE = 64 * 1024
+COUNTED_CALLS = ("stat", "open", "pread", "close")
+
+
+def install_counters(counter: Counter) -> dict:
+    """os 함수를 호출 수를 세는 래퍼로 교체"""
+    originals = {name: getattr(os, name) for name in COUNTED_CALLS}
+
+    def wrap(name, func):
+        def counted(*args, **kwargs):
+            counter[name] += 1
+            return func(*args, **kwargs)
+        return counted
+
+    for name, func in originals.items():
+        setattr(os, name, wrap(name, func))
+    return originals
+
+
+def run(client: TestClient, post_id: int, counter: Counter) -> Counter:
+    counter.clear()
+    # 세그먼트 캐시 영향을 배제하기 위해 파일 중간 구간 요청
+    base = 8 * 1024 * 1024
+    for i in range(RANGE_REQUESTS):
+        start = base + i * RANGE_SIZE
+        response = client.get(
+            f"/api/stream/{post_id}",
+            headers={"Range": f"bytes={start}-{start + RANGE_SIZE - 1}"}
+        )
+        assert response.status_code == 206
+    return Counter(counter)
+
+
+def main() -> None:
+    counter = Counter()
+
+    @event.listens_for(Engine, "before_cursor_execute")
+    def count_sql(*args):
+        counter["sql"] += 1
+
+    with bench_environment() as (app, post_id, cookies):
+        with TestClient(app, cookies=cookies) as client:
+            originals = install_counters(counter)
+            try:
+                results = {}
+                original_ttl = metadata_cache.ttl
+                for mode, ttl in (("no-cache", 0), ("cache", original_ttl)):
+                    metadata_cache.clear()
+                    segment_cache.clear()
+                    metadata_cache.ttl = ttl
+                    results[mode] = run(client, post_id, counter)
+                metadata_cache.ttl = original_ttl
+            finally:
+                for name, func in originals.items():
+                    setattr(os, name, func)
+
+    columns = (*COUNTED_CALLS, "sql")
+    print(f"{'mode':<10}" + "".join(f"{name:>8}" for name in columns) + "   (per request)")
+    for mode, counts in results.items():
+        print(f"{mode:<10}" + "".join(f"{counts[name] / RANGE_REQUESTS:>8.2f}" for name in columns))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""
+업로드 디스크 쓰기량 / 메모리 벤치마크
+
+같은 multipart 업로드를 두 방식으로 처리하며 요청 하나의 기록량과 최대 메모리를 비교합니다.
+- legacy: UploadFile로 임시 파일에 받은 뒤 업로드 디렉토리로 복사, 크기는 복사 후 확인 (이전 구현)
+- streaming: POST /api/posts (본문을 받는 대로 업로드 디렉토리의 임시 파일에 기록, 현재 구현)
+
+TestClient는 요청 본문을 한 번에 보내므로 서버처럼 64KB씩 나눠 ASGI 앱을 직접 호출합니다.
+
+- written: 요청 중 write 시스템 호출로 기록한 바이트 (/proc/self/io wchar, Linux)
+- read: 앱이 읽은 요청 본문 바이트 (크기 초과 시 어디서 중단했는지)
+  reject는 Content-Length로 본문을 받기 전에, reject-ch(Content-Length 없음)는 받는 중에 거부
+- peak: 요청 중 최대 Python 메모리 할당 (tracemalloc, 느려지므로 작은 업로드로 따로 측정)
+  업로드 크기가 달라도 peak가 같으면 메모리 사용량이 업로드 크기와 무관
+
+실행: cd backend && python -m bench.upload_io
+"""
+
+import asyncio
+import os
+import shutil
+import time
+import tracemalloc
+import uuid
+
+from fastapi import FastAPI, File, Form, HTTPException, UploadFile
+
+from app.routers import posts
+from bench.common import bench_environment
+
+UPLOAD_SIZE = 256 * 1024 * 1024
+# 크기 초과 시나리오의 MAX_FILE_SIZE
+REJECT_LIMIT = 64 * 1024 * 1024
+# 메모리 측정 업로드 크기
+MEMORY_SIZES = (2 * 1024 * 1024, 8 * 1024 * 1024)
+BODY_CHUNK = 64 * 1024
+BOUNDARY = "bench-boundary"
+MB = 1024 * 1024
+
+
+def legacy_app() -> FastAPI:
+    """이전 create_post의 파일 저장 방식"""
+    app = FastAPI()
+
+    @app.post("/upload")
+    def upload(title: str = Form(...), video: UploadFile = File(...)):
+        file_path = os.path.join(posts.UPLOAD_DIR, f"{uuid.uuid4()}.mp4")
+        video.file.seek(0)
+        with open(file_path, "wb") as buffer:
+            shutil.copyfileobj(video.file, buffer)
+        if os.path.getsize(file_path) > posts.MAX_FILE_SIZE:
+            os.remove(file_path)
+            raise HTTPException(status_code=400, detail="File too large")
+        return {"title": title}
+
+    return app
+
+
+def written_bytes() -> int:
+    with open("/proc/self/io") as f:
+        for line in f:
+            name, value = line.split(":")
+            if name == "wchar":
+                return int(value)
+    raise RuntimeError("wchar not available")
+
+
+def body_chunks(size: int):
+    """multipart 본문을 BODY_CHUNK씩 생성 (파일 내용은 같은 블록 반복)"""
+    yield (
+        f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="title"\r\n\r\nBench\r\n'
+        f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="video"; filename="bench.mp4"\r\n'
+        f"Content-Type: video/mp4\r\n\r\n"
+    ).encode()
+    block = os.urandom(BODY_CHUNK)
+    for offset in range(0, size, BODY_CHUNK):
+        yield block[:min(BODY_CHUNK, size - offset)]
+    yield f"\r\n--{BOUNDARY}--\r\n".encode()
+
+
+async def upload(app, path: str, cookies: dict, size: int, chunked: bool = False) -> tuple[int, int]:
+    """
+    본문을 BODY_CHUNK씩 보내며 ASGI 앱 호출 (chunked이면 Content-Length 없이)
+
+    Returns:
+        (응답 상태 코드, 앱이 읽은 본문 바이트)
+    """
+    chunks = body_chunks(size)
+    body_size = size + 512
+    consumed = 0
+    status = 0
+
+    async def receive():
+        nonlocal consumed
+        chunk = next(chunks, None)
+        if chunk is None:
+            return {"type": "http.request", "body": b"", "more_body": False}
+        consumed += len(chunk)
+        return {"type": "http.request", "body": chunk, "more_body": True}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    cookie = "; ".join(f"{name}={value}" for name, value in cookies.items())
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "server": ("bench", 80),
+        "client": ("127.0.0.1", 50000),
+        "headers": [
+            (b"content-type", f"multipart/form-data; boundary={BOUNDARY}".encode()),
+            (b"cookie", cookie.encode()),
+        ],
+    }
+    if not chunked:
+        scope["headers"].append((b"content-length", str(body_size).encode()))
+    await app(scope, receive, send)
+    return status, consumed
+
+
+def measure_io(app, path: str, cookies: dict, size: int, chunked: bool) -> dict:
+    before = written_bytes()
+    started = time.perf_counter()
+    status, consumed = asyncio.run(upload(app, path, cookies, size, chunked))
+    elapsed = time.perf_counter() - started
+    return {"status": status, "written": written_bytes() - before, "read": consumed, "seconds": elapsed}
+
+
+def measure_peak(app, path: str, cookies: dict, size: int) -> int:
+    tracemalloc.start()
+    try:
+        asyncio.run(upload(app, path, cookies, size))
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def main() -> None:
+    with bench_environment(video_size=1024) as (app, _, cookies):
+        modes = (("legacy", legacy_app(), "/upload"), ("streaming", app, "/api/posts"))
+        original_limit = posts.MAX_FILE_SIZE
+        results = []
+        scenarios = (
+            ("accept", original_limit, False),
+            ("reject", REJECT_LIMIT, False),
+            ("reject-ch", REJECT_LIMIT, True),
+        )
+        for scenario, limit, chunked in scenarios:
+            posts.MAX_FILE_SIZE = limit
+            try:
+                for mode, target, path in modes:
+                    results.append((scenario, mode, measure_io(target, path, cookies, UPLOAD_SIZE, chunked)))
+            finally:
+                posts.MAX_FILE_SIZE = original_limit
+        peaks = [
+            (mode, [measure_peak(target, path, cookies, size) for size in MEMORY_SIZES])
+            for mode, target, path in modes
+        ]
+
+    print(f"upload {UPLOAD_SIZE // MB}MB, reject limit {REJECT_LIMIT // MB}MB")
+    print(f"{'scenario':<10}{'mode':<11}{'status':>7}{'written':>12}{'read':>12}{'time':>9}")
+    for scenario, mode, result in results:
+        print(
+            f"{scenario:<10}{mode:<11}{result['status']:>7}"
+            f"{result['written'] / MB:>10.1f}MB{result['read'] / MB:>10.1f}MB{result['seconds']:>8.2f}s"
+        )
+    print()
+    print(f"{'mode':<11}" + "".join(f"{f'peak@{size // MB}MB':>14}" for size in MEMORY_SIZES))
+    for mode, values in peaks:
+        print(f"{mode:<11}" + "".join(f"{value / MB:>12.2f}MB" for value in values))
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,7 @@
 pytest fixtures for backend tests
 - TestClient with in-memory SQLite database
 - Test user creation fixture
+- Upload directory and test post fixtures
 """
 
 import pytest
@@ -12,8 +13,19 @@ from sqlalchemy.pool import StaticPool
 
 from app.main import app
 from app.database import Base, get_db
-from app.models import User
+from app.models import User, Post
 from app.auth_utils import hash_password, create_access_token
+from app.segment_cache import segment_cache
+from app.metadata_cache import metadata_cache
+from app.stream_tickets import ticket_revocations
+from app.bandwidth import bandwidth_scheduler
+from app.admission import stream_admission
+from app.keyframe_index import keyframe_index_cache
+from app.analytics import analytics_collector
+from app.progress import progress_buffer
+from app.clip_cache import clip_cache
+from app.upload_sessions import upload_sweeper
+from app.processing import processing_queue
 
 
 # In-memory SQLite database for testing
@@ -38,6 +50,43 @@ def override_get_db():
 
 # Override the database dependency
 app.dependency_overrides[get_db] = override_get_db
+# Write-behind flushes outside requests write to the test database too
+analytics_collector.configure(session_factory=TestSessionLocal)
+progress_buffer.configure(session_factory=TestSessionLocal)
+upload_sweeper.configure(session_factory=TestSessionLocal)
+# No processing worker threads in tests: jobs run on demand via processing_queue.run_pending()
+processing_queue.configure(session_factory=TestSessionLocal, workers=0)
+
+
+@pytest.fixture(autouse=True)
+def reset_stream_state():
+    """
+    Clear process-wide stream caches, ticket revocations and pending
+    write-behind buffers so tests do not leak state.
+    """
+    segment_cache.clear()
+    metadata_cache.clear()
+    ticket_revocations.clear()
+    bandwidth_scheduler.reset()
+    stream_admission.reset()
+    keyframe_index_cache.clear()
+    analytics_collector.reset()
+    progress_buffer.reset()
+    clip_cache.clear()
+    upload_sweeper.reset()
+    processing_queue.reset()
+    yield
+    segment_cache.clear()
+    metadata_cache.clear()
+    ticket_revocations.clear()
+    bandwidth_scheduler.reset()
+    stream_admission.reset()
+    keyframe_index_cache.clear()
+    analytics_collector.reset()
+    progress_buffer.reset()
+    clip_cache.clear()
+    upload_sweeper.reset()
+    processing_queue.reset()
 
 
 @pytest.fixture(scope="function")
@@ -102,3 +151,79 @@ def authenticated_client(client, auth_token):
     """
     client.cookies.set("access_token", auth_token)
     return client
+
+
+@pytest.fixture(scope="function")
+def admin_user(test_db):
+    """
+    Create an admin user in the database.
+    """
+    user = User(
+        email="admin@example.com",
+        hashed_password=hash_password("adminpassword123"),
+        full_name="Admin User",
+        is_active=True,
+        is_admin=True
+    )
+    test_db.add(user)
+    test_db.commit()
+    test_db.refresh(user)
+    return user
+
+
+@pytest.fixture(scope="function")
+def admin_client(client, admin_user):
+    """
+    TestClient with an admin authentication cookie set.
+    """
+    client.cookies.set(
+        "access_token",
+        create_access_token(data={"sub": str(admin_user.id), "email": admin_user.email})
+    )
+    return client
+
+
+@pytest.fixture(scope="function")
+def upload_dir(tmp_path, monkeypatch):
+    """
+    Temporary upload directory.
+    Patches UPLOAD_DIR in every module that resolves video paths.
+    """
+    from app import config, media_utils, upload_sessions
+    from app.routers import posts, stream
+
+    directory = tmp_path / "videos"
+    directory.mkdir()
+    for module in (config, posts, stream, media_utils, upload_sessions):
+        monkeypatch.setattr(module, "UPLOAD_DIR", str(directory))
+    for module in (media_utils, upload_sessions):
+        monkeypatch.setattr(module, "DERIVATIVES_DIR", str(tmp_path / "derivatives"))
+    return directory
+
+
+@pytest.fixture(scope="function")
+def test_post(test_db, test_user, upload_dir):
+    """
+    Create a private post owned by the test user with a video file on disk.
+    Returns the post object with the file content attached.
+    """
+    content = bytes(range(256)) * 64  # 16KB
+    filename = "sample.mp4"
+    (upload_dir / filename).write_bytes(content)
+
+    post = Post(
+        title="Sample Video",
+        description="Sample description",
+        video_filename=filename,
+        video_original_name="sample.mp4",
+        video_size=len(content),
+        author_id=test_user.id,
+        is_public=False
+    )
+    test_db.add(post)
+    test_db.commit()
+    test_db.refresh(post)
+
+    # Attach file content for use in tests
+    post.content = content
+    return post
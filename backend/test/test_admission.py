@@ -0,0 +1,301 @@
+"""
+Tests for stream admission control
+- Per-worker and per-user concurrent stream caps
+- Bounded wait queue, timeouts and eviction
+- Active playback sessions jump ahead of new sessions
+- 503 + Retry-After from /api/stream and GET /api/admin/streams
+"""
+
+import asyncio
+
+import pytest
+
+from app.admission import AdmissionController, AdmissionRejected, stream_admission
+from app.routers import stream
+from app.stream_utils import FileRangeResponse
+
+from test.test_stream import run_response
+
+
+@pytest.fixture
+def single_slot():
+    """Allow one concurrent stream and no waiting on the process-wide controller"""
+    stream_admission.configure(max_streams=1, max_user_streams=0, queue_size=0)
+    yield stream_admission
+    stream_admission.configure(max_streams=256, max_user_streams=8, queue_size=32)
+
+
+def controller(**kwargs) -> AdmissionController:
+    options = {"queue_size": 4, "queue_timeout": 1.0, "retry_after": 7}
+    options.update(kwargs)
+    return AdmissionController(options.pop("max_streams", 1), options.pop("max_user_streams", 0), **options)
+
+
+class TestAdmissionController:
+    """AdmissionController tests"""
+
+    def test_admit_and_release(self):
+        admission = controller(max_streams=2)
+
+        async def scenario():
+            first = await admission.acquire(1, 10)
+            second = await admission.acquire(2, 20)
+            assert admission.stats()["active_streams"] == 2
+            first.release()
+            first.release()  # releasing twice returns the slot once
+            second.release()
+
+        asyncio.run(scenario())
+
+        stats = admission.stats()
+        assert stats["active_streams"] == 0
+        assert stats["admitted_total"] == 2
+        assert stats["users"] == []
+
+    def test_waiter_gets_released_slot(self):
+        admission = controller(max_streams=1)
+
+        async def scenario():
+            held = await admission.acquire(1, 10)
+            waiting = asyncio.create_task(admission.acquire(2, 20))
+            await asyncio.sleep(0.01)
+            assert admission.stats()["queued"] == 1
+            held.release()
+            slot = await waiting
+            assert slot.user_id == 2
+
+        asyncio.run(scenario())
+
+        assert admission.stats()["active_streams"] == 1
+
+    def test_queue_full_rejected(self):
+        admission = controller(max_streams=1, queue_size=0)
+
+        async def scenario():
+            await admission.acquire(1, 10)
+            with pytest.raises(AdmissionRejected) as error:
+                await admission.acquire(2, 20)
+            assert error.value.retry_after == 7
+
+        asyncio.run(scenario())
+
+        assert admission.stats()["rejected_total"] == 1
+
+    def test_queue_timeout(self):
+        admission = controller(max_streams=1, queue_timeout=0.05)
+
+        async def scenario():
+            await admission.acquire(1, 10)
+            with pytest.raises(AdmissionRejected):
+                await admission.acquire(2, 20)
+
+        asyncio.run(scenario())
+
+        stats = admission.stats()
+        assert stats["timed_out_total"] == 1
+        assert stats["queued"] == 0
+
+    def test_per_user_cap(self):
+        admission = controller(max_streams=10, max_user_streams=2, queue_size=0)
+
+        async def scenario():
+            await admission.acquire(1, 10)
+            await admission.acquire(1, 11)
+            with pytest.raises(AdmissionRejected):
+                await admission.acquire(1, 12)
+            # Other users are not affected
+            await admission.acquire(2, 20)
+
+        asyncio.run(scenario())
+
+        assert admission.stats()["users"] == [
+            {"user_id": 1, "streams": 2}, {"user_id": 2, "streams": 1}
+        ]
+
+    def test_user_capped_waiter_does_not_block_others(self):
+        admission = controller(max_streams=2, max_user_streams=1)
+
+        async def scenario():
+            first = await admission.acquire(1, 10)
+            other = await admission.acquire(3, 30)
+            capped = asyncio.create_task(admission.acquire(1, 11))
+            free = asyncio.create_task(admission.acquire(2, 20))
+            await asyncio.sleep(0.01)
+            other.release()
+            slot = await free
+            assert slot.user_id == 2
+            assert not capped.done()
+            first.release()
+            assert (await capped).user_id == 1
+
+        asyncio.run(scenario())
+
+    def test_new_request_not_queued_behind_user_capped_waiter(self):
+        admission = controller(max_streams=10, max_user_streams=1, queue_timeout=0.2)
+
+        async def scenario():
+            await admission.acquire(1, 10)
+            capped = asyncio.create_task(admission.acquire(1, 11))
+            await asyncio.sleep(0.01)
+            # 9 worker slots are free: user 2 is admitted right away
+            slot = await admission.acquire(2, 20)
+            assert slot.user_id == 2
+            with pytest.raises(AdmissionRejected):
+                await capped
+
+        asyncio.run(scenario())
+
+        assert admission.stats()["active_streams"] == 2
+
+    def test_active_session_goes_first(self):
+        admission = controller(max_streams=1)
+
+        async def scenario():
+            # User 1 starts watching post 10, then seeks (a new Range request)
+            playing = await admission.acquire(1, 10)
+            new_session = asyncio.create_task(admission.acquire(2, 20))
+            await asyncio.sleep(0.01)
+            seek = asyncio.create_task(admission.acquire(1, 10))
+            await asyncio.sleep(0.01)
+            assert admission.stats()["queued_priority"] == 1
+            playing.release()
+            slot = await seek
+            assert slot.session == (1, 10)
+            assert not new_session.done()
+            slot.release()
+            await new_session
+
+        asyncio.run(scenario())
+
+    def test_active_session_evicts_new_session_when_full(self):
+        admission = controller(max_streams=1, queue_size=1)
+
+        async def scenario():
+            playing = await admission.acquire(1, 10)
+            new_session = asyncio.create_task(admission.acquire(2, 20))
+            await asyncio.sleep(0.01)
+            seek = asyncio.create_task(admission.acquire(1, 10))
+            with pytest.raises(AdmissionRejected):
+                await new_session
+            playing.release()
+            await seek
+
+        asyncio.run(scenario())
+
+    def test_cancelled_waiter_leaves_queue(self):
+        admission = controller(max_streams=1)
+
+        async def scenario():
+            held = await admission.acquire(1, 10)
+            waiting = asyncio.create_task(admission.acquire(2, 20))
+            await asyncio.sleep(0.01)
+            waiting.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await waiting
+            held.release()
+
+        asyncio.run(scenario())
+
+        stats = admission.stats()
+        assert stats["queued"] == 0
+        assert stats["active_streams"] == 0
+
+    def test_unlimited(self):
+        admission = controller(max_streams=0)
+
+        async def scenario():
+            return [await admission.acquire(1, 10) for _ in range(50)]
+
+        assert len(asyncio.run(scenario())) == 50
+
+
+class TestSlotRelease:
+    """FileRangeResponse returns its slot"""
+
+    def test_released_after_body(self, tmp_path):
+        admission = controller(max_streams=1)
+        path = tmp_path / "video.mp4"
+        path.write_bytes(b"0123456789")
+        slot = asyncio.run(admission.acquire(1, 10))
+
+        run_response(FileRangeResponse(str(path), 0, 10, slot=slot), {"type": "http", "method": "GET"})
+
+        assert admission.stats()["active_streams"] == 0
+
+    def test_released_when_file_is_missing(self, tmp_path):
+        admission = controller(max_streams=1)
+        slot = asyncio.run(admission.acquire(1, 10))
+        response = FileRangeResponse(str(tmp_path / "missing.mp4"), 0, 10, slot=slot)
+
+        with pytest.raises(FileNotFoundError):
+            run_response(response, {"type": "http", "method": "GET"})
+
+        assert admission.stats()["active_streams"] == 0
+
+
+class TestStreamAdmission:
+    """Admission control wired into /api/stream"""
+
+    def test_slot_released_after_stream(self, authenticated_client, test_post):
+        response = authenticated_client.get(f"/api/stream/{test_post.id}")
+
+        assert response.content == test_post.content
+        stats = stream_admission.stats()
+        assert stats["admitted_total"] == 1
+        assert stats["active_streams"] == 0
+
+    def test_full_returns_503_with_retry_after(self, authenticated_client, test_post, single_slot):
+        asyncio.run(single_slot.acquire(999, 999))
+
+        response = authenticated_client.get(f"/api/stream/{test_post.id}")
+
+        assert response.status_code == 503
+        assert response.headers["retry-after"] == "5"
+
+    def test_head_does_not_take_slot(self, authenticated_client, test_post, single_slot):
+        asyncio.run(single_slot.acquire(999, 999))
+
+        response = authenticated_client.head(f"/api/stream/{test_post.id}")
+
+        assert response.status_code == 200
+
+    def test_not_modified_does_not_take_slot(self, authenticated_client, test_post, single_slot):
+        url = f"/api/stream/{test_post.id}"
+        etag = authenticated_client.head(url).headers["etag"]
+        asyncio.run(single_slot.acquire(999, 999))
+
+        response = authenticated_client.get(url, headers={"If-None-Match": etag})
+
+        assert response.status_code == 304
+
+    def test_unsatisfiable_range_releases_slot(self, authenticated_client, test_post, single_slot):
+        response = authenticated_client.get(
+            f"/api/stream/{test_post.id}", headers={"Range": "bytes=99999-"}
+        )
+
+        assert response.status_code == 416
+        assert single_slot.stats()["active_streams"] == 0
+
+    def test_failed_response_releases_slot(self, authenticated_client, test_post, single_slot, monkeypatch):
+        def fail(*args, **kwargs):
+            raise OSError("stat failed")
+        monkeypatch.setattr(stream, "build_range_response", fail)
+
+        with pytest.raises(OSError):
+            authenticated_client.get(f"/api/stream/{test_post.id}")
+
+        assert single_slot.stats()["active_streams"] == 0
+
+    def test_admin_streams_endpoint(self, admin_client, single_slot):
+        response = admin_client.get("/api/admin/streams")
+
+        assert response.status_code == 200
+        body = response.json()
+        assert body["max_streams"] == 1
+        assert body["active_streams"] == 0
+        assert body["queued"] == 0
+
+    def test_admin_streams_requires_admin(self, authenticated_client):
+        response = authenticated_client.get("/api/admin/streams")
+
+        assert response.status_code == 403
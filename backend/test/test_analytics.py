@@ -0,0 +1,236 @@
+"""
+Tests for stream analytics
+- In-memory aggregation, view sessions and batched upserts
+- Flush thread (size threshold, shutdown) and failed flush retry
+- Bytes served reported by FileRangeResponse
+- Recording from /api/stream and GET /api/admin/analytics
+"""
+
+import time
+from datetime import date
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.analytics import AnalyticsCollector, analytics_collector
+from app.auth_utils import create_access_token
+from app.main import app
+from app.models import StreamStat
+from app.stream_utils import FileRangeResponse
+
+from test.conftest import TestSessionLocal
+from test.test_stream import run_response
+
+DAY = date(2024, 1, 2)
+
+
+def collector(**kwargs) -> AnalyticsCollector:
+    options = {
+        "flush_interval": 60.0,
+        "flush_threshold": 1000,
+        "view_window": 60.0,
+        "session_factory": TestSessionLocal,
+    }
+    options.update(kwargs)
+    return AnalyticsCollector(**options)
+
+
+def rows(db) -> list[tuple]:
+    db.expire_all()
+    return [
+        (stat.day, stat.post_id, stat.user_id, stat.views, stat.bytes_served)
+        for stat in db.query(StreamStat).order_by(StreamStat.post_id, StreamStat.user_id)
+    ]
+
+
+def wait_for(condition, timeout: float = 2.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+class TestAnalyticsCollector:
+    """AnalyticsCollector tests"""
+
+    def test_range_requests_are_one_view(self, test_db):
+        analytics = collector()
+
+        analytics.record(1, 10, 1000, day=DAY)
+        analytics.record(1, 10, 500, day=DAY)
+        analytics.record(1, 20, 300, day=DAY)
+
+        assert analytics.flush() == 2
+        assert rows(test_db) == [(DAY, 1, 10, 1, 1500), (DAY, 1, 20, 1, 300)]
+
+    def test_new_view_after_window(self, test_db):
+        analytics = collector(view_window=0)
+
+        analytics.record(1, 10, 100, day=DAY)
+        time.sleep(0.001)
+        analytics.record(1, 10, 100, day=DAY)
+        analytics.flush()
+
+        assert rows(test_db) == [(DAY, 1, 10, 2, 200)]
+
+    def test_flushes_add_to_existing_rows(self, test_db):
+        analytics = collector(view_window=0)
+
+        analytics.record(1, 10, 100, day=DAY)
+        analytics.flush()
+        analytics.record(1, 10, 50, day=DAY)
+        analytics.flush()
+
+        assert rows(test_db) == [(DAY, 1, 10, 2, 150)]
+        stats = analytics.stats()
+        assert stats["flushes_total"] == 2
+        assert stats["flushed_rows_total"] == 2
+        assert stats["pending_rows"] == 0
+
+    def test_empty_responses_ignored(self, test_db):
+        analytics = collector()
+
+        analytics.record(1, 10, 0, day=DAY)
+
+        assert analytics.flush() == 0
+        assert analytics.stats()["recorded_total"] == 0
+
+    def test_failed_flush_keeps_pending(self, test_db):
+        # A database without the rollup table
+        engine = create_engine(
+            "sqlite:///:memory:", connect_args={"check_same_thread": False}, poolclass=StaticPool
+        )
+        analytics = collector(session_factory=sessionmaker(bind=engine))
+        analytics.record(1, 10, 100, day=DAY)
+
+        with pytest.raises(Exception):
+            analytics.flush()
+
+        stats = analytics.stats()
+        assert stats["failed_flushes_total"] == 1
+        assert (stats["pending_rows"], stats["pending_views"], stats["pending_bytes"]) == (1, 1, 100)
+
+        analytics.configure(session_factory=TestSessionLocal)
+        analytics.flush()
+        assert rows(test_db) == [(DAY, 1, 10, 1, 100)]
+
+    def test_threshold_wakes_flush_thread(self, test_db):
+        analytics = collector(flush_threshold=2)
+        analytics.start()
+        try:
+            analytics.record(1, 10, 100, day=DAY)
+            analytics.record(2, 10, 100, day=DAY)
+
+            assert wait_for(lambda: analytics.stats()["flushes_total"] == 1)
+        finally:
+            analytics.stop()
+
+        assert len(rows(test_db)) == 2
+
+    def test_stop_flushes_pending(self, test_db):
+        analytics = collector()
+        analytics.start()
+        analytics.record(1, 10, 100, day=DAY)
+
+        analytics.stop()
+
+        assert rows(test_db) == [(DAY, 1, 10, 1, 100)]
+
+
+class TestBytesSent:
+    """FileRangeResponse reports the body bytes it sent"""
+
+    def test_on_sent(self, tmp_path):
+        path = tmp_path / "video.mp4"
+        path.write_bytes(b"0123456789")
+        sent = []
+
+        run_response(FileRangeResponse(str(path), 2, 5, on_sent=sent.append), {"type": "http", "method": "GET"})
+
+        assert sent == [5]
+
+    def test_head_sends_nothing(self, tmp_path):
+        path = tmp_path / "video.mp4"
+        path.write_bytes(b"0123456789")
+        sent = []
+
+        run_response(FileRangeResponse(str(path), 0, 10, on_sent=sent.append), {"type": "http", "method": "HEAD"})
+
+        assert sent == [0]
+
+
+class TestStreamAnalytics:
+    """Analytics recorded by /api/stream and reported by /api/admin/analytics"""
+
+    def test_stream_recorded(self, authenticated_client, admin_user, test_post):
+        url = f"/api/stream/{test_post.id}"
+        authenticated_client.get(url)
+        authenticated_client.get(url, headers={"Range": "bytes=0-99"})
+        authenticated_client.head(url)
+
+        authenticated_client.cookies.set("access_token", create_access_token(data={"sub": str(admin_user.id)}))
+        response = authenticated_client.get("/api/admin/analytics")
+
+        assert response.status_code == 200
+        body = response.json()
+        expected_bytes = len(test_post.content) + 100
+        assert body["totals"] == {"views": 1, "bytes_served": expected_bytes, "viewers": 1}
+        assert body["posts"] == [{
+            "post_id": test_post.id,
+            "title": test_post.title,
+            "views": 1,
+            "bytes_served": expected_bytes,
+            "viewers": 1,
+        }]
+        assert len(body["daily"]) == 1
+        assert body["collector"]["pending_rows"] == 0
+
+    def test_not_modified_not_recorded(self, authenticated_client, test_post):
+        url = f"/api/stream/{test_post.id}"
+        etag = authenticated_client.head(url).headers["etag"]
+
+        authenticated_client.get(url, headers={"If-None-Match": etag})
+
+        assert analytics_collector.stats()["recorded_total"] == 0
+
+    def test_filter_by_post(self, admin_client, test_db):
+        analytics_collector.record(1, 10, 100)
+        analytics_collector.record(2, 10, 200)
+
+        body = admin_client.get("/api/admin/analytics", params={"post_id": 2}).json()
+
+        assert body["totals"]["bytes_served"] == 200
+        assert [post["post_id"] for post in body["posts"]] == [2]
+        assert body["posts"][0]["title"] is None  # stats outlive deleted posts
+
+    def test_days_window(self, admin_client, test_db):
+        analytics_collector.record(1, 10, 100, day=date(2000, 1, 1))
+
+        body = admin_client.get("/api/admin/analytics", params={"days": 7}).json()
+
+        assert body["totals"]["bytes_served"] == 0
+        assert body["posts"] == []
+
+    @pytest.mark.parametrize("params", [{"days": 0}, {"days": 366}, {"limit": 0}])
+    def test_invalid_params(self, admin_client, params):
+        response = admin_client.get("/api/admin/analytics", params=params)
+
+        assert response.status_code == 400
+
+    def test_requires_admin(self, authenticated_client):
+        response = authenticated_client.get("/api/admin/analytics")
+
+        assert response.status_code == 403
+
+    def test_shutdown_flushes(self, test_db, test_post, auth_token):
+        with TestClient(app) as c:
+            c.cookies.set("access_token", auth_token)
+            c.get(f"/api/stream/{test_post.id}")
+            assert rows(test_db) == []
+
+        assert [row[1:] for row in rows(test_db)] == [(test_post.id, test_post.author_id, 1, len(test_post.content))]
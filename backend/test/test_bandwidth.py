@@ -0,0 +1,214 @@
+"""
+Tests for stream bandwidth shaping
+- Token bucket reservations
+- Weighted max-min fair allocation across users
+- Throttled FileRangeResponse delivery
+- GET /api/admin/bandwidth counters
+"""
+
+import time
+
+import pytest
+
+from app.bandwidth import MIN_ALLOCATION, BandwidthScheduler, TokenBucket, bandwidth_scheduler
+from app.metadata_cache import StreamMetadata
+from app.routers.stream import StreamAccess, stream_throttle
+from app.stream_utils import FileRangeResponse
+
+from test.test_stream import run_response
+
+MB = 1024 * 1024
+
+
+@pytest.fixture
+def shaped():
+    """Enable a per-user limit on the process-wide scheduler for one test"""
+    bandwidth_scheduler.configure(global_rate=0, user_rate=50 * MB)
+    yield bandwidth_scheduler
+    bandwidth_scheduler.configure(global_rate=0, user_rate=0)
+
+
+def allocations(scheduler: BandwidthScheduler) -> dict[int, int]:
+    return {user["user_id"]: user["allocated_rate"] for user in scheduler.stats()["users"]}
+
+
+class TestTokenBucket:
+    """TokenBucket tests"""
+
+    def test_unlimited(self):
+        bucket = TokenBucket(0, 1.0)
+
+        assert bucket.reserve(10 * MB, time.monotonic()) == 0
+
+    def test_burst_then_wait(self):
+        bucket = TokenBucket(1000, 1.0)
+        now = time.monotonic()
+
+        assert bucket.reserve(1000, now) == 0
+        assert bucket.reserve(500, now) == pytest.approx(0.5)
+        assert bucket.reserve(500, now) == pytest.approx(1.0)
+
+    def test_refill(self):
+        bucket = TokenBucket(1000, 1.0)
+        now = time.monotonic()
+        bucket.reserve(2500, now)  # 1500 bytes in debt
+
+        assert bucket.reserve(100, now + 1.0) == pytest.approx(0.6)
+
+
+class TestFairShare:
+    """BandwidthScheduler allocation tests"""
+
+    def test_disabled_returns_no_throttle(self):
+        scheduler = BandwidthScheduler(0, 0)
+
+        assert scheduler.throttle(1) is None
+
+    def test_equal_split(self):
+        scheduler = BandwidthScheduler(10 * MB, 0)
+        scheduler.throttle(1).open()
+        scheduler.throttle(2).open()
+
+        assert allocations(scheduler) == {1: 5 * MB, 2: 5 * MB}
+
+    def test_parallel_connections_share_one_allocation(self):
+        scheduler = BandwidthScheduler(10 * MB, 0)
+        for _ in range(8):
+            scheduler.throttle(1).open()
+        scheduler.throttle(2).open()
+
+        stats = scheduler.stats()
+        assert allocations(scheduler) == {1: 5 * MB, 2: 5 * MB}
+        assert stats["active_connections"] == 9
+        assert stats["users"][0]["connections"] == 8
+
+    def test_priority_weight(self):
+        scheduler = BandwidthScheduler(10 * MB, 0, priority_weight=4.0)
+        scheduler.throttle(1, priority=True).open()
+        scheduler.throttle(2).open()
+
+        assert allocations(scheduler) == {1: 8 * MB, 2: 2 * MB}
+
+    def test_user_cap_without_global_limit(self):
+        scheduler = BandwidthScheduler(0, 3 * MB)
+        scheduler.throttle(1).open()
+
+        assert allocations(scheduler) == {1: 3 * MB}
+
+    def test_user_cap_redistributes_global(self):
+        scheduler = BandwidthScheduler(10 * MB, 2 * MB)
+        scheduler.throttle(1).open()
+        scheduler.throttle(2).open()
+
+        assert allocations(scheduler) == {1: 2 * MB, 2: 2 * MB}
+
+    def test_unused_share_goes_to_others(self):
+        scheduler = BandwidthScheduler(10 * MB, 0)
+        slow, fast = scheduler.throttle(1), scheduler.throttle(2)
+        slow.open()
+        fast.open()
+        now = time.monotonic()
+        for share in scheduler._shares.values():
+            share.window_start = now - 1.0
+        scheduler._shares[1].window_bytes = 1 * MB  # never waited, 1MB/s demand
+        scheduler._shares[2].window_bytes = 5 * MB
+        scheduler._shares[2].throttled = True
+
+        scheduler._measure(now)
+        scheduler._allocate(now)
+
+        result = allocations(scheduler)
+        assert result[1] == round(1.25 * MB)
+        assert result[2] == round(10 * MB - 1.25 * MB)
+
+    def test_idle_user_keeps_minimum(self):
+        scheduler = BandwidthScheduler(10 * MB, 0)
+        scheduler.throttle(1).open()
+        now = time.monotonic()
+        scheduler._shares[1].window_start = now - 1.0
+
+        scheduler._measure(now)
+        scheduler._allocate(now)
+
+        assert allocations(scheduler) == {1: MIN_ALLOCATION}
+
+    def test_close_releases_share(self):
+        scheduler = BandwidthScheduler(10 * MB, 0)
+        first, second = scheduler.throttle(1), scheduler.throttle(2)
+        first.open()
+        second.open()
+
+        second.close()
+
+        assert allocations(scheduler) == {1: 10 * MB}
+        first.close()
+        assert scheduler.stats()["active_users"] == 0
+
+
+class TestThrottledResponse:
+    """FileRangeResponse with a throttle"""
+
+    def test_rate_is_enforced(self, tmp_path):
+        scheduler = BandwidthScheduler(0, 200_000, burst_seconds=0.1)
+        content = bytes(range(256)) * 400  # 100KB
+        path = tmp_path / "video.mp4"
+        path.write_bytes(content)
+        response = FileRangeResponse(str(path), 0, len(content), throttle=scheduler.throttle(1))
+
+        start = time.monotonic()
+        messages = run_response(response, {"type": "http", "method": "GET"})
+        elapsed = time.monotonic() - start
+
+        assert b"".join(m["body"] for m in messages[1:]) == content
+        # 20KB burst, the remaining 80KB at 200KB/s
+        assert elapsed >= 0.35
+        stats = scheduler.stats()
+        assert stats["bytes_sent"] == len(content)
+        assert stats["throttled_waits"] >= 1
+        assert stats["active_connections"] == 0
+
+    def test_head_does_not_register(self, tmp_path):
+        scheduler = BandwidthScheduler(0, 1000)
+        response = FileRangeResponse(str(tmp_path / "missing.mp4"), 0, 100, throttle=scheduler.throttle(1))
+
+        run_response(response, {"type": "http", "method": "HEAD"})
+
+        assert scheduler.stats()["bytes_sent"] == 0
+
+
+class TestStreamIntegration:
+    """Bandwidth shaping wired into /api/stream"""
+
+    def test_stream_is_accounted(self, authenticated_client, test_post, shaped):
+        response = authenticated_client.get(f"/api/stream/{test_post.id}")
+
+        assert response.content == test_post.content
+        stats = shaped.stats()
+        assert stats["bytes_sent"] == len(test_post.content)
+        assert stats["active_connections"] == 0
+
+    def test_no_throttle_when_unconfigured(self, authenticated_client, test_post):
+        authenticated_client.get(f"/api/stream/{test_post.id}")
+
+        assert bandwidth_scheduler.stats()["bytes_sent"] == 0
+
+    def test_author_and_admin_priority(self, shaped):
+        metadata = StreamMetadata("a.mp4", "/tmp/a.mp4", 1, 0.0, 0, "video/mp4", '"1-0"', False, author_id=7)
+
+        assert stream_throttle(StreamAccess(None, 7), metadata).weight == shaped.priority_weight
+        assert stream_throttle(StreamAccess(None, 8, is_admin=True), metadata).weight == shaped.priority_weight
+        assert stream_throttle(StreamAccess(None, 8), metadata).weight == 1.0
+
+    def test_admin_bandwidth_endpoint(self, admin_client, shaped):
+        response = admin_client.get("/api/admin/bandwidth")
+
+        assert response.status_code == 200
+        body = response.json()
+        assert body["user_rate"] == 50 * MB
+        assert body["active_users"] == 0
+        assert body["users"] == []
+
+    def test_admin_bandwidth_requires_admin(self, authenticated_client):
+        response = authenticated_client.get("/api/admin/bandwidth")
+
+        assert response.status_code == 403
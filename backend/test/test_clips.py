@@ -0,0 +1,251 @@
+"""
+Tests for clip extraction
+- ClipCache disk LRU (budget, eviction, reload, discard)
+- GET /api/stream/{post_id}/clip (validation, keyframe snapping, caching, ranges)
+- ffmpeg extraction (skipped when ffmpeg is not installed)
+"""
+
+import os
+
+import pytest
+
+from app import media_utils
+from app.clip_cache import ClipCache, clip_cache
+from app.media_utils import get_clip_path, get_clips_dir
+
+from test.test_keyframes import make_video
+
+
+def write(path, size: int) -> str:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(b"c" * size)
+    return str(path)
+
+
+@pytest.fixture
+def fake_extract(monkeypatch):
+    """Replace ffmpeg extraction with a writer that records its calls"""
+    calls = []
+
+    def extract(video_path, output_path, start, end):
+        calls.append((start, end))
+        data = f"clip {start:.3f}-{end:.3f}".encode() * 10
+        write(output_path, 0)
+        with open(output_path, "wb") as f:
+            f.write(data)
+        return len(data)
+
+    monkeypatch.setattr(media_utils, "extract_clip", extract)
+    return calls
+
+
+class TestClipCache:
+    """ClipCache tests"""
+
+    def test_evicts_least_recently_used(self, tmp_path):
+        cache = ClipCache(max_bytes=250)
+        a = write(tmp_path / "a.mp4", 100)
+        b = write(tmp_path / "b.mp4", 100)
+        c = write(tmp_path / "c.mp4", 100)
+        cache.add(a, 100)
+        cache.add(b, 100)
+        assert cache.touch(a)
+
+        evicted = cache.add(c, 100)
+
+        assert evicted == [b]
+        assert not os.path.exists(b)
+        assert os.path.exists(a) and os.path.exists(c)
+        assert cache.stats()["size"] == 200
+
+    def test_keeps_new_clip_larger_than_budget(self, tmp_path):
+        cache = ClipCache(max_bytes=50)
+        a = write(tmp_path / "a.mp4", 40)
+        big = write(tmp_path / "big.mp4", 100)
+        cache.add(a, 40)
+
+        assert cache.add(big, 100) == [a]
+        assert cache.touch(big)
+
+    def test_touch_keeps_mtime(self, tmp_path):
+        cache = ClipCache(max_bytes=1000)
+        a = write(tmp_path / "a.mp4", 10)
+        os.utime(a, ns=(1, 1))
+
+        assert cache.touch(a)
+
+        file_stat = os.stat(a)
+        assert file_stat.st_mtime_ns == 1
+        assert file_stat.st_atime_ns > 1
+
+    def test_touch_missing_file(self, tmp_path):
+        cache = ClipCache(max_bytes=1000)
+        a = write(tmp_path / "a.mp4", 10)
+        cache.add(a, 10)
+        os.remove(a)
+
+        assert not cache.touch(a)
+        assert cache.stats()["size"] == 0
+
+    def test_load_orders_by_last_use(self, tmp_path):
+        cache = ClipCache(max_bytes=150)
+        old = write(tmp_path / "old.mp4", 100)
+        recent = write(tmp_path / "recent.mp4", 100)
+        os.utime(old, ns=(1_000, 1_000))
+        os.utime(recent, ns=(2_000, 1_000))
+
+        cache.load([recent, old, str(tmp_path / "gone.mp4")])
+
+        assert not os.path.exists(old)
+        assert os.path.exists(recent)
+        assert cache.stats()["entries"] == 1
+
+    def test_discard_dir(self, tmp_path):
+        cache = ClipCache(max_bytes=1000)
+        cache.add(write(tmp_path / "one" / "a.mp4", 10), 10)
+        cache.add(write(tmp_path / "two" / "b.mp4", 10), 10)
+
+        cache.discard_dir(str(tmp_path / "one"))
+
+        assert cache.stats()["entries"] == 1
+        assert cache.stats()["size"] == 10
+
+
+@pytest.fixture
+def seek_post(test_post, upload_dir):
+    """Test post whose file is a 10 second MP4 with a keyframe every second"""
+    data, _ = make_video()
+    (upload_dir / test_post.video_filename).write_bytes(data)
+    return test_post
+
+
+class TestClipEndpoint:
+    """GET /api/stream/{post_id}/clip tests"""
+
+    def test_extract_and_serve(self, authenticated_client, seek_post, fake_extract):
+        response = authenticated_client.get(
+            f"/api/stream/{seek_post.id}/clip", params={"start": 3.5, "end": 6}
+        )
+
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "video/mp4"
+        assert response.headers["x-clip-start"] == "3.000"
+        assert response.headers["x-clip-end"] == "6.000"
+        assert response.headers["cache-control"] == "private, max-age=31536000, immutable"
+        assert response.content.startswith(b"clip 3.000-6.000")
+        assert fake_extract == [(3.0, 6.0)]
+
+    def test_repeated_requests_use_cache(self, authenticated_client, seek_post, fake_extract):
+        url = f"/api/stream/{seek_post.id}/clip"
+        first = authenticated_client.get(url, params={"start": 3.2, "end": 6})
+
+        # Snaps to the same keyframe, so it is the same clip
+        second = authenticated_client.get(url, params={"start": 3.9, "end": 6})
+
+        assert second.content == first.content
+        assert second.headers["etag"] == first.headers["etag"]
+        assert fake_extract == [(3.0, 6.0)]
+        assert clip_cache.stats()["hits"] == 1
+
+    def test_range_and_not_modified(self, authenticated_client, seek_post, fake_extract):
+        url = f"/api/stream/{seek_post.id}/clip"
+        params = {"start": 1, "end": 2}
+        full = authenticated_client.get(url, params=params)
+
+        partial = authenticated_client.get(url, params=params, headers={"Range": "bytes=5-9"})
+        not_modified = authenticated_client.get(
+            url, params=params, headers={"If-None-Match": full.headers["etag"]}
+        )
+
+        assert partial.status_code == 206
+        assert partial.content == full.content[5:10]
+        assert partial.headers["content-range"] == f"bytes 5-9/{len(full.content)}"
+        assert not_modified.status_code == 304
+
+    def test_served_from_disk_without_ffmpeg(self, authenticated_client, seek_post, monkeypatch):
+        monkeypatch.setattr(media_utils, "ffmpeg_available", lambda: False)
+        write(get_clip_path(seek_post.video_filename, 2.0, 4.0), 64)
+
+        response = authenticated_client.get(
+            f"/api/stream/{seek_post.id}/clip", params={"start": 2.5, "end": 4}
+        )
+
+        assert response.status_code == 200
+        assert response.content == b"c" * 64
+
+    def test_budget_evicts_old_clips(self, authenticated_client, seek_post, fake_extract, monkeypatch):
+        monkeypatch.setattr(clip_cache, "max_bytes", 200)
+
+        url = f"/api/stream/{seek_post.id}/clip"
+        for start in (1, 2, 3):
+            authenticated_client.get(url, params={"start": start, "end": start + 1})
+
+        clips = sorted(os.listdir(get_clips_dir(seek_post.video_filename)))
+        assert clips == ["3000-4000.mp4"]
+
+    def test_non_mp4_start_not_snapped(self, authenticated_client, test_post, fake_extract):
+        response = authenticated_client.get(
+            f"/api/stream/{test_post.id}/clip", params={"start": 1.25, "end": 2}
+        )
+
+        assert response.headers["x-clip-start"] == "1.250"
+
+    @pytest.mark.parametrize("params", [
+        {"start": -1, "end": 2},
+        {"start": 5, "end": 5},
+        {"start": 0, "end": "inf"},
+        {"start": 0, "end": 301},
+    ])
+    def test_invalid_range(self, authenticated_client, seek_post, params):
+        response = authenticated_client.get(f"/api/stream/{seek_post.id}/clip", params=params)
+
+        assert response.status_code == 400
+
+    def test_without_ffmpeg(self, authenticated_client, seek_post, monkeypatch):
+        monkeypatch.setattr(media_utils, "ffmpeg_available", lambda: False)
+
+        response = authenticated_client.get(
+            f"/api/stream/{seek_post.id}/clip", params={"start": 0, "end": 2}
+        )
+
+        assert response.status_code == 503
+
+    def test_requires_login(self, client, seek_post):
+        response = client.get(f"/api/stream/{seek_post.id}/clip", params={"start": 0, "end": 2})
+
+        assert response.status_code == 401
+
+    def test_delete_post_removes_clips(self, authenticated_client, seek_post, fake_extract):
+        authenticated_client.get(f"/api/stream/{seek_post.id}/clip", params={"start": 0, "end": 2})
+
+        authenticated_client.delete(f"/api/posts/{seek_post.id}")
+
+        assert not os.path.exists(get_clips_dir(seek_post.video_filename))
+        assert clip_cache.stats()["size"] == 0
+
+    def test_admin_cache_stats(self, admin_client):
+        response = admin_client.get("/api/admin/cache")
+
+        assert set(response.json()["clips"]) >= {"entries", "size", "max_bytes", "evictions"}
+
+
+@pytest.mark.skipif(not media_utils.ffmpeg_available(), reason="ffmpeg is not installed")
+class TestClipExtraction:
+    """ffmpeg clip extraction tests"""
+
+    def test_extract_clip(self, tmp_path):
+        source = tmp_path / "source.mp4"
+        media_utils.run_ffmpeg([
+            "-f", "lavfi", "-i", "testsrc=duration=10:size=320x180:rate=25",
+            "-c:v", "libx264", "-g", "25", str(source),
+        ])
+        output = tmp_path / "clips" / "2000-4000.mp4"
+
+        size = media_utils.extract_clip(str(source), str(output), 2.0, 4.0)
+
+        assert size == output.stat().st_size
+        assert 0 < size < source.stat().st_size
+        probe = media_utils.probe_video(str(output))
+        if probe is not None:
+            assert probe.duration == pytest.approx(2.0, abs=0.2)
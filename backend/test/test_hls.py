@@ -0,0 +1,181 @@
+"""
+Tests for HLS packaging and endpoints
+- GET /api/stream/{post_id}/hls/index.m3u8
+- GET /api/stream/{post_id}/hls/{segment}
+- Derivative cleanup on post deletion
+- ffmpeg packaging (skipped when ffmpeg is not installed)
+"""
+
+import os
+
+import pytest
+
+from app import media_utils
+from app.media_utils import HLS_PLAYLIST, get_hls_dir
+from app.routers.stream import add_ticket_to_playlist
+from app.stream_tickets import create_stream_ticket
+
+
+PLAYLIST = (
+    "#EXTM3U\n"
+    "#EXT-X-VERSION:3\n"
+    "#EXT-X-TARGETDURATION:6\n"
+    "#EXT-X-PLAYLIST-TYPE:VOD\n"
+    "#EXTINF:6.000000,\n"
+    "seg_00000.ts\n"
+    "#EXTINF:2.000000,\n"
+    "seg_00001.ts\n"
+    "#EXT-X-ENDLIST\n"
+)
+
+
+@pytest.fixture
+def hls_post(test_post):
+    """Test post with a hand-made HLS rendition on disk"""
+    hls_dir = get_hls_dir(test_post.video_filename)
+    os.makedirs(hls_dir)
+    with open(os.path.join(hls_dir, HLS_PLAYLIST), "w") as f:
+        f.write(PLAYLIST)
+    test_post.segments = [b"\x47" * 188 * 4, b"\x47" * 188 * 2]
+    for index, data in enumerate(test_post.segments):
+        with open(os.path.join(hls_dir, f"seg_{index:05d}.ts"), "wb") as f:
+            f.write(data)
+    return test_post
+
+
+class TestHlsPlaylist:
+    """HLS playlist endpoint tests"""
+
+    def test_playlist(self, authenticated_client, hls_post):
+        response = authenticated_client.get(f"/api/stream/{hls_post.id}/hls/index.m3u8")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/vnd.apple.mpegurl"
+        assert response.text == PLAYLIST
+
+    def test_playlist_not_packaged(self, authenticated_client, test_post):
+        response = authenticated_client.get(f"/api/stream/{test_post.id}/hls/index.m3u8")
+
+        assert response.status_code == 404
+
+    def test_playlist_requires_access(self, client, hls_post):
+        response = client.get(f"/api/stream/{hls_post.id}/hls/index.m3u8")
+
+        assert response.status_code == 401
+
+    def test_playlist_with_ticket_rewrites_segments(self, client, hls_post, test_user):
+        ticket, _ = create_stream_ticket(test_user.id, hls_post.id)
+
+        response = client.get(
+            f"/api/stream/{hls_post.id}/hls/index.m3u8", params={"ticket": ticket}
+        )
+
+        assert response.status_code == 200
+        assert f"seg_00000.ts?ticket={ticket}" in response.text
+        assert f"seg_00001.ts?ticket={ticket}" in response.text
+        assert "#EXTM3U\n" in response.text
+
+    def test_add_ticket_skips_tags(self):
+        result = add_ticket_to_playlist("#EXTM3U\n#EXTINF:6.0,\nseg_00000.ts\n", "abc")
+
+        assert result == "#EXTM3U\n#EXTINF:6.0,\nseg_00000.ts?ticket=abc\n"
+
+
+class TestHlsSegment:
+    """HLS segment endpoint tests"""
+
+    def test_segment(self, authenticated_client, hls_post):
+        response = authenticated_client.get(f"/api/stream/{hls_post.id}/hls/seg_00001.ts")
+
+        assert response.status_code == 200
+        assert response.content == hls_post.segments[1]
+        assert response.headers["content-type"] == "video/mp2t"
+        assert "immutable" in response.headers["cache-control"]
+        assert response.headers["cache-control"].startswith("private")
+
+    def test_segment_range(self, authenticated_client, hls_post):
+        response = authenticated_client.get(
+            f"/api/stream/{hls_post.id}/hls/seg_00000.ts",
+            headers={"Range": "bytes=0-187"}
+        )
+
+        assert response.status_code == 206
+        assert response.content == hls_post.segments[0][:188]
+
+    def test_segment_not_modified(self, authenticated_client, hls_post):
+        url = f"/api/stream/{hls_post.id}/hls/seg_00000.ts"
+        etag = authenticated_client.get(url).headers["etag"]
+
+        response = authenticated_client.get(url, headers={"If-None-Match": etag})
+
+        assert response.status_code == 304
+
+    def test_segment_missing(self, authenticated_client, hls_post):
+        response = authenticated_client.get(f"/api/stream/{hls_post.id}/hls/seg_00009.ts")
+
+        assert response.status_code == 404
+
+    @pytest.mark.parametrize("name", ["index.txt", "..%2Fsample.mp4", "seg_1.ts", "seg_00000.ts.bak"])
+    def test_segment_name_rejected(self, authenticated_client, hls_post, name):
+        response = authenticated_client.get(f"/api/stream/{hls_post.id}/hls/{name}")
+
+        assert response.status_code == 404
+
+    def test_segment_with_ticket(self, client, hls_post, test_user):
+        ticket, _ = create_stream_ticket(test_user.id, hls_post.id)
+
+        response = client.get(
+            f"/api/stream/{hls_post.id}/hls/seg_00000.ts", params={"ticket": ticket}
+        )
+
+        assert response.status_code == 200
+        assert response.content == hls_post.segments[0]
+
+    def test_segment_requires_access(self, client, hls_post):
+        response = client.get(f"/api/stream/{hls_post.id}/hls/seg_00000.ts")
+
+        assert response.status_code == 401
+
+
+class TestHlsCleanup:
+    """Derivative cleanup tests"""
+
+    def test_delete_post_removes_hls(self, authenticated_client, hls_post):
+        hls_dir = get_hls_dir(hls_post.video_filename)
+
+        response = authenticated_client.delete(f"/api/posts/{hls_post.id}")
+
+        assert response.status_code == 200
+        assert not os.path.exists(hls_dir)
+
+    def test_publish_directory_replaces_target(self, tmp_path):
+        target = tmp_path / "hls"
+        target.mkdir()
+        (target / "old.ts").write_bytes(b"old")
+        staging = tmp_path / ".staging"
+        staging.mkdir()
+        (staging / "new.ts").write_bytes(b"new")
+
+        media_utils.publish_directory(str(staging), str(target))
+
+        assert sorted(os.listdir(target)) == ["new.ts"]
+        assert not staging.exists()
+
+
+@pytest.mark.skipif(not media_utils.ffmpeg_available(), reason="ffmpeg is not installed")
+class TestHlsPackaging:
+    """ffmpeg packaging tests"""
+
+    def test_package_hls(self, tmp_path):
+        source = tmp_path / "source.mp4"
+        media_utils.run_ffmpeg([
+            "-f", "lavfi", "-i", "testsrc=duration=4:size=160x120:rate=25",
+            "-c:v", "libx264", "-g", "25", str(source),
+        ])
+        output_dir = tmp_path / "out" / "hls"
+
+        media_utils.package_hls(str(source), str(output_dir), segment_seconds=1)
+
+        playlist = (output_dir / HLS_PLAYLIST).read_text()
+        assert "#EXT-X-ENDLIST" in playlist
+        assert (output_dir / "seg_00000.ts").exists()
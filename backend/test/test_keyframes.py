@@ -0,0 +1,316 @@
+"""
+Tests for the keyframe index and time-based seek
+- Keyframe table parsing (stss/stts/stsc/stsz/stco/co64)
+- Index file round trip and staleness
+- GET /api/stream/{post_id}?t= resolves to one byte window
+- Index built after upload
+"""
+
+import os
+import struct
+
+import pytest
+
+from app.keyframe_index import KeyframeIndex, build_keyframe_index, keyframe_index_cache
+from app.media_utils import get_keyframe_index_path
+from app.metadata_cache import metadata_cache
+from app.mp4_utils import Mp4Error, read_keyframes
+from app.processing import processing_queue
+
+from test.test_faststart import box, full_box
+
+
+# ==================== Test corpus ====================
+
+TIMESCALE = 1000
+FRAME_DURATION = 40  # 25 fps
+GOP = 25  # one keyframe per second
+AUDIO_CHUNK = b"a" * 50
+
+
+def table(box_type: bytes, fields: str, entries: list[tuple]) -> bytes:
+    body = struct.pack(">I", len(entries)) + b"".join(struct.pack(f">{fields}", *entry) for entry in entries)
+    return full_box(box_type, body)
+
+
+def track(handler: bytes, stbl: bytes, mdhd_version: int = 0) -> bytes:
+    if mdhd_version == 1:
+        mdhd = box(b"mdhd", b"\x01\x00\x00\x00" + struct.pack(">QQIQ", 0, 0, TIMESCALE, 0) + b"\x00" * 4)
+    else:
+        mdhd = full_box(b"mdhd", struct.pack(">IIII", 0, 0, TIMESCALE, 0) + b"\x00" * 4)
+    hdlr = full_box(b"hdlr", b"\x00" * 4 + handler + b"\x00" * 12 + b"\x00")
+    return box(b"trak", box(b"mdia", mdhd + hdlr + box(b"minf", box(b"stbl", stbl))))
+
+
+def make_video(
+    frames: int = 250,
+    chunk_pattern: tuple[int, ...] = (3, 3, 3, 3, 5),
+    use_stss: bool = True,
+    co64: bool = False,
+    uniform_size: int | None = None,
+    mdhd_version: int = 0,
+    with_video: bool = True,
+) -> tuple[bytes, list[tuple[float, int]]]:
+    """
+    Build an MP4 with an audio track and a video track whose chunks are
+    interleaved in mdat. Returns the file and the expected (seconds, offset)
+    of every keyframe.
+    """
+    sizes = [uniform_size or 100 + (i % 7) * 10 for i in range(frames)]
+    samples = [
+        (b"K" if i % GOP == 0 else b"p") + bytes([i % 256]) * (sizes[i] - 1)
+        for i in range(frames)
+    ]
+    chunks = []
+    index = 0
+    while index < frames:
+        count = min(chunk_pattern[min(len(chunks), len(chunk_pattern) - 1)], frames - index)
+        chunks.append(samples[index:index + count])
+        index += count
+
+    def build_moov(mdat_offset: int) -> tuple[bytes, list[int]]:
+        position = mdat_offset + 8
+        audio_offsets, video_offsets = [], []
+        for chunk in chunks:
+            audio_offsets.append(position)
+            position += len(AUDIO_CHUNK)
+            video_offsets.append(position)
+            position += sum(len(sample) for sample in chunk)
+
+        offset_box = (b"co64", "Q") if co64 else (b"stco", "I")
+        stsc = []
+        for number, chunk in enumerate(chunks, start=1):
+            if not stsc or stsc[-1][1] != len(chunk):
+                stsc.append((number, len(chunk), 1))
+        if uniform_size:
+            stsz = full_box(b"stsz", struct.pack(">II", uniform_size, frames))
+        else:
+            stsz = full_box(b"stsz", struct.pack(">II", 0, frames) + b"".join(struct.pack(">I", s) for s in sizes))
+        video_stbl = (
+            table(b"stts", "II", [(frames, FRAME_DURATION)])
+            + (table(b"stss", "I", [(i + 1,) for i in range(0, frames, GOP)]) if use_stss else b"")
+            + table(b"stsc", "III", stsc)
+            + stsz
+            + table(offset_box[0], offset_box[1], [(o,) for o in video_offsets])
+        )
+        audio_stbl = (
+            table(b"stts", "II", [(len(chunks), 1024)])
+            + table(b"stsc", "III", [(1, 1, 1)])
+            + full_box(b"stsz", struct.pack(">II", len(AUDIO_CHUNK), len(chunks)))
+            + table(b"stco", "I", [(o,) for o in audio_offsets])
+        )
+        traks = track(b"soun", audio_stbl)
+        if with_video:
+            traks += track(b"vide", video_stbl, mdhd_version)
+        return box(b"moov", full_box(b"mvhd", b"\x00" * 96) + traks), video_offsets
+
+    ftyp = box(b"ftyp", b"isom\x00\x00\x02\x00isomiso2mp41")
+    moov_size = len(build_moov(0)[0])
+    moov, video_offsets = build_moov(len(ftyp) + moov_size)
+    mdat = box(b"mdat", b"".join(AUDIO_CHUNK + b"".join(chunk) for chunk in chunks))
+
+    expected = []
+    sample_number = 0
+    for chunk, chunk_offset in zip(chunks, video_offsets):
+        offset = chunk_offset
+        for sample in chunk:
+            if sample_number % GOP == 0 or not use_stss:
+                expected.append((sample_number * FRAME_DURATION / TIMESCALE, offset))
+            offset += len(sample)
+            sample_number += 1
+    return ftyp + moov + mdat, expected
+
+
+def as_seconds(keyframes) -> list[tuple[float, int]]:
+    return [(t / keyframes.timescale, o) for t, o in zip(keyframes.times, keyframes.offsets)]
+
+
+# ==================== Tests ====================
+
+class TestReadKeyframes:
+    """read_keyframes() tests"""
+
+    @pytest.mark.parametrize("options", [
+        {},
+        {"co64": True},
+        {"uniform_size": 120},
+        {"chunk_pattern": (1,)},
+        {"mdhd_version": 1},
+    ])
+    def test_keyframes(self, tmp_path, options):
+        data, expected = make_video(**options)
+        path = tmp_path / "video.mp4"
+        path.write_bytes(data)
+
+        keyframes = read_keyframes(str(path))
+
+        assert keyframes.timescale == TIMESCALE
+        assert as_seconds(keyframes) == expected
+        for _, offset in expected:
+            assert data[offset:offset + 1] == b"K"
+
+    def test_without_stss_every_sample_is_sync(self, tmp_path):
+        data, expected = make_video(frames=30, use_stss=False)
+        path = tmp_path / "video.mp4"
+        path.write_bytes(data)
+
+        assert as_seconds(read_keyframes(str(path))) == expected
+        assert len(expected) == 30
+
+    def test_no_video_track(self, tmp_path):
+        path = tmp_path / "audio.mp4"
+        path.write_bytes(make_video(with_video=False)[0])
+
+        with pytest.raises(Mp4Error):
+            read_keyframes(str(path))
+
+    def test_not_mp4(self, tmp_path):
+        path = tmp_path / "fake.mp4"
+        path.write_bytes(b"fake video content")
+
+        with pytest.raises(Mp4Error):
+            read_keyframes(str(path))
+
+
+class TestKeyframeIndex:
+    """KeyframeIndex format and lookup tests"""
+
+    @pytest.fixture
+    def index(self, tmp_path):
+        path = tmp_path / "video.mp4"
+        path.write_bytes(make_video()[0])
+        return build_keyframe_index(str(path), str(tmp_path / "keyframes" / "video.mp4.idx"))
+
+    @pytest.mark.parametrize("seconds, expected", [
+        (0, 0.0), (0.99, 0.0), (1.0, 1.0), (93.5, 9.0), (3.5, 3.0),
+    ])
+    def test_lookup(self, index, seconds, expected):
+        assert index.lookup(seconds)[0] == expected
+
+    def test_round_trip(self, index):
+        data = index.to_bytes(1234, 5678)
+
+        loaded = KeyframeIndex.from_bytes(data, 1234, 5678)
+
+        assert list(loaded.times) == list(index.times)
+        assert list(loaded.offsets) == list(index.offsets)
+        assert len(data) == 28 + len(index) * 16
+
+    def test_stale_or_corrupt(self, index):
+        data = index.to_bytes(1234, 5678)
+
+        assert KeyframeIndex.from_bytes(data, 1234, 9999) is None
+        assert KeyframeIndex.from_bytes(data[:-1], 1234, 5678) is None
+        assert KeyframeIndex.from_bytes(b"junk", 1234, 5678) is None
+
+
+@pytest.fixture
+def seek_post(test_post, upload_dir):
+    """Test post whose file is a 10 second MP4 with a keyframe every second"""
+    data, expected = make_video()
+    (upload_dir / test_post.video_filename).write_bytes(data)
+    test_post.content = data
+    test_post.keyframes = expected
+    return test_post
+
+
+class TestTimeSeek:
+    """?t= on /api/stream/{post_id}"""
+
+    def test_seek_is_one_request(self, authenticated_client, seek_post):
+        response = authenticated_client.get(f"/api/stream/{seek_post.id}", params={"t": 3.5})
+
+        seconds, offset = seek_post.keyframes[3]
+        assert response.status_code == 206
+        assert response.headers["x-seek-time"] == "3.000"
+        assert response.headers["content-range"] == (
+            f"bytes {offset}-{len(seek_post.content) - 1}/{len(seek_post.content)}"
+        )
+        assert response.content == seek_post.content[offset:]
+        assert response.content[:1] == b"K"
+
+    def test_seek_overrides_range(self, authenticated_client, seek_post):
+        response = authenticated_client.get(
+            f"/api/stream/{seek_post.id}", params={"t": 9.9}, headers={"Range": "bytes=0-99"}
+        )
+
+        assert response.headers["x-seek-time"] == "9.000"
+        assert response.content[:1] == b"K"
+
+    def test_index_written_and_reused(self, authenticated_client, seek_post, upload_dir):
+        video_path = str(upload_dir / seek_post.video_filename)
+        index_path = get_keyframe_index_path(seek_post.video_filename, video_path)
+
+        authenticated_client.get(f"/api/stream/{seek_post.id}", params={"t": 1})
+        assert os.path.exists(index_path)
+
+        # Later lookups come from memory
+        os.remove(index_path)
+        response = authenticated_client.head(f"/api/stream/{seek_post.id}", params={"t": 2})
+        assert response.headers["x-seek-time"] == "2.000"
+        assert not os.path.exists(index_path)
+
+    def test_stale_index_rebuilt(self, authenticated_client, seek_post, upload_dir):
+        url = f"/api/stream/{seek_post.id}"
+        authenticated_client.get(url, params={"t": 1})
+
+        data, expected = make_video(chunk_pattern=(1,))
+        (upload_dir / seek_post.video_filename).write_bytes(data)
+        os.utime(upload_dir / seek_post.video_filename, ns=(1, 1))
+        metadata_cache.clear()
+        keyframe_index_cache.clear()
+
+        response = authenticated_client.get(url, params={"t": 5})
+
+        assert response.content == data[expected[5][1]:]
+
+    def test_non_mp4_ignores_seek(self, authenticated_client, test_post):
+        response = authenticated_client.get(f"/api/stream/{test_post.id}", params={"t": 3})
+
+        assert response.status_code == 200
+        assert response.content == test_post.content
+        assert "x-seek-time" not in response.headers
+
+    @pytest.mark.parametrize("value", ["-1", "nan", "inf"])
+    def test_invalid_seek(self, authenticated_client, seek_post, value):
+        response = authenticated_client.get(f"/api/stream/{seek_post.id}", params={"t": value})
+
+        assert response.status_code == 400
+
+    def test_offload_mode_streams_seek_in_process(self, authenticated_client, seek_post, monkeypatch):
+        from app.routers import stream
+        monkeypatch.setattr(stream, "STREAM_OFFLOAD_MODE", "x-accel")
+
+        response = authenticated_client.get(f"/api/stream/{seek_post.id}", params={"t": 2})
+
+        assert "x-accel-redirect" not in response.headers
+        assert response.status_code == 206
+
+
+class TestUploadIndex:
+    """Keyframe index built after POST /api/posts"""
+
+    def test_upload_builds_index(self, authenticated_client, upload_dir):
+        data, expected = make_video()
+        response = authenticated_client.post(
+            "/api/posts",
+            data={"title": "Seekable", "is_public": "false"},
+            files={"video": ("seek.mp4", data, "video/mp4")}
+        )
+        processing_queue.run_pending()
+
+        filename = response.json()["video_filename"]
+        index_path = get_keyframe_index_path(filename, str(upload_dir / filename))
+        assert os.path.exists(index_path)
+        assert os.path.getsize(index_path) == 28 + len(expected) * 16
+
+    def test_non_mp4_upload_has_no_index(self, authenticated_client, upload_dir):
+        response = authenticated_client.post(
+            "/api/posts",
+            data={"title": "Clip", "is_public": "false"},
+            files={"video": ("clip.webm", b"webm content", "video/webm")}
+        )
+        processing_queue.run_pending()
+
+        filename = response.json()["video_filename"]
+        assert not os.path.exists(get_keyframe_index_path(filename, str(upload_dir / filename)))
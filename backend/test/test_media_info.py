@@ -0,0 +1,268 @@
+"""
+Tests for media probing and technical metadata on posts
+- read_media_info parses duration, resolution, codecs and layout from moov
+- Uploads record the metadata; the prepare job refreshes it after faststart
+- GET /api/posts filters by duration, resolution, codec and faststart
+"""
+
+import os
+import struct
+
+import pytest
+
+from app import media_utils
+from app.media_utils import media_info_values, probe_media
+from app.models import Post
+from app.mp4_utils import MediaInfo, Mp4Error, read_media_info
+from app.processing import processing_queue
+from app.routers import posts
+from app.upload_utils import TEMP_PREFIX
+
+from test.test_faststart import CORPUS, box, full_box
+from test.test_thumbnails import other_client  # noqa: F401 (fixture)
+
+
+def mvhd(timescale: int, duration: int, version: int = 0) -> bytes:
+    if version == 1:
+        return box(b"mvhd", b"\x01\x00\x00\x00" + struct.pack(">QQIQ", 0, 0, timescale, duration) + b"\x00" * 80)
+    return full_box(b"mvhd", struct.pack(">IIII", 0, 0, timescale, duration) + b"\x00" * 80)
+
+
+def trak(handler: bytes, fourcc: bytes, width: int = 0, height: int = 0) -> bytes:
+    tkhd = full_box(b"tkhd", b"\x00" * 72 + struct.pack(">II", width << 16, height << 16))
+    hdlr = full_box(b"hdlr", b"\x00" * 4 + handler + b"\x00" * 13)
+    stsd = full_box(b"stsd", struct.pack(">I", 1) + box(fourcc, b"\x00" * 28))
+    return box(b"trak", tkhd + box(b"mdia", hdlr + box(b"minf", box(b"stbl", stsd))))
+
+
+def make_file(
+    timescale: int = 1000,
+    duration: int = 10_000,
+    version: int = 0,
+    video: bytes = b"avc1",
+    audio: bytes | None = b"mp4a",
+    moov_at_end: bool = False,
+    mdat_size: int = 12_000,
+) -> bytes:
+    ftyp = box(b"ftyp", b"isom\x00\x00\x02\x00isomiso2mp41")
+    traks = trak(b"vide", video, 1280, 720) + (trak(b"soun", audio) if audio else b"")
+    moov = box(b"moov", mvhd(timescale, duration, version) + traks)
+    mdat = box(b"mdat", b"\x00" * mdat_size)
+    return ftyp + mdat + moov if moov_at_end else ftyp + moov + mdat
+
+
+class TestReadMediaInfo:
+    """mp4_utils.read_media_info tests"""
+
+    def test_parses_moov(self, tmp_path):
+        path = tmp_path / "clip.mp4"
+        path.write_bytes(make_file())
+
+        info = read_media_info(str(path))
+
+        assert info == MediaInfo(
+            duration=10.0, width=1280, height=720, video_codec="h264", audio_codec="aac",
+            bitrate=round(path.stat().st_size * 8 / 10), faststart=True,
+        )
+
+    def test_mvhd_version_1(self, tmp_path):
+        path = tmp_path / "clip.mov"
+        path.write_bytes(make_file(timescale=600, duration=6000, version=1))
+
+        assert read_media_info(str(path)).duration == 10.0
+
+    def test_moov_at_end(self, tmp_path):
+        path = tmp_path / "clip.mp4"
+        path.write_bytes(make_file(moov_at_end=True))
+
+        assert read_media_info(str(path)).faststart is False
+
+    @pytest.mark.parametrize("fourcc, codec", [
+        (b"hvc1", "hevc"), (b"av01", "av1"), (b"xyz1", "xyz1"), (b"XYZ1", "xyz1"),
+    ])
+    def test_codec_names(self, tmp_path, fourcc, codec):
+        path = tmp_path / "clip.mp4"
+        path.write_bytes(make_file(video=fourcc, audio=None))
+
+        info = read_media_info(str(path))
+
+        assert (info.video_codec, info.audio_codec) == (codec, None)
+
+    def test_unknown_duration(self, tmp_path):
+        path = tmp_path / "clip.mp4"
+        path.write_bytes(CORPUS["faststart"])
+
+        info = read_media_info(str(path))
+
+        assert (info.duration, info.bitrate, info.width, info.video_codec) == (None, None, None, None)
+        assert info.faststart is True
+
+    def test_not_mp4(self, tmp_path):
+        path = tmp_path / "clip.mp4"
+        path.write_bytes(b"not a video")
+
+        with pytest.raises(Mp4Error):
+            read_media_info(str(path))
+
+
+class TestProbeMedia:
+    """media_utils.probe_media tests"""
+
+    def test_mp4_without_ffprobe(self, tmp_path):
+        path = tmp_path / "clip.mp4"
+        path.write_bytes(make_file())
+
+        assert probe_media(str(path), use_ffprobe=False).width == 1280
+
+    def test_other_formats_need_ffprobe(self, tmp_path):
+        path = tmp_path / "clip.webm"
+        path.write_bytes(b"webm content")
+
+        assert probe_media(str(path), use_ffprobe=False) is None
+
+    @pytest.mark.skipif(not media_utils.ffmpeg_available(), reason="ffmpeg is not installed")
+    def test_other_formats_with_ffprobe(self, tmp_path):
+        path = tmp_path / "clip.mkv"
+        media_utils.run_ffmpeg([
+            "-f", "lavfi", "-i", "testsrc=duration=2:size=320x180:rate=25",
+            "-f", "lavfi", "-i", "sine=duration=2",
+            "-c:v", "libx264", "-c:a", "aac", str(path),
+        ])
+
+        info = probe_media(str(path))
+
+        assert (info.width, info.height, info.video_codec, info.audio_codec) == (320, 180, "h264", "aac")
+        assert info.duration == pytest.approx(2.0, abs=0.2)
+        assert info.bitrate > 0
+        assert info.faststart is None
+
+    def test_column_values(self):
+        assert media_info_values(None) == dict.fromkeys(
+            ("duration", "width", "height", "video_codec", "audio_codec", "bitrate", "is_faststart")
+        )
+
+
+class TestUploadMetadata:
+    """Metadata recorded on upload"""
+
+    def upload(self, client, content: bytes, filename: str = "clip.mp4"):
+        return client.post(
+            "/api/posts", data={"title": "Probed"}, files={"video": (filename, content, "video/mp4")}
+        )
+
+    def test_recorded_on_upload(self, authenticated_client, upload_dir):
+        post = self.upload(authenticated_client, make_file()).json()
+
+        assert post["duration"] == 10.0
+        assert (post["width"], post["height"]) == (1280, 720)
+        assert (post["video_codec"], post["audio_codec"]) == ("h264", "aac")
+        assert post["bitrate"] == round(post["video_size"] * 8 / 10)
+        assert post["is_faststart"] is True
+
+    def test_probed_before_publishing(self, authenticated_client, upload_dir, monkeypatch):
+        probed = []
+        def probe(path, use_ffprobe=True):
+            probed.append(path)
+            return probe_media(path, use_ffprobe)
+        monkeypatch.setattr(posts, "probe_media", probe)
+
+        post = self.upload(authenticated_client, make_file()).json()
+
+        assert [os.path.basename(path).startswith(TEMP_PREFIX) for path in probed] == [True]
+        assert post["width"] == 1280
+
+    def test_unknown_codec_filterable(self, authenticated_client, upload_dir):
+        post = self.upload(authenticated_client, make_file(video=b"XYZ1")).json()
+
+        listed = authenticated_client.get("/api/posts?video_codec=XYZ1").json()
+
+        assert [item["id"] for item in listed] == [post["id"]]
+
+    def test_refreshed_after_faststart(self, authenticated_client, upload_dir):
+        post = self.upload(authenticated_client, make_file(moov_at_end=True)).json()
+        assert post["is_faststart"] is False
+
+        processing_queue.run_pending()
+
+        post = authenticated_client.get(f"/api/posts/{post['id']}").json()
+        assert post["is_faststart"] is True
+        assert post["duration"] == 10.0
+
+    def test_unknown_format(self, authenticated_client, upload_dir):
+        post = self.upload(authenticated_client, b"webm content", filename="clip.webm").json()
+
+        assert post["duration"] is None
+        assert post["is_faststart"] is None
+
+    def test_deduplicated_upload_copies_metadata(self, authenticated_client, upload_dir, test_db):
+        first = self.upload(authenticated_client, make_file()).json()
+        test_db.query(Post).filter(Post.id == first["id"]).update({"video_codec": "from-ffprobe"})
+        test_db.commit()
+
+        second = self.upload(authenticated_client, make_file()).json()
+
+        assert second["video_codec"] == "from-ffprobe"
+
+    def test_resumable_upload(self, authenticated_client, upload_dir):
+        content = make_file()
+        upload_id = authenticated_client.post("/api/uploads", json={
+            "title": "Chunked", "filename": "clip.mp4", "size": len(content)
+        }).json()["id"]
+        authenticated_client.put(f"/api/uploads/{upload_id}/chunks/0", content=content)
+
+        post = authenticated_client.post(f"/api/uploads/{upload_id}/complete").json()
+
+        assert (post["width"], post["video_codec"]) == (1280, "h264")
+
+
+class TestListFilters:
+    """GET /api/posts media filter tests"""
+
+    @pytest.fixture
+    def posts(self, test_db, test_user):
+        rows = [
+            ("Short SD", dict(duration=30.0, width=640, height=360, video_codec="h264", audio_codec="aac",
+                              is_faststart=True)),
+            ("Long HD", dict(duration=600.0, width=1920, height=1080, video_codec="hevc", audio_codec="aac",
+                             is_faststart=False)),
+            ("Silent 4K", dict(duration=120.0, width=3840, height=2160, video_codec="vp9", is_faststart=True)),
+            ("Unprobed", {}),
+        ]
+        for title, values in rows:
+            test_db.add(Post(
+                title=title, video_filename=f"{title}.mp4", video_original_name="clip.mp4", video_size=1,
+                author_id=test_user.id, **values
+            ))
+        test_db.commit()
+
+    def titles(self, client, query: str = "") -> list[str]:
+        response = client.get(f"/api/posts?{query}")
+        assert response.status_code == 200
+        return sorted(post["title"] for post in response.json())
+
+    def test_no_filter(self, authenticated_client, posts):
+        assert len(self.titles(authenticated_client)) == 4
+
+    @pytest.mark.parametrize("query, expected", [
+        ("min_duration=60", ["Long HD", "Silent 4K"]),
+        ("max_duration=120", ["Short SD", "Silent 4K"]),
+        ("min_duration=30&max_duration=30", ["Short SD"]),
+        ("min_height=1080", ["Long HD", "Silent 4K"]),
+        ("max_width=1920&min_width=1280", ["Long HD"]),
+        ("video_codec=HEVC", ["Long HD"]),
+        ("audio_codec=aac&faststart=true", ["Short SD"]),
+        ("faststart=false", ["Long HD"]),
+    ])
+    def test_filters(self, authenticated_client, posts, query, expected):
+        assert self.titles(authenticated_client, query) == expected
+
+    def test_respects_access(self, test_db, posts, request):
+        test_db.query(Post).filter(Post.title == "Long HD").update({"is_public": True})
+        test_db.commit()
+        other_client = request.getfixturevalue("other_client")
+
+        assert self.titles(other_client, "min_duration=0") == ["Long HD"]
+
+    @pytest.mark.parametrize("query", ["min_duration=-1", "min_width=1920&max_width=640"])
+    def test_invalid(self, authenticated_client, query):
+        assert authenticated_client.get(f"/api/posts?{query}").status_code == 400
@@ -0,0 +1,139 @@
+"""
+Tests for the stream metadata cache
+- TTL expiry and LRU eviction
+- Stat elimination on repeat range requests
+- Invalidation on post update/delete
+"""
+
+import os
+
+import pytest
+
+from app.metadata_cache import MetadataCache, StreamMetadata, metadata_cache
+
+
+def make_metadata(filename="a.mp4"):
+    return StreamMetadata(
+        video_filename=filename,
+        path=f"/videos/{filename}",
+        size=100,
+        mtime=1.0,
+        mtime_ns=1_000_000_000,
+        content_type="video/mp4",
+        etag='"64-3b9aca00"',
+        is_public=False,
+    )
+
+
+class TestMetadataCache:
+    """MetadataCache unit tests"""
+
+    def test_put_and_get(self):
+        cache = MetadataCache(max_entries=10, ttl=60)
+        cache.put(1, make_metadata())
+
+        assert cache.get(1) == make_metadata()
+        assert cache.stats()["hits"] == 1
+
+    def test_missing_entry_counts_miss(self):
+        cache = MetadataCache(max_entries=10, ttl=60)
+
+        assert cache.get(1) is None
+        assert cache.stats()["misses"] == 1
+
+    def test_entry_expires_after_ttl(self, monkeypatch):
+        cache = MetadataCache(max_entries=10, ttl=5)
+        now = [1000.0]
+        monkeypatch.setattr("app.metadata_cache.time.monotonic", lambda: now[0])
+        cache.put(1, make_metadata())
+
+        now[0] += 6
+
+        assert cache.get(1) is None
+        assert cache.stats()["entries"] == 0
+
+    def test_lru_eviction(self):
+        cache = MetadataCache(max_entries=2, ttl=60)
+        cache.put(1, make_metadata("1.mp4"))
+        cache.put(2, make_metadata("2.mp4"))
+        cache.get(1)
+        cache.put(3, make_metadata("3.mp4"))
+
+        assert cache.get(2) is None
+        assert cache.get(1) is not None
+        assert cache.get(3) is not None
+
+    def test_invalidate(self):
+        cache = MetadataCache(max_entries=10, ttl=60)
+        cache.put(1, make_metadata())
+        cache.invalidate(1)
+
+        assert cache.get(1) is None
+
+    def test_disabled_cache_stores_nothing(self):
+        cache = MetadataCache(max_entries=10, ttl=0)
+        cache.put(1, make_metadata())
+
+        assert cache.get(1) is None
+
+
+class TestMetadataCacheStreaming:
+    """Stream path integration tests"""
+
+    def count_stats(self, monkeypatch):
+        calls = []
+        original_stat = os.stat
+
+        def counting_stat(path, *args, **kwargs):
+            if str(path).endswith(".mp4"):
+                calls.append(path)
+            return original_stat(path, *args, **kwargs)
+
+        monkeypatch.setattr(os, "stat", counting_stat)
+        return calls
+
+    def test_repeat_range_requests_stat_once(self, authenticated_client, test_post, monkeypatch):
+        """Test only the first range request stats the video file"""
+        calls = self.count_stats(monkeypatch)
+
+        for start in range(0, 5000, 1000):
+            response = authenticated_client.get(
+                f"/api/stream/{test_post.id}",
+                headers={"Range": f"bytes={start}-{start + 999}"}
+            )
+            assert response.status_code == 206
+
+        assert len(calls) == 1
+        assert metadata_cache.stats()["hits"] == 4
+
+    def test_update_post_invalidates(self, authenticated_client, test_post):
+        """Test updating a post drops its cached metadata"""
+        authenticated_client.get(f"/api/stream/{test_post.id}")
+        assert metadata_cache.stats()["entries"] == 1
+
+        response = authenticated_client.put(
+            f"/api/posts/{test_post.id}",
+            json={"is_public": True}
+        )
+
+        assert response.status_code == 200
+        assert metadata_cache.stats()["entries"] == 0
+
+    def test_delete_post_invalidates(self, authenticated_client, test_post):
+        """Test deleting a post drops its cached metadata"""
+        authenticated_client.get(f"/api/stream/{test_post.id}")
+
+        authenticated_client.delete(f"/api/posts/{test_post.id}")
+
+        assert metadata_cache.stats()["entries"] == 0
+        response = authenticated_client.get(f"/api/stream/{test_post.id}")
+        assert response.status_code == 404
+
+    def test_missing_file_is_not_cached(self, authenticated_client, test_post, upload_dir):
+        """Test 404 for a missing file does not poison the cache"""
+        (upload_dir / test_post.video_filename).unlink()
+
+        response = authenticated_client.get(f"/api/stream/{test_post.id}")
+
+        assert response.status_code == 404
+        assert metadata_cache.stats()["entries"] == 0
@@ -0,0 +1,327 @@
+"""
+Tests for the background post-processing job queue
+- Uploads record processing jobs with the post and respond without running them
+- Jobs run by priority, retry with exponential backoff and fail after max_attempts
+- Running jobs hold a lease; jobs left behind by a crashed worker are reclaimed
+- GET /api/posts/{id}/processing reports progress
+- GET /api/admin/processing reports queue state
+"""
+
+import hashlib
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app import processing
+from app.models import ProcessingJob
+from app.processing import JOB_PRIORITIES, processing_queue
+from app.routers import posts
+from app.video_store import blob_filename
+
+from test.test_thumbnails import other_client  # noqa: F401 (fixture)
+
+
+def add_jobs(db, post, *kinds):
+    post.processing_jobs = [processing_queue.new_job(kind) for kind in kinds]
+    db.commit()
+
+
+def job_states(db):
+    db.expire_all()
+    return {job.kind: (job.status, job.attempts) for job in db.query(ProcessingJob).all()}
+
+
+@pytest.fixture
+def handled(monkeypatch):
+    """Replace every job handler with one that records (kind, post_id)"""
+    calls = []
+    for kind in JOB_PRIORITIES:
+        monkeypatch.setitem(
+            processing.JOB_HANDLERS, kind, lambda db, post, kind=kind: calls.append((kind, post.id))
+        )
+    return calls
+
+
+@pytest.fixture
+def failing(monkeypatch):
+    def fail(db, post):
+        raise RuntimeError("ffmpeg exited with 1")
+    monkeypatch.setitem(processing.JOB_HANDLERS, "thumbnails", fail)
+
+
+class TestScheduling:
+    """Jobs recorded on upload"""
+
+    def test_upload_records_jobs(self, authenticated_client, upload_dir, test_db, handled, monkeypatch):
+        monkeypatch.setattr(posts, "THUMBNAILS_ENABLED", True)
+        monkeypatch.setattr(posts, "SPRITES_ENABLED", False)
+        monkeypatch.setattr(posts, "HLS_ENABLED", False)
+        monkeypatch.setattr(posts, "RENDITIONS_ENABLED", True)
+
+        response = authenticated_client.post(
+            "/api/posts", data={"title": "Queued"}, files={"video": ("clip.mp4", b"video bytes", "video/mp4")}
+        )
+
+        assert response.status_code == 201
+        assert handled == []
+        assert job_states(test_db) == {
+            "prepare": ("pending", 0), "thumbnails": ("pending", 0), "renditions": ("pending", 0),
+        }
+
+    def test_deduplicated_upload_skips_file_jobs(self, authenticated_client, upload_dir, test_db, monkeypatch):
+        monkeypatch.setattr(posts, "RENDITIONS_ENABLED", True)
+        for _ in range(2):
+            second = authenticated_client.post(
+                "/api/posts", data={"title": "Same"}, files={"video": ("clip.mp4", b"same bytes", "video/mp4")}
+            ).json()
+
+        kinds = [kind for (kind,) in test_db.query(ProcessingJob.kind).filter(ProcessingJob.post_id == second["id"])]
+        assert kinds == ["renditions"]
+
+
+    def test_orphaned_file_is_processed(self, authenticated_client, upload_dir, test_db):
+        # File left on disk without a post (an earlier upload stopped before commit)
+        content = b"orphaned bytes"
+        (upload_dir / blob_filename(hashlib.sha256(content).hexdigest(), "clip.mp4")).write_bytes(content)
+
+        post = authenticated_client.post(
+            "/api/posts", data={"title": "Orphan"}, files={"video": ("clip.mp4", content, "video/mp4")}
+        ).json()
+
+        kinds = [kind for (kind,) in test_db.query(ProcessingJob.kind).filter(ProcessingJob.post_id == post["id"])]
+        assert "prepare" in kinds
+
+class TestRunJobs:
+    """ProcessingQueue.run_pending tests"""
+
+    def test_priority_order(self, test_db, test_post, handled):
+        add_jobs(test_db, test_post, "renditions", "hls", "thumbnails", "prepare", "sprite")
+
+        assert processing_queue.run_pending() == 5
+
+        assert [kind for kind, _ in handled] == ["prepare", "thumbnails", "sprite", "hls", "renditions"]
+        assert set(job_states(test_db).values()) == {("succeeded", 1)}
+        assert processing_queue.stats()["succeeded_total"] == 5
+
+    def test_retry_with_backoff(self, test_db, test_post, failing, monkeypatch):
+        monkeypatch.setattr(processing_queue, "retry_delay", 10)
+        add_jobs(test_db, test_post, "thumbnails")
+
+        before = datetime.now(timezone.utc)
+        processing_queue.run_pending()
+        # Not due yet
+        assert processing_queue.run_pending() == 0
+
+        job = test_db.query(ProcessingJob).one()
+        assert (job.status, job.attempts, job.last_error) == ("pending", 1, "ffmpeg exited with 1")
+        run_at = job.run_at.replace(tzinfo=timezone.utc)
+        assert before + timedelta(seconds=10) <= run_at <= datetime.now(timezone.utc) + timedelta(seconds=10)
+
+        processing_queue.run_pending(now=run_at)
+        test_db.refresh(job)
+        assert (job.status, job.attempts) == ("pending", 2)
+        # Backoff doubles
+        assert job.run_at.replace(tzinfo=timezone.utc) >= run_at + timedelta(seconds=20)
+
+    def test_retry_delay_counts_from_completion(self, test_db, test_post, monkeypatch):
+        monkeypatch.setattr(processing_queue, "retry_delay", 10)
+        ended = []
+        def slow_failure(db, post):
+            time.sleep(0.3)
+            ended.append(datetime.now(timezone.utc))
+            raise RuntimeError("ffmpeg exited with 1")
+        monkeypatch.setitem(processing.JOB_HANDLERS, "thumbnails", slow_failure)
+        add_jobs(test_db, test_post, "thumbnails")
+
+        processing_queue.run_pending()
+
+        job = test_db.query(ProcessingJob).one()
+        assert job.run_at.replace(tzinfo=timezone.utc) >= ended[0] + timedelta(seconds=10)
+
+    def test_finished_at_is_completion_time(self, test_db, test_post, monkeypatch):
+        ended = []
+        def slow(db, post):
+            time.sleep(0.3)
+            ended.append(datetime.now(timezone.utc))
+        monkeypatch.setitem(processing.JOB_HANDLERS, "thumbnails", slow)
+        add_jobs(test_db, test_post, "thumbnails")
+
+        processing_queue.run_pending()
+
+        job = test_db.query(ProcessingJob).one()
+        assert job.finished_at.replace(tzinfo=timezone.utc) >= ended[0]
+        assert job.started_at < job.finished_at
+
+    def test_fails_after_max_attempts(self, test_db, test_post, failing):
+        add_jobs(test_db, test_post, "thumbnails", "prepare")
+        now = datetime.now(timezone.utc)
+
+        for day in range(processing_queue.max_attempts):
+            processing_queue.run_pending(now=now + timedelta(days=day))
+
+        assert job_states(test_db) == {
+            "prepare": ("succeeded", 1), "thumbnails": ("failed", processing_queue.max_attempts),
+        }
+        assert processing_queue.run_pending(now=now + timedelta(days=30)) == 0
+        stats = processing_queue.stats()
+        assert (stats["retried_total"], stats["failed_total"]) == (processing_queue.max_attempts - 1, 1)
+
+    def test_expired_lease_reclaimed(self, test_db, test_post, handled):
+        add_jobs(test_db, test_post, "thumbnails")
+        # A worker claimed the job and crashed
+        assert processing_queue.claim(test_db) is not None
+        assert processing_queue.run_pending() == 0
+
+        expired = datetime.now(timezone.utc) + timedelta(seconds=processing_queue.lease_seconds + 1)
+        assert processing_queue.run_pending(now=expired) == 1
+
+        assert job_states(test_db) == {"thumbnails": ("succeeded", 2)}
+
+    def test_lease_renewed_while_running(self, test_db, test_post, monkeypatch):
+        monkeypatch.setattr(processing_queue, "lease_seconds", 0.3)
+        reclaimed = []
+        def slow(db, post):
+            time.sleep(1)
+            # Past the original lease, but the running worker kept renewing it
+            reclaimed.append(processing_queue.claim(db))
+        monkeypatch.setitem(processing.JOB_HANDLERS, "thumbnails", slow)
+        add_jobs(test_db, test_post, "thumbnails")
+
+        assert processing_queue.run_pending() == 1
+
+        assert reclaimed == [None]
+        assert job_states(test_db) == {"thumbnails": ("succeeded", 1)}
+
+    def test_expired_lease_without_attempts_left_fails(self, test_db, test_post, monkeypatch):
+        monkeypatch.setattr(processing_queue, "max_attempts", 1)
+        add_jobs(test_db, test_post, "thumbnails")
+        processing_queue.claim(test_db)
+
+        expired = datetime.now(timezone.utc) + timedelta(seconds=processing_queue.lease_seconds + 1)
+        assert processing_queue.run_pending(now=expired) == 0
+
+        job = test_db.query(ProcessingJob).one()
+        assert (job.status, job.last_error) == ("failed", "Lease expired")
+
+    def test_claimed_once(self, test_db, test_post):
+        add_jobs(test_db, test_post, "thumbnails")
+
+        assert processing_queue.claim(test_db) is not None
+        assert processing_queue.claim(test_db) is None
+
+    def test_post_deleted_while_running(self, test_db, test_post, monkeypatch):
+        def delete_post(db, post):
+            db.delete(post)
+            db.commit()
+        monkeypatch.setitem(processing.JOB_HANDLERS, "thumbnails", delete_post)
+        add_jobs(test_db, test_post, "thumbnails", "sprite")
+
+        assert processing_queue.run_pending() == 1
+
+        assert test_db.query(ProcessingJob).count() == 0
+
+    def test_worker_thread(self, test_db, test_post, monkeypatch):
+        done = threading.Event()
+        monkeypatch.setitem(processing.JOB_HANDLERS, "thumbnails", lambda db, post: done.set())
+        monkeypatch.setattr(processing_queue, "workers", 1)
+        add_jobs(test_db, test_post, "thumbnails")
+
+        processing_queue.start()
+        try:
+            processing_queue.wake()
+            assert done.wait(5)
+        finally:
+            processing_queue.stop()
+
+        assert job_states(test_db) == {"thumbnails": ("succeeded", 1)}
+
+
+class TestProcessingStatus:
+    """GET /api/posts/{id}/processing tests"""
+
+    def test_pending(self, authenticated_client, test_db, test_post):
+        add_jobs(test_db, test_post, "thumbnails", "prepare")
+
+        body = authenticated_client.get(f"/api/posts/{test_post.id}/processing").json()
+
+        assert body["post_id"] == test_post.id
+        assert body["status"] == "pending"
+        assert [job["kind"] for job in body["jobs"]] == ["prepare", "thumbnails"]
+        assert body["jobs"][0]["max_attempts"] == processing_queue.max_attempts
+
+    def test_processing_then_completed(self, authenticated_client, test_db, test_post, handled):
+        add_jobs(test_db, test_post, "thumbnails", "prepare")
+        processing_queue.run_next()
+
+        assert authenticated_client.get(f"/api/posts/{test_post.id}/processing").json()["status"] == "processing"
+
+        processing_queue.run_pending()
+        body = authenticated_client.get(f"/api/posts/{test_post.id}/processing").json()
+        assert body["status"] == "completed"
+        assert all(job["finished_at"] for job in body["jobs"])
+
+    def test_retry_reported(self, authenticated_client, test_db, test_post, failing):
+        add_jobs(test_db, test_post, "thumbnails")
+        processing_queue.run_pending()
+
+        [job] = authenticated_client.get(f"/api/posts/{test_post.id}/processing").json()["jobs"]
+
+        assert job["status"] == "pending"
+        assert job["attempts"] == 1
+        assert job["next_attempt_at"] is not None
+        assert job["last_error"] == "ffmpeg exited with 1"
+
+    def test_failed(self, authenticated_client, test_db, test_post, failing, monkeypatch):
+        monkeypatch.setattr(processing_queue, "max_attempts", 1)
+        add_jobs(test_db, test_post, "thumbnails")
+        processing_queue.run_pending()
+
+        body = authenticated_client.get(f"/api/posts/{test_post.id}/processing").json()
+
+        assert body["status"] == "failed"
+        assert body["jobs"][0]["next_attempt_at"] is None
+
+    def test_no_jobs(self, authenticated_client, test_post):
+        body = authenticated_client.get(f"/api/posts/{test_post.id}/processing").json()
+
+        assert body == {"post_id": test_post.id, "status": "completed", "jobs": []}
+
+    def test_error_hidden_from_other_users(self, test_db, test_post, failing, request):
+        test_post.is_public = True
+        add_jobs(test_db, test_post, "thumbnails")
+        processing_queue.run_pending()
+        other_client = request.getfixturevalue("other_client")
+
+        [job] = other_client.get(f"/api/posts/{test_post.id}/processing").json()["jobs"]
+
+        assert job["attempts"] == 1
+        assert job["last_error"] is None
+
+    def test_private_post(self, test_post, request):
+        other_client = request.getfixturevalue("other_client")
+
+        assert other_client.get(f"/api/posts/{test_post.id}/processing").status_code == 403
+
+    def test_not_found(self, authenticated_client):
+        assert authenticated_client.get("/api/posts/9999/processing").status_code == 404
+
+
+class TestAdminProcessing:
+    """GET /api/admin/processing tests"""
+
+    def test_counts(self, admin_client, test_db, test_post, failing, monkeypatch):
+        monkeypatch.setattr(processing_queue, "max_attempts", 1)
+        add_jobs(test_db, test_post, "thumbnails", "sprite")
+        processing_queue.run_next()
+
+        body = admin_client.get("/api/admin/processing").json()
+
+        assert body["jobs"] == {"pending": 1, "running": 0, "succeeded": 0, "failed": 1}
+        assert body["failed"][0]["kind"] == "thumbnails"
+        assert body["failed"][0]["last_error"] == "ffmpeg exited with 1"
+        assert body["queue"]["failed_total"] == 1
+
+    def test_requires_admin(self, authenticated_client):
+        assert authenticated_client.get("/api/admin/processing").status_code == 403
@@ -0,0 +1,238 @@
+"""
+Tests for watch progress (resume position)
+- Coalescing buffer: latest position per (user, post), bulk upserts
+- PUT/GET /api/posts/{post_id}/progress
+- GET /api/posts?include_progress=true
+- Cleanup on post deletion and flush on shutdown
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app.main import app
+from app.models import Post, WatchProgress
+from app.progress import ProgressBuffer, ProgressEntry, progress_buffer
+
+from test.conftest import TestSessionLocal, test_engine
+from test.test_thumbnails import other_client  # noqa: F401 (fixture)
+
+
+def buffer(**kwargs) -> ProgressBuffer:
+    options = {"flush_interval": 60.0, "flush_threshold": 1000, "session_factory": TestSessionLocal}
+    options.update(kwargs)
+    return ProgressBuffer(**options)
+
+
+def stored(db) -> list[tuple]:
+    db.expire_all()
+    return [
+        (row.user_id, row.post_id, row.position, row.duration)
+        for row in db.query(WatchProgress).order_by(WatchProgress.user_id, WatchProgress.post_id)
+    ]
+
+
+class TestProgressBuffer:
+    """ProgressBuffer tests"""
+
+    def test_keeps_latest_position(self, test_db):
+        progress = buffer()
+
+        for position in (5.0, 10.0, 15.0):
+            progress.record(1, 10, position, 100.0)
+        progress.record(1, 20, 3.0)
+
+        assert progress.get(1, 10).position == 15.0
+        assert progress.stats()["pending_rows"] == 2
+        assert progress.flush() == 2
+        assert stored(test_db) == [(1, 10, 15.0, 100.0), (1, 20, 3.0, None)]
+
+    def test_flush_updates_existing_row(self, test_db):
+        progress = buffer()
+
+        progress.record(1, 10, 5.0)
+        progress.flush()
+        progress.record(1, 10, 42.0)
+        progress.flush()
+
+        assert stored(test_db) == [(1, 10, 42.0, None)]
+        assert progress.get(1, 10) is None
+
+    def test_older_report_does_not_overwrite(self, test_db):
+        progress = buffer()
+        progress.record(1, 10, 42.0)
+        progress.flush()
+
+        # A report from another worker that arrived earlier but flushed later
+        stale = datetime.now(timezone.utc) - timedelta(minutes=1)
+        progress._pending[(1, 10)] = ProgressEntry(5.0, None, stale)
+        progress.flush()
+
+        assert stored(test_db) == [(1, 10, 42.0, None)]
+
+    def test_failed_flush_keeps_newer_report(self, test_db):
+        progress = buffer()
+        progress.record(1, 10, 5.0)
+        with progress._lock:
+            batch, progress._pending = progress._pending, {}
+        progress.record(1, 10, 9.0)
+
+        with progress._lock:
+            progress._merge(batch)
+
+        assert progress.get(1, 10).position == 9.0
+
+    def test_discard(self, test_db):
+        progress = buffer()
+        progress.record(1, 10, 5.0)
+        progress.record(1, 20, 5.0)
+        progress.record(2, 10, 5.0)
+
+        progress.discard(post_id=10)
+        assert progress.get_user(1) == {20: progress.get(1, 20)}
+
+        progress.discard(user_id=1)
+        assert progress.stats()["pending_rows"] == 0
+
+
+class TestProgressEndpoints:
+    """PUT/GET /api/posts/{post_id}/progress tests"""
+
+    def test_put_then_get(self, authenticated_client, test_post):
+        url = f"/api/posts/{test_post.id}/progress"
+
+        response = authenticated_client.put(url, json={"position": 93.5, "duration": 600})
+
+        assert response.status_code == 200
+        assert response.json()["position"] == 93.5
+        body = authenticated_client.get(url).json()
+        assert body["post_id"] == test_post.id
+        assert body["position"] == 93.5
+        assert body["duration"] == 600
+        assert body["updated_at"] is not None
+
+    def test_reports_are_not_written_per_request(self, authenticated_client, test_post, test_db):
+        url = f"/api/posts/{test_post.id}/progress"
+
+        for position in range(0, 60, 5):
+            authenticated_client.put(url, json={"position": position})
+
+        assert stored(test_db) == []
+        assert progress_buffer.flush() == 1
+        assert stored(test_db) == [(test_post.author_id, test_post.id, 55.0, None)]
+        assert authenticated_client.get(url).json()["position"] == 55.0
+
+    def test_get_without_progress(self, authenticated_client, test_post):
+        body = authenticated_client.get(f"/api/posts/{test_post.id}/progress").json()
+
+        assert body == {"post_id": test_post.id, "position": 0.0, "duration": None, "updated_at": None}
+
+    def test_position_clamped_to_duration(self, authenticated_client, test_post):
+        response = authenticated_client.put(
+            f"/api/posts/{test_post.id}/progress", json={"position": 700, "duration": 600}
+        )
+
+        assert response.json()["position"] == 600
+
+    @pytest.mark.parametrize("body", [
+        {"position": -1}, {"position": "nan"}, {"position": 5, "duration": 0}, {},
+    ])
+    def test_invalid_body(self, authenticated_client, test_post, body):
+        response = authenticated_client.put(f"/api/posts/{test_post.id}/progress", json=body)
+
+        assert response.status_code == 422
+
+    def test_private_post_forbidden(self, other_client, test_post):
+        response = other_client.put(f"/api/posts/{test_post.id}/progress", json={"position": 1})
+
+        assert response.status_code == 403
+        assert progress_buffer.stats()["pending_rows"] == 0
+
+    def test_requires_login(self, client, test_post):
+        response = client.get(f"/api/posts/{test_post.id}/progress")
+
+        assert response.status_code == 401
+
+    def test_delete_post_removes_progress(self, authenticated_client, test_post, test_db):
+        url = f"/api/posts/{test_post.id}/progress"
+        authenticated_client.put(url, json={"position": 10})
+        progress_buffer.flush()
+        authenticated_client.put(url, json={"position": 20})
+
+        authenticated_client.delete(f"/api/posts/{test_post.id}")
+
+        assert stored(test_db) == []
+        assert progress_buffer.stats()["pending_rows"] == 0
+
+
+class TestPostListProgress:
+    """GET /api/posts?include_progress=true"""
+
+    @pytest.fixture
+    def second_post(self, test_db, test_post):
+        post = Post(
+            title="Second",
+            video_filename="second.mp4",
+            video_original_name="second.mp4",
+            video_size=1,
+            author_id=test_post.author_id,
+        )
+        test_db.add(post)
+        test_db.commit()
+        test_db.refresh(post)
+        return post
+
+    def test_include_progress(self, authenticated_client, test_post, second_post):
+        authenticated_client.put(f"/api/posts/{test_post.id}/progress", json={"position": 10})
+        progress_buffer.flush()
+        authenticated_client.put(f"/api/posts/{test_post.id}/progress", json={"position": 12})
+
+        posts = authenticated_client.get("/api/posts", params={"include_progress": True}).json()
+
+        by_id = {post["id"]: post for post in posts}
+        assert by_id[test_post.id]["progress"]["position"] == 12
+        assert by_id[second_post.id]["progress"] is None
+
+    def test_progress_omitted_by_default(self, authenticated_client, test_post):
+        authenticated_client.put(f"/api/posts/{test_post.id}/progress", json={"position": 10})
+
+        posts = authenticated_client.get("/api/posts").json()
+
+        assert posts[0]["progress"] is None
+
+    def test_progress_is_per_user(self, admin_client, test_post):
+        admin_client.put(f"/api/posts/{test_post.id}/progress", json={"position": 30})
+        progress_buffer.flush()
+        progress_buffer.record(test_post.author_id, test_post.id, 5.0)
+
+        posts = admin_client.get("/api/posts", params={"include_progress": True}).json()
+
+        assert posts[0]["progress"]["position"] == 30
+
+    def test_one_query_for_the_list(self, authenticated_client, test_post, second_post, test_db):
+        statements = []
+
+        def count(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(test_engine, "before_cursor_execute", count)
+        try:
+            authenticated_client.get("/api/posts", params={"include_progress": True})
+        finally:
+            event.remove(test_engine, "before_cursor_execute", count)
+
+        assert sum("FROM watch_progress" in statement for statement in statements) == 1
+
+
+class TestShutdown:
+    """Pending progress is written when the app shuts down"""
+
+    def test_shutdown_flushes(self, test_db, test_post, auth_token):
+        with TestClient(app) as c:
+            c.cookies.set("access_token", auth_token)
+            c.put(f"/api/posts/{test_post.id}/progress", json={"position": 77})
+            assert stored(test_db) == []
+
+        assert stored(test_db) == [(test_post.author_id, test_post.id, 77.0, None)]
@@ -0,0 +1,322 @@
+"""
+Tests for adaptive bitrate renditions
+- Rendition ladder parsing
+- Rendition selection (?rendition=, ?bw=, Downlink header)
+- post_renditions bookkeeping and cleanup
+- ffmpeg transcoding (skipped when ffmpeg is not installed)
+"""
+
+import os
+
+import pytest
+
+from app import media_utils
+from app.media_utils import (
+    RenditionSpec,
+    get_rendition_path,
+    parse_rendition_ladder,
+    save_renditions,
+)
+from app.metadata_cache import metadata_cache
+from app.models import PostRendition
+from app.mp4_utils import MediaInfo
+from app.segment_cache import segment_cache
+from app.stream_tickets import create_stream_ticket
+
+
+LADDER = [
+    RenditionSpec("720p", 1280, 720, 2_800_000),
+    RenditionSpec("480p", 854, 480, 1_400_000),
+    RenditionSpec("360p", 640, 360, 800_000),
+]
+
+
+@pytest.fixture
+def rendition_post(test_db, test_post):
+    """Test post with three renditions on disk and in post_renditions"""
+    test_post.rendition_content = {}
+    results = []
+    for index, spec in enumerate(LADDER):
+        content = bytes([index + 1]) * (1000 * (index + 1))
+        path = get_rendition_path(test_post.video_filename, f"{spec.name}.mp4")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(content)
+        test_post.rendition_content[spec.name] = content
+        results.append((spec, f"{spec.name}.mp4", len(content)))
+    save_renditions(test_db, test_post.id, results)
+    return test_post
+
+
+class TestRenditionLadder:
+    """parse_rendition_ladder tests"""
+
+    def test_parse(self):
+        ladder = parse_rendition_ladder("360p:640x360:800k, 1080p:1920x1080:5M,720p:1280x720:2800000")
+
+        assert ladder == [
+            RenditionSpec("1080p", 1920, 1080, 5_000_000),
+            RenditionSpec("720p", 1280, 720, 2_800_000),
+            RenditionSpec("360p", 640, 360, 800_000),
+        ]
+
+    @pytest.mark.parametrize("value", ["720p", "720p:1280:2800k", "720p:1280x720:fast"])
+    def test_parse_invalid(self, value):
+        with pytest.raises(ValueError):
+            parse_rendition_ladder(value)
+
+
+class TestRenditionSelection:
+    """Rendition selection on /api/stream/{post_id}"""
+
+    def test_default_is_original(self, authenticated_client, rendition_post):
+        response = authenticated_client.get(f"/api/stream/{rendition_post.id}")
+
+        assert response.status_code == 200
+        assert response.content == rendition_post.content
+        assert "x-rendition" not in response.headers
+
+    def test_by_name(self, authenticated_client, rendition_post):
+        response = authenticated_client.get(
+            f"/api/stream/{rendition_post.id}", params={"rendition": "480p"}
+        )
+
+        assert response.status_code == 200
+        assert response.content == rendition_post.rendition_content["480p"]
+        assert response.headers["x-rendition"] == "480p"
+        assert response.headers["content-type"] == "video/mp4"
+
+    def test_explicit_original(self, authenticated_client, rendition_post):
+        response = authenticated_client.get(
+            f"/api/stream/{rendition_post.id}", params={"rendition": "original"}
+        )
+
+        assert response.content == rendition_post.content
+
+    def test_unknown_rendition(self, authenticated_client, rendition_post):
+        response = authenticated_client.get(
+            f"/api/stream/{rendition_post.id}", params={"rendition": "4k"}
+        )
+
+        assert response.status_code == 404
+
+    @pytest.mark.parametrize("bw, expected", [
+        (10_000_000, "720p"),
+        (2_000_000, "480p"),
+        (1_100_000, "360p"),
+        (100_000, "360p"),
+    ])
+    def test_by_bandwidth(self, authenticated_client, rendition_post, bw, expected):
+        response = authenticated_client.get(f"/api/stream/{rendition_post.id}", params={"bw": bw})
+
+        assert response.headers["x-rendition"] == expected
+        assert response.content == rendition_post.rendition_content[expected]
+
+    def test_downlink_hint(self, authenticated_client, rendition_post):
+        response = authenticated_client.get(
+            f"/api/stream/{rendition_post.id}", headers={"Downlink": "1.9"}
+        )
+
+        assert response.headers["x-rendition"] == "480p"
+        assert response.headers["vary"] == "Downlink"
+
+    def test_explicit_rendition_wins_over_downlink(self, authenticated_client, rendition_post):
+        response = authenticated_client.get(
+            f"/api/stream/{rendition_post.id}",
+            params={"rendition": "720p"},
+            headers={"Downlink": "0.5"}
+        )
+
+        assert response.headers["x-rendition"] == "720p"
+
+    def test_bandwidth_without_renditions(self, authenticated_client, test_post):
+        response = authenticated_client.get(f"/api/stream/{test_post.id}", params={"bw": 500_000})
+
+        assert response.content == test_post.content
+
+    def test_range_on_rendition(self, authenticated_client, rendition_post):
+        response = authenticated_client.get(
+            f"/api/stream/{rendition_post.id}",
+            params={"rendition": "720p"},
+            headers={"Range": "bytes=0-99"}
+        )
+
+        assert response.status_code == 206
+        assert response.headers["content-range"] == "bytes 0-99/1000"
+
+    def test_rendition_has_own_etag(self, authenticated_client, rendition_post):
+        url = f"/api/stream/{rendition_post.id}"
+        original = authenticated_client.head(url).headers["etag"]
+        rendition = authenticated_client.head(url, params={"rendition": "480p"}).headers["etag"]
+
+        assert original != rendition
+
+    def test_rendition_with_ticket(self, client, rendition_post, test_user):
+        ticket, _ = create_stream_ticket(test_user.id, rendition_post.id)
+
+        response = client.get(
+            f"/api/stream/{rendition_post.id}",
+            params={"ticket": ticket, "rendition": "360p"}
+        )
+
+        assert response.status_code == 200
+        assert response.content == rendition_post.rendition_content["360p"]
+
+    def test_rendition_from_ticket_claim(self, authenticated_client, rendition_post):
+        ticket = authenticated_client.post(f"/api/stream/{rendition_post.id}/ticket").json()["ticket"]
+        authenticated_client.cookies.clear()
+        metadata_cache.clear()
+
+        response = authenticated_client.get(
+            f"/api/stream/{rendition_post.id}",
+            params={"ticket": ticket, "rendition": "360p"}
+        )
+
+        assert response.status_code == 200
+        assert response.content == rendition_post.rendition_content["360p"]
+
+    def test_missing_rendition_file_skipped(self, authenticated_client, rendition_post):
+        os.remove(get_rendition_path(rendition_post.video_filename, "720p.mp4"))
+
+        response = authenticated_client.get(
+            f"/api/stream/{rendition_post.id}", params={"rendition": "720p"}
+        )
+
+        assert response.status_code == 404
+
+    def test_offload_mode_streams_rendition_in_process(self, authenticated_client, rendition_post, monkeypatch):
+        from app.routers import stream
+        monkeypatch.setattr(stream, "STREAM_OFFLOAD_MODE", "x-accel")
+
+        response = authenticated_client.get(
+            f"/api/stream/{rendition_post.id}", params={"rendition": "480p"}
+        )
+
+        assert "x-accel-redirect" not in response.headers
+        assert response.content == rendition_post.rendition_content["480p"]
+
+
+class TestRenditionRecords:
+    """post_renditions bookkeeping tests"""
+
+    def test_post_detail_lists_renditions(self, authenticated_client, rendition_post):
+        response = authenticated_client.get(f"/api/posts/{rendition_post.id}")
+
+        assert [r["name"] for r in response.json()["renditions"]] == ["360p", "480p", "720p"]
+        assert response.json()["renditions"][0] == {
+            "name": "360p", "width": 640, "height": 360, "bitrate": 800_000, "size": 3000
+        }
+
+    def test_save_replaces_rows_and_invalidates_metadata(self, authenticated_client, test_db, rendition_post):
+        authenticated_client.head(f"/api/stream/{rendition_post.id}")
+        assert metadata_cache.get(rendition_post.id) is not None
+
+        save_renditions(test_db, rendition_post.id, [(LADDER[2], "360p.mp4", 3000)])
+
+        assert test_db.query(PostRendition).filter(PostRendition.post_id == rendition_post.id).count() == 1
+        assert metadata_cache.get(rendition_post.id) is None
+
+    def test_save_for_deleted_post(self, test_db):
+        assert save_renditions(test_db, 9999, [(LADDER[0], "720p.mp4", 1)]) is False
+
+    def test_delete_post_removes_renditions(self, authenticated_client, test_db, rendition_post):
+        rendition_dir = os.path.dirname(get_rendition_path(rendition_post.video_filename, "720p.mp4"))
+
+        response = authenticated_client.delete(f"/api/posts/{rendition_post.id}")
+
+        assert response.status_code == 200
+        assert not os.path.exists(rendition_dir)
+        assert test_db.query(PostRendition).count() == 0
+
+    def test_delete_post_drops_cached_rendition_segments(self, authenticated_client, rendition_post):
+        authenticated_client.get(f"/api/stream/{rendition_post.id}")
+        authenticated_client.get(f"/api/stream/{rendition_post.id}", params={"rendition": "480p"})
+        assert segment_cache.stats()["entries"] == 2
+
+        authenticated_client.delete(f"/api/posts/{rendition_post.id}")
+
+        assert segment_cache.stats()["entries"] == 0
+
+
+class TestTranscodeRenditions:
+    """transcode_renditions_for_post ladder filtering and recorded sizes (ffmpeg replaced)"""
+
+    @pytest.fixture
+    def transcoded(self, monkeypatch):
+        """Source probe, transcoder and output probe stubs; returns the specs passed to the transcoder"""
+        specs = []
+
+        def transcode(video_path, output_path, spec):
+            specs.append(spec)
+            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+            with open(output_path, "wb") as f:
+                f.write(b"rendition")
+            return 9
+
+        def probe_output(path, use_ffprobe=True):
+            # What scale=...:force_original_aspect_ratio=decrease produces for a 9:16 source
+            spec = next(spec for spec in specs if path.endswith(f"{spec.name}.mp4"))
+            return MediaInfo(1.0, spec.height * 9 // 16 // 2 * 2, spec.height, "h264", "aac", 1, True)
+
+        monkeypatch.setattr(media_utils, "ffmpeg_available", lambda: True)
+        monkeypatch.setattr(media_utils, "RENDITION_LADDER", "1080p:1920x1080:5M,720p:1280x720:2800k,360p:640x360:800k")
+        monkeypatch.setattr(media_utils, "transcode_rendition", transcode)
+        monkeypatch.setattr(media_utils, "probe_media", probe_output)
+        return specs
+
+    def test_portrait_source(self, test_db, test_post, transcoded, monkeypatch):
+        monkeypatch.setattr(media_utils, "probe_video", lambda path: media_utils.VideoProbe(720, 1280, 10.0))
+
+        media_utils.transcode_renditions_for_post(test_db, test_post.id, test_post.video_filename)
+
+        # Short side 720: 1080p skipped, boxes turned upright
+        assert [(spec.name, spec.width, spec.height) for spec in transcoded] == [
+            ("720p", 720, 1280), ("360p", 360, 640),
+        ]
+        rows = test_db.query(PostRendition.name, PostRendition.width, PostRendition.height).order_by(
+            PostRendition.name
+        ).all()
+        assert rows == [("360p", 360, 640), ("720p", 720, 1280)]
+
+    def test_landscape_source_filtered_on_short_side(self, test_db, test_post, transcoded, monkeypatch):
+        monkeypatch.setattr(media_utils, "probe_video", lambda path: media_utils.VideoProbe(1920, 800, 10.0))
+
+        media_utils.transcode_renditions_for_post(test_db, test_post.id, test_post.video_filename)
+
+        assert [(spec.name, spec.width, spec.height) for spec in transcoded] == [
+            ("720p", 1280, 720), ("360p", 640, 360),
+        ]
+
+
+@pytest.mark.skipif(not media_utils.ffmpeg_available(), reason="ffmpeg is not installed")
+class TestTranscoding:
+    """ffmpeg transcoding tests"""
+
+    def test_transcode_rendition(self, tmp_path):
+        source = tmp_path / "source.mp4"
+        media_utils.run_ffmpeg([
+            "-f", "lavfi", "-i", "testsrc=duration=1:size=640x360:rate=25",
+            "-c:v", "libx264", str(source),
+        ])
+        output = tmp_path / "out" / "240p.mp4"
+
+        size = media_utils.transcode_rendition(
+            str(source), str(output), RenditionSpec("240p", 426, 240, 300_000)
+        )
+
+        assert size == output.stat().st_size
+        probe = media_utils.probe_video(str(output))
+        assert probe is None or probe.height == 240
+
+    def test_portrait_rendition_size(self, tmp_path):
+        source = tmp_path / "source.mp4"
+        media_utils.run_ffmpeg([
+            "-f", "lavfi", "-i", "testsrc=duration=1:size=360x640:rate=25",
+            "-c:v", "libx264", str(source),
+        ])
+        output = tmp_path / "out" / "240p.mp4"
+
+        media_utils.transcode_rendition(str(source), str(output), RenditionSpec("240p", 240, 426, 300_000))
+
+        info = media_utils.probe_media(str(output))
+        assert (info.width, info.height) == (240, 426)
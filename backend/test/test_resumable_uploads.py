@@ -0,0 +1,355 @@
+"""
+Tests for resumable uploads
+- POST /api/uploads creates a session with a sparse data file
+- PUT /api/uploads/{id}/chunks/{index} in any order, in parallel, with retries
+- GET /api/uploads/{id} reports the resume offset and missing chunks
+- POST /api/uploads/{id}/complete publishes the file and creates the post
+- Expired sessions and orphaned upload/post-processing temp files are swept
+"""
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.models import Post, UploadChunk, UploadSession, VideoBlob
+from app.routers import posts, uploads
+from app.upload_sessions import SESSION_PREFIX, upload_sweeper
+from app.upload_utils import TEMP_PREFIX
+
+from test.test_thumbnails import other_client  # noqa: F401 (fixture)
+
+CHUNK = 1024
+
+
+@pytest.fixture(autouse=True)
+def small_chunks(monkeypatch):
+    monkeypatch.setattr(uploads, "UPLOAD_MIN_CHUNK_SIZE", CHUNK)
+
+
+@pytest.fixture
+def content():
+    return os.urandom(CHUNK * 3 + 100)
+
+
+def create(client, size: int, filename: str = "clip.mp4", **options):
+    body = {"title": "Resumable", "filename": filename, "size": size, "chunk_size": CHUNK, **options}
+    return client.post("/api/uploads", json=body)
+
+
+def put_chunk(client, upload_id: str, index: int, content: bytes):
+    return client.put(
+        f"/api/uploads/{upload_id}/chunks/{index}", content=content[index * CHUNK:(index + 1) * CHUNK]
+    )
+
+
+def session_files(upload_dir) -> list[str]:
+    return [name for name in os.listdir(upload_dir) if name.startswith(SESSION_PREFIX)]
+
+
+class TestCreateUpload:
+    """POST /api/uploads tests"""
+
+    def test_create(self, authenticated_client, upload_dir, content):
+        response = create(authenticated_client, len(content))
+
+        assert response.status_code == 201
+        body = response.json()
+        assert body["chunk_count"] == 4
+        assert body["offset"] == 0
+        assert body["received_bytes"] == 0
+        assert body["missing_chunks"] == [0, 1, 2, 3]
+        [name] = session_files(upload_dir)
+        assert name == f"{SESSION_PREFIX}{body['id']}.mp4"
+        assert (upload_dir / name).stat().st_size == len(content)
+
+    def test_default_chunk_size(self, authenticated_client, upload_dir):
+        body = create(authenticated_client, 10, chunk_size=None).json()
+
+        assert body["chunk_size"] == uploads.UPLOAD_CHUNK_SIZE
+        assert body["chunk_count"] == 1
+
+    @pytest.mark.parametrize("options", [
+        {"filename": "clip.exe"},
+        {"chunk_size": CHUNK - 1},
+        {"chunk_size": 1024 * 1024 * 1024},
+    ])
+    def test_rejected(self, authenticated_client, upload_dir, options):
+        response = create(authenticated_client, 4096, **options)
+
+        assert response.status_code == 400
+        assert session_files(upload_dir) == []
+
+    def test_too_large(self, authenticated_client, upload_dir, monkeypatch):
+        monkeypatch.setattr(uploads, "MAX_FILE_SIZE", 4096)
+
+        response = create(authenticated_client, 4097)
+
+        assert response.status_code == 400
+        assert "File too large" in response.json()["detail"]
+
+    def test_session_limit(self, authenticated_client, upload_dir, monkeypatch):
+        monkeypatch.setattr(uploads, "UPLOAD_MAX_SESSIONS_PER_USER", 1)
+        create(authenticated_client, 4096)
+
+        response = create(authenticated_client, 4096)
+
+        assert response.status_code == 429
+
+    def test_requires_login(self, client, upload_dir):
+        assert create(client, 4096).status_code == 401
+
+
+class TestChunks:
+    """PUT /api/uploads/{id}/chunks/{index} tests"""
+
+    @pytest.fixture
+    def upload_id(self, authenticated_client, upload_dir, content):
+        return create(authenticated_client, len(content)).json()["id"]
+
+    def test_out_of_order(self, authenticated_client, upload_id, content):
+        put_chunk(authenticated_client, upload_id, 3, content)
+        response = put_chunk(authenticated_client, upload_id, 1, content)
+
+        assert response.status_code == 200
+        body = response.json()
+        assert body["missing_chunks"] == [0, 2]
+        assert body["offset"] == 0
+        assert body["received_bytes"] == CHUNK + 100
+
+    def test_resume_offset(self, authenticated_client, upload_id, content):
+        put_chunk(authenticated_client, upload_id, 0, content)
+        put_chunk(authenticated_client, upload_id, 1, content)
+
+        body = authenticated_client.get(f"/api/uploads/{upload_id}").json()
+
+        assert body["offset"] == 2 * CHUNK
+        assert body["missing_chunks"] == [2, 3]
+
+    def test_retry_is_idempotent(self, authenticated_client, upload_id, content, test_db):
+        put_chunk(authenticated_client, upload_id, 0, content)
+        response = put_chunk(authenticated_client, upload_id, 0, content)
+
+        assert response.status_code == 200
+        assert response.json()["received_bytes"] == CHUNK
+        assert test_db.query(UploadChunk).count() == 1
+
+    def test_parallel(self, authenticated_client, upload_id, content, upload_dir):
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            responses = list(pool.map(lambda index: put_chunk(authenticated_client, upload_id, index, content), range(4)))
+
+        assert [response.status_code for response in responses] == [200] * 4
+        body = authenticated_client.get(f"/api/uploads/{upload_id}").json()
+        assert body["missing_chunks"] == []
+        assert body["offset"] == len(content)
+        assert (upload_dir / session_files(upload_dir)[0]).read_bytes() == content
+
+    @pytest.mark.parametrize("data", [b"short", os.urandom(CHUNK + 1)])
+    def test_wrong_length(self, authenticated_client, upload_id, data, test_db):
+        response = authenticated_client.put(f"/api/uploads/{upload_id}/chunks/0", content=data)
+
+        assert response.status_code == 400
+        assert test_db.query(UploadChunk).count() == 0
+
+    @pytest.mark.parametrize("index", [-1, 4])
+    def test_index_out_of_range(self, authenticated_client, upload_id, index):
+        response = authenticated_client.put(f"/api/uploads/{upload_id}/chunks/{index}", content=b"x")
+
+        assert response.status_code == 400
+
+    def test_extends_expiry(self, authenticated_client, upload_id, content, test_db):
+        test_db.query(UploadSession).update({"expires_at": datetime.now(timezone.utc) + timedelta(minutes=1)})
+        test_db.commit()
+
+        body = put_chunk(authenticated_client, upload_id, 0, content).json()
+
+        expires_at = datetime.fromisoformat(body["expires_at"])
+        assert expires_at > datetime.now(timezone.utc) + timedelta(hours=1)
+
+    def test_other_user(self, upload_id, content, request):
+        # Logs the shared client in as another user after the upload was created
+        other_client = request.getfixturevalue("other_client")
+
+        assert other_client.get(f"/api/uploads/{upload_id}").status_code == 404
+        assert put_chunk(other_client, upload_id, 0, content).status_code == 404
+
+    def test_expired(self, authenticated_client, upload_id, test_db):
+        test_db.query(UploadSession).update({"expires_at": datetime.now(timezone.utc) - timedelta(seconds=1)})
+        test_db.commit()
+
+        assert authenticated_client.get(f"/api/uploads/{upload_id}").status_code == 404
+
+    def test_data_file_lost(self, authenticated_client, upload_id, content, upload_dir):
+        os.remove(upload_dir / session_files(upload_dir)[0])
+
+        assert put_chunk(authenticated_client, upload_id, 0, content).status_code == 410
+
+
+class TestCompleteUpload:
+    """POST /api/uploads/{id}/complete and DELETE /api/uploads/{id} tests"""
+
+    def upload_all(self, client, content: bytes, **options) -> str:
+        upload_id = create(client, len(content), **options).json()["id"]
+        for index in reversed(range(4)):
+            put_chunk(client, upload_id, index, content)
+        return upload_id
+
+    def test_complete(self, authenticated_client, upload_dir, content, test_db):
+        upload_id = self.upload_all(authenticated_client, content, description="Chunked", is_public=True)
+
+        response = authenticated_client.post(f"/api/uploads/{upload_id}/complete")
+
+        assert response.status_code == 201
+        post = response.json()
+        assert post["title"] == "Resumable"
+        assert post["description"] == "Chunked"
+        assert post["is_public"] is True
+        assert post["video_original_name"] == "clip.mp4"
+        assert post["video_size"] == len(content)
+        assert os.listdir(upload_dir) == [post["video_filename"]]
+        assert (upload_dir / post["video_filename"]).read_bytes() == content
+        assert test_db.query(UploadSession).count() == 0
+        assert test_db.query(UploadChunk).count() == 0
+        assert authenticated_client.post(f"/api/uploads/{upload_id}/complete").status_code == 404
+
+    def test_incomplete(self, authenticated_client, upload_dir, content, test_db):
+        upload_id = create(authenticated_client, len(content)).json()["id"]
+        put_chunk(authenticated_client, upload_id, 0, content)
+
+        response = authenticated_client.post(f"/api/uploads/{upload_id}/complete")
+
+        assert response.status_code == 409
+        assert "3 chunks missing" in response.json()["detail"]
+        assert test_db.query(Post).count() == 0
+
+    def test_chunks_rejected_while_completing(self, authenticated_client, upload_dir, content, test_db):
+        upload_id = self.upload_all(authenticated_client, content)
+        test_db.query(UploadSession).update({"completing": True})
+        test_db.commit()
+
+        assert put_chunk(authenticated_client, upload_id, 0, content).status_code == 409
+        assert authenticated_client.post(f"/api/uploads/{upload_id}/complete").status_code == 409
+
+    def test_failure_before_publish_can_retry(self, authenticated_client, upload_dir, content, test_db, monkeypatch):
+        upload_id = self.upload_all(authenticated_client, content)
+        def fail(path):
+            raise OSError("read error")
+        with monkeypatch.context() as patched:
+            patched.setattr(uploads, "file_sha256", fail)
+            assert authenticated_client.post(f"/api/uploads/{upload_id}/complete").status_code == 500
+
+        test_db.expire_all()
+        assert test_db.query(UploadSession).one().completing is False
+        assert len(session_files(upload_dir)) == 1
+        assert authenticated_client.post(f"/api/uploads/{upload_id}/complete").status_code == 201
+
+    def test_failure_after_publish_discards_session(
+        self, authenticated_client, upload_dir, content, test_db, monkeypatch
+    ):
+        upload_id = self.upload_all(authenticated_client, content)
+        def fail(post, deduplicated=False):
+            raise RuntimeError("scheduling failed")
+        monkeypatch.setattr(posts, "schedule_post_processing", fail)
+
+        assert authenticated_client.post(f"/api/uploads/{upload_id}/complete").status_code == 500
+
+        assert os.listdir(upload_dir) == []
+        assert test_db.query(UploadSession).count() == 0
+        assert (test_db.query(Post).count(), test_db.query(VideoBlob).count()) == (0, 0)
+        assert authenticated_client.get(f"/api/uploads/{upload_id}").status_code == 404
+
+    def test_cancel(self, authenticated_client, upload_dir, content, test_db):
+        upload_id = create(authenticated_client, len(content)).json()["id"]
+        put_chunk(authenticated_client, upload_id, 0, content)
+
+        response = authenticated_client.delete(f"/api/uploads/{upload_id}")
+
+        assert response.status_code == 200
+        assert session_files(upload_dir) == []
+        assert test_db.query(UploadSession).count() == 0
+        assert test_db.query(UploadChunk).count() == 0
+
+    def test_delete_user_removes_uploads(self, admin_client, test_user, upload_dir, content, test_db, auth_token):
+        admin_token = admin_client.cookies.get("access_token")
+        admin_client.cookies.set("access_token", auth_token)
+        create(admin_client, len(content))
+        admin_client.cookies.set("access_token", admin_token)
+
+        response = admin_client.delete(f"/api/admin/users/{test_user.id}")
+
+        assert response.status_code == 200
+        assert session_files(upload_dir) == []
+        assert test_db.query(UploadSession).count() == 0
+
+
+class TestUploadSweeper:
+    """UploadSweeper tests"""
+
+    def test_removes_expired_sessions(self, authenticated_client, upload_dir, content, test_db):
+        expired_id = create(authenticated_client, len(content)).json()["id"]
+        put_chunk(authenticated_client, expired_id, 0, content)
+        live_id = create(authenticated_client, len(content)).json()["id"]
+        test_db.query(UploadSession).filter(UploadSession.id == expired_id).update(
+            {"expires_at": datetime.now(timezone.utc) - timedelta(seconds=1)}
+        )
+        test_db.commit()
+
+        result = upload_sweeper.sweep()
+
+        assert result["expired_sessions"] == 1
+        assert result["reclaimed_bytes"] > 0
+        assert session_files(upload_dir) == [f"{SESSION_PREFIX}{live_id}.mp4"]
+        assert test_db.query(UploadChunk).count() == 0
+        assert upload_sweeper.stats()["expired_sessions_total"] == 1
+
+    def test_removes_old_orphaned_files(self, test_db, upload_dir):
+        old = time.time() - upload_sweeper.session_ttl - 60
+        for name in (f"{SESSION_PREFIX}gone.mp4", f"{TEMP_PREFIX}crashed.mp4"):
+            (upload_dir / name).write_bytes(b"x" * 4096)
+            os.utime(upload_dir / name, (old, old))
+        (upload_dir / f"{TEMP_PREFIX}in-progress.mp4").write_bytes(b"x")
+        (upload_dir / "video.mp4").write_bytes(b"x")
+        os.utime(upload_dir / "video.mp4", (old, old))
+
+        result = upload_sweeper.sweep()
+
+        assert result["removed_files"] == 2
+        assert sorted(os.listdir(upload_dir)) == [f"{TEMP_PREFIX}in-progress.mp4", "video.mp4"]
+
+    def test_removes_old_pipeline_temp_files(self, test_db, upload_dir):
+        old = time.time() - upload_sweeper.session_ttl - 60
+        derivatives = upload_dir.parent / "derivatives" / "abc"
+        stale = [
+            upload_dir / ".faststart-x1",
+            derivatives / "clips" / ".clip-x2.mp4",
+            derivatives / "renditions" / ".rendition-x3.mp4",
+            derivatives / ".keyframes-x4",
+            derivatives / ".hls-x5" / "segment_000.ts",
+        ]
+        fresh = derivatives / "renditions" / ".rendition-running.mp4"
+        kept = [derivatives / "clips" / "0-1000.mp4", derivatives / "hls" / "segment_000.ts", fresh]
+        for path in stale + kept:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(b"x" * 4096)
+        for path in stale + kept[:2] + [derivatives / ".hls-x5"]:
+            os.utime(path, (old, old))
+
+        result = upload_sweeper.sweep()
+
+        assert result["removed_files"] == 5
+        assert result["reclaimed_bytes"] >= 5 * 4096
+        assert not any(path.exists() for path in stale)
+        assert not (derivatives / ".hls-x5").exists()
+        assert all(path.exists() for path in kept)
+
+    def test_keeps_live_session_files(self, authenticated_client, upload_dir, content):
+        upload_id = create(authenticated_client, len(content)).json()["id"]
+        path = upload_dir / f"{SESSION_PREFIX}{upload_id}.mp4"
+        old = time.time() - upload_sweeper.session_ttl - 60
+        os.utime(path, (old, old))
+
+        upload_sweeper.sweep()
+
+        assert path.exists()
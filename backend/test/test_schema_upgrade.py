@@ -0,0 +1,98 @@
+"""
+Tests for upgrading an existing database at startup
+- create_all adds new tables; add_missing_columns adds new columns and indexes to existing ones
+- Running it again changes nothing
+"""
+
+import sqlite3
+
+import pytest
+from sqlalchemy import create_engine, inspect
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base, add_missing_columns
+from app.models import Post
+
+# Schema before the media info columns were added to posts
+PRE_SERIES_SCHEMA = """
+CREATE TABLE users (
+    id INTEGER NOT NULL,
+    email VARCHAR(255) NOT NULL,
+    hashed_password VARCHAR(255) NOT NULL,
+    full_name VARCHAR(100),
+    is_active BOOLEAN,
+    is_admin BOOLEAN,
+    created_at DATETIME DEFAULT (CURRENT_TIMESTAMP),
+    updated_at DATETIME,
+    PRIMARY KEY (id)
+);
+CREATE INDEX ix_users_id ON users (id);
+CREATE UNIQUE INDEX ix_users_email ON users (email);
+CREATE TABLE posts (
+    id INTEGER NOT NULL,
+    title VARCHAR(200) NOT NULL,
+    description VARCHAR(5000),
+    video_filename VARCHAR(255) NOT NULL,
+    video_original_name VARCHAR(255) NOT NULL,
+    video_size INTEGER NOT NULL,
+    author_id INTEGER NOT NULL,
+    is_public BOOLEAN,
+    created_at DATETIME DEFAULT (CURRENT_TIMESTAMP),
+    updated_at DATETIME,
+    PRIMARY KEY (id),
+    FOREIGN KEY(author_id) REFERENCES users (id)
+);
+CREATE INDEX ix_posts_id ON posts (id);
+CREATE TABLE post_permissions (
+    id INTEGER NOT NULL,
+    post_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    permission_type VARCHAR(50),
+    created_at DATETIME DEFAULT (CURRENT_TIMESTAMP),
+    PRIMARY KEY (id),
+    FOREIGN KEY(post_id) REFERENCES posts (id),
+    FOREIGN KEY(user_id) REFERENCES users (id)
+);
+INSERT INTO users (id, email, hashed_password, is_active, is_admin) VALUES (1, 'old@example.com', 'x', 1, 0);
+INSERT INTO posts (id, title, video_filename, video_original_name, video_size, author_id, is_public)
+    VALUES (1, 'Old post', 'old.mp4', 'clip.mp4', 100, 1, 1);
+"""
+
+
+@pytest.fixture
+def old_engine(tmp_path):
+    path = tmp_path / "app.db"
+    with sqlite3.connect(path) as conn:
+        conn.executescript(PRE_SERIES_SCHEMA)
+    engine = create_engine(f"sqlite:///{path}")
+    yield engine
+    engine.dispose()
+
+
+class TestAddMissingColumns:
+    """app.database.add_missing_columns tests"""
+
+    def test_upgrades_pre_series_schema(self, old_engine):
+        Base.metadata.create_all(bind=old_engine)
+
+        added = add_missing_columns(old_engine)
+
+        assert "posts.duration" in added and "posts.is_faststart" in added
+        indexes = {index["name"] for index in inspect(old_engine).get_indexes("posts")}
+        assert {"ix_posts_duration", "ix_posts_video_codec", "ix_posts_is_faststart"} <= indexes
+        with sessionmaker(bind=old_engine)() as db:
+            post = db.query(Post).filter(Post.duration.is_(None)).one()
+            assert (post.title, post.width, post.video_codec) == ("Old post", None, None)
+
+    def test_idempotent(self, old_engine):
+        Base.metadata.create_all(bind=old_engine)
+        add_missing_columns(old_engine)
+
+        assert add_missing_columns(old_engine) == []
+
+    def test_new_database_unchanged(self, tmp_path):
+        engine = create_engine(f"sqlite:///{tmp_path / 'new.db'}")
+        Base.metadata.create_all(bind=engine)
+
+        assert add_missing_columns(engine) == []
+        engine.dispose()
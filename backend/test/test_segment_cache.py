@@ -0,0 +1,150 @@
+"""
+Tests for the hot-segment cache
+- Head/tail segment bounds
+- Byte-budgeted LRU eviction
+- Invalidation and counters
+- Stream path integration
+"""
+
+import pytest
+
+from app.segment_cache import SegmentCache, segment_cache
+
+
+class TestSegmentBounds:
+    """SegmentCache.segment_bounds tests"""
+
+    def test_head_segment(self):
+        cache = SegmentCache(max_bytes=1000, segment_bytes=100)
+        assert cache.segment_bounds(1000, 0) == (0, 100)
+        assert cache.segment_bounds(1000, 99) == (0, 100)
+
+    def test_tail_segment(self):
+        cache = SegmentCache(max_bytes=1000, segment_bytes=100)
+        assert cache.segment_bounds(1000, 950) == (900, 1000)
+
+    def test_middle_is_not_cached(self):
+        cache = SegmentCache(max_bytes=1000, segment_bytes=100)
+        assert cache.segment_bounds(1000, 500) is None
+
+    def test_small_file_is_single_segment(self):
+        cache = SegmentCache(max_bytes=1000, segment_bytes=100)
+        assert cache.segment_bounds(150, 120) == (100, 150)
+        assert cache.segment_bounds(50, 10) == (0, 50)
+
+    def test_disabled_cache(self):
+        cache = SegmentCache(max_bytes=0, segment_bytes=100)
+        assert cache.segment_bounds(1000, 0) is None
+
+
+class TestSegmentCacheStorage:
+    """SegmentCache get/put/invalidate tests"""
+
+    def test_get_counts_hits_and_misses(self):
+        cache = SegmentCache(max_bytes=1000, segment_bytes=100)
+        assert cache.get(("a.mp4", '"1"'), 0) is None
+        cache.put(("a.mp4", '"1"'), 0, b"x" * 100)
+        assert cache.get(("a.mp4", '"1"'), 0) == b"x" * 100
+
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["bytes"] == 100
+
+    def test_etag_is_part_of_key(self):
+        cache = SegmentCache(max_bytes=1000, segment_bytes=100)
+        cache.put(("a.mp4", '"1"'), 0, b"old")
+        assert cache.get(("a.mp4", '"2"'), 0) is None
+
+    def test_lru_eviction_by_bytes(self):
+        cache = SegmentCache(max_bytes=250, segment_bytes=100)
+        cache.put(("a.mp4", "e"), 0, b"a" * 100)
+        cache.put(("b.mp4", "e"), 0, b"b" * 100)
+        cache.get(("a.mp4", "e"), 0)  # a is now most recently used
+        cache.put(("c.mp4", "e"), 0, b"c" * 100)
+
+        assert cache.get(("b.mp4", "e"), 0) is None
+        assert cache.get(("a.mp4", "e"), 0) is not None
+        assert cache.stats()["bytes"] == 200
+
+    def test_invalidate_removes_all_segments_of_file(self):
+        cache = SegmentCache(max_bytes=1000, segment_bytes=100)
+        cache.put(("a.mp4", "e"), 0, b"h" * 100)
+        cache.put(("a.mp4", "e"), 900, b"t" * 100)
+        cache.put(("b.mp4", "e"), 0, b"b" * 100)
+
+        assert cache.invalidate("a.mp4") == 2
+        assert cache.get(("a.mp4", "e"), 0) is None
+        assert cache.get(("b.mp4", "e"), 0) is not None
+        assert cache.stats()["bytes"] == 100
+
+    def test_invalidate_prefix(self):
+        cache = SegmentCache(max_bytes=1000, segment_bytes=100)
+        cache.put(("a/renditions/360p.mp4", "e"), 0, b"l" * 100)
+        cache.put(("a/renditions/720p.mp4", "e"), 0, b"h" * 100)
+        cache.put(("ab/renditions/360p.mp4", "e"), 0, b"b" * 100)
+
+        assert cache.invalidate_prefix("a/renditions/") == 2
+        assert cache.get(("ab/renditions/360p.mp4", "e"), 0) is not None
+
+
+class TestSegmentCacheStreaming:
+    """Stream path integration tests"""
+
+    def test_repeat_request_is_served_from_cache(self, authenticated_client, test_post):
+        """Test second request for the head is a cache hit"""
+        first = authenticated_client.get(
+            f"/api/stream/{test_post.id}",
+            headers={"Range": "bytes=0-1023"}
+        )
+        second = authenticated_client.get(
+            f"/api/stream/{test_post.id}",
+            headers={"Range": "bytes=0-1023"}
+        )
+
+        assert first.content == second.content == test_post.content[:1024]
+        stats = segment_cache.stats()
+        assert stats["misses"] == 1
+        assert stats["hits"] == 1
+
+    def test_cached_prefix_then_disk(self, authenticated_client, test_post, monkeypatch):
+        """Test window spanning past the head segment is stitched correctly"""
+        monkeypatch.setattr(segment_cache, "segment_bytes", 1000)
+
+        response = authenticated_client.get(f"/api/stream/{test_post.id}")
+
+        assert response.content == test_post.content
+        assert segment_cache.stats()["entries"] == 1
+
+    def test_delete_post_invalidates_cache(self, authenticated_client, test_post):
+        """Test deleting a post drops its cached segments"""
+        authenticated_client.get(f"/api/stream/{test_post.id}")
+        assert segment_cache.stats()["entries"] == 1
+
+        response = authenticated_client.delete(f"/api/posts/{test_post.id}")
+
+        assert response.status_code == 200
+        assert segment_cache.stats()["entries"] == 0
+
+    def test_delete_user_invalidates_cache(self, admin_client, test_post):
+        """Test admin deleting a user drops cached segments of their posts"""
+        admin_client.get(f"/api/stream/{test_post.id}")
+        assert segment_cache.stats()["entries"] == 1
+
+        response = admin_client.delete(f"/api/admin/users/{test_post.author_id}")
+
+        assert response.status_code == 200
+        assert segment_cache.stats()["entries"] == 0
+
+    def test_admin_cache_stats(self, admin_client):
+        """Test admin cache endpoint exposes segment counters"""
+        response = admin_client.get("/api/admin/cache")
+
+        assert response.status_code == 200
+        assert set(response.json()["segments"]) >= {"hits", "misses", "bytes"}
+
+    def test_cache_stats_requires_admin(self, authenticated_client):
+        """Test non-admin users cannot read cache stats"""
+        response = authenticated_client.get("/api/admin/cache")
+
+        assert response.status_code == 403
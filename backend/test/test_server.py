@@ -0,0 +1,129 @@
+"""
+Tests for the zero-copy uvicorn protocol
+- A real uvicorn server with SendfileHttpProtocol advertises http.response.zerocopysend
+- FileRangeResponse bodies go through os.sendfile and arrive intact (full, single range, multipart, HEAD)
+"""
+
+import asyncio
+import http.client
+import os
+import threading
+
+import pytest
+import uvicorn
+from starlette.requests import Request
+
+from app.server import SendfileHttpProtocol
+from app.stream_utils import ZEROCOPY_EXTENSION, build_range_response
+
+pytestmark = pytest.mark.skipif(not hasattr(os, "sendfile"), reason="os.sendfile not available")
+
+
+@pytest.fixture
+def video(tmp_path):
+    path = tmp_path / "video.mp4"
+    path.write_bytes(os.urandom(300_000))
+    return path
+
+
+@pytest.fixture
+def server(video, monkeypatch):
+    """Runs uvicorn with SendfileHttpProtocol on a free port; yields (port, os.sendfile calls, scopes)"""
+    calls, scopes = [], []
+    sendfile = os.sendfile
+    monkeypatch.setattr(os, "sendfile", lambda *args: (calls.append(args), sendfile(*args))[1])
+
+    async def app(scope, receive, send):
+        if scope["type"] != "http":
+            return
+        scopes.append(scope)
+        request = Request(scope, receive)
+        response = build_range_response(
+            str(video), video.stat().st_size, "video/mp4", request.headers.get("range")
+        )
+        await response(scope, receive, send)
+
+    config = uvicorn.Config(
+        app, host="127.0.0.1", port=0, http=SendfileHttpProtocol, loop="asyncio",
+        lifespan="off", log_level="warning",
+    )
+    server = uvicorn.Server(config)
+    thread = threading.Thread(target=lambda: asyncio.run(server.serve()))
+    thread.start()
+    try:
+        while not server.started:
+            assert thread.is_alive()
+            thread.join(0.01)
+        port = server.servers[0].sockets[0].getsockname()[1]
+        yield port, calls, scopes
+    finally:
+        server.should_exit = True
+        thread.join(10)
+
+
+def fetch(port, method="GET", headers=None):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+    try:
+        conn.request(method, "/video", headers=headers or {})
+        response = conn.getresponse()
+        return response.status, dict(response.getheaders()), response.read()
+    finally:
+        conn.close()
+
+
+class TestSendfileHttpProtocol:
+    """app.server.SendfileHttpProtocol tests"""
+
+    def test_full_body_sent_with_sendfile(self, server, video):
+        port, calls, scopes = server
+
+        status, headers, body = fetch(port)
+
+        assert status == 200
+        assert body == video.read_bytes()
+        assert int(headers["content-length"]) == len(body)
+        assert ZEROCOPY_EXTENSION in scopes[0]["extensions"]
+        assert calls
+        assert sum(min(count, len(body)) for _, _, _, count in calls) >= len(body)
+
+    def test_single_range(self, server, video):
+        port, calls, _ = server
+
+        status, headers, body = fetch(port, headers={"Range": "bytes=1000-200999"})
+
+        assert status == 206
+        assert body == video.read_bytes()[1000:201000]
+        assert headers["content-range"] == f"bytes 1000-200999/{video.stat().st_size}"
+        assert calls[0][2] == 1000
+
+    def test_multipart_ranges(self, server, video):
+        port, calls, _ = server
+        content = video.read_bytes()
+
+        status, headers, body = fetch(port, headers={"Range": "bytes=0-99,200000-200099"})
+
+        assert status == 206
+        assert headers["content-type"].startswith("multipart/byteranges")
+        assert content[:100] in body and content[200000:200100] in body
+        assert int(headers["content-length"]) == len(body)
+        assert len(calls) >= 2
+
+    def test_keep_alive_after_sendfile(self, server, video):
+        port, _, _ = server
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+        try:
+            for _ in range(2):
+                conn.request("GET", "/video", headers={"Range": "bytes=0-9"})
+                response = conn.getresponse()
+                assert response.read() == video.read_bytes()[:10]
+        finally:
+            conn.close()
+
+    def test_head_sends_no_body(self, server):
+        port, calls, _ = server
+
+        status, headers, body = fetch(port, method="HEAD")
+
+        assert status == 200
+        assert body == b""
+        assert calls == []
@@ -0,0 +1,149 @@
+"""
+Tests for scrubbing preview sprite sheets
+- Sprite layout planning and WebVTT generation
+- GET /api/posts/{post_id}/sprite.jpg and sprite.vtt
+- ffmpeg generation (skipped when ffmpeg is not installed)
+"""
+
+import os
+
+import pytest
+
+from app import media_utils
+from app.media_utils import (
+    SPRITE_IMAGE,
+    SPRITE_VTT,
+    SpriteLayout,
+    build_sprite_vtt,
+    get_sprites_dir,
+    plan_sprite_layout,
+)
+
+
+@pytest.fixture
+def sprite_post(test_post):
+    """Test post with a hand-made sprite sheet and WebVTT index"""
+    sprites_dir = get_sprites_dir(test_post.video_filename)
+    os.makedirs(sprites_dir)
+    layout = plan_sprite_layout(30.0, 1280, 720)
+    test_post.sprite = b"\xff\xd8sprite\xff\xd9"
+    test_post.vtt = build_sprite_vtt(layout, 30.0)
+    with open(os.path.join(sprites_dir, SPRITE_IMAGE), "wb") as f:
+        f.write(test_post.sprite)
+    with open(os.path.join(sprites_dir, SPRITE_VTT), "w") as f:
+        f.write(test_post.vtt)
+    return test_post
+
+
+class TestSpriteLayout:
+    """plan_sprite_layout tests"""
+
+    def test_short_video_uses_min_interval(self):
+        layout = plan_sprite_layout(30.0, 1280, 720)
+
+        assert layout == SpriteLayout(2.0, 15, 10, 2, 160, 90)
+
+    def test_long_video_caps_tiles(self):
+        layout = plan_sprite_layout(3600.0, 1920, 1080)
+
+        assert layout.tiles == 100
+        assert layout.interval == 36.0
+        assert (layout.columns, layout.rows) == (10, 10)
+
+    def test_very_short_video(self):
+        layout = plan_sprite_layout(0.5, 640, 480)
+
+        assert (layout.tiles, layout.columns, layout.rows) == (1, 1, 1)
+        assert layout.tile_height == 120
+
+    def test_odd_aspect_height_is_even(self):
+        assert plan_sprite_layout(10.0, 1000, 333).tile_height % 2 == 0
+
+
+class TestSpriteVtt:
+    """build_sprite_vtt tests"""
+
+    def test_cues(self):
+        layout = SpriteLayout(interval=5.0, tiles=3, columns=2, rows=2, tile_width=160, tile_height=90)
+
+        vtt = build_sprite_vtt(layout, 12.5)
+
+        assert vtt == (
+            "WEBVTT\n\n"
+            "00:00:00.000 --> 00:00:05.000\nsprite.jpg#xywh=0,0,160,90\n\n"
+            "00:00:05.000 --> 00:00:10.000\nsprite.jpg#xywh=160,0,160,90\n\n"
+            "00:00:10.000 --> 00:00:12.500\nsprite.jpg#xywh=0,90,160,90\n"
+        )
+
+    def test_hour_timestamps(self):
+        layout = plan_sprite_layout(3700.0, 1280, 720)
+
+        vtt = build_sprite_vtt(layout, 3700.0)
+
+        assert "01:01:40.000\n" in vtt
+
+
+class TestSpriteEndpoints:
+    """GET /api/posts/{post_id}/sprite.jpg and sprite.vtt tests"""
+
+    def test_sprite_image(self, authenticated_client, sprite_post):
+        response = authenticated_client.get(f"/api/posts/{sprite_post.id}/sprite.jpg")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "image/jpeg"
+        assert response.content == sprite_post.sprite
+        assert "immutable" in response.headers["cache-control"]
+
+    def test_sprite_vtt(self, authenticated_client, sprite_post):
+        response = authenticated_client.get(f"/api/posts/{sprite_post.id}/sprite.vtt")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/vtt")
+        assert response.text == sprite_post.vtt
+        assert response.headers["etag"]
+
+    def test_not_modified(self, authenticated_client, sprite_post):
+        url = f"/api/posts/{sprite_post.id}/sprite.jpg"
+        etag = authenticated_client.get(url).headers["etag"]
+
+        response = authenticated_client.get(url, headers={"If-None-Match": etag})
+
+        assert response.status_code == 304
+
+    @pytest.mark.parametrize("name", ["sprite.jpg", "sprite.vtt"])
+    def test_not_generated(self, authenticated_client, test_post, name):
+        response = authenticated_client.get(f"/api/posts/{test_post.id}/{name}")
+
+        assert response.status_code == 404
+
+    @pytest.mark.parametrize("name", ["sprite.jpg", "sprite.vtt"])
+    def test_requires_login(self, client, sprite_post, name):
+        response = client.get(f"/api/posts/{sprite_post.id}/{name}")
+
+        assert response.status_code == 401
+
+    def test_delete_post_removes_sprites(self, authenticated_client, sprite_post):
+        sprites_dir = get_sprites_dir(sprite_post.video_filename)
+
+        authenticated_client.delete(f"/api/posts/{sprite_post.id}")
+
+        assert not os.path.exists(sprites_dir)
+
+
+@pytest.mark.skipif(not media_utils.ffmpeg_available(), reason="ffmpeg is not installed")
+class TestSpriteGeneration:
+    """ffmpeg sprite generation tests"""
+
+    def test_generate_sprite(self, tmp_path):
+        source = tmp_path / "source.mp4"
+        media_utils.run_ffmpeg([
+            "-f", "lavfi", "-i", "testsrc=duration=10:size=320x180:rate=25",
+            "-c:v", "libx264", str(source),
+        ])
+        output_dir = tmp_path / "out" / "sprites"
+
+        layout = media_utils.generate_sprite(str(source), str(output_dir))
+
+        assert layout.tiles == 5
+        assert sorted(os.listdir(output_dir)) == [SPRITE_IMAGE, SPRITE_VTT]
+        assert (output_dir / SPRITE_VTT).read_text().count("#xywh=") == 5
@@ -0,0 +1,569 @@
+"""
+Tests for GET /api/stream/{post_id} endpoint
+- Full and ranged responses
+- Zero-copy sendfile path
+- Reverse proxy offload mode
+- Thread pool reads with read-ahead
+- RFC 7233 ranges (suffix, multi-range, HEAD, 416)
+- Conditional requests and cache policy
+- Adaptive chunk sizing and posix_fadvise hints
+"""
+
+import asyncio
+import os
+
+import pytest
+
+from app import stream_utils
+from app.routers import stream
+from app.stream_utils import (
+    ChunkSizer,
+    FileRangeResponse,
+    RangeNotSatisfiable,
+    ZEROCOPY_EXTENSION,
+    coalesce_ranges,
+    format_http_date,
+    if_range_matches,
+    is_not_modified,
+    make_etag,
+    parse_range_header,
+)
+
+
+def run_response(response, scope):
+    """Run an ASGI response and collect the messages it sends"""
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == ZEROCOPY_EXTENSION:
+            # Record the window the server would hand to os.sendfile
+            message = dict(message, fd=message["file"].fileno())
+        messages.append(message)
+
+    asyncio.run(response(scope, receive, send))
+    return messages
+
+
+class TestStreamEndpoint:
+    """Tests for /api/stream/{post_id} endpoint"""
+
+    def test_stream_full_file(self, authenticated_client, test_post):
+        """Test streaming without Range returns the whole file"""
+        response = authenticated_client.get(f"/api/stream/{test_post.id}")
+
+        assert response.status_code == 200
+        assert response.content == test_post.content
+        assert response.headers["content-length"] == str(len(test_post.content))
+        assert response.headers["accept-ranges"] == "bytes"
+        assert response.headers["content-type"] == "video/mp4"
+
+    def test_stream_range(self, authenticated_client, test_post):
+        """Test Range request returns 206 with the requested window"""
+        response = authenticated_client.get(
+            f"/api/stream/{test_post.id}",
+            headers={"Range": "bytes=100-1123"}
+        )
+
+        assert response.status_code == 206
+        assert response.content == test_post.content[100:1124]
+        assert response.headers["content-range"] == f"bytes 100-1123/{len(test_post.content)}"
+        assert response.headers["content-length"] == "1024"
+
+    def test_stream_open_ended_range(self, authenticated_client, test_post):
+        """Test open-ended Range request returns the rest of the file"""
+        response = authenticated_client.get(
+            f"/api/stream/{test_post.id}",
+            headers={"Range": "bytes=16000-"}
+        )
+
+        assert response.status_code == 206
+        assert response.content == test_post.content[16000:]
+
+    def test_stream_range_not_satisfiable(self, authenticated_client, test_post):
+        """Test Range starting past the end of file returns 416"""
+        response = authenticated_client.get(
+            f"/api/stream/{test_post.id}",
+            headers={"Range": "bytes=999999-"}
+        )
+
+        assert response.status_code == 416
+        assert response.headers["content-range"] == f"bytes */{len(test_post.content)}"
+
+    def test_stream_suffix_range(self, authenticated_client, test_post):
+        """Test suffix Range returns the last N bytes"""
+        response = authenticated_client.get(
+            f"/api/stream/{test_post.id}",
+            headers={"Range": "bytes=-500"}
+        )
+
+        size = len(test_post.content)
+        assert response.status_code == 206
+        assert response.content == test_post.content[-500:]
+        assert response.headers["content-range"] == f"bytes {size - 500}-{size - 1}/{size}"
+
+    def test_stream_multi_range(self, authenticated_client, test_post):
+        """Test multiple ranges return multipart/byteranges"""
+        response = authenticated_client.get(
+            f"/api/stream/{test_post.id}",
+            headers={"Range": "bytes=0-99, 5000-5099"}
+        )
+
+        assert response.status_code == 206
+        content_type = response.headers["content-type"]
+        assert content_type.startswith("multipart/byteranges; boundary=")
+        boundary = content_type.split("boundary=")[1].encode()
+        assert response.headers["content-length"] == str(len(response.content))
+
+        parts = response.content.split(b"--" + boundary)
+        assert parts[-1] == b"--\r\n"
+        bodies = [part.split(b"\r\n\r\n", 1) for part in parts[1:-1]]
+        assert b"Content-Range: bytes 0-99/16384" in bodies[0][0]
+        assert bodies[0][1] == test_post.content[0:100] + b"\r\n"
+        assert b"Content-Range: bytes 5000-5099/16384" in bodies[1][0]
+        assert bodies[1][1] == test_post.content[5000:5100] + b"\r\n"
+
+    def test_stream_overlapping_ranges_coalesced(self, authenticated_client, test_post):
+        """Test overlapping ranges are merged into a single part"""
+        response = authenticated_client.get(
+            f"/api/stream/{test_post.id}",
+            headers={"Range": "bytes=100-199, 150-299"}
+        )
+
+        assert response.status_code == 206
+        assert response.headers["content-range"] == "bytes 100-299/16384"
+        assert response.content == test_post.content[100:300]
+
+    def test_stream_invalid_range_ignored(self, authenticated_client, test_post):
+        """Test malformed Range header is ignored and full file is returned"""
+        response = authenticated_client.get(
+            f"/api/stream/{test_post.id}",
+            headers={"Range": "items=0-10"}
+        )
+
+        assert response.status_code == 200
+        assert response.content == test_post.content
+
+    def test_stream_head(self, authenticated_client, test_post):
+        """Test HEAD returns metadata headers without body"""
+        response = authenticated_client.head(f"/api/stream/{test_post.id}")
+
+        assert response.status_code == 200
+        assert response.headers["content-length"] == str(len(test_post.content))
+        assert response.headers["accept-ranges"] == "bytes"
+        assert response.content == b""
+
+    def test_stream_head_without_token(self, client, test_post):
+        """Test HEAD without token returns 401"""
+        response = client.head(f"/api/stream/{test_post.id}")
+
+        assert response.status_code == 401
+
+    def test_stream_without_token(self, client, test_post):
+        """Test streaming without token returns 401"""
+        response = client.get(f"/api/stream/{test_post.id}")
+
+        assert response.status_code == 401
+
+
+class TestStreamConditional:
+    """Tests for validators and conditional requests"""
+
+    def test_stream_sends_validators(self, authenticated_client, test_post):
+        """Test response includes ETag, Last-Modified and Cache-Control"""
+        response = authenticated_client.get(f"/api/stream/{test_post.id}")
+
+        assert response.status_code == 200
+        assert response.headers["etag"].startswith('"')
+        assert "last-modified" in response.headers
+        assert response.headers["cache-control"].startswith("private")
+
+    def test_stream_public_post_cache_policy(self, authenticated_client, test_post, test_db):
+        """Test public posts get a shared-cache policy"""
+        test_post.is_public = True
+        test_db.commit()
+
+        response = authenticated_client.get(f"/api/stream/{test_post.id}")
+
+        assert response.headers["cache-control"].startswith("public")
+
+    def test_if_none_match_returns_304(self, authenticated_client, test_post):
+        """Test matching If-None-Match returns 304 without body"""
+        etag = authenticated_client.get(f"/api/stream/{test_post.id}").headers["etag"]
+
+        response = authenticated_client.get(
+            f"/api/stream/{test_post.id}",
+            headers={"If-None-Match": etag, "Range": "bytes=0-99"}
+        )
+
+        assert response.status_code == 304
+        assert response.headers["etag"] == etag
+        assert response.content == b""
+
+    def test_if_modified_since_returns_304(self, authenticated_client, test_post):
+        """Test If-Modified-Since equal to Last-Modified returns 304"""
+        last_modified = authenticated_client.get(
+            f"/api/stream/{test_post.id}"
+        ).headers["last-modified"]
+
+        response = authenticated_client.get(
+            f"/api/stream/{test_post.id}",
+            headers={"If-Modified-Since": last_modified}
+        )
+
+        assert response.status_code == 304
+
+    def test_stale_etag_returns_full_response(self, authenticated_client, test_post):
+        """Test non-matching If-None-Match returns the file"""
+        response = authenticated_client.get(
+            f"/api/stream/{test_post.id}",
+            headers={"If-None-Match": '"stale"'}
+        )
+
+        assert response.status_code == 200
+        assert response.content == test_post.content
+
+    def test_if_range_match_serves_range(self, authenticated_client, test_post):
+        """Test matching If-Range keeps the Range request"""
+        etag = authenticated_client.head(f"/api/stream/{test_post.id}").headers["etag"]
+
+        response = authenticated_client.get(
+            f"/api/stream/{test_post.id}",
+            headers={"Range": "bytes=0-99", "If-Range": etag}
+        )
+
+        assert response.status_code == 206
+        assert response.content == test_post.content[:100]
+
+    def test_if_range_mismatch_serves_full_file(self, authenticated_client, test_post):
+        """Test stale If-Range ignores Range and returns the whole file"""
+        response = authenticated_client.get(
+            f"/api/stream/{test_post.id}",
+            headers={"Range": "bytes=0-99", "If-Range": '"stale"'}
+        )
+
+        assert response.status_code == 200
+        assert response.content == test_post.content
+
+    def test_conditional_request_still_checks_access(self, client, test_post):
+        """Test 304 is never returned without authentication"""
+        response = client.get(
+            f"/api/stream/{test_post.id}",
+            headers={"If-None-Match": "*"}
+        )
+
+        assert response.status_code == 401
+
+
+class TestValidators:
+    """make_etag / is_not_modified / if_range_matches tests"""
+
+    def test_etag_changes_with_size_and_mtime(self):
+        assert make_etag(100, 1) != make_etag(101, 1)
+        assert make_etag(100, 1) != make_etag(100, 2)
+
+    def test_is_not_modified_weak_etag(self):
+        etag = make_etag(100, 1)
+        assert is_not_modified({"if-none-match": f"W/{etag}"}, etag, 1000.0)
+
+    def test_is_not_modified_etag_list(self):
+        etag = make_etag(100, 1)
+        assert is_not_modified({"if-none-match": f'"a", {etag}'}, etag, 1000.0)
+
+    def test_if_none_match_takes_precedence(self):
+        """If-Modified-Since is ignored when If-None-Match is present"""
+        headers = {"if-none-match": '"other"', "if-modified-since": format_http_date(2000)}
+        assert not is_not_modified(headers, make_etag(1, 1), 1000.0)
+
+    def test_modified_since_older_date(self):
+        assert not is_not_modified({"if-modified-since": format_http_date(500)}, '"x"', 1000.0)
+
+    def test_invalid_date_is_ignored(self):
+        assert not is_not_modified({"if-modified-since": "not a date"}, '"x"', 1000.0)
+
+    def test_if_range_weak_etag_never_matches(self):
+        etag = make_etag(100, 1)
+        assert not if_range_matches(f"W/{etag}", etag, 1000.0)
+
+    def test_if_range_date(self):
+        assert if_range_matches(format_http_date(1000), '"x"', 1000.5)
+        assert not if_range_matches(format_http_date(999), '"x"', 1000.5)
+
+
+class TestParseRangeHeader:
+    """parse_range_header / coalesce_ranges tests"""
+
+    def test_parse_single_range(self):
+        assert parse_range_header("bytes=0-99", 1000) == [(0, 99)]
+
+    def test_parse_open_ended_range(self):
+        assert parse_range_header("bytes=900-", 1000) == [(900, 999)]
+
+    def test_parse_suffix_range(self):
+        assert parse_range_header("bytes=-100", 1000) == [(900, 999)]
+
+    def test_parse_suffix_larger_than_file(self):
+        assert parse_range_header("bytes=-5000", 1000) == [(0, 999)]
+
+    def test_parse_end_clamped_to_file_size(self):
+        assert parse_range_header("bytes=500-5000", 1000) == [(500, 999)]
+
+    def test_parse_multiple_ranges(self):
+        assert parse_range_header("bytes=0-9, 20-29,-5", 1000) == [(0, 9), (20, 29), (995, 999)]
+
+    def test_parse_drops_unsatisfiable_ranges(self):
+        assert parse_range_header("bytes=0-9, 2000-3000", 1000) == [(0, 9)]
+
+    def test_parse_all_unsatisfiable(self):
+        with pytest.raises(RangeNotSatisfiable):
+            parse_range_header("bytes=1000-", 1000)
+
+    def test_parse_zero_suffix_unsatisfiable(self):
+        with pytest.raises(RangeNotSatisfiable):
+            parse_range_header("bytes=-0", 1000)
+
+    @pytest.mark.parametrize("header", ["items=0-1", "bytes=", "bytes=abc", "bytes=5-1", "bytes=-"])
+    def test_parse_invalid_header_returns_none(self, header):
+        assert parse_range_header(header, 1000) is None
+
+    def test_coalesce_overlapping_and_adjacent(self):
+        assert coalesce_ranges([(50, 60), (0, 10), (5, 20), (21, 30)], gap=0) == [(0, 30), (50, 60)]
+
+    def test_coalesce_small_gap(self):
+        assert coalesce_ranges([(0, 10), (20, 30)], gap=16) == [(0, 30)]
+
+    def test_coalesce_too_many_ranges(self):
+        ranges = [(i * 100, i * 100 + 9) for i in range(10)]
+        assert coalesce_ranges(ranges, gap=0, max_ranges=4) == [(0, 909)]
+
+
+class TestStreamOffload:
+    """Tests for X-Accel-Redirect / X-Sendfile offload mode"""
+
+    def test_x_accel_redirect(self, authenticated_client, test_post, monkeypatch):
+        """Test x-accel mode returns internal redirect header without body"""
+        monkeypatch.setattr(stream, "STREAM_OFFLOAD_MODE", "x-accel")
+        monkeypatch.setattr(stream, "STREAM_OFFLOAD_PREFIX", "/protected/videos/")
+
+        response = authenticated_client.get(
+            f"/api/stream/{test_post.id}",
+            headers={"Range": "bytes=0-99"}
+        )
+
+        assert response.status_code == 200
+        assert response.headers["x-accel-redirect"] == "/protected/videos/sample.mp4"
+        assert response.headers["content-type"] == "video/mp4"
+        assert response.content == b""
+
+    def test_x_sendfile(self, authenticated_client, test_post, upload_dir, monkeypatch):
+        """Test x-sendfile mode returns absolute file path"""
+        monkeypatch.setattr(stream, "STREAM_OFFLOAD_MODE", "x-sendfile")
+
+        response = authenticated_client.get(f"/api/stream/{test_post.id}")
+
+        assert response.status_code == 200
+        assert response.headers["x-sendfile"] == str(upload_dir / "sample.mp4")
+        assert response.content == b""
+
+    def test_offload_still_checks_access(self, client, test_post, monkeypatch):
+        """Test offload mode does not bypass authentication"""
+        monkeypatch.setattr(stream, "STREAM_OFFLOAD_MODE", "x-accel")
+
+        response = client.get(f"/api/stream/{test_post.id}")
+
+        assert response.status_code == 401
+        assert "x-accel-redirect" not in response.headers
+
+    def test_offload_disabled_streams_in_process(self, authenticated_client, test_post, monkeypatch):
+        """Test empty offload mode falls back to in-process streaming"""
+        monkeypatch.setattr(stream, "STREAM_OFFLOAD_MODE", "")
+
+        response = authenticated_client.get(f"/api/stream/{test_post.id}")
+
+        assert response.status_code == 200
+        assert "x-accel-redirect" not in response.headers
+        assert response.content == test_post.content
+
+
+class TestFileRangeResponse:
+    """FileRangeResponse tests"""
+
+    def test_zerocopy_send_when_server_supports_extension(self, tmp_path):
+        """Test that the file window is handed to the server instead of read"""
+        path = tmp_path / "video.mp4"
+        path.write_bytes(b"x" * 4096)
+        response = FileRangeResponse(str(path), 1000, 500, status_code=206)
+
+        messages = run_response(
+            response,
+            {"type": "http", "method": "GET", "extensions": {ZEROCOPY_EXTENSION: {}}}
+        )
+
+        assert messages[0]["type"] == "http.response.start"
+        assert messages[0]["status"] == 206
+        assert len(messages) == 2
+        assert messages[1]["type"] == ZEROCOPY_EXTENSION
+        assert messages[1]["offset"] == 1000
+        assert messages[1]["count"] == 500
+        assert messages[1]["more_body"] is False
+        assert "body" not in messages[1]
+
+    def test_chunked_send_without_extension(self, tmp_path):
+        """Test fallback path sends the exact window as body chunks"""
+        content = bytes(range(256)) * 16
+        path = tmp_path / "video.mp4"
+        path.write_bytes(content)
+        response = FileRangeResponse(str(path), 10, 2000)
+
+        messages = run_response(response, {"type": "http", "method": "GET"})
+
+        body = b"".join(m["body"] for m in messages[1:])
+        assert body == content[10:2010]
+        assert messages[-1]["more_body"] is False
+
+    def test_chunked_send_with_read_ahead(self, tmp_path, monkeypatch):
+        """Test multi-chunk window is delivered in order with read-ahead"""
+        monkeypatch.setattr(stream_utils, "CHUNK_SIZE", 100)
+        monkeypatch.setattr(stream_utils, "MIN_CHUNK_SIZE", 100)
+        monkeypatch.setattr(stream_utils, "MAX_CHUNK_SIZE", 100)
+        content = bytes(range(256)) * 16
+        path = tmp_path / "video.mp4"
+        path.write_bytes(content)
+        response = FileRangeResponse(str(path), 50, 1234)
+
+        messages = run_response(response, {"type": "http", "method": "GET"})
+
+        bodies = [m["body"] for m in messages[1:]]
+        assert len(bodies) == 13
+        assert b"".join(bodies) == content[50:1284]
+        assert all(m["more_body"] for m in messages[1:-1])
+        assert messages[-1]["more_body"] is False
+
+    def test_chunked_send_truncated_file(self, tmp_path, monkeypatch):
+        """Test response ends cleanly when the file is shorter than the window"""
+        monkeypatch.setattr(stream_utils, "CHUNK_SIZE", 100)
+        path = tmp_path / "video.mp4"
+        path.write_bytes(b"y" * 250)
+        response = FileRangeResponse(str(path), 0, 1000)
+
+        messages = run_response(response, {"type": "http", "method": "GET"})
+
+        assert b"".join(m["body"] for m in messages[1:]) == b"y" * 250
+        assert messages[-1]["more_body"] is False
+
+    def test_head_does_not_open_file(self, tmp_path):
+        """Test HEAD sends headers only, even if the file is missing"""
+        response = FileRangeResponse(str(tmp_path / "missing.mp4"), 0, 100)
+
+        messages = run_response(response, {"type": "http", "method": "HEAD"})
+
+        assert len(messages) == 2
+        assert messages[1]["body"] == b""
+        assert messages[1]["more_body"] is False
+
+
+class TestChunkSizer:
+    """ChunkSizer tests"""
+
+    def test_short_range_single_read(self):
+        sizer = ChunkSizer(2048)
+
+        assert sizer.next_size(2048) == 2048
+
+    def test_medium_range_single_read(self):
+        length = stream_utils.MAX_CHUNK_SIZE
+
+        assert ChunkSizer(length).next_size(length) == length
+
+    def test_long_range_starts_at_default(self):
+        sizer = ChunkSizer(400 * 1024 * 1024)
+
+        assert sizer.next_size(400 * 1024 * 1024) == stream_utils.CHUNK_SIZE
+
+    def test_fast_client_grows_chunks(self):
+        sizer = ChunkSizer(400 * 1024 * 1024)
+        sizer.record(1024 * 1024, 0.001)  # ~1GB/s
+
+        assert sizer.next_size(400 * 1024 * 1024) == stream_utils.MAX_CHUNK_SIZE
+
+    def test_slow_client_shrinks_chunks(self):
+        sizer = ChunkSizer(400 * 1024 * 1024)
+        sizer.record(1024 * 1024, 4.0)  # 256KB/s
+
+        size = sizer.next_size(400 * 1024 * 1024)
+        assert size == 64 * 1024
+        assert size % 4096 == 0
+
+    def test_rate_is_smoothed(self):
+        sizer = ChunkSizer(400 * 1024 * 1024)
+        sizer.record(1000, 1.0)
+        sizer.record(2000, 1.0)
+
+        assert sizer.rate == pytest.approx(0.3 * 2000 + 0.7 * 1000)
+
+    def test_no_tiny_tail(self):
+        sizer = ChunkSizer(400 * 1024 * 1024)
+        remaining = stream_utils.CHUNK_SIZE + 1000
+
+        assert sizer.next_size(remaining) == remaining
+
+
+@pytest.mark.skipif(not hasattr(os, "posix_fadvise"), reason="posix_fadvise not available")
+class TestFadviseHints:
+    """posix_fadvise hints issued while streaming"""
+
+    @pytest.fixture
+    def advice_log(self, monkeypatch):
+        calls = []
+        original = os.posix_fadvise
+
+        def record(fd, offset, length, advice):
+            calls.append((offset, length, advice))
+            return original(fd, offset, length, advice)
+
+        monkeypatch.setattr(os, "posix_fadvise", record)
+        monkeypatch.setattr(stream_utils, "CHUNK_SIZE", 1000)
+        monkeypatch.setattr(stream_utils, "MIN_CHUNK_SIZE", 1000)
+        monkeypatch.setattr(stream_utils, "MAX_CHUNK_SIZE", 1000)
+        return calls
+
+    def stream(self, tmp_path, length):
+        content = os.urandom(length)
+        path = tmp_path / "video.mp4"
+        path.write_bytes(content)
+        messages = run_response(FileRangeResponse(str(path), 0, length), {"type": "http", "method": "GET"})
+        assert b"".join(m["body"] for m in messages[1:]) == content
+
+    def test_sequential_and_willneed(self, tmp_path, advice_log, monkeypatch):
+        monkeypatch.setattr(stream_utils, "STREAM_DONTNEED_MIN_BYTES", 0)
+
+        self.stream(tmp_path, 5000)
+
+        # Hints run on the file I/O threads, so their order is not fixed
+        assert (0, 5000, os.POSIX_FADV_SEQUENTIAL) in advice_log
+        willneed = sorted((o, n) for o, n, a in advice_log if a == os.POSIX_FADV_WILLNEED)
+        assert willneed == [(1000, 1000), (2000, 1000), (3000, 1000), (4000, 1000)]
+        assert not any(a == os.POSIX_FADV_DONTNEED for _, _, a in advice_log)
+
+    def test_dontneed_for_large_ranges(self, tmp_path, advice_log, monkeypatch):
+        monkeypatch.setattr(stream_utils, "STREAM_DONTNEED_MIN_BYTES", 4000)
+
+        self.stream(tmp_path, 5000)
+
+        dontneed = sorted((o, n) for o, n, a in advice_log if a == os.POSIX_FADV_DONTNEED)
+        assert dontneed
+        assert all(n == 1000 and o % 1000 == 0 and o + n <= 5000 for o, n in dontneed)
+
+    def test_no_hints_for_single_chunk(self, tmp_path, advice_log):
+        self.stream(tmp_path, 800)
+
+        assert advice_log == []
+
+    def test_disabled(self, tmp_path, advice_log, monkeypatch):
+        monkeypatch.setattr(stream_utils, "STREAM_FADVISE", False)
+
+        self.stream(tmp_path, 5000)
+
+        assert advice_log == []
@@ -0,0 +1,314 @@
+"""
+Tests for signed stream tickets
+- POST /api/stream/{post_id}/ticket
+- Ticket-authenticated streaming without DB round trips, even on a metadata cache miss
+- Expiry, tampering and revocation (shared between workers through the database)
+"""
+
+import pytest
+from sqlalchemy import event
+
+from app.metadata_cache import metadata_cache
+from app.models import User, PostPermission, TicketRevocation
+from app.stream_tickets import (
+    TicketRevocations,
+    InvalidStreamTicket,
+    create_stream_ticket,
+    ticket_revocations,
+    verify_stream_ticket,
+)
+
+from test.conftest import test_engine
+
+
+@pytest.fixture
+def other_user(test_db):
+    """A second user without access to the test post"""
+    user = User(email="other@example.com", hashed_password="x", full_name="Other")
+    test_db.add(user)
+    test_db.commit()
+    test_db.refresh(user)
+    return user
+
+
+class TestStreamTicketFunctions:
+    """create_stream_ticket / verify_stream_ticket tests"""
+
+    def test_roundtrip(self):
+        ticket, _ = create_stream_ticket(7, 3)
+        assert verify_stream_ticket(ticket, 3).user_id == 7
+
+    def test_wrong_post(self):
+        ticket, _ = create_stream_ticket(7, 3)
+        with pytest.raises(InvalidStreamTicket):
+            verify_stream_ticket(ticket, 4)
+
+    def test_expired(self):
+        ticket, _ = create_stream_ticket(7, 3, ttl=-1)
+        with pytest.raises(InvalidStreamTicket):
+            verify_stream_ticket(ticket, 3)
+
+    def test_tampered_payload(self):
+        ticket, _ = create_stream_ticket(7, 3)
+        tampered = "8" + ticket[1:]
+        with pytest.raises(InvalidStreamTicket):
+            verify_stream_ticket(tampered, 3)
+
+    @pytest.mark.parametrize("ticket", ["", "garbage", "1.2.3.sig", "a.b.c.d.sig"])
+    def test_malformed(self, ticket):
+        with pytest.raises(InvalidStreamTicket):
+            verify_stream_ticket(ticket, 2)
+
+    def test_file_claim_roundtrip(self):
+        file = {"f": "abc.mp4", "s": 100, "r": []}
+        ticket, _ = create_stream_ticket(7, 3, file)
+
+        assert verify_stream_ticket(ticket, 3) == (7, file)
+
+    def test_tampered_file_claim(self):
+        ticket, _ = create_stream_ticket(7, 3, {"f": "abc.mp4"})
+        forged, _ = create_stream_ticket(7, 3, {"f": "other.mp4"})
+        signature = ticket.rpartition(".")[2]
+        forged_payload = forged.rpartition(".")[0]
+
+        with pytest.raises(InvalidStreamTicket):
+            verify_stream_ticket(f"{forged_payload}.{signature}", 3)
+
+    def test_revoke_grant_only_affects_that_user(self):
+        mine, _ = create_stream_ticket(7, 3)
+        theirs, _ = create_stream_ticket(8, 3)
+        ticket_revocations.revoke_grant(3, 7)
+
+        with pytest.raises(InvalidStreamTicket):
+            verify_stream_ticket(mine, 3)
+        assert verify_stream_ticket(theirs, 3).user_id == 8
+
+    def test_ticket_issued_after_revocation_is_valid(self, monkeypatch):
+        now = [1_000_000]
+        monkeypatch.setattr("app.stream_tickets._now_ms", lambda: now[0])
+        ticket_revocations.revoke_post(3)
+        now[0] += 1
+        ticket, _ = create_stream_ticket(7, 3)
+
+        assert verify_stream_ticket(ticket, 3).user_id == 7
+
+
+class TestStreamTicketEndpoint:
+    """Tests for ticket issuing and ticket-authenticated streaming"""
+
+    def issue(self, client, post_id):
+        response = client.post(f"/api/stream/{post_id}/ticket")
+        assert response.status_code == 200
+        return response.json()
+
+    def test_issue_ticket(self, authenticated_client, test_post):
+        """Test ticket endpoint returns a ticket and stream URL"""
+        data = self.issue(authenticated_client, test_post.id)
+
+        assert data["ticket"]
+        assert data["stream_url"] == f"/api/stream/{test_post.id}?ticket={data['ticket']}"
+        assert "expires_at" in data
+
+    def test_issue_ticket_requires_access(self, client, test_post, other_user):
+        """Test users without access cannot obtain a ticket"""
+        from app.auth_utils import create_access_token
+        client.cookies.set("access_token", create_access_token(data={"sub": str(other_user.id)}))
+
+        response = client.post(f"/api/stream/{test_post.id}/ticket")
+
+        assert response.status_code == 403
+
+    def test_stream_with_ticket_without_cookie(self, authenticated_client, test_post):
+        """Test ticket alone authorizes range requests"""
+        ticket = self.issue(authenticated_client, test_post.id)["ticket"]
+        authenticated_client.cookies.clear()
+
+        response = authenticated_client.get(
+            f"/api/stream/{test_post.id}",
+            params={"ticket": ticket},
+            headers={"Range": "bytes=0-99"}
+        )
+
+        assert response.status_code == 206
+        assert response.content == test_post.content[:100]
+
+    def test_ticket_range_requests_skip_database(self, authenticated_client, test_post, monkeypatch):
+        """Test repeat ticket range requests run no SQL once metadata is cached"""
+        ticket = self.issue(authenticated_client, test_post.id)["ticket"]
+        authenticated_client.get(f"/api/stream/{test_post.id}", params={"ticket": ticket})
+        monkeypatch.setattr(ticket_revocations, "sync_interval", 60)
+
+        statements = []
+
+        def record(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(test_engine, "before_cursor_execute", record)
+        try:
+            for start in (0, 1000, 2000):
+                response = authenticated_client.get(
+                    f"/api/stream/{test_post.id}",
+                    params={"ticket": ticket},
+                    headers={"Range": f"bytes={start}-{start + 99}"}
+                )
+                assert response.status_code == 206
+        finally:
+            event.remove(test_engine, "before_cursor_execute", record)
+
+        assert statements == []
+
+    def test_invalid_ticket_returns_401(self, client, test_post):
+        """Test bad ticket is rejected"""
+        response = client.get(f"/api/stream/{test_post.id}", params={"ticket": "1.2.3.4.bad"})
+
+        assert response.status_code == 401
+
+    def test_ticket_for_other_post_returns_401(self, authenticated_client, test_post):
+        """Test ticket cannot be reused for another post"""
+        ticket = self.issue(authenticated_client, test_post.id)["ticket"]
+
+        response = authenticated_client.get(
+            f"/api/stream/{test_post.id + 1}", params={"ticket": ticket}
+        )
+
+        assert response.status_code == 401
+
+    def test_deleting_permission_revokes_ticket(
+        self, client, test_post, other_user, test_db, auth_token
+    ):
+        """Test removing a granted permission revokes the user's tickets"""
+        from app.auth_utils import create_access_token
+
+        test_db.add(PostPermission(post_id=test_post.id, user_id=other_user.id))
+        test_db.commit()
+        client.cookies.set("access_token", create_access_token(data={"sub": str(other_user.id)}))
+        ticket = self.issue(client, test_post.id)["ticket"]
+
+        # Owner removes the permission
+        client.cookies.set("access_token", auth_token)
+        response = client.delete(f"/api/posts/{test_post.id}/permissions/{other_user.id}")
+        assert response.status_code == 200
+
+        client.cookies.clear()
+        response = client.get(f"/api/stream/{test_post.id}", params={"ticket": ticket})
+        assert response.status_code == 401
+
+    def test_making_post_private_revokes_tickets(
+        self, client, test_post, other_user, test_db, auth_token
+    ):
+        """Test switching a public post to private revokes issued tickets"""
+        from app.auth_utils import create_access_token
+
+        test_post.is_public = True
+        test_db.commit()
+        client.cookies.set("access_token", create_access_token(data={"sub": str(other_user.id)}))
+        ticket = self.issue(client, test_post.id)["ticket"]
+
+        client.cookies.set("access_token", auth_token)
+        response = client.put(f"/api/posts/{test_post.id}", json={"is_public": False})
+        assert response.status_code == 200
+
+        client.cookies.clear()
+        response = client.get(f"/api/stream/{test_post.id}", params={"ticket": ticket})
+        assert response.status_code == 401
+
+
+class TestSharedRevocations:
+    """Revocations recorded in the database reach other workers"""
+
+    def test_other_worker_sees_revocation(self, test_db):
+        other_worker = TicketRevocations(ttl=300, sync_interval=1)
+        ticket, _ = create_stream_ticket(7, 3)
+
+        ticket_revocations.revoke_grant(3, 7, test_db)
+        other_worker.sync(test_db)
+
+        assert other_worker.is_revoked(7, 3, issued_at=int(ticket.split(".")[3]))
+        assert not other_worker.is_revoked(8, 3, issued_at=int(ticket.split(".")[3]))
+
+    def test_sync_reads_only_new_rows_once_per_interval(self, test_db):
+        worker = TicketRevocations(ttl=300, sync_interval=60)
+        worker.sync(test_db)
+        ticket_revocations.revoke_post(3, test_db)
+        statements = []
+
+        def record(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(test_engine, "before_cursor_execute", record)
+        try:
+            worker.sync(test_db)
+        finally:
+            event.remove(test_engine, "before_cursor_execute", record)
+
+        assert statements == []
+        assert not worker.is_revoked(7, 3, issued_at=0)
+        worker.sync(test_db, force=True)
+        assert worker.is_revoked(7, 3, issued_at=0)
+
+    def test_old_rows_pruned(self, test_db, monkeypatch):
+        now = [1_000_000_000]
+        monkeypatch.setattr("app.stream_tickets._now_ms", lambda: now[0])
+        ticket_revocations.revoke_post(3, test_db)
+        now[0] += ticket_revocations.ttl_ms + 1
+        ticket_revocations.revoke_post(4, test_db)
+
+        assert [row.post_id for row in test_db.query(TicketRevocation)] == [4]
+
+
+class TestTicketFileClaim:
+    """Ticket-authenticated streaming from the signed file claim"""
+
+    def issue(self, client, post_id):
+        return client.post(f"/api/stream/{post_id}/ticket").json()["ticket"]
+
+    def test_cache_miss_skips_database(self, authenticated_client, test_post, test_db, monkeypatch):
+        ticket = self.issue(authenticated_client, test_post.id)
+        authenticated_client.cookies.clear()
+        metadata_cache.clear()
+        # Revocations were just synced; the next sync is a minute away
+        monkeypatch.setattr(ticket_revocations, "sync_interval", 60)
+        ticket_revocations.sync(test_db, force=True)
+        statements = []
+
+        def record(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(test_engine, "before_cursor_execute", record)
+        try:
+            response = authenticated_client.get(
+                f"/api/stream/{test_post.id}", params={"ticket": ticket}, headers={"Range": "bytes=0-99"}
+            )
+        finally:
+            event.remove(test_engine, "before_cursor_execute", record)
+
+        assert response.status_code == 206
+        assert response.content == test_post.content[:100]
+        assert response.headers["content-range"] == f"bytes 0-99/{len(test_post.content)}"
+        assert statements == []
+
+    def test_ticket_revoked_on_another_worker(self, authenticated_client, test_post, test_db):
+        ticket = self.issue(authenticated_client, test_post.id)
+        # Another worker revoked the post: only the database row exists here
+        TicketRevocations(ttl=300, sync_interval=1).revoke_post(test_post.id, test_db)
+        ticket_revocations.clear()
+
+        response = authenticated_client.get(f"/api/stream/{test_post.id}", params={"ticket": ticket})
+
+        assert response.status_code == 401
+        assert response.json()["detail"] == "Invalid stream ticket: Ticket revoked"
+
+    def test_deactivating_user_revokes_on_other_workers(self, admin_client, test_user, test_db, test_post,
+                                                        auth_token):
+        admin_token = admin_client.cookies.get("access_token")
+        admin_client.cookies.set("access_token", auth_token)
+        ticket = self.issue(admin_client, test_post.id)
+        admin_client.cookies.set("access_token", admin_token)
+
+        assert admin_client.put(f"/api/admin/users/{test_user.id}", json={"is_active": False}).status_code == 200
+        ticket_revocations.clear()  # this worker never saw the revocation in memory
+        admin_client.cookies.clear()
+
+        response = admin_client.get(f"/api/stream/{test_post.id}", params={"ticket": ticket})
+
+        assert response.status_code == 401
@@ -0,0 +1,172 @@
+"""
+Tests for poster thumbnails
+- GET /api/posts/{post_id}/thumbnail (access rules, size selection, caching)
+- Thumbnail width parsing
+- Derivative cleanup on post deletion
+- ffmpeg generation (skipped when ffmpeg is not installed)
+"""
+
+import os
+
+import pytest
+
+from app import media_utils
+from app.auth_utils import create_access_token
+from app.media_utils import get_thumbnail_path, get_thumbnails_dir, parse_thumbnail_widths
+from app.models import Post, User
+from app.routers.posts import select_thumbnail_width
+
+
+@pytest.fixture
+def thumbnail_post(test_post):
+    """Test post with hand-made thumbnails for the default widths"""
+    os.makedirs(get_thumbnails_dir(test_post.video_filename))
+    test_post.thumbnails = {}
+    for width in (160, 320, 640):
+        data = b"\xff\xd8" + bytes([width % 256]) * width + b"\xff\xd9"
+        with open(get_thumbnail_path(test_post.video_filename, width), "wb") as f:
+            f.write(data)
+        test_post.thumbnails[width] = data
+    return test_post
+
+
+@pytest.fixture
+def other_client(client, test_db):
+    """Client logged in as a user without access to the test post"""
+    user = User(email="other@example.com", hashed_password="x", full_name="Other")
+    test_db.add(user)
+    test_db.commit()
+    client.cookies.set("access_token", create_access_token(data={"sub": str(user.id)}))
+    return client
+
+
+class TestThumbnailWidths:
+    """Width parsing and selection tests"""
+
+    def test_parse(self):
+        assert parse_thumbnail_widths("640, 160,320,160") == [160, 320, 640]
+
+    @pytest.mark.parametrize("value", ["", "abc", "0,320"])
+    def test_parse_invalid(self, value):
+        with pytest.raises(ValueError):
+            parse_thumbnail_widths(value)
+
+    @pytest.mark.parametrize("requested, expected", [
+        (None, 320), (100, 160), (160, 160), (200, 320), (641, 640),
+    ])
+    def test_select(self, requested, expected):
+        assert select_thumbnail_width([160, 320, 640], requested) == expected
+
+
+class TestThumbnailEndpoint:
+    """GET /api/posts/{post_id}/thumbnail tests"""
+
+    def test_default_size(self, authenticated_client, thumbnail_post):
+        response = authenticated_client.get(f"/api/posts/{thumbnail_post.id}/thumbnail")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "image/jpeg"
+        assert response.content == thumbnail_post.thumbnails[320]
+
+    def test_requested_size(self, authenticated_client, thumbnail_post):
+        response = authenticated_client.get(
+            f"/api/posts/{thumbnail_post.id}/thumbnail", params={"size": 150}
+        )
+
+        assert response.content == thumbnail_post.thumbnails[160]
+
+    def test_cache_headers(self, authenticated_client, thumbnail_post):
+        response = authenticated_client.get(f"/api/posts/{thumbnail_post.id}/thumbnail")
+
+        assert response.headers["etag"].startswith('"')
+        assert response.headers["cache-control"] == "private, max-age=31536000, immutable"
+
+    def test_public_post_is_shared_cacheable(self, authenticated_client, thumbnail_post, test_db):
+        test_db.query(Post).filter(Post.id == thumbnail_post.id).update({"is_public": True})
+        test_db.commit()
+
+        response = authenticated_client.get(f"/api/posts/{thumbnail_post.id}/thumbnail")
+
+        assert response.headers["cache-control"].startswith("public,")
+
+    def test_not_modified(self, authenticated_client, thumbnail_post):
+        url = f"/api/posts/{thumbnail_post.id}/thumbnail"
+        etag = authenticated_client.get(url).headers["etag"]
+
+        response = authenticated_client.get(url, headers={"If-None-Match": etag})
+
+        assert response.status_code == 304
+        assert response.content == b""
+
+    def test_not_generated(self, authenticated_client, test_post):
+        response = authenticated_client.get(f"/api/posts/{test_post.id}/thumbnail")
+
+        assert response.status_code == 404
+
+    def test_requires_login(self, client, thumbnail_post):
+        response = client.get(f"/api/posts/{thumbnail_post.id}/thumbnail")
+
+        assert response.status_code == 401
+
+    def test_private_post_forbidden(self, other_client, thumbnail_post):
+        response = other_client.get(f"/api/posts/{thumbnail_post.id}/thumbnail")
+
+        assert response.status_code == 403
+
+    def test_public_post_visible_to_others(self, other_client, thumbnail_post, test_db):
+        test_db.query(Post).filter(Post.id == thumbnail_post.id).update({"is_public": True})
+        test_db.commit()
+
+        response = other_client.get(f"/api/posts/{thumbnail_post.id}/thumbnail")
+
+        assert response.status_code == 200
+
+    def test_delete_post_removes_thumbnails(self, authenticated_client, thumbnail_post):
+        thumbnails_dir = get_thumbnails_dir(thumbnail_post.video_filename)
+
+        authenticated_client.delete(f"/api/posts/{thumbnail_post.id}")
+
+        assert not os.path.exists(thumbnails_dir)
+
+    def test_upload_without_ffmpeg(self, authenticated_client, upload_dir, monkeypatch):
+        monkeypatch.setattr(media_utils, "ffmpeg_available", lambda: False)
+
+        response = authenticated_client.post(
+            "/api/posts",
+            data={"title": "No ffmpeg", "is_public": "false"},
+            files={"video": ("clip.mp4", b"fake video content", "video/mp4")}
+        )
+
+        assert response.status_code == 201
+        thumbnail = authenticated_client.get(f"/api/posts/{response.json()['id']}/thumbnail")
+        assert thumbnail.status_code == 404
+
+
+@pytest.mark.skipif(not media_utils.ffmpeg_available(), reason="ffmpeg is not installed")
+class TestThumbnailGeneration:
+    """ffmpeg thumbnail generation tests"""
+
+    def test_generate_thumbnails(self, tmp_path):
+        source = tmp_path / "source.mp4"
+        media_utils.run_ffmpeg([
+            "-f", "lavfi", "-i", "testsrc=duration=2:size=640x360:rate=25",
+            "-c:v", "libx264", str(source),
+        ])
+        output_dir = tmp_path / "out" / "thumbnails"
+
+        media_utils.generate_thumbnails(str(source), str(output_dir), [160, 320])
+
+        assert sorted(os.listdir(output_dir)) == ["160.jpg", "320.jpg"]
+        assert (output_dir / "160.jpg").read_bytes()[:2] == b"\xff\xd8"
+
+    def test_short_video_uses_first_frame(self, tmp_path):
+        source = tmp_path / "short.mp4"
+        media_utils.run_ffmpeg([
+            "-f", "lavfi", "-i", "testsrc=duration=0.2:size=320x240:rate=25",
+            "-c:v", "libx264", str(source),
+        ])
+        output_dir = tmp_path / "out" / "thumbnails"
+
+        media_utils.generate_thumbnails(str(source), str(output_dir), [160], seek_seconds=5)
+
+        assert (output_dir / "160.jpg").exists()
@@ -0,0 +1,272 @@
+"""
+Tests for streaming uploads
+- POST /api/posts parses the multipart body as it arrives
+- The video is written once, into a temp file in the upload directory, then renamed
+- Size and extension limits are enforced before the rest of the body is read
+"""
+
+import asyncio
+import hashlib
+import os
+import threading
+import time
+
+import pytest
+from fastapi import HTTPException
+from fastapi.exceptions import RequestValidationError
+from starlette.requests import ClientDisconnect, Request
+
+from app import upload_utils
+from app.models import Post
+from app.routers import posts
+from app.upload_utils import TEMP_PREFIX, receive_upload
+
+BOUNDARY = "test-boundary"
+
+
+def multipart_body(fields: dict, filename: str | None = "clip.mp4", content: bytes = b"") -> bytes:
+    parts = [
+        f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode()
+        for name, value in fields.items()
+    ]
+    if filename is not None:
+        parts.append(
+            f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="video"; filename="{filename}"\r\n'
+            f"Content-Type: video/mp4\r\n\r\n".encode() + content + b"\r\n"
+        )
+    return b"".join(parts) + f"--{BOUNDARY}--\r\n".encode()
+
+
+class StreamedRequest:
+    """ASGI request whose body arrives in chunks; counts how many chunks were read"""
+
+    def __init__(self, body: bytes, chunk_size: int = 1024, content_length: int | None = None,
+                 disconnect_after: int | None = None):
+        self.chunks = [body[i:i + chunk_size] for i in range(0, len(body), chunk_size)]
+        if disconnect_after is not None:
+            self.chunks = self.chunks[:disconnect_after]
+        self.disconnect = disconnect_after is not None
+        self.received = 0
+        headers = [(b"content-type", f"multipart/form-data; boundary={BOUNDARY}".encode())]
+        if content_length is not None:
+            headers.append((b"content-length", str(content_length).encode()))
+        self.request = Request({"type": "http", "method": "POST", "headers": headers}, self.receive)
+
+    async def receive(self):
+        index = self.received
+        self.received += 1
+        if index >= len(self.chunks):
+            return {"type": "http.disconnect"}
+        return {
+            "type": "http.request",
+            "body": self.chunks[index],
+            "more_body": self.disconnect or index + 1 < len(self.chunks),
+        }
+
+
+def receive(streamed: StreamedRequest, upload_dir, max_file_size: int = 1024 * 1024):
+    return asyncio.run(receive_upload(
+        streamed.request,
+        file_field="video",
+        upload_dir=str(upload_dir),
+        max_file_size=max_file_size,
+        validate_filename=posts.validate_file_extension,
+        required_fields=("title",),
+    ))
+
+
+class TestReceiveUpload:
+    """receive_upload tests"""
+
+    def test_fields_and_file(self, tmp_path):
+        content = os.urandom(10_000)
+        streamed = StreamedRequest(multipart_body({"title": "제목", "description": "desc"}, content=content))
+
+        upload = receive(streamed, tmp_path)
+
+        assert upload.fields == {"title": "제목", "description": "desc"}
+        assert upload.filename == "clip.mp4"
+        assert upload.size == len(content)
+        assert upload.sha256 == hashlib.sha256(content).hexdigest()
+        assert os.path.dirname(upload.temp_path) == str(tmp_path)
+        assert os.path.basename(upload.temp_path).startswith(TEMP_PREFIX)
+        assert upload.temp_path.endswith(".mp4")
+        with open(upload.temp_path, "rb") as f:
+            assert f.read() == content
+
+    def test_writes_in_batches(self, tmp_path, monkeypatch):
+        writes = []
+        original = upload_utils._write_all
+        monkeypatch.setattr(upload_utils, "UPLOAD_WRITE_BYTES", 4096)
+        monkeypatch.setattr(upload_utils, "_write_all", lambda fd, data: (writes.append(len(data)), original(fd, data)))
+
+        upload = receive(StreamedRequest(multipart_body({"title": "t"}, content=os.urandom(20_000))), tmp_path)
+
+        assert sum(writes) == upload.size
+        assert max(writes) < 4096 + 1024
+
+    def test_stops_reading_when_file_too_large(self, tmp_path):
+        streamed = StreamedRequest(multipart_body({"title": "t"}, content=os.urandom(100_000)))
+
+        with pytest.raises(HTTPException) as exc_info:
+            receive(streamed, tmp_path, max_file_size=4096)
+
+        assert exc_info.value.status_code == 400
+        assert "File too large" in exc_info.value.detail
+        assert streamed.received < 10
+        assert os.listdir(tmp_path) == []
+
+    def test_rejects_large_content_length_before_reading(self, tmp_path):
+        streamed = StreamedRequest(multipart_body({"title": "t"}), content_length=10 * 1024 * 1024)
+
+        with pytest.raises(HTTPException):
+            receive(streamed, tmp_path, max_file_size=1024)
+
+        assert streamed.received == 0
+
+    def test_rejects_extension_before_file_data(self, tmp_path):
+        streamed = StreamedRequest(multipart_body({"title": "t"}, filename="clip.exe", content=os.urandom(100_000)))
+
+        with pytest.raises(HTTPException) as exc_info:
+            receive(streamed, tmp_path)
+
+        assert "extension" in exc_info.value.detail
+        assert streamed.received < 10
+        assert os.listdir(tmp_path) == []
+
+    def test_form_fields_limited(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(upload_utils, "UPLOAD_FORM_MAX_BYTES", 1024)
+
+        with pytest.raises(HTTPException) as exc_info:
+            receive(StreamedRequest(multipart_body({"title": "t", "description": "x" * 4096})), tmp_path)
+
+        assert "Form fields too large" in exc_info.value.detail
+
+    def test_missing_fields(self, tmp_path):
+        with pytest.raises(RequestValidationError) as exc_info:
+            receive(StreamedRequest(multipart_body({"description": "d"}, filename=None)), tmp_path)
+
+        assert [error["loc"] for error in exc_info.value.errors()] == [("body", "title"), ("body", "video")]
+
+    def test_missing_title_removes_file(self, tmp_path):
+        with pytest.raises(RequestValidationError):
+            receive(StreamedRequest(multipart_body({}, content=b"data")), tmp_path)
+
+        assert os.listdir(tmp_path) == []
+
+    def test_second_file_rejected(self, tmp_path):
+        body = multipart_body({"title": "t"}, content=b"one")
+        body = body.replace(f"--{BOUNDARY}--\r\n".encode(), b"") + multipart_body({}, content=b"two")
+
+        with pytest.raises(HTTPException) as exc_info:
+            receive(StreamedRequest(body), tmp_path)
+
+        assert "Unexpected file field" in exc_info.value.detail
+        assert os.listdir(tmp_path) == []
+
+    def test_client_disconnect_removes_file(self, tmp_path):
+        body = multipart_body({"title": "t"}, content=os.urandom(10_000))
+
+        with pytest.raises(ClientDisconnect):
+            receive(StreamedRequest(body, disconnect_after=5), tmp_path)
+
+        assert os.listdir(tmp_path) == []
+
+    def test_cancel_waits_for_inflight_write(self, tmp_path, monkeypatch):
+        started, finished = threading.Event(), threading.Event()
+        errors = []
+        write_hashed = upload_utils._write_hashed
+
+        def slow_write(fd, data, digest):
+            started.set()
+            time.sleep(0.2)
+            try:
+                write_hashed(fd, data, digest)
+            except OSError as e:
+                errors.append(e)
+            finally:
+                finished.set()
+        monkeypatch.setattr(upload_utils, "_write_hashed", slow_write)
+        monkeypatch.setattr(upload_utils, "UPLOAD_WRITE_BYTES", 1024)
+        body = multipart_body({"title": "t"}, content=os.urandom(10_000))
+
+        async def cancel_mid_write():
+            task = asyncio.ensure_future(receive_upload(
+                StreamedRequest(body).request, file_field="video", upload_dir=str(tmp_path),
+                max_file_size=1024 * 1024, validate_filename=posts.validate_file_extension,
+            ))
+            while not started.is_set():
+                await asyncio.sleep(0.01)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+        asyncio.run(cancel_mid_write())
+
+        assert finished.wait(5)
+        assert errors == []
+        assert os.listdir(tmp_path) == []
+
+
+class TestCreatePostUpload:
+    """POST /api/posts streaming upload tests"""
+
+    def upload(self, client, content: bytes = b"video content", filename: str = "clip.mp4", **fields):
+        data = {"title": "Upload", "is_public": "false", **fields}
+        return client.post("/api/posts", data=data, files={"video": (filename, content, "video/mp4")})
+
+    def test_upload(self, authenticated_client, upload_dir, test_db):
+        content = os.urandom(256 * 1024)
+
+        response = self.upload(authenticated_client, content, description="Streamed", is_public="true")
+
+        assert response.status_code == 201
+        post = response.json()
+        assert post["title"] == "Upload"
+        assert post["description"] == "Streamed"
+        assert post["is_public"] is True
+        assert post["video_size"] == len(content)
+        assert os.listdir(upload_dir) == [post["video_filename"]]
+        assert (upload_dir / post["video_filename"]).read_bytes() == content
+
+    def test_too_large(self, authenticated_client, upload_dir, test_db, monkeypatch):
+        monkeypatch.setattr(posts, "MAX_FILE_SIZE", 1024)
+
+        response = self.upload(authenticated_client, os.urandom(4096))
+
+        assert response.status_code == 400
+        assert "File too large" in response.json()["detail"]
+        assert os.listdir(upload_dir) == []
+        assert test_db.query(Post).count() == 0
+
+    def test_extension_not_allowed(self, authenticated_client, upload_dir):
+        response = self.upload(authenticated_client, filename="clip.avi")
+
+        assert response.status_code == 400
+        assert os.listdir(upload_dir) == []
+
+    def test_missing_title(self, authenticated_client, upload_dir):
+        response = authenticated_client.post(
+            "/api/posts", files={"video": ("clip.mp4", b"data", "video/mp4")}
+        )
+
+        assert response.status_code == 422
+        assert response.json()["detail"][0]["loc"] == ["body", "title"]
+        assert os.listdir(upload_dir) == []
+
+    def test_not_multipart(self, authenticated_client, upload_dir):
+        response = authenticated_client.post("/api/posts", json={"title": "Upload"})
+
+        assert response.status_code == 400
+
+    def test_requires_login(self, client, upload_dir):
+        response = self.upload(client)
+
+        assert response.status_code == 401
+        assert os.listdir(upload_dir) == []
+
+    def test_openapi_describes_form(self, client):
+        schema = client.get("/openapi.json").json()
+
+        body = schema["paths"]["/api/posts"]["post"]["requestBody"]["content"]["multipart/form-data"]
+        assert body["schema"]["properties"]["video"]["format"] == "binary"
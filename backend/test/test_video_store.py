@@ -0,0 +1,336 @@
+"""
+Tests for content-addressed video storage
+- Uploads are stored as <sha256><ext>; identical uploads share one file, whatever the extension
+- video_blobs.ref_count tracks posts per file; the file goes away after the last post's delete commits
+- Duplicate uploads skip per-file post-processing and share renditions
+- GET /api/admin/storage reports bytes saved
+"""
+
+import asyncio
+import hashlib
+import os
+
+import httpx
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.auth_utils import create_access_token, hash_password
+from app.database import Base, get_db
+from app.main import app
+from app.media_utils import RenditionSpec, get_derivatives_dir, save_renditions, share_renditions
+from app.models import Post, PostRendition, ProcessingJob, User, VideoBlob
+from app.routers import posts
+from app.video_store import (
+    blob_filename, discard_unreferenced_video, file_sha256, release_video, store_video
+)
+
+from test.test_resumable_uploads import CHUNK, create, put_chunk
+
+
+def upload_post(client, content: bytes, filename: str = "clip.mp4"):
+    return client.post(
+        "/api/posts", data={"title": "Upload"}, files={"video": (filename, content, "video/mp4")}
+    )
+
+
+def sha256(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+
+def fail_commit(session):
+    raise OperationalError("COMMIT", None, Exception("disk I/O error"))
+
+
+@pytest.fixture
+def content():
+    return os.urandom(CHUNK * 3 + 100)
+
+
+class TestStoreUpload:
+    """POST /api/posts content addressing tests"""
+
+    def test_named_by_content_hash(self, authenticated_client, upload_dir, content, test_db):
+        post = upload_post(authenticated_client, content).json()
+
+        assert post["video_filename"] == f"{sha256(content)}.mp4"
+        assert (upload_dir / post["video_filename"]).read_bytes() == content
+        blob = test_db.query(VideoBlob).one()
+        assert (blob.sha256, blob.size, blob.ref_count) == (sha256(content), len(content), 1)
+
+    def test_identical_upload_shares_file(self, authenticated_client, upload_dir, content, test_db):
+        first = upload_post(authenticated_client, content, filename="a.mp4").json()
+        second = upload_post(authenticated_client, content, filename="b.MP4").json()
+
+        assert second["id"] != first["id"]
+        assert second["video_filename"] == first["video_filename"]
+        assert second["video_original_name"] == "b.MP4"
+        assert second["video_size"] == len(content)
+        assert os.listdir(upload_dir) == [first["video_filename"]]
+        assert test_db.query(VideoBlob).one().ref_count == 2
+
+    def test_different_extension_shares_file(self, authenticated_client, upload_dir, content, test_db):
+        first = upload_post(authenticated_client, content, filename="a.mp4").json()
+        second = upload_post(authenticated_client, content, filename="a.mov").json()
+
+        assert second["video_filename"] == first["video_filename"] == f"{sha256(content)}.mp4"
+        assert second["video_original_name"] == "a.mov"
+        assert os.listdir(upload_dir) == [first["video_filename"]]
+        assert test_db.query(VideoBlob).one().ref_count == 2
+
+    def test_duplicate_skips_file_processing(self, authenticated_client, upload_dir, content, test_db, monkeypatch):
+        monkeypatch.setattr(posts, "THUMBNAILS_ENABLED", False)
+        monkeypatch.setattr(posts, "SPRITES_ENABLED", False)
+        monkeypatch.setattr(posts, "HLS_ENABLED", False)
+        monkeypatch.setattr(posts, "RENDITIONS_ENABLED", False)
+
+        first = upload_post(authenticated_client, content).json()
+        second = upload_post(authenticated_client, content).json()
+
+        jobs = test_db.query(ProcessingJob.post_id, ProcessingJob.kind).all()
+        assert jobs == [(first["id"], "prepare")]
+        assert second["id"] != first["id"]
+
+    def test_resumable_upload_deduplicated(self, authenticated_client, upload_dir, content, test_db, monkeypatch):
+        from app.routers import uploads
+        monkeypatch.setattr(uploads, "UPLOAD_MIN_CHUNK_SIZE", CHUNK)
+        streamed = upload_post(authenticated_client, content).json()
+        upload_id = create(authenticated_client, len(content)).json()["id"]
+        for index in range(4):
+            put_chunk(authenticated_client, upload_id, index, content)
+
+        completed = authenticated_client.post(f"/api/uploads/{upload_id}/complete").json()
+
+        assert completed["video_filename"] == streamed["video_filename"]
+        assert os.listdir(upload_dir) == [streamed["video_filename"]]
+        assert test_db.query(VideoBlob).one().ref_count == 2
+
+    def test_failed_save_removes_published_file(self, authenticated_client, upload_dir, content, test_db, monkeypatch):
+        kept = upload_post(authenticated_client, b"kept").json()
+        def fail(post, deduplicated=False):
+            raise RuntimeError("scheduling failed")
+        monkeypatch.setattr(posts, "schedule_post_processing", fail)
+
+        assert upload_post(authenticated_client, content).status_code == 500
+        assert upload_post(authenticated_client, b"kept").status_code == 500
+
+        assert os.listdir(upload_dir) == [kept["video_filename"]]
+        assert test_db.query(VideoBlob).one().ref_count == 1
+
+    def test_missing_file_is_restored(self, test_db, upload_dir, content):
+        # Row left behind while the last reference was being deleted
+        filename = blob_filename(sha256(content), "clip.mp4")
+        test_db.add(VideoBlob(filename=filename, sha256=sha256(content), size=len(content), ref_count=1))
+        test_db.commit()
+        temp = upload_dir / ".upload-restore.mp4"
+        temp.write_bytes(content)
+
+        stored = store_video(test_db, str(temp), filename, sha256(content), synced=False)
+        test_db.commit()
+
+        assert stored.deduplicated is False
+        assert (upload_dir / filename).read_bytes() == content
+        assert not temp.exists()
+        assert test_db.query(VideoBlob).one().ref_count == 2
+
+    def test_file_sha256(self, tmp_path, content):
+        path = tmp_path / "video.mp4"
+        path.write_bytes(content)
+
+        assert file_sha256(str(path)) == sha256(content)
+
+
+class TestConcurrentUploads:
+    """Concurrent uploads against a file-backed database (SQLite locks the whole file on write)"""
+
+    @pytest.fixture
+    def file_db(self, tmp_path, monkeypatch):
+        engine = create_engine(f"sqlite:///{tmp_path / 'app.db'}", connect_args={"check_same_thread": False})
+        Base.metadata.create_all(bind=engine)
+        session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+        def get_file_db():
+            db = session_factory()
+            try:
+                yield db
+            finally:
+                db.close()
+        monkeypatch.setitem(app.dependency_overrides, get_db, get_file_db)
+        yield session_factory
+        engine.dispose()
+
+    def test_uploads_do_not_hold_lock_across_awaits(self, file_db, upload_dir):
+        with file_db() as db:
+            user = User(email="writer@example.com", hashed_password=hash_password("password123"), is_active=True)
+            db.add(user)
+            db.commit()
+            token = create_access_token(data={"sub": str(user.id), "email": user.email})
+        contents = [os.urandom(CHUNK) for _ in range(3)] + [b"shared"] * 3
+
+        async def upload_all():
+            async with httpx.AsyncClient(
+                transport=httpx.ASGITransport(app=app), base_url="http://test", cookies={"access_token": token}
+            ) as client:
+                return await asyncio.gather(*(
+                    client.post("/api/posts", data={"title": "Upload"},
+                                files={"video": ("clip.mp4", content, "video/mp4")})
+                    for content in contents
+                ))
+
+        responses = asyncio.run(upload_all())
+
+        assert [response.status_code for response in responses] == [201] * len(contents)
+        with file_db() as db:
+            assert db.query(Post).count() == len(contents)
+            assert sorted(blob.ref_count for blob in db.query(VideoBlob)) == [1, 1, 1, 3]
+
+
+class TestReleaseVideo:
+    """Reference counting on delete tests"""
+
+    def test_file_kept_until_last_post_deleted(self, authenticated_client, upload_dir, content, test_db):
+        first = upload_post(authenticated_client, content).json()
+        second = upload_post(authenticated_client, content).json()
+        derivatives = get_derivatives_dir(first["video_filename"])
+        os.makedirs(derivatives)
+
+        assert authenticated_client.delete(f"/api/posts/{first['id']}").status_code == 200
+        assert os.listdir(upload_dir) == [first["video_filename"]]
+        assert os.path.isdir(derivatives)
+        assert test_db.query(VideoBlob).one().ref_count == 1
+        assert authenticated_client.get(f"/api/stream/{second['id']}").content == content
+
+        assert authenticated_client.delete(f"/api/posts/{second['id']}").status_code == 200
+        assert os.listdir(upload_dir) == []
+        assert not os.path.exists(derivatives)
+        assert test_db.query(VideoBlob).count() == 0
+
+    def test_delete_user_keeps_shared_file(self, admin_client, test_user, auth_token, upload_dir, content, test_db):
+        admin_token = admin_client.cookies.get("access_token")
+        admin_post = upload_post(admin_client, content).json()
+        admin_client.cookies.set("access_token", auth_token)
+        upload_post(admin_client, content)
+        upload_post(admin_client, content)
+        admin_client.cookies.set("access_token", admin_token)
+
+        assert admin_client.delete(f"/api/admin/users/{test_user.id}").status_code == 200
+
+        assert os.listdir(upload_dir) == [admin_post["video_filename"]]
+        assert test_db.query(VideoBlob).one().ref_count == 1
+
+    def test_legacy_file_without_blob_row(self, authenticated_client, test_post, upload_dir):
+        assert authenticated_client.delete(f"/api/posts/{test_post.id}").status_code == 200
+
+        assert os.listdir(upload_dir) == []
+
+    def test_failed_delete_keeps_file(self, authenticated_client, upload_dir, content, test_db, monkeypatch):
+        post = upload_post(authenticated_client, content).json()
+        with monkeypatch.context() as m, pytest.raises(OperationalError):
+            m.setattr(Session, "commit", fail_commit)
+            authenticated_client.delete(f"/api/posts/{post['id']}")
+
+        assert os.listdir(upload_dir) == [post["video_filename"]]
+        assert authenticated_client.get(f"/api/stream/{post['id']}").content == content
+
+    def test_failed_user_delete_keeps_files(self, admin_client, test_user, auth_token, upload_dir, content,
+                                           test_db, monkeypatch):
+        admin_token = admin_client.cookies.get("access_token")
+        admin_client.cookies.set("access_token", auth_token)
+        post = upload_post(admin_client, content).json()
+        admin_client.cookies.set("access_token", admin_token)
+        with monkeypatch.context() as m, pytest.raises(OperationalError):
+            m.setattr(Session, "commit", fail_commit)
+            admin_client.delete(f"/api/admin/users/{test_user.id}")
+
+        assert os.listdir(upload_dir) == [post["video_filename"]]
+        assert test_db.query(VideoBlob).one().ref_count == 1
+
+    def test_delete_user_removes_unshared_files(self, admin_client, test_user, auth_token, upload_dir, content, test_db):
+        admin_token = admin_client.cookies.get("access_token")
+        admin_client.cookies.set("access_token", auth_token)
+        upload_post(admin_client, content)
+        upload_post(admin_client, content, filename="copy.mov")
+        admin_client.cookies.set("access_token", admin_token)
+
+        assert admin_client.delete(f"/api/admin/users/{test_user.id}").status_code == 200
+
+        assert os.listdir(upload_dir) == []
+        assert test_db.query(VideoBlob).count() == 0
+
+    def test_reupload_before_discard_keeps_file(self, test_db, upload_dir, content):
+        filename = blob_filename(sha256(content), "clip.mp4")
+        (upload_dir / filename).write_bytes(content)
+        test_db.add(VideoBlob(filename=filename, sha256=sha256(content), size=len(content), ref_count=1))
+        test_db.commit()
+        assert release_video(test_db, filename) is True
+        test_db.commit()
+        # Same content uploaded again between the delete commit and the file removal
+        temp = upload_dir / ".upload-again.mp4"
+        temp.write_bytes(content)
+        stored = store_video(test_db, str(temp), filename, sha256(content), False)
+        test_db.commit()
+
+        discard_unreferenced_video(test_db, filename)
+
+        assert stored.filename == filename
+        assert os.listdir(upload_dir) == [filename]
+
+
+class TestSharedRenditions:
+    """Renditions for duplicate uploads tests"""
+
+    def test_copied_from_post_with_same_file(self, test_db, test_post, test_user):
+        spec = RenditionSpec("360p", 640, 360, 800_000)
+        save_renditions(test_db, test_post.id, [(spec, "360p.mp4", 3000)])
+        duplicate = Post(
+            title="Duplicate", video_filename=test_post.video_filename, video_original_name="dup.mp4",
+            video_size=test_post.video_size, author_id=test_user.id
+        )
+        test_db.add(duplicate)
+        test_db.commit()
+
+        assert share_renditions(test_db, duplicate.id, duplicate.video_filename) is True
+
+        rows = test_db.query(PostRendition).filter(PostRendition.post_id == duplicate.id).all()
+        assert [(row.name, row.filename, row.size) for row in rows] == [("360p", "360p.mp4", 3000)]
+
+    def test_nothing_to_share(self, test_db, test_post):
+        assert share_renditions(test_db, test_post.id, test_post.video_filename) is False
+
+
+class TestStorageReport:
+    """GET /api/admin/storage tests"""
+
+    def test_bytes_saved(self, admin_client, upload_dir, test_db):
+        shared = os.urandom(5000)
+        for content in (shared, shared, shared, os.urandom(1000)):
+            upload_post(admin_client, content)
+
+        report = admin_client.get("/api/admin/storage").json()
+
+        assert report["posts"] == 4
+        assert report["blobs"] == 2
+        assert report["shared_blobs"] == 1
+        assert report["logical_bytes"] == 16000
+        assert report["saved_bytes"] == 10000
+        assert report["stored_bytes"] == 6000
+        assert report["shared"] == [{
+            "filename": f"{sha256(shared)}.mp4",
+            "sha256": sha256(shared),
+            "size": 5000,
+            "ref_count": 3,
+            "saved_bytes": 10000,
+        }]
+
+    def test_counts_legacy_files_as_stored(self, admin_client, test_post):
+        report = admin_client.get("/api/admin/storage").json()
+
+        assert report["stored_bytes"] == report["logical_bytes"] == test_post.video_size
+        assert report["saved_bytes"] == 0
+
+    def test_invalid_limit(self, admin_client):
+        assert admin_client.get("/api/admin/storage?limit=0").status_code == 400
+
+    def test_requires_admin(self, authenticated_client):
+        assert authenticated_client.get("/api/admin/storage").status_code == 403
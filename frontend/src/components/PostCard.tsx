@@ -13,17 +13,27 @@ export default function PostCard({ post }: PostCardProps) {
   const videoRef = useRef<HTMLVideoElement>(null);
   const [thumbnailLoaded, setThumbnailLoaded] = useState(false);
   const [isHovering, setIsHovering] = useState(false);
+  // Video bytes are only requested once the card is hovered
+  const [previewRequested, setPreviewRequested] = useState(false);
 
   const handleClick = () => {
     router.push(`/board/${post.id}`);
   };
 
+  const handleThumbnailLoad = () => {
+    setThumbnailLoaded(true);
+  };
+
   const handleLoadedData = () => {
     setThumbnailLoaded(true);
+    if (videoRef.current && isHovering) {
+      videoRef.current.play().catch(() => {});
+    }
   };
 
   const handleMouseEnter = () => {
     setIsHovering(true);
+    setPreviewRequested(true);
     if (videoRef.current) {
       videoRef.current.play().catch(() => {});
     }
@@ -60,17 +70,28 @@ export default function PostCard({ post }: PostCardProps) {
     >
       {/* Video Thumbnail */}
       <div className="aspect-video bg-gradient-to-br from-gray-200 to-gray-300 relative overflow-hidden">
-        {/* Video element for thumbnail */}
-        <video
-          ref={videoRef}
-          src={`/api/stream/${post.id}`}
-          className="w-full h-full object-cover"
-          preload="metadata"
-          muted
-          playsInline
-          onLoadedData={handleLoadedData}
+        {/* Poster thumbnail (a few KB, generated after upload) */}
+        <img
+          src={`/api/posts/${post.id}/thumbnail?size=320`}
+          alt=""
+          loading="lazy"
+          className="absolute inset-0 w-full h-full object-cover"
+          onLoad={handleThumbnailLoad}
         />
 
+        {/* Hover preview video */}
+        {previewRequested && (
+          <video
+            ref={videoRef}
+            src={`/api/stream/${post.id}`}
+            className={`absolute inset-0 w-full h-full object-cover ${isHovering ? '' : 'invisible'}`}
+            preload="metadata"
+            muted
+            playsInline
+            onLoadedData={handleLoadedData}
+          />
+        )}
+
         {/* Loading placeholder */}
         {!thumbnailLoaded && (
           <div className="absolute inset-0 flex items-center justify-center bg-gradient-to-br from-gray-200 to-gray-300">